@@ -10,3 +10,17 @@ from .tournamentSelector import *
 from .guildSettings import *
 from .exceptions import *
 from .pairingQueue import *
+from .pairingsAnnouncer import *
+from .replayArchive import *
+from .queueActivityLog import *
+from .metrics import *
+from .commandProfiler import *
+from .blocking import *
+from .pagedMessage import *
+from .standings import *
+from .messageScheduler import *
+from .swissTournament import *
+from .eliminationBracket import *
+from .podSeating import *
+from .sharding import *
+from .decklistMessage import *
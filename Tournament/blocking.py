@@ -0,0 +1,227 @@
+""" This module keeps blocking work off of the event loop and watches the event loop for stalls """
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Tuple
+
+from .metrics import counter, gauge, histogram, registerMetric, LATENCY_BUCKETS
+
+
+# How many threads each category of blocking work gets. Saves are small and
+# ordered per file, HTTP calls mostly wait on the network, and hashing holds
+# the GIL, so there is no point in giving it many threads.
+BLOCKING_POOL_SIZES = { "disk": 4, "http": 16, "hashing": 2 }
+
+blockingQueueDepth = registerMetric( gauge( "squirebot_blocking_queue_depth", "Blocking calls waiting for a thread, by category", ("category",) ) )
+blockingWaitTime = registerMetric( histogram( "squirebot_blocking_wait_seconds", "Time blocking calls waited for a thread, by category", LATENCY_BUCKETS, ("category",) ) )
+blockingRunTime = registerMetric( histogram( "squirebot_blocking_run_seconds", "Time blocking calls took to run, by category", LATENCY_BUCKETS, ("category",) ) )
+savesWritten = registerMetric( counter( "squirebot_saves_written_total", "Files written by saves" ) )
+savedBytes = registerMetric( counter( "squirebot_saved_bytes_total", "Bytes written by saves" ) )
+loopStallTime = registerMetric( histogram( "squirebot_event_loop_stall_seconds", "How long the event loop was stalled, by the call site that stalled it", LATENCY_BUCKETS, ("site",) ) )
+
+
+class blockingPool( ThreadPoolExecutor ):
+    """ A thread pool for one category of blocking work that keeps track of its queue """
+    def __init__( self, category: str, size: int ):
+        super().__init__( max_workers=size, thread_name_prefix=f'squirebot-{category}' )
+        self.category = category
+
+    def submit( self, fn, *args, **kwargs ) -> Future:
+        blockingQueueDepth.inc( self.category )
+        return super().submit( self._track, time.perf_counter(), partial( fn, *args, **kwargs ) )
+
+    def _track( self, queuedAt: float, call ):
+        start = time.perf_counter( )
+        blockingQueueDepth.dec( self.category )
+        blockingWaitTime.observe( start - queuedAt, self.category )
+        try:
+            return call( )
+        finally:
+            blockingRunTime.observe( time.perf_counter() - start, self.category )
+
+
+blockingPools: Dict[str, blockingPool] = { }
+blockingPoolsLock = threading.Lock( )
+
+def getBlockingPool( category: str ) -> blockingPool:
+    pool = blockingPools.get( category )
+    if pool is None:
+        with blockingPoolsLock:
+            if not category in blockingPools:
+                blockingPools[category] = blockingPool( category, BLOCKING_POOL_SIZES[category] )
+            pool = blockingPools[category]
+    return pool
+
+# Runs a blocking function on its category's thread pool and waits for it without blocking the event loop
+async def runBlocking( category: str, func, *args, **kwargs ):
+    return await asyncio.get_running_loop().run_in_executor( getBlockingPool( category ), partial( func, *args, **kwargs ) )
+
+
+# ---------------- File Saves ----------------
+
+# Saves made from the event loop are written by the disk pool. Only the newest
+# content of a file is written if it is saved again before the write starts.
+# Each file has at most one writer at a time, which keeps its writes in order.
+# A file is only tracked while it has a write waiting or running, or until a
+# failed write has been waited for.
+pendingSaves: Dict[str, str] = { }
+pendingSavesLock = threading.Lock( )
+saveWrites: Dict[str, Future] = { }
+
+# Writes a file's pending content until there's none left
+def _writeSaves( filename: str, writing: Future ) -> None:
+    try:
+        while True:
+            with pendingSavesLock:
+                content = pendingSaves.pop( filename, None )
+                if content is None:
+                    del saveWrites[filename]
+                    break
+            with open( filename, "w+" ) as savefile:
+                savefile.write( content )
+            savesWritten.inc( )
+            savedBytes.inc( amount=len(content.encode()) )
+    except Exception as ex:
+        with pendingSavesLock:
+            pendingSaves.pop( filename, None )
+        print( f'Error while saving {filename}' )
+        traceback.print_exception( type(ex), ex, ex.__traceback__ )
+        writing.set_exception( ex )
+        return
+    writing.set_result( None )
+
+def saveFile( filename: str, content: str ) -> None:
+    filename = os.path.normpath( filename )
+    with pendingSavesLock:
+        pendingSaves[filename] = content
+        writing = saveWrites.get( filename )
+        isWriter = writing is None or writing.done()
+        if isWriter:
+            writing = saveWrites[filename] = Future( )
+    try:
+        asyncio.get_running_loop( )
+    except RuntimeError:
+        # Not on the event loop, so there's nothing to hold up
+        if isWriter:
+            _writeSaves( filename, writing )
+        _waitForWrites( [ filename ] )
+        return
+    if isWriter:
+        getBlockingPool( "disk" ).submit( _writeSaves, filename, writing )
+
+# Waits for the writes of the given files, and raises the first error that any of them had
+def _waitForWrites( filenames: List[str] ) -> None:
+    error = None
+    for filename in filenames:
+        with pendingSavesLock:
+            writing = saveWrites.get( filename )
+        if writing is None:
+            continue
+        try:
+            writing.result( )
+        except Exception as ex:
+            if error is None:
+                error = ex
+            with pendingSavesLock:
+                if saveWrites.get( filename ) is writing:
+                    del saveWrites[filename]
+    if not error is None:
+        raise error
+
+# Makes sure a file's latest save has been written, e.g. before it is read
+def waitForSave( filename: str ) -> None:
+    _waitForWrites( [ os.path.normpath( filename ) ] )
+
+# Makes sure every save in the given directories has been written, e.g. before
+# a tournament's files are moved. With no directories, every save is waited for.
+# This blocks, so the event loop should wait for it with runBlocking.
+def waitForSaves( *directories: str ) -> None:
+    prefixes = tuple( os.path.normpath( directory ) + os.sep for directory in directories )
+    with pendingSavesLock:
+        filenames = [ filename for filename in saveWrites if len(prefixes) == 0 or filename.startswith( prefixes ) ]
+    _waitForWrites( filenames )
+
+
+# ---------------- Stall Watchdog ----------------
+
+projectDir = os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) )
+
+# The innermost frame in this project's code, which is usually the call that is blocking
+def findCallSite( frame ) -> str:
+    digest = None
+    while not frame is None:
+        filename = frame.f_code.co_filename
+        if filename.startswith( projectDir ) and filename != __file__:
+            digest = f'{os.path.relpath( filename, projectDir )}:{frame.f_lineno} in {frame.f_code.co_name}'
+            break
+        frame = frame.f_back
+    return "unknown" if digest is None else digest
+
+
+class loopWatchdog:
+    """ Watches the event loop from a separate thread.
+        The loop keeps a heartbeat going. When the heartbeat is late by more
+        than the threshold, the loop's stack is sampled to find the call site
+        that is blocking it. Once the loop recovers, the stall is recorded.
+    """
+    def __init__( self, threshold: float = 0.1, interval: float = 0.05, historySize: int = 100 ):
+        self.threshold = threshold
+        self.interval = interval
+        self.lastBeat = time.perf_counter( )
+        self.loopThreadID = None
+        # The most recent stalls, as (when, duration, call site, stack)
+        self.stalls = deque( maxlen=historySize )
+        self.started = False
+
+    # Must be called from the event loop's thread
+    def start( self, loop: asyncio.AbstractEventLoop = None ) -> None:
+        if self.started:
+            return
+        self.started = True
+        self.loopThreadID = threading.get_ident( )
+        if loop is None:
+            loop = asyncio.get_event_loop( )
+        self.lastBeat = time.perf_counter( )
+        self.heartbeat = loop.create_task( self._beat( ) )
+        threading.Thread( target=self._watch, daemon=True ).start( )
+
+    async def _beat( self ) -> None:
+        while True:
+            self.lastBeat = time.perf_counter( )
+            await asyncio.sleep( self.interval )
+
+    def _watch( self ) -> None:
+        stalledBeat, site, stack = None, None, None
+        while True:
+            time.sleep( self.interval )
+            lastBeat = self.lastBeat
+            if not stalledBeat is None and lastBeat != stalledBeat:
+                # The loop is running again
+                duration = lastBeat - stalledBeat - self.interval
+                loopStallTime.observe( duration, site )
+                self.stalls.append( ( time.time(), duration, site, stack ) )
+                stalledBeat = None
+            if stalledBeat is None and time.perf_counter() - lastBeat > self.interval + self.threshold:
+                frame = sys._current_frames().get( self.loopThreadID )
+                if frame is None:
+                    continue
+                stalledBeat = lastBeat
+                site = findCallSite( frame )
+                stack = traceback.format_stack( frame )
+
+    # Returns the total stall time, number of stalls, and longest stall for each call site, worst first
+    def stallsBySite( self ) -> List[Tuple[str, float, int, float]]:
+        digest: Dict[str, List] = { }
+        for when, duration, site, stack in list( self.stalls ):
+            total = digest.setdefault( site, [ 0.0, 0, 0.0 ] )
+            total[0] += duration
+            total[1] += 1
+            total[2] = max( total[2], duration )
+        return sorted( [ ( site, *total ) for site, total in digest.items() ], key=lambda x: x[1], reverse=True )
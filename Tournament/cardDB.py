@@ -4,14 +4,17 @@ import json
 import tempfile
 import zipfile
 import os.path
-from typing import List
+import mmap
+import fcntl
+import struct
+from typing import List, Tuple
 
 # Helps with memory being consumed
 import gc
 import ctypes
 
 from time import time, sleep
-from threading import Thread
+from threading import Event, Lock, Thread
 
 from .exceptions import *
 
@@ -37,14 +40,21 @@ class card:
 class cardsDBLoadingError ( Exception ):
     pass
 
+NORMALISE_REGEX = re.compile(",|\.|-|'")
+SPACES_REGEX = re.compile(" +")
+
+# Makes two strings easier to compare by removing excess whitespace,
+# commas, hyphens, apostrophes and full stops.
+def normaliseCardName(string: str) -> str:
+    return re.sub(SPACES_REGEX, " ", re.sub(NORMALISE_REGEX, "", string)).split("//")[0].lower().strip().replace("û", "u")
+    # heck Lim-Dûl's Vault, it is the bane of my existence
+
 class cardDB:
     def __init__(self, updateTime: int = 24*60*60, mtgjsonURL: str = "https://www.mtgjson.com/api/v5/AllPrintings.json.zip"):
         self.lastUpdate = 0
         self.updateTime = updateTime
         self.cards = dict( )
         self.url = mtgjsonURL
-        self.normaliseRegex = re.compile(",|\.|-|'")
-        self.spacesRegex = re.compile(" +")
         self.cacheName = "AllPrintings.json"
 
         if self.isCacheIsUpToDate():
@@ -64,11 +74,8 @@ class cardDB:
         if len(self.cards) == 0:
             raise cardsDBLoadingError("Error loading CardsDB")
 
-    # Makes two strings easier to compare by removing excess whitespace,
-    # commas, hyphens, apostrophes and full stops.
     def normaliseCardName(self, string: str):
-        return re.sub(self.spacesRegex, " ", re.sub(self.normaliseRegex, "", string)).split("//")[0].lower().strip().replace("û", "u")
-        # heck Lim-Dûl's Vault, it is the bane of my existence
+        return normaliseCardName(string)
 
     def needsUpdate(self) -> bool:
         return int(time()) - self.lastUpdate > self.updateTime
@@ -168,18 +175,173 @@ def getFileLastModified(file_name: str) -> int:
         mtime = 0
     return mtime
 
-def updateDB(db):
-    while True:
-        sleep(db.updateTime)
-        while db.needsUpdate():
-            db.updateCards()
 
-def initCardDB():
-    print("Creating card database...")
+# ---------------- Shared Card Table ----------------
+# The bot's processes (e.g. its shards) share one copy of the card database. A single process, the updater, writes
+# the cards into a table file sorted by their normalised names. The other processes map the table into memory
+# read-only, so attaching to it costs next to nothing and its pages are shared between them. When the updater
+# refreshes the cards, it replaces the file, and the others map the new file the next time they check for it.
+
+TABLE_MAGIC = b"SQCARDS1"
+TABLE_HEADER = struct.Struct("<8sI")
+TABLE_OFFSET = struct.Struct("<I")
+# How often processes that are attached to the table check whether it has been replaced, in seconds
+TABLE_CHECK_INTERVAL = 60
+
+def writeCardTable(cards: dict, path: str) -> None:
+    """ Writes the cards (by normalised name) to a table file. The file is swapped in whole, so a half written table is never seen. """
+    records = sorted( ( name.encode(), c.getName().encode(), "\x1f".join(c.getTypes()).encode() ) for name, c in cards.items() )
+    body = [ ]
+    offsets = [ ]
+    offset = TABLE_HEADER.size + TABLE_OFFSET.size * len(records)
+    for name, cardName, types in records:
+        offsets.append( offset )
+        body.append( name + b"\0" + cardName + b"\0" + types + b"\0" )
+        offset += len(body[-1])
+
+    tmpPath = f'{path}.{os.getpid()}.tmp'
+    with open(tmpPath, "wb") as f:
+        f.write( TABLE_HEADER.pack(TABLE_MAGIC, len(records)) )
+        f.write( b"".join( TABLE_OFFSET.pack(offset) for offset in offsets ) )
+        f.write( b"".join(body) )
+    os.replace(tmpPath, path)
+
+def buildCardTable(path: str) -> None:
+    """ Loads the cards from MTGJSON (or its cache) and writes them to the table """
     db = cardDB()
-    print(f"Created card database with {len(db.cards)} cards.")
+    writeCardTable(db.cards, path)
+    del db
+    gc.collect()
+
+def isTableUpToDate(path: str, updateTime: int) -> bool:
+    return int(time()) - getFileLastModified(path) < updateTime
+
+def claimUpdater(lockPath: str):
+    """ Returns the lock file if this process is now the card table's updater, and None if another process already is """
+    lockFile = open(lockPath, "a")
+    try:
+        fcntl.flock(lockFile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lockFile.close()
+        return None
+    return lockFile
+
+
+class sharedCardDB:
+    """ A read-only view of a card table file, with the same lookups as cardDB """
+    def __init__(self, path: str, checkInterval: int = TABLE_CHECK_INTERVAL):
+        self.path = path
+        self.checkInterval = checkInterval
+        self.table = None
+        self.tableID = None
+        self.count = 0
+        self.lastCheck = 0
+        self.attach()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def attach(self) -> None:
+        with open(self.path, "rb") as f:
+            table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            info = os.fstat(f.fileno())
+        magic, count = TABLE_HEADER.unpack_from(table, 0)
+        if magic != TABLE_MAGIC:
+            table.close()
+            raise cardsDBLoadingError(f'{self.path} is not a card table')
+        # The old table is left for the garbage collector, since cards that were just looked up might still point into it
+        self.table, self.count = table, count
+        self.tableID = ( info.st_dev, info.st_ino )
+        self.lastCheck = time()
+
+    def wasReplaced(self) -> bool:
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return False
+        return ( info.st_dev, info.st_ino ) != self.tableID
 
-    cardUpdateThread = Thread(target = updateDB, args = (db,))
-    cardUpdateThread.start()
+    def normaliseCardName(self, string: str):
+        return normaliseCardName(string)
+
+    def _field(self, offset: int) -> Tuple[bytes, int]:
+        end = self.table.find(b"\0", offset)
+        return self.table[offset:end], end + 1
+
+    def getCard(self, cardName: str) -> card:
+        if time() - self.lastCheck > self.checkInterval:
+            self.lastCheck = time()
+            if self.wasReplaced():
+                self.attach()
+
+        key = normaliseCardName(cardName).encode()
+        table = self.table
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            offset = TABLE_OFFSET.unpack_from(table, TABLE_HEADER.size + TABLE_OFFSET.size * mid)[0]
+            name, offset = self._field(offset)
+            if name < key:
+                low = mid + 1
+            elif name > key:
+                high = mid
+            else:
+                cardName_, offset = self._field(offset)
+                types, _ = self._field(offset)
+                return card(cardName_.decode(), "normal", types.decode().split("\x1f") if types else [ ])
+        raise CardNotFoundError( f'{cardName} could not be found in the card database.' )
+
+
+def updateTable(path: str, updateTime: int, updaterLock) -> None:
+    try:
+        while not cardUpdatesStopped.wait(updateTime):
+            while not isTableUpToDate(path, updateTime) and not cardUpdatesStopped.is_set():
+                buildCardTable(path)
+    finally:
+        # Lets another process take over as the updater
+        updaterLock.close()
+
+def initCardDB(tablePath: str = "cardTable.bin", updateTime: int = 24*60*60):
+    global cardUpdateThread
+    print("Creating card database...")
+    # Whichever process gets the lock first is the updater, and the others wait for its table
+    updaterLock = claimUpdater(tablePath + ".lock")
+    while updaterLock is None and not os.path.exists(tablePath):
+        sleep(1)
+        # If the updater stopped before writing the table, this process takes over
+        updaterLock = claimUpdater(tablePath + ".lock")
+
+    if not updaterLock is None:
+        if not isTableUpToDate(tablePath, updateTime):
+            buildCardTable(tablePath)
+        cardUpdatesStopped.clear()
+        cardUpdateThread = Thread(target = updateTable, args = (tablePath, updateTime, updaterLock), name = "cardTableUpdater", daemon = True)
+        cardUpdateThread.start()
+
+    db = sharedCardDB(tablePath)
+    print(f"Created card database with {len(db)} cards.")
 
     return db
+
+
+# ---------------- The Card Database ----------------
+# Nothing is loaded when this module is imported. The database is created the first time a card is looked up, or when
+# the bot starts, which calls getCardDB itself.
+
+cardsDB: sharedCardDB = None
+cardsDBLock = Lock()
+cardUpdateThread: Thread = None
+cardUpdatesStopped = Event()
+
+def getCardDB() -> sharedCardDB:
+    global cardsDB
+    with cardsDBLock:
+        if cardsDB is None:
+            cardsDB = initCardDB()
+    return cardsDB
+
+def stopCardDB() -> None:
+    """ Stops refreshing the card table, if this process is the updater. A refresh that has started is finished first. """
+    cardUpdatesStopped.set()
+    if not cardUpdateThread is None:
+        cardUpdateThread.join()
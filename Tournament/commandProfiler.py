@@ -0,0 +1,170 @@
+""" This module contains the profiler that times each bot command, watches for event loop lag, and logs slow commands """
+import sys
+import time
+import types
+import asyncio
+import threading
+import traceback
+
+from typing import List, Tuple
+
+from .utils import getTime
+from .metrics import histogram, registerMetric, LATENCY_BUCKETS
+
+
+COMMAND_BUCKETS = ( 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60 )
+
+commandWallTime = registerMetric( histogram( "squirebot_command_seconds", "Wall time taken by each command", COMMAND_BUCKETS, ("command",) ) )
+commandLoopTime = registerMetric( histogram( "squirebot_command_loop_seconds", "Time each command spent running on the event loop, during which nothing else can run", COMMAND_BUCKETS, ("command",) ) )
+eventLoopLag = registerMetric( histogram( "squirebot_event_loop_lag_seconds", "How late the event loop was in waking up a sleeping task", LATENCY_BUCKETS ) )
+
+
+# Walks down the chain of awaits of a suspended coroutine to find where it is waiting
+def awaitStack( coro ) -> List[str]:
+    digest = [ ]
+    while not coro is None:
+        frame = getattr( coro, "cr_frame", None ) or getattr( coro, "gi_frame", None )
+        if frame is None:
+            break
+        digest.append( f'  File "{frame.f_code.co_filename}", line {frame.f_lineno}, in {frame.f_code.co_name}\n' )
+        coro = getattr( coro, "cr_await", None ) or getattr( coro, "gi_yieldfrom", None )
+    return digest
+
+
+class commandProfile:
+    """ The timings of a single run of a command """
+    __slots__ = ( "name", "start", "stepStart", "loopTime", "longestStep", "longestWait", "loopStack", "waitStack" )
+
+    def __init__( self, name: str ):
+        self.name = name
+        self.start = time.perf_counter( )
+        self.stepStart = self.start
+        # Time spent running on the event loop (blocking it) versus waiting on I/O, threads, etc.
+        self.loopTime = 0.0
+        self.longestStep = 0.0
+        self.longestWait = 0.0
+        # Where the command was when it held the event loop the longest and when it waited the longest
+        self.loopStack: List[str] = None
+        self.waitStack: List[str] = None
+
+
+class commandProfiler:
+    """ Times commands by stepping through their coroutines.
+        A command "runs" on the event loop between awaits, and everything else
+        waits on it during that time. The rest of its wall time is spent waiting.
+        A sampler thread grabs the event loop's stack when a step runs long, so
+        slow commands can be logged with where they were blocking.
+    """
+    def __init__( self, logFile: str = "squireBotSlowCommands.log", threshold: float = 1.0, sampleInterval: float = 0.05, lagInterval: float = 0.5 ):
+        self.logFile = logFile
+        self.threshold = threshold
+        self.sampleInterval = sampleInterval
+        self.lagInterval = lagInterval
+        self.startTime = time.time( )
+        self.loopThreadID = None
+        self.activeStep: commandProfile = None
+        self.maxLag = 0.0
+        self.started = False
+
+    # Must be called from the event loop's thread
+    def start( self, loop: asyncio.AbstractEventLoop = None ) -> None:
+        if self.started:
+            return
+        self.started = True
+        self.loopThreadID = threading.get_ident( )
+        if loop is None:
+            loop = asyncio.get_event_loop( )
+        self.lagMonitor = loop.create_task( self.monitorLoopLag( ) )
+        threading.Thread( target=self._sampleSteps, daemon=True ).start( )
+
+    async def profile( self, name: str, coro ):
+        profile = commandProfile( name )
+        try:
+            return await self._drive( coro, profile )
+        finally:
+            self._finish( profile )
+
+    @types.coroutine
+    def _drive( self, coro, profile: commandProfile ):
+        sendValue, throwValue = None, None
+        while True:
+            self.activeStep = profile
+            profile.stepStart = time.perf_counter( )
+            try:
+                if throwValue is None:
+                    yielded = coro.send( sendValue )
+                else:
+                    yielded = coro.throw( throwValue )
+            except StopIteration as ex:
+                return ex.value
+            finally:
+                self.activeStep = None
+                step = time.perf_counter() - profile.stepStart
+                profile.loopTime += step
+                profile.longestStep = max( profile.longestStep, step )
+            waitStart = time.perf_counter( )
+            try:
+                sendValue, throwValue = (yield yielded), None
+            except GeneratorExit:
+                coro.close( )
+                raise
+            except BaseException as ex:
+                sendValue, throwValue = None, ex
+            wait = time.perf_counter() - waitStart
+            if wait > profile.longestWait:
+                # The command hasn't been resumed yet, so it is still where it was waiting
+                profile.longestWait = wait
+                profile.waitStack = awaitStack( coro )
+
+    def _finish( self, profile: commandProfile ) -> None:
+        wallTime = time.perf_counter() - profile.start
+        commandWallTime.observe( wallTime, profile.name )
+        commandLoopTime.observe( profile.loopTime, profile.name )
+        if wallTime >= self.threshold:
+            self.logSlowCommand( profile, wallTime )
+
+    def _sampleSteps( self ) -> None:
+        while True:
+            time.sleep( self.sampleInterval )
+            profile = self.activeStep
+            if profile is None or not profile.loopStack is None:
+                continue
+            stepStart = profile.stepStart
+            if time.perf_counter() - stepStart < self.sampleInterval:
+                continue
+            frame = sys._current_frames().get( self.loopThreadID )
+            # Only keep the sample if the same step was still running
+            if not frame is None and self.activeStep is profile and profile.stepStart == stepStart:
+                profile.loopStack = traceback.format_stack( frame )
+
+    async def monitorLoopLag( self ) -> None:
+        while True:
+            start = time.perf_counter( )
+            await asyncio.sleep( self.lagInterval )
+            lag = max( 0.0, time.perf_counter() - start - self.lagInterval )
+            eventLoopLag.observe( lag )
+            self.maxLag = max( self.maxLag, lag )
+            if lag >= self.threshold:
+                self._writeLog( f'{getTime()}: The event loop was blocked for {lag:.2f}s.\n' )
+
+    def logSlowCommand( self, profile: commandProfile, wallTime: float ) -> None:
+        message  = f'{getTime()}: The command {profile.name!r} took {wallTime:.2f}s. '
+        message += f'It ran on the event loop for {profile.loopTime:.2f}s (longest stretch {profile.longestStep:.2f}s) and waited for {wallTime - profile.loopTime:.2f}s (longest wait {profile.longestWait:.2f}s).\n'
+        if not profile.loopStack is None:
+            message += "Stack sample while blocking the event loop:\n" + "".join( profile.loopStack )
+        if not profile.waitStack is None:
+            message += "Where it waited the longest:\n" + "".join( profile.waitStack )
+        self._writeLog( message )
+
+    def _writeLog( self, message: str ) -> None:
+        with open( self.logFile, "a" ) as logFile:
+            logFile.write( message + "\n" )
+
+    # Returns the name, count, p50, p95, and p99 wall times, and the p95 event loop time of each command, slowest first
+    def report( self ) -> List[Tuple]:
+        digest = [ ]
+        for labels in list( commandWallTime.values ):
+            digest.append( ( labels[0], commandWallTime.count( *labels ), commandWallTime.quantile( 0.5, *labels ), commandWallTime.quantile( 0.95, *labels ),
+                             commandWallTime.quantile( 0.99, *labels ), commandLoopTime.quantile( 0.95, *labels ) ) )
+        digest.sort( key=lambda x: x[3], reverse=True )
+        return digest
@@ -21,14 +21,12 @@ import json
 import re
 import requests
 import traceback
-from typing import List
+from typing import List, Tuple
 
 from .utils import *
 from .exceptions import *
 from .cardDB import *
 
-cardsDB = initCardDB()
-
 # Constant compiled regexes
 anchorRegex = "((#[a-zA-Z0-9_-]+)?(\?([a-zA-Z0-9_-]+=[+a-zA-Z0-9_-]+)(&([a-zA-Z0-9_-]+=[+a-zA-Z0-9_-]+))*)?)?"
 
@@ -61,10 +59,11 @@ class deck:
     def __init__ ( self, ident: str = "", decklist: str = "" ):
         self.deckHash  = 0
         self.ident = ident
-        # TODO: The cards list should probably be a list of card objects from the card DB module
-        # This would save a decent work of time when constructing the deck embed
         self.cards = [ ]
         self.decklist = ""
+        # The deck's embed fields and the hash of the version of the deck they were made for
+        self.embedFields = None
+        self.embedFieldsHash = None
 
         # Check input type
         if isValidCodFile(decklist):
@@ -248,7 +247,7 @@ class deck:
                     
                     name = card[0]
                     try:
-                        name   = cardsDB.getCard(name).getName().strip().lower()                        
+                        name   = getCardDB().getCard(name).getName().strip().lower()                        
                     except CardNotFoundError as ex:
                         pass
                 else:
@@ -256,7 +255,7 @@ class deck:
                     
                     name = card[1]
                     try:
-                        name   = cardsDB.getCard(name).getName().strip().lower()                                        
+                        name   = getCardDB().getCard(name).getName().strip().lower()                                        
                     except CardNotFoundError as ex:
                         pass
                 for i in range(number):
@@ -266,7 +265,7 @@ class deck:
                 number = int( card[1].strip() )
                 name = card[2]
                 try:
-                    name   = card[0] + cardsDB.getCard(name).getName().strip().lower()
+                    name   = card[0] + getCardDB().getCard(name).getName().strip().lower()
                 except CardNotFoundError as ex:
                     pass
                 for i in range(number):
@@ -314,4 +313,44 @@ class deck:
         return [ line for line in self.decklist.strip().split("\n") \
                     if line.strip() != "" and line[0:2] != "//" ]
 
+    def getEmbedFields( self ) -> List[Tuple[str, str]]:
+        """
+        The name and value of each field in the deck's embed. The cards are
+        grouped by their primary type, with the biggest groups first and the
+        sideboard last. Grouping looks up every card, so it is only done once
+        for each version of the deck, i.e. each deck hash.
+        """
+        if self.embedFieldsHash == self.deckHash:
+            return self.embedFields
 
+        fieldVals: dict = { "Sideboard": [] }
+        counts: dict = { "Sideboard": 0 }
+        for line in self.cards:
+            if line == "":
+                continue
+            isSideboard = "SB:" in line
+            if isSideboard:
+                line = line.partition( "SB:" )[-1].strip()
+                field = "Sideboard"
+            else:
+                try:
+                    field = getPrimaryType( getCardDB().getCard( line.partition( " " )[-1].strip() ).getTypes() )
+                except CardNotFoundError as ex:
+                    field = "Unknown"
+            if not field in fieldVals:
+                fieldVals[field] = []
+                counts[field] = 0
+            fieldVals[field].append( line )
+            counts[field] += int( line.partition( " " )[0] )
+
+        # The embed looks bad if the fields that form a row are vastly different lengths
+        # So, they are sorted (except for the sideboard)
+        fieldKeys: list = [ key for key in fieldVals if key != "Sideboard" ]
+        fieldKeys.sort( key = lambda x: len(fieldVals[x]), reverse=True )
+        # The Sideboard should always be displayed last
+        if len(fieldVals["Sideboard"]) > 0:
+            fieldKeys.append( "Sideboard" )
+
+        self.embedFields = [ ( f'{field} ({counts[field]}):', "\n".join(fieldVals[field]) ) for field in fieldKeys ]
+        self.embedFieldsHash = self.deckHash
+        return self.embedFields
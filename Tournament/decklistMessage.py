@@ -0,0 +1,33 @@
+""" This module contains the paged message that judges use to go through many decklists at once, e.g. for deck checks """
+from typing import List, Tuple
+
+import discord
+
+from .player import player
+from .pagedMessage import pagedMessage
+
+
+class decklistMessage( pagedMessage ):
+    """
+    A message with one decklist per page. Each page is built from the deck's
+    cached layout when it is turned to, so paging is quick even through
+    hundreds of lists, and a deck that has changed shows its new version.
+    """
+    def __init__( self, decks: List[Tuple[player, str]], content: str = "", page: int = 0 ):
+        super().__init__( content, page )
+        # The player and the name of the deck on each page
+        self.decks = decks
+
+    def pageCount( self ) -> int:
+        return max( 1, len(self.decks) )
+
+    def getPage( self, page: int ) -> discord.Embed:
+        if len(self.decks) == 0:
+            return discord.Embed( description="There are no decklists to show." )
+        plyr, deckName = self.decks[page]
+        if deckName in plyr.decks:
+            digest = plyr.buildDeckEmbed( deckName )
+        else:
+            digest = discord.Embed( title=f"**{plyr.name}'s Deck,** **{deckName}**", description="This deck has been removed." )
+        digest.set_footer( text=f'Decklist {page+1} of {self.pageCount()}' )
+        return digest
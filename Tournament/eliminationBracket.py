@@ -0,0 +1,139 @@
+""" This module contains the single-elimination bracket that tournaments use for their top cut """
+# Imports of standard libraries
+
+# Partial imports from standard libraries
+
+# Include typing help
+from typing import Dict, List, Tuple
+
+# External libraries
+
+# Local modules
+from .utils import *
+from .match import match
+
+
+def bracketOrder( size: int ) -> List[int]:
+    """ The seeds (starting at 1) in bracket order, so that the best seeds meet as late as possible, e.g. 1, 8, 4, 5, 2, 7, 3, 6 """
+    digest = [ 1 ]
+    while len(digest) < size:
+        digest = [ seed for s in digest for seed in ( s, 2*len(digest) + 1 - s ) ]
+    return digest
+
+def bracketSize( players: int ) -> int:
+    """ The smallest power of two that fits the players """
+    digest = 1
+    while digest < players:
+        digest *= 2
+    return digest
+
+
+class eliminationBracket:
+    """
+    A single-elimination bracket of two player matches. Each round is a list
+    of the players (by ID) in bracket order, and neighbouring players play
+    each other. When there are fewer players than spots, the empty spots are
+    byes for the best seeds. The winners of a round, in order, are the next round.
+    """
+    def __init__( self, seeds: List[int] = [ ] ):
+        """ Seeds are player IDs, best first """
+        # Each round's players in bracket order, where 0 is an empty spot
+        self.rounds: List[List[int]] = [ ]
+        # The match number of each pair in each round, where 0 means the pair doesn't have a match (yet)
+        self.matches: List[List[int]] = [ ]
+        if len(seeds) > 0:
+            self.rounds.append( [ seeds[s-1] if s <= len(seeds) else 0 for s in bracketOrder( bracketSize( len(seeds) ) ) ] )
+            self.matches.append( [ 0 for _ in range( len(self.rounds[0]) // 2 ) ] )
+
+    def size( self ) -> int:
+        """ The number of spots in the first round """
+        return len(self.rounds[0]) if len(self.rounds) > 0 else 0
+
+    def playerCount( self ) -> int:
+        """ The number of players that were seeded """
+        return len([ plyr for plyr in self.rounds[0] if plyr != 0 ]) if len(self.rounds) > 0 else 0
+
+    def roundNumber( self ) -> int:
+        return len(self.rounds)
+
+    def currentRound( self ) -> List[int]:
+        return self.rounds[-1]
+
+    def pairs( self ) -> List[Tuple[int, int]]:
+        """ The pairs of the current round """
+        plyrs = self.currentRound( )
+        return [ ( plyrs[i], plyrs[i+1] ) for i in range( 0, len(plyrs), 2 ) ]
+
+    def isFinished( self ) -> bool:
+        return len(self.rounds) > 0 and len(self.currentRound()) == 1
+
+    def champion( self ) -> int:
+        return self.currentRound()[0] if self.isFinished() else None
+
+    def hasMatch( self, matchNum: int ) -> bool:
+        """ Whether the match is one of the current round's """
+        return len(self.matches) > 0 and matchNum in self.matches[-1]
+
+    def unpairedPairs( self ) -> List[List[int]]:
+        """ The pairs of the current round that need a match, as pairings """
+        if self.isFinished( ):
+            return [ ]
+        return [ [ a, b ] for ( a, b ), num in zip( self.pairs(), self.matches[-1] ) if a != 0 and b != 0 and num == 0 ]
+
+    def recordMatches( self, matches: List[match] ) -> None:
+        """ Records the matches that were made for unpairedPairs, in the same order """
+        numbers = iter( mtch.matchNumber for mtch in matches )
+        for i, ( a, b ) in enumerate( self.pairs() ):
+            if a != 0 and b != 0 and self.matches[-1][i] == 0:
+                self.matches[-1][i] = next( numbers )
+
+    def winners( self, getMatch ) -> List[int]:
+        """
+        The players that advance from the current round, in order, or None if
+        the round isn't over. A certified draw counts as unfinished, since
+        someone needs to advance.
+        """
+        digest = [ ]
+        for ( a, b ), num in zip( self.pairs(), self.matches[-1] ):
+            if a == 0 or b == 0:
+                digest.append( a + b )
+                continue
+            if num == 0:
+                return None
+            mtch = getMatch( num )
+            if mtch is None or not mtch.isCertified() or mtch.winnerID is None:
+                return None
+            digest.append( mtch.winnerID )
+        return digest
+
+    def advance( self, getMatch ) -> bool:
+        """ Starts the next round if the current one is over, and returns whether it did """
+        if self.isFinished( ):
+            return False
+        plyrs = self.winners( getMatch )
+        if plyrs is None:
+            return False
+        self.rounds.append( plyrs )
+        self.matches.append( [ 0 for _ in range( len(plyrs) // 2 ) ] )
+        return True
+
+    def roundName( self ) -> str:
+        remaining = len(self.currentRound( ))
+        if remaining == 2:
+            return "the finals"
+        if remaining == 4:
+            return "the semifinals"
+        return f'the top {remaining}'
+
+    def exportToXML( self, indent: str ) -> str:
+        """ Exports the bracket to an XML for saving. """
+        digest = f'{indent}<bracket>\n'
+        for plyrs, nums in zip( self.rounds, self.matches ):
+            digest += f'{indent}\t<round players="{" ".join( str(p) for p in plyrs )}" matches="{" ".join( str(m) for m in nums )}"/>\n'
+        digest += f'{indent}</bracket>\n'
+        return digest
+
+    def loadFromXML( self, bracketRoot ) -> None:
+        for rnd in bracketRoot.findall( 'round' ):
+            self.rounds.append( [ internID( int(p) ) if p != "0" else 0 for p in fromXML( rnd.attrib['players'] ).split() ] )
+            self.matches.append( [ int(m) for m in fromXML( rnd.attrib['matches'] ).split() ] )
@@ -34,4 +34,6 @@ class CardNotFoundError( CardDatabaseBaseError ):
     """ The error raised when a card name is not found in the card database. """
     pass
 
-
+class ShardCallError( TournamentBaseError ):
+    """ The error raised when a call to another shard fails or its handler raises """
+    pass
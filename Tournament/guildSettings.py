@@ -20,6 +20,7 @@ from .deck import *
 from .tournament import *
 from .fluidRoundTournament import *
 from .tournamentSelector import *
+from .blocking import saveFile, waitForSave
 
 
 
@@ -44,6 +45,10 @@ class guildSettings:
 
         # Tournament Stuff
         self.tournaments : list = [ ]
+        # Indexes over the tournaments, which are kept up to date by
+        # _addTournament, _removeTournament, and the tournaments' player observers
+        self.tournamentsByName: Dict[str, tournament] = { }
+        self.playerTournaments: Dict[int, Dict[str, tournament]] = { }
         self.d_tournType : str = "Swiss"
         self.d_tournProps: dict = { }
         for prop in getTournamentProperties():
@@ -247,7 +252,7 @@ class guildSettings:
         digest = tourn.setProperties( props )
         await tourn.addDiscordGuild( self.guild )
         tourn.loop = self.eventLoop
-        self.tournaments.append( tourn )
+        self._addTournament( tourn )
         return digest
 
     # Cancels a tournament (given by name)
@@ -255,7 +260,7 @@ class guildSettings:
     async def endTournament( self, name: str, author: str ) -> str:
         tourn = self.getTournament( name )
         digest = await tourn.cancelTourn( self.d_tournAdminRole.mention, author )
-        del self.tournaments[ self._indexTournament(name) ]
+        self._removeTournament( tourn )
         return digest
 
     # Returns a dictionary of current tournaments with tournament names as keys
@@ -264,28 +269,40 @@ class guildSettings:
         return self.tournaments
 
     def getTournament( self, name: str ) -> tournament:
-        digest = None
-        for tourn in self.tournaments:
-            if tourn.name == name:
-                digest = tourn
-                break
-        return digest
+        return self.tournamentsByName.get( name )
 
     # Returns a list of tournaments that a user has registered for and is active in the guild
-    def getPlayerTournaments( self, user: discord.Member ) -> Dict:
-        digest: list = [ ]
-        for tourn in self.tournaments:
-            if user.id in tourn.players and tourn.players[user.id].isActive():
-                digest.append( tourn )
-        return digest
+    def getPlayerTournaments( self, user: discord.Member ) -> List:
+        return list( self.playerTournaments.get( user.id, { } ).values() )
 
-    def _indexTournament( self, name: str ) -> int:
-        digest = None
-        for i in range(len(self.tournaments)):
-            if self.tournaments[i].name == name:
-                digest = i
-                break
-        return digest
+    def _addTournament( self, tourn: tournament ) -> None:
+        self.tournaments.append( tourn )
+        self.tournamentsByName[tourn.name] = tourn
+        tourn.playerObservers.append( self._updatePlayerIndex )
+        for plyr in tourn.players:
+            self._updatePlayerIndex( tourn, plyr )
+
+    def _removeTournament( self, tourn: tournament ) -> None:
+        self.tournaments.remove( tourn )
+        del( self.tournamentsByName[tourn.name] )
+        tourn.playerObservers.remove( self._updatePlayerIndex )
+        for plyr in tourn.players:
+            self._unindexPlayer( tourn, plyr )
+
+    # Called by a tournament whenever one of its players registers or drops
+    def _updatePlayerIndex( self, tourn: tournament, plyr: int ) -> None:
+        if tourn.players[plyr].isActive():
+            self.playerTournaments.setdefault( plyr, { } )[tourn.name] = tourn
+        else:
+            self._unindexPlayer( tourn, plyr )
+
+    def _unindexPlayer( self, tourn: tournament, plyr: int ) -> None:
+        tourns = self.playerTournaments.get( plyr )
+        if tourns is None:
+            return
+        tourns.pop( tourn.name, None )
+        if len( tourns ) == 0:
+            del( self.playerTournaments[plyr] )
 
 
     # ---------------- Saving and Loading Methods ----------------
@@ -345,8 +362,7 @@ class guildSettings:
         digest += f'/>\n'
         digest += '</settings>\n'
 
-        with open( filename, 'w+' ) as xmlfile:
-            xmlfile.write( toSafeXML(digest) )
+        saveFile( filename, toSafeXML(digest) )
 
     def saveTournaments( self, filename: str = "" ) -> None:
         if filename == "":
@@ -361,6 +377,7 @@ class guildSettings:
         await self.loadTournaments( f'{dirName}/currentTournaments' )
 
     def loadSettings( self, filename: str ) -> None:
+        waitForSave( filename )
         xmlTree = ET.parse( filename )
         root    = xmlTree.getroot()
 
@@ -396,6 +413,6 @@ class guildSettings:
             tourn = tournamentSelector( f'{tournDir}/tournamentType.xml', tournDir.split("/")[-2], self.guild.name, {} )
             tourn.loadTournament( tournDir )
             await tourn.assignGuild( self.guild )
-            self.tournaments.append( tourn )
+            self._addTournament( tourn )
 
 
@@ -2,10 +2,36 @@ import xml.etree.ElementTree as ET
 
 import discord
 
+from enum import IntEnum
 from typing import List, Dict
 import threading
 
 from .utils import *
+from .blocking import saveFile, waitForSave
+
+
+class matchStatus( IntEnum ):
+    OPEN        = 0
+    UNCERTIFIED = 1
+    CERTIFIED   = 2
+    DEAD        = 3
+
+    # Matches are saved and displayed with the same strings as before
+    def __str__( self ):
+        return self.name.lower()
+
+    def __format__( self, spec ):
+        return format( str(self), spec )
+
+class winnerKind( IntEnum ):
+    NONE   = 0
+    PLAYER = 1
+    DRAW   = 2
+    BYE    = 3
+
+# What a match's winner was before winners had kinds, which is still how they are saved
+DRAW_WINNER = "This match is a draw."
+BYE_WINNER  = "This match is a bye."
 
 
 """
@@ -24,18 +50,35 @@ from .utils import *
         - activePlayers : A list of strings (player's names) that are in the match
         - droppedPlayers: A list of strings (player's names) that dropped from the match
         - confirmedPlayers: A list of strings (player's names) that have confirmed the result
-        - status: The correct status of the match, options are "open", "uncertified", and "certified"
-        - winner: The winner of the match or, in the case of a draw, a string stating that the match was a draw
+        - status: The correct status of the match, a matchStatus
+        - winnerKind and winnerID: Who won the match, if anyone. The winnerID is only set if a player won
+        - winner: The winner as a player ID or a string stating that the match was a draw or bye (for compatibility)
+        - observers: A list of objects whose matchUpdated method is called whenever the match's status or winner changes
+
+    Leagues can accumulate tens of thousands of matches, so the class uses
+    __slots__ and player IDs are interned (see internID in utils.py).
 """
 
 class match:
+    __slots__ = ( "observers", "_status", "winnerKind", "winnerID", "saveLocation", "matchNumber",
+                  "activePlayers", "droppedPlayers", "confirmedPlayers", "misfortunes",
+                  "role", "roleID", "VC", "VC_ID", "matchLength", "timeExtension", "timer",
+                  "startTime", "endTime", "triceMatch", "playerDeckVerification", "gameID",
+                  "replayURL", "sentOneMinWarning", "sentFiveMinWarning", "sentFinalWarning",
+                  "stopTimer" )
+
     # The class constructor
     def __init__( self, a_players: List[str]):
+        self.observers = [ ]
+        self._status = matchStatus.OPEN
+        self.winnerKind = winnerKind.NONE
+        self.winnerID = None
+
         self.saveLocation = ""
 
         self.matchNumber = -1
 
-        self.activePlayers    = a_players
+        self.activePlayers    = [ internID(plyr) for plyr in a_players ]
         self.droppedPlayers   = [ ]
         self.confirmedPlayers = [ ]
         
@@ -46,9 +89,6 @@ class match:
         self.VC     = ""
         self.VC_ID  = ""
 
-        self.status = "open"
-        self.winner = ""
-
         self.matchLength   = 60*60 # Time is in seconds
         self.timeExtension = 0
         self.timer     = ""
@@ -67,6 +107,57 @@ class match:
         
         self.stopTimer = False
     
+    # Players track their open matches and tallies through these, so changes need to go through them
+    @property
+    def status( self ) -> matchStatus:
+        return self._status
+
+    # The status can also be given as a string, e.g. "certified"
+    @status.setter
+    def status( self, a_status ) -> None:
+        if isinstance( a_status, str ):
+            a_status = matchStatus[a_status.upper()]
+        if a_status == self._status:
+            return
+        self._status = a_status
+        self._notifyObservers( )
+
+    def setWinner( self, kind: winnerKind, ID: int = None ) -> None:
+        ID = internID( ID ) if kind == winnerKind.PLAYER else None
+        if kind == self.winnerKind and ID == self.winnerID:
+            return
+        self.winnerKind = kind
+        self.winnerID = ID
+        self._notifyObservers( )
+
+    @property
+    def winner( self ):
+        if self.winnerKind == winnerKind.PLAYER:
+            return self.winnerID
+        if self.winnerKind == winnerKind.DRAW:
+            return DRAW_WINNER
+        if self.winnerKind == winnerKind.BYE:
+            return BYE_WINNER
+        return ""
+
+    # Accepts the old way of storing winners, i.e. a player ID or a sentence about a draw or bye
+    @winner.setter
+    def winner( self, a_winner ) -> None:
+        if a_winner is None or a_winner == "":
+            self.setWinner( winnerKind.NONE )
+        elif isinstance( a_winner, int ) or a_winner.isdigit():
+            self.setWinner( winnerKind.PLAYER, int(a_winner) )
+        elif "draw" in a_winner:
+            self.setWinner( winnerKind.DRAW )
+        elif "bye" in a_winner:
+            self.setWinner( winnerKind.BYE )
+        else:
+            raise ValueError( f'{a_winner!r} is not a valid match winner.' )
+
+    def _notifyObservers( self ) -> None:
+        for observer in self.observers:
+            observer.matchUpdated( self )
+
     def __str__( self ):
         digest  = f'Match #{self.matchNumber}\n'
         digest += f'Active players: {", ".join([ "<@" + str(p) + ">" for p in self.activePlayers ])}\n'
@@ -77,22 +168,22 @@ class match:
         return digest
     
     def isOpen( self ) -> bool:
-        return self.status == "open"
+        return self._status == matchStatus.OPEN
     
     def isUncertified( self ) -> bool:
-        return self.status == "uncertified"
+        return self._status == matchStatus.UNCERTIFIED
 
     def isBye( self ) -> bool:
-        return self.winner == "This match is a bye."
+        return self.winnerKind == winnerKind.BYE
     
     def isDraw( self ) -> bool:
-        return self.winner == "This match is a draw."
+        return self.winnerKind == winnerKind.DRAW
     
     def isDead( self ) -> bool:
-        return self.status == "dead"
+        return self._status == matchStatus.DEAD
     
     def isCertified( self ):
-        return self.status == "certified"
+        return self._status == matchStatus.CERTIFIED
     
     def getTimeLeft( self ) -> int:
         if self.isCertified() or self.stopTimer:
@@ -136,8 +227,8 @@ class match:
         self.VC     = ""
         self.VC_ID  = ""
 
-        self.winner = ""
-        self.status = "dead"
+        self.setWinner( winnerKind.NONE )
+        self.status = matchStatus.DEAD
         self.endTime = getTime( )
         self.stopTimer = True
     
@@ -151,7 +242,7 @@ class match:
         digest |= len( self.confirmedPlayers ) >= len( self.activePlayers )
         digest &= not self.isCertified( )
         if digest:
-            self.status = "certified"
+            self.status = matchStatus.CERTIFIED
             self.endTime = getTime( )
             self.stopTimer = True
             if type( self.VC ) == discord.VoiceChannel:
@@ -159,15 +250,16 @@ class match:
         return digest
 
     def recordBye( self ) -> None:
-        self.winner = "This match is a bye."
+        self.setWinner( winnerKind.BYE )
         self.endTime = getTime()
         self.stopTimer = True
-        self.status = "certified"
+        self.status = matchStatus.CERTIFIED
     
     # Confirms the result for one player.
     # If all players have confirmed the result, the status of the match is status to "certified"
     async def confirmResult( self, a_player: str ) -> str:
-        if self.status != "uncertified":
+        a_player = internID( a_player )
+        if not self.isUncertified( ):
             return f'a result for match #{self.matchNumber} has not been recorded.'
         if not a_player in self.confirmedPlayers:
             self.confirmedPlayers.append( a_player )
@@ -184,17 +276,18 @@ class match:
     # the recording on results in order to provide a single interface for the
     # tournament classes to use
     async def recordResult( self, plyr: str, result: str ) -> Dict[str, str]:
+        plyr = internID( plyr )
         digest = { "message": "" }
         if self.isCertified():
             digest["message"] = f'Match #{self.matchNumber} is already certified. Talk to a tournament official to change the result of this match.'
             return digest
             
         if "win" == result or "winner" == result:
-            self.winner = plyr
+            self.setWinner( winnerKind.PLAYER, plyr )
             self.confirmedPlayers = [ plyr ]
             digest["message"] = f'<@{plyr}> has recorded themself as the winner of match #{self.matchNumber}. {self.getMention()}, please confirm with "!confirm-result".'
         elif "draw" == result:
-            self.winner = "This match is a draw."
+            self.setWinner( winnerKind.DRAW )
             self.confirmedPlayers = [ plyr ]
             digest["message"] = f'<@{plyr}> has recorded match #{self.matchNumber} as a draw. {self.getMention()}, please confirm with "!confirm-result".'
         elif "loss" == result or "loser" == result:
@@ -206,21 +299,22 @@ class match:
         
         if await self.confirmMatch( ):
             if len(self.activePlayers) == 0:
-                self.winner = "This match was a draw."
+                self.setWinner( winnerKind.DRAW )
             elif len(self.activePlayers) == 1:
-                self.winner = self.activePlayers[0]
-                self.confirmedPlayers.append( self.winner )
+                self.setWinner( winnerKind.PLAYER, self.activePlayers[0] )
+                self.confirmedPlayers.append( self.winnerID )
             digest["announcement"] = f'{self.getMention()}, your match has been certified. You can join the matchmaking queue again.'
         else:
-            self.status = "uncertified"
+            self.status = matchStatus.UNCERTIFIED
         
         return digest
     
     async def recordResultAdmin( self, plyr: str, result: str ) -> Dict[str, str]:
+        plyr = internID( plyr )
         digest = { "message": "" }
         
         if "win" == result or "winner" == result:
-            self.winner = plyr
+            self.setWinner( winnerKind.PLAYER, plyr )
             digest["announcement"] = f'{self.getMention()}, <@{plyr}> has been recorded as the winner of this match.'
             if not self.isCertified( ):
                 self.confirmedPlayers = [ ]
@@ -229,7 +323,7 @@ class match:
                 digest["announcement"] += ' There is no need to re-confirm the result.'
             digest["message"] = f'<@{plyr}> has recorded as the winner of match #{self.matchNumber}.'
         elif "draw" == result:
-            self.winner = "This match is a draw."
+            self.setWinner( winnerKind.DRAW )
             digest["announcement"] = f'{self.getMention()}, this match has been recorded as a draw.'
             if not self.isCertified( ):
                 self.confirmedPlayers = [ ]
@@ -247,13 +341,13 @@ class match:
         
         if await self.confirmMatch( ):
             if len(self.activePlayers) == 0:
-                self.winner = "This match was a draw."
+                self.setWinner( winnerKind.DRAW )
             elif len(self.activePlayers) == 1:
-                self.winner = self.activePlayers[0]
-                self.confirmedPlayers.append( self.winner )
+                self.setWinner( winnerKind.PLAYER, self.activePlayers[0] )
+                self.confirmedPlayers.append( self.winnerID )
             digest["announcement"] += f'\n\n{self.getMention()}, your match has been certified. You can join the matchmaking queue again.'
         elif not self.isCertified( ):
-            self.status = "uncertified"
+            self.status = matchStatus.UNCERTIFIED
         
         return digest
 
@@ -289,12 +383,12 @@ class match:
             digest += f'\t\t<player name="{player}"/>\n'
         digest += '\t</confirmedPlayers>\n'
         digest += '</match>'
-        with open( a_filename, "w+" ) as savefile:
-            savefile.write( toSafeXML(digest) )
+        saveFile( a_filename, toSafeXML(digest) )
     
     # Loads a match from an xml file saved with this class
     def loadXML( self, a_filename: str ) -> None:
         self.saveLocation = a_filename
+        waitForSave( a_filename )
         xmlTree = ET.parse( a_filename )
         matchRoot = xmlTree.getroot()
         self.roleID = fromXML(matchRoot.attrib["roleID"])
@@ -317,14 +411,12 @@ class match:
         self.sentOneMinWarning  = str_to_bool( fromXML( matchRoot.find( "sentWarnings" ).attrib["oneMin" ] ) )
         self.sentFiveMinWarning = str_to_bool( fromXML( matchRoot.find( "sentWarnings" ).attrib["fiveMin"] ) )
         self.sentFinalWarning   = str_to_bool( fromXML( matchRoot.find( "sentWarnings" ).attrib["final"  ] ) )
+        # The winner setter converts the saved winner into a kind and ID
         self.winner = fromXML( matchRoot.find( "winner" ).attrib["name"] )
-        if self.winner != "" and not ( "a draw" in self.winner ) and not self.isBye():
-            print( self.winner )
-            self.winner = int(self.winner)
         for player in matchRoot.find("activePlayers"):
-            self.activePlayers.append( int( fromXML( player.attrib["name"] ) ) )
+            self.activePlayers.append( internID( int( fromXML( player.attrib["name"] ) ) ) )
         for player in matchRoot.find("droppedPlayers"):
-            self.droppedPlayers.append( int( fromXML( player.attrib["name"] ) ) )
+            self.droppedPlayers.append( internID( int( fromXML( player.attrib["name"] ) ) ) )
         for player in matchRoot.find("confirmedPlayers"):
-            self.confirmedPlayers.append( int( fromXML( player.attrib["name"] ) ) )
+            self.confirmedPlayers.append( internID( int( fromXML( player.attrib["name"] ) ) ) )
 
@@ -0,0 +1,307 @@
+""" This module contains the scheduler that outbound Discord messages and edits go through """
+import time
+import heapq
+import asyncio
+import traceback
+
+from enum import IntEnum
+from typing import Dict, List, Set, Tuple
+
+from .metrics import counter, gauge, histogram, registerMetric, LATENCY_BUCKETS
+
+
+class messagePriority( IntEnum ):
+    """ When calls are waiting on the same route or on the global limit, lower values go first """
+    MATCH_WARNING  = 0
+    ANNOUNCEMENT   = 1
+    DIRECT_MESSAGE = 2
+    INFO_EDIT      = 3
+
+
+# (calls, seconds) allowed per route, which is a channel or a user's DMs, and across the whole bot
+# These are a little under Discord's limits, so that the bot rarely sees a 429
+ROUTE_LIMITS = { "channel": ( 5, 5.0 ), "user": ( 5, 5.0 ) }
+GLOBAL_LIMIT = ( 45, 1.0 )
+# The fraction of a period that the scheduler waits past a window's end, to allow for latency
+WINDOW_MARGIN = 0.05
+# How long to back off when Discord rate limits a call without saying for how long
+DEFAULT_RETRY_AFTER = 1.0
+MAX_ATTEMPTS = 5
+
+outboundQueueDepth = registerMetric( gauge( "squirebot_outbound_queue_depth", "Outbound Discord calls waiting to be made, by priority", ("priority",) ) )
+outboundWaitTime = registerMetric( histogram( "squirebot_outbound_wait_seconds", "Time outbound Discord calls waited in the scheduler, by priority", LATENCY_BUCKETS, ("priority",) ) )
+outboundCoalesced = registerMetric( counter( "squirebot_outbound_coalesced_total", "Message edits that were folded into an edit that was already waiting" ) )
+outboundRateLimited = registerMetric( counter( "squirebot_outbound_rate_limited_total", "Outbound Discord calls that Discord rate limited, by kind of route", ("route",) ) )
+
+
+class tokenBucket:
+    """
+    Allows up to capacity calls, and refills all at once a period after the
+    first of them. This matches how Discord's rate limit buckets reset.
+    """
+    __slots__ = ( "capacity", "period", "tokens", "resetAt" )
+
+    def __init__( self, capacity: int, period: float ):
+        self.capacity = capacity
+        self.period = period
+        self.tokens = capacity
+        self.resetAt = None
+
+    # How long until a call can be made
+    def delay( self, now: float ) -> float:
+        if not self.resetAt is None and now >= self.resetAt:
+            self.tokens = self.capacity
+            self.resetAt = None
+        return 0.0 if self.tokens > 0 else self.resetAt - now
+
+    def take( self, now: float ) -> None:
+        self.delay( now )
+        if self.resetAt is None:
+            # Discord starts the window when the call arrives, which is a little after it is made
+            self.resetAt = now + self.period * (1 + WINDOW_MARGIN)
+        self.tokens -= 1
+
+    # Used when Discord says the route is limited, e.g. because of calls made outside of the scheduler
+    def backOff( self, now: float, retryAfter: float ) -> None:
+        self.tokens = 0
+        self.resetAt = max( self.resetAt or now, now + retryAfter )
+
+
+# Calls to a message are limited with the channel it is in. Users are the DMs with them.
+def routeOf( target ) -> Tuple[str, int]:
+    if hasattr( target, "channel" ) and hasattr( target, "edit" ):
+        return ( "channel", getattr( target.channel, "id", id(target.channel) ) )
+    if hasattr( target, "dm_channel" ):
+        return ( "user", target.id )
+    return ( "channel", getattr( target, "id", id(target) ) )
+
+def _logFailure( future: asyncio.Future ) -> None:
+    if future.cancelled() or future.exception() is None:
+        return
+    ex = future.exception( )
+    print( f'An outbound Discord call failed: {ex!r}' )
+    traceback.print_exception( type(ex), ex, ex.__traceback__ )
+
+
+class outboundCall:
+    """ A send or edit that is waiting in the scheduler """
+    __slots__ = ( "priority", "sequence", "route", "target", "method", "kwargs", "future", "queuedAt", "attempts" )
+
+    def __init__( self, priority: messagePriority, sequence: int, target, method: str, kwargs: Dict, future: asyncio.Future ):
+        self.priority = priority
+        self.sequence = sequence
+        self.route = routeOf( target )
+        self.target = target
+        self.method = method
+        self.kwargs = kwargs
+        self.future = future
+        self.queuedAt = time.monotonic( )
+        self.attempts = 0
+
+    def __lt__( self, other ) -> bool:
+        return ( self.priority, self.sequence ) < ( other.priority, other.sequence )
+
+
+class messageScheduler:
+    """
+    Every outbound message and edit goes through here, so that the bot paces
+    itself instead of piling up behind discord.py's rate limit handling.
+
+    Each route (a channel or a user's DMs) has a token bucket, and so does the
+    bot as a whole. Calls on a route are made one at a time in priority order,
+    while different routes are sent to concurrently. An edit to a message
+    that already has an edit waiting is folded into that edit, so only the
+    latest state gets sent.
+
+    The scheduler must be used from the event loop that it sends on, which is
+    the first loop it is used from. Other threads need to hand their calls to
+    that loop, e.g. with asyncio.run_coroutine_threadsafe. Once that loop has
+    been closed, the next loop it is used from takes over whatever is still
+    queued. Sending and editing return futures, which can be awaited for the
+    result or left alone. Failures that nobody awaits are still printed.
+    """
+    def __init__( self, routeLimits: Dict[str, Tuple[int, float]] = ROUTE_LIMITS, globalLimit: Tuple[int, float] = GLOBAL_LIMIT ):
+        self.routeLimits = routeLimits
+        self.globalLimit = globalLimit
+        self.loop = None
+        self._reset( )
+
+    def _reset( self ) -> None:
+        self.globalBucket = tokenBucket( *self.globalLimit )
+        self.buckets: Dict[Tuple, tokenBucket] = { }
+        # Each route's calls, as a heap
+        self.queues: Dict[Tuple, List[outboundCall]] = { }
+        # Routes that can make their next call, as (priority, sequence, route). Entries go stale as routes change.
+        self.ready: List[Tuple] = [ ]
+        # Routes that are out of tokens, as (when they will have one, route)
+        self.waiting: List[Tuple] = [ ]
+        self.waitingRoutes: Set[Tuple] = set( )
+        # Routes that have a call in progress
+        self.busy: Set[Tuple] = set( )
+        # The edits that haven't been made yet, by message ID
+        self.edits: Dict[int, outboundCall] = { }
+        self.pending: Set[asyncio.Future] = set( )
+        self.tasks: Set[asyncio.Task] = set( )
+        self.sequence = 0
+        self.wakeup = None
+        self.worker = None
+
+    def __len__( self ):
+        """ The number of calls that haven't finished """
+        return len(self.pending)
+
+    def send( self, target, priority: messagePriority = messagePriority.ANNOUNCEMENT, **kwargs ) -> asyncio.Future:
+        """ Sends a message to a channel or user. The keyword arguments are passed to its send method. """
+        return self._enqueue( target, "send", priority, kwargs ).future
+
+    def edit( self, message, priority: messagePriority = messagePriority.INFO_EDIT, **kwargs ) -> asyncio.Future:
+        """ Edits a message. If an edit to it is already waiting, these changes are added to that edit instead. """
+        self._ensureWorker( )
+        call = self.edits.get( message.id )
+        if not call is None:
+            call.kwargs.update( kwargs )
+            outboundCoalesced.inc( )
+            return call.future
+        call = self._enqueue( message, "edit", priority, kwargs )
+        self.edits[message.id] = call
+        return call.future
+
+    async def join( self ) -> None:
+        """ Waits until every call has been made """
+        self._ensureWorker( )
+        while len(self.pending) > 0:
+            await asyncio.gather( *list(self.pending), return_exceptions=True )
+
+    def _enqueue( self, target, method: str, priority: messagePriority, kwargs: Dict ) -> outboundCall:
+        self._ensureWorker( )
+        self.sequence += 1
+        call = outboundCall( priority, self.sequence, target, method, kwargs, self.loop.create_future() )
+        call.future.add_done_callback( _logFailure )
+        call.future.add_done_callback( self.pending.discard )
+        self.pending.add( call.future )
+        outboundQueueDepth.inc( priority.name )
+        heapq.heappush( self.queues.setdefault( call.route, [ ] ), call )
+        self._markReady( call.route )
+        self.wakeup.set( )
+        return call
+
+    def _ensureWorker( self ) -> None:
+        loop = asyncio.get_running_loop( )
+        if self.loop is loop:
+            return
+        if not self.loop is None and not self.loop.is_closed( ):
+            # The calls queued on the other loop are sent once it runs again
+            if self.loop.is_running( ) or len(self.pending) > 0:
+                raise RuntimeError( "The outbox is sending on another event loop, so calls need to be made from that loop" )
+            self.worker.cancel( )
+        self._adoptLoop( loop )
+
+    # Moves the scheduler to a new event loop. Queued calls are kept, with new
+    # futures, as nothing can wait on the futures of a closed loop. Calls that
+    # were being made when the old loop closed may have gone through, so they
+    # aren't made again.
+    def _adoptLoop( self, loop: asyncio.AbstractEventLoop ) -> None:
+        self.loop = loop
+        # The limits may have been changed since the buckets were made
+        self.globalBucket = tokenBucket( *self.globalLimit )
+        self.buckets.clear( )
+        self.busy.clear( )
+        self.tasks.clear( )
+        self.pending = set( )
+        for queue in self.queues.values():
+            for call in queue:
+                call.future = loop.create_future( )
+                call.future.add_done_callback( _logFailure )
+                call.future.add_done_callback( self.pending.discard )
+                self.pending.add( call.future )
+        for route in list( self.queues ):
+            self._markReady( route )
+        self.wakeup = asyncio.Event( )
+        self.worker = loop.create_task( self._work() )
+
+    def _getBucket( self, route: Tuple ) -> tokenBucket:
+        if not route in self.buckets:
+            self.buckets[route] = tokenBucket( *self.routeLimits[route[0]] )
+        return self.buckets[route]
+
+    def _markReady( self, route: Tuple ) -> None:
+        queue = self.queues.get( route )
+        if not queue:
+            self.queues.pop( route, None )
+            return
+        if route in self.busy or route in self.waitingRoutes:
+            return
+        delay = self._getBucket( route ).delay( time.monotonic() )
+        if delay > 0:
+            self.waitingRoutes.add( route )
+            heapq.heappush( self.waiting, ( time.monotonic() + delay, route ) )
+        else:
+            heapq.heappush( self.ready, ( queue[0].priority, queue[0].sequence, route ) )
+
+    async def _work( self ) -> None:
+        while True:
+            now = time.monotonic( )
+            while len(self.waiting) > 0 and self.waiting[0][0] <= now:
+                _, route = heapq.heappop( self.waiting )
+                self.waitingRoutes.discard( route )
+                self._markReady( route )
+
+            timeout = None
+            if len(self.ready) > 0:
+                timeout = self.globalBucket.delay( now )
+                if timeout == 0:
+                    self._dispatchNext( now )
+                    continue
+            if len(self.waiting) > 0:
+                untilReady = self.waiting[0][0] - now
+                timeout = untilReady if timeout is None else min( timeout, untilReady )
+
+            self.wakeup.clear( )
+            try:
+                await asyncio.wait_for( self.wakeup.wait(), timeout )
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatchNext( self, now: float ) -> None:
+        priority, sequence, route = heapq.heappop( self.ready )
+        queue = self.queues.get( route )
+        if route in self.busy or route in self.waitingRoutes or not queue or queue[0].sequence != sequence:
+            return
+        call = heapq.heappop( queue )
+        if call.method == "edit" and self.edits.get( call.target.id ) is call:
+            del self.edits[call.target.id]
+        self.busy.add( route )
+        self._getBucket( route ).take( now )
+        self.globalBucket.take( now )
+        outboundQueueDepth.dec( call.priority.name )
+        outboundWaitTime.observe( now - call.queuedAt, call.priority.name )
+        task = self.loop.create_task( self._make( call ) )
+        self.tasks.add( task )
+        task.add_done_callback( self.tasks.discard )
+
+    async def _make( self, call: outboundCall ) -> None:
+        call.attempts += 1
+        try:
+            result = await getattr( call.target, call.method )( **call.kwargs )
+        except Exception as ex:
+            if getattr( ex, "status", None ) == 429 and call.attempts < MAX_ATTEMPTS:
+                # Try again once the route has recovered
+                outboundRateLimited.inc( call.route[0] )
+                self._getBucket( call.route ).backOff( time.monotonic(), getattr( ex, "retry_after", None ) or DEFAULT_RETRY_AFTER )
+                outboundQueueDepth.inc( call.priority.name )
+                heapq.heappush( self.queues.setdefault( call.route, [ ] ), call )
+                if call.method == "edit" and not call.target.id in self.edits:
+                    self.edits[call.target.id] = call
+            elif not call.future.done():
+                call.future.set_exception( ex )
+        else:
+            if not call.future.done():
+                call.future.set_result( result )
+        finally:
+            self.busy.discard( call.route )
+            self._markReady( call.route )
+            self.wakeup.set( )
+
+
+# The scheduler that the whole bot shares
+outbox = messageScheduler( )
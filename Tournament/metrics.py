@@ -0,0 +1,209 @@
+""" This module contains lightweight counters and histograms for instrumenting the bot, and a local endpoint that serves them in the Prometheus text format """
+import threading
+import time
+
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Tuple
+
+
+# Bucket bounds in seconds
+WAIT_BUCKETS    = ( 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600 )
+LATENCY_BUCKETS = ( 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10 )
+
+
+class counter:
+    """ A count that only goes up, with one value per set of label values """
+    def __init__( self, name: str, helpText: str, labelNames: Tuple[str] = ( ) ):
+        self.name = name
+        self.helpText = helpText
+        self.labelNames = labelNames
+        self.values: Dict[Tuple, float] = { }
+        self.lock = threading.Lock( )
+
+    def inc( self, *labels, amount: float = 1 ) -> None:
+        with self.lock:
+            self.values[labels] = self.values.get( labels, 0 ) + amount
+
+    def get( self, *labels ) -> float:
+        return self.values.get( labels, 0 )
+
+    def exportToText( self ) -> str:
+        digest  = f'# HELP {self.name} {self.helpText}\n'
+        digest += f'# TYPE {self.name} counter\n'
+        with self.lock:
+            for labels, value in self.values.items():
+                digest += f'{self.name}{formatLabels( self.labelNames, labels )} {value}\n'
+        return digest
+
+
+class gauge:
+    """ A value that can go up and down, with one value per set of label values """
+    def __init__( self, name: str, helpText: str, labelNames: Tuple[str] = ( ) ):
+        self.name = name
+        self.helpText = helpText
+        self.labelNames = labelNames
+        self.values: Dict[Tuple, float] = { }
+        self.lock = threading.Lock( )
+
+    def set( self, value: float, *labels ) -> None:
+        with self.lock:
+            self.values[labels] = value
+
+    def inc( self, *labels, amount: float = 1 ) -> None:
+        with self.lock:
+            self.values[labels] = self.values.get( labels, 0 ) + amount
+
+    def dec( self, *labels, amount: float = 1 ) -> None:
+        self.inc( *labels, amount=-amount )
+
+    def get( self, *labels ) -> float:
+        return self.values.get( labels, 0 )
+
+    def exportToText( self ) -> str:
+        digest  = f'# HELP {self.name} {self.helpText}\n'
+        digest += f'# TYPE {self.name} gauge\n'
+        with self.lock:
+            for labels, value in self.values.items():
+                digest += f'{self.name}{formatLabels( self.labelNames, labels )} {value}\n'
+        return digest
+
+
+class histogram:
+    """ Counts observations in fixed buckets, with one set of buckets per set of label values """
+    def __init__( self, name: str, helpText: str, buckets: Tuple[float], labelNames: Tuple[str] = ( ) ):
+        self.name = name
+        self.helpText = helpText
+        self.buckets = tuple( sorted( buckets ) )
+        self.labelNames = labelNames
+        # Each value is the (non-cumulative) bucket counts, with the overflow bucket last, then the sum
+        self.values: Dict[Tuple, List] = { }
+        self.lock = threading.Lock( )
+
+    def observe( self, value: float, *labels ) -> None:
+        index = bisect_left( self.buckets, value )
+        with self.lock:
+            counts = self.values.get( labels )
+            if counts is None:
+                counts = self.values[labels] = [ 0 ] * ( len(self.buckets) + 2 )
+            counts[index] += 1
+            counts[-1] += value
+
+    # Observes how long the body of a with statement takes
+    def time( self, *labels ) -> "metricTimer":
+        return metricTimer( self, labels )
+
+    def count( self, *labels ) -> int:
+        counts = self.values.get( labels )
+        return 0 if counts is None else sum( counts[:-1] )
+
+    def total( self, *labels ) -> float:
+        counts = self.values.get( labels )
+        return 0 if counts is None else counts[-1]
+
+    def mean( self, *labels ) -> float:
+        count = self.count( *labels )
+        return None if count == 0 else self.total( *labels ) / count
+
+    # Estimates a quantile by interpolating within the bucket it falls in
+    def quantile( self, q: float, *labels ) -> float:
+        with self.lock:
+            counts = list( self.values.get( labels, [ ] ) )
+        if len(counts) == 0 or sum( counts[:-1] ) == 0:
+            return None
+        rank = q * sum( counts[:-1] )
+        seen = 0
+        for i, count in enumerate( counts[:-1] ):
+            if count > 0 and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = 0 if i == 0 else self.buckets[i-1]
+                return lower + ( self.buckets[i] - lower ) * ( rank - seen ) / count
+            seen += count
+        return self.buckets[-1]
+
+    def exportToText( self ) -> str:
+        digest  = f'# HELP {self.name} {self.helpText}\n'
+        digest += f'# TYPE {self.name} histogram\n'
+        with self.lock:
+            values = { labels: list(counts) for labels, counts in self.values.items() }
+        for labels, counts in values.items():
+            cumulative = 0
+            for bound, count in zip( self.buckets + ( "+Inf", ), counts[:-1] ):
+                cumulative += count
+                digest += f'{self.name}_bucket{formatLabels( self.labelNames + ("le",), labels + (bound,) )} {cumulative}\n'
+            digest += f'{self.name}_sum{formatLabels( self.labelNames, labels )} {counts[-1]}\n'
+            digest += f'{self.name}_count{formatLabels( self.labelNames, labels )} {cumulative}\n'
+        return digest
+
+
+class metricTimer:
+    """ Context manager that records how long its body took in a histogram """
+    __slots__ = ( "histogram", "labels", "start" )
+
+    def __init__( self, hist: histogram, labels: Tuple ):
+        self.histogram = hist
+        self.labels = labels
+
+    def __enter__( self ):
+        self.start = time.perf_counter( )
+        return self
+
+    def __exit__( self, *args ):
+        self.histogram.observe( time.perf_counter() - self.start, *self.labels )
+
+
+def formatLabels( names: Tuple[str], values: Tuple ) -> str:
+    if len(names) == 0:
+        return ""
+    escaped = [ str(value).replace( "\\", "\\\\" ).replace( '"', '\\"' ).replace( "\n", "\\n" ) for value in values ]
+    return "{" + ",".join( f'{name}="{value}"' for name, value in zip( names, escaped ) ) + "}"
+
+
+# ---------------- Registry ----------------
+
+registeredMetrics: List = [ ]
+
+def registerMetric( metric ):
+    registeredMetrics.append( metric )
+    return metric
+
+def exportMetrics( ) -> str:
+    return "".join( metric.exportToText() for metric in registeredMetrics )
+
+
+queueWaitTime = registerMetric( histogram( "squirebot_queue_wait_seconds", "Time between a player joining the matchmaking queue and being paired", WAIT_BUCKETS, ("tournament",) ) )
+pairingPassTime = registerMetric( histogram( "squirebot_pairing_pass_seconds", "Time taken by a whole pairing pass, including match setup", LATENCY_BUCKETS, ("tournament",) ) )
+pairingComputeTime = registerMetric( histogram( "squirebot_pairing_compute_seconds", "Time spent finding pairings in a pairing pass", LATENCY_BUCKETS, ("tournament",) ) )
+pairingPasses = registerMetric( counter( "squirebot_pairing_passes_total", "Pairing passes that have been run", ("tournament",) ) )
+playersConsidered = registerMetric( counter( "squirebot_pairing_players_considered_total", "Players that were in the queue when a pairing pass started", ("tournament",) ) )
+playersPaired = registerMetric( counter( "squirebot_pairing_players_paired_total", "Players that were paired by a pairing pass", ("tournament",) ) )
+matchSetupTime = registerMetric( histogram( "squirebot_match_setup_seconds", "Time taken to set up matches, by stage", LATENCY_BUCKETS, ("tournament", "stage") ) )
+
+
+# ---------------- Endpoint ----------------
+
+class metricsHandler( BaseHTTPRequestHandler ):
+    def log_message( self, *args ):
+        return
+
+    def do_GET( self ):
+        if self.path != "/metrics":
+            self.send_response( 404 )
+            self.send_header( "Content-Length", "0" )
+            self.end_headers( )
+            return
+        content = exportMetrics( ).encode( )
+        self.send_response( 200 )
+        self.send_header( "Content-Type", "text/plain; version=0.0.4" )
+        self.send_header( "Content-Length", str(len(content)) )
+        self.end_headers( )
+        self.wfile.write( content )
+
+
+# Serves the metrics at http://<host>:<port>/metrics from a background thread.
+# By default, only local connections are accepted.
+def startMetricsServer( port: int, host: str = "127.0.0.1" ) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer( (host, port), metricsHandler )
+    threading.Thread( target=server.serve_forever, daemon=True ).start( )
+    return server
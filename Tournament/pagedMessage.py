@@ -0,0 +1,82 @@
+""" This module contains the message whose embed is paged through with reactions """
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict
+
+import discord
+
+from .messageScheduler import outbox
+
+PREVIOUS_PAGE = "⬅️"
+NEXT_PAGE     = "➡️"
+PAGE_REACTIONS = ( PREVIOUS_PAGE, NEXT_PAGE )
+
+# Only the most recent paged messages can be turned. Older ones stay on their last page.
+PAGED_MESSAGE_LIMIT = 1000
+
+
+class pagedMessage( ABC ):
+    """
+    A single message whose embed shows one page of something too long for a
+    message. Reacting with an arrow turns the page by editing the message.
+
+    Adding and removing an arrow both turn the page, so a viewer can keep
+    clicking the same arrow and the bot never needs to remove reactions.
+
+    Subclasses define pageCount and getPage. They are asked again each time
+    the page is turned, so the pages can change while the message is up.
+    """
+    def __init__( self, content: str = "", page: int = 0 ):
+        self.content = content
+        self.page = page
+        self.message = None
+
+    @abstractmethod
+    def pageCount( self ) -> int:
+        pass
+
+    @abstractmethod
+    def getPage( self, page: int ) -> discord.Embed:
+        pass
+
+    def isPageable( self ) -> bool:
+        return self.pageCount() > 1
+
+    def _clampPage( self, page: int ) -> int:
+        return max( 0, min( page, self.pageCount() - 1 ) )
+
+    async def send( self, channel ):
+        self.page = self._clampPage( self.page )
+        self.message = await outbox.send( channel, content=self.content, embed=self.getPage( self.page ) )
+        if self.isPageable( ):
+            registerPagedMessage( self )
+            for emoji in PAGE_REACTIONS:
+                await self.message.add_reaction( emoji )
+        return self.message
+
+    # Returns whether or not the message was edited
+    async def turnPage( self, step: int ) -> bool:
+        page = self._clampPage( self.page + step )
+        if page == self.page:
+            return False
+        self.page = page
+        # Quick page turns are folded into one edit
+        await outbox.edit( self.message, content=self.content, embed=self.getPage( self.page ) )
+        return True
+
+
+pagedMessages: Dict[int, pagedMessage] = OrderedDict( )
+
+def registerPagedMessage( pager: pagedMessage ) -> None:
+    pagedMessages[pager.message.id] = pager
+    pagedMessages.move_to_end( pager.message.id )
+    while len(pagedMessages) > PAGED_MESSAGE_LIMIT:
+        pagedMessages.popitem( last=False )
+
+# Called with the details of a reaction being added or removed
+# Returns whether or not the reaction turned a page
+async def handlePageReaction( messageID: int, emoji: str ) -> bool:
+    pager = pagedMessages.get( messageID )
+    if pager is None or not emoji in PAGE_REACTIONS:
+        return False
+    return await pager.turnPage( -1 if emoji == PREVIOUS_PAGE else 1 )
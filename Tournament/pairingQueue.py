@@ -3,9 +3,10 @@
 
 # Partial imports from standard libraries
 from random import shuffle
+from time import monotonic
 
 # Include typing help
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 # External libraries
 
@@ -19,18 +20,35 @@ class pairingQueue:
     def __init__( self ):
         """ Constructor """
         self.queue: List[List] = [ [ ] ]
+        # When each player (by ID) joined the queue
+        self.joinTimes: Dict[int, float] = { }
         return
 
     def __str__( self ):
         """ Returns a string representation of the queue. """
-        levels = [ ]
-        for lvl in self.queue:
-            levels.append( ", ".join( [ plyr.getMention() for plyr in lvl ] ) )
-        return "\n".join( [ f'Tier {i+1}: {lvl}' for i, lvl in enumerate(levels) if len(lvl) > 0 ] )
+        return self.toString( )
+
+    def toString( self, limit: int = None ) -> str:
+        """ Returns a string representation of the queue, or None if it would be longer than the limit """
+        lines = [ ]
+        length = 0
+        for i, lvl in enumerate(self.queue):
+            if len(lvl) == 0:
+                continue
+            header = f'Tier {i+1}: '
+            mentions = [ ]
+            length += len(header) + (1 if len(lines) > 0 else 0)
+            for plyr in lvl:
+                mentions.append( plyr.getMention() )
+                length += len(mentions[-1]) + (2 if len(mentions) > 1 else 0)
+                if not limit is None and length > limit:
+                    return None
+            lines.append( header + ", ".join( mentions ) )
+        return "\n".join( lines )
 
     def size( self ) -> int:
         """ Calculates the number of people in the queue """
-        return sum( len(lvl) for lvl in self.queue )
+        return len(self.joinTimes)
 
     def height( self ) -> int:
         """ Calculates the number of levels in the queue """
@@ -42,7 +60,7 @@ class pairingQueue:
 
     def _isInQueue( self, plyr: player ) -> bool:
         """ Determines if a player is in the queue """
-        return Union( [ (plyr in lvl) for lvl in self.queue ] )
+        return plyr.discordID in self.joinTimes
 
     def _linearize( self, q: List = None ) -> List:
         """ Flattens the queue into a single list """
@@ -114,6 +132,7 @@ class pairingQueue:
         while index > self.height() - 2:
             self.queue.append( [ ] )
         self.queue[index].append( plyr )
+        self.joinTimes[plyr.discordID] = monotonic( )
         return f'{plyr.getMention()}, you have been added to the queue.'
 
     def removePlayer( self, plyr: player ) -> str:
@@ -121,10 +140,17 @@ class pairingQueue:
         for lvl in self.queue:
             if plyr in lvl:
                 lvl.remove(plyr)
+                self.joinTimes.pop( plyr.discordID, None )
                 self._trim()
                 return f'{plyr.getMention()}, you have been removed from the queue.'
         return f'{plyr.getMention()}, you were not in the queue.'
 
+    def waitTime( self, plyr: player ) -> float:
+        """ Calculates how long (in seconds) a player has been in the queue, or None if they aren't in it """
+        if not plyr.discordID in self.joinTimes:
+            return None
+        return monotonic() - self.joinTimes[plyr.discordID]
+
     def readyToPair( self, threshold: int ) -> bool:
         """ Determines if there are enough people to create pairings """
         return self.size() >= threshold
@@ -141,7 +167,6 @@ class pairingQueue:
             # Would the new queue be smaller than the match size
             if size - len(tries[-1])*matchSize < matchSize:
                 break
-        print( tries )
         tries.sort( key=lambda x: len(x) )
         # Since the tries have been sorted, the last one will be the one with
         # the most pairings
@@ -0,0 +1,148 @@
+""" This module contains the object that batches together the pairing announcements for a wave of matches """
+import asyncio
+
+# Include typing help
+from typing import List, Tuple
+
+# External libraries
+import discord
+
+# Local modules
+from .utils import *
+from .messageScheduler import outbox
+
+
+# Discord's limits on what a single message can carry
+MESSAGE_CHAR_LIMIT: int = 2000
+# Sending multiple embeds in one message was added in discord.py 2.0
+EMBEDS_PER_MESSAGE: int = 10 if discord.version_info.major >= 2 else 1
+EMBED_FIELD_LIMIT: int  = 25
+EMBED_CHAR_LIMIT: int   = 6000
+FIELD_NAME_LIMIT: int   = 256
+FIELD_VALUE_LIMIT: int  = 1024
+
+
+class pairingsAnnouncer:
+    """
+    Collects the announcements for every match created in a pairing pass and
+    packs them into as few messages (and embeds) as Discord allows.
+
+    Each match contributes a single line to the message content (which is
+    where its role mention lives, so that the players still get pinged) and a
+    group of embed fields. A match's fields are only split across embeds when
+    they wouldn't fit in one embed on their own. A field that is too long is
+    split into several fields, and a name that is too long is cut short.
+    """
+    def __init__( self, header: str = "" ):
+        """ Constructor """
+        self.header: str = header
+        self.lines: List[str] = [ ]
+        self.fieldGroups: List[List[Tuple[str, str]]] = [ ]
+        return
+
+    def __len__( self ):
+        """ The number of matches that have been added """
+        return len(self.lines)
+
+    def addMatch( self, line: str, fields: List[Tuple[str, str]] ) -> None:
+        """ Adds the announcement line and the embed fields (name/value pairs) for one match """
+        self.lines.append( line )
+        self.fieldGroups.append( fields )
+        return
+
+    def _createContents( self ) -> List[str]:
+        """ Packs the header and match lines into as few message bodies as possible """
+        content = "\n".join( ([ self.header ] if self.header != "" else [ ]) + self.lines )
+        return [ msg for msg in splitMessage( content, MESSAGE_CHAR_LIMIT ) if msg.strip() != "" ]
+
+    def _splitField( self, name: str, value: str ) -> List[Tuple[str, str]]:
+        """ Splits a field into fields whose names and values are within Discord's limits """
+        if len(name) > FIELD_NAME_LIMIT:
+            name = name[:FIELD_NAME_LIMIT - 3] + "..."
+        pieces: List[str] = [ ]
+        # Values are split between lines where possible
+        for piece in splitMessage( value, FIELD_VALUE_LIMIT ):
+            piece = piece.lstrip( "\n" )
+            pieces += [ piece[i:i+FIELD_VALUE_LIMIT] for i in range( 0, len(piece), FIELD_VALUE_LIMIT ) ]
+        if len(pieces) == 0:
+            return [ (name, value) ]
+        contName = name[:FIELD_NAME_LIMIT - len(" (cont.)")] + " (cont.)"
+        return [ (name if i == 0 else contName, piece) for i, piece in enumerate( pieces ) ]
+
+    def _splitGroup( self, group: List[Tuple[str, str]] ) -> List[List[Tuple[str, str]]]:
+        """ Splits a group of fields into pieces that each fit in one embed """
+        digest: List = [ [ ] ]
+        length: int = 0
+        fields = [ field for name, value in group for field in self._splitField( name, value ) ]
+        for name, value in fields:
+            if len(digest[-1]) == EMBED_FIELD_LIMIT or length + len(name) + len(value) > EMBED_CHAR_LIMIT:
+                digest.append( [ ] )
+                length = 0
+            digest[-1].append( (name, value) )
+            length += len(name) + len(value)
+        return digest
+
+    def _createEmbeds( self ) -> List[Tuple[discord.Embed, int]]:
+        """ Packs the groups of fields into as few embeds as possible. Returns each embed and its character count. """
+        digest: List = [ ]
+        fields: List = [ ]
+        length: int = 0
+        groups = [ piece for group in self.fieldGroups for piece in self._splitGroup( group ) ]
+        for group in groups:
+            groupLength = sum( len(name) + len(value) for name, value in group )
+            if len(fields) + len(group) > EMBED_FIELD_LIMIT or length + groupLength > EMBED_CHAR_LIMIT:
+                if len(fields) > 0:
+                    digest.append( (fields, length) )
+                fields = [ ]
+                length = 0
+            fields += group
+            length += groupLength
+        if len(fields) > 0:
+            digest.append( (fields, length) )
+
+        embeds: List = [ ]
+        for fields, length in digest:
+            embed = discord.Embed( )
+            for name, value in fields:
+                embed.add_field( name=name, value=value )
+            embeds.append( (embed, length) )
+        return embeds
+
+    def createMessages( self ) -> List[Tuple[str, List[discord.Embed]]]:
+        """ Creates the (content, embeds) pairs that need to be sent """
+        contents = self._createContents( )
+        embeds   = self._createEmbeds( )
+
+        # Embeds are attached to the messages carrying the content first. Any
+        # embeds that don't fit get additional, content-less messages.
+        digest: List = [ ]
+        index: int = 0
+        while index < len(contents) or len(embeds) > 0:
+            content = contents[index] if index < len(contents) else None
+            attached: List = [ ]
+            length: int = 0
+            # Every embed fits in a message on its own, so each message gets at least one
+            while len(embeds) > 0 and len(attached) < EMBEDS_PER_MESSAGE and ( len(attached) == 0 or length + embeds[0][1] <= EMBED_CHAR_LIMIT ):
+                embed, embedLength = embeds.pop( 0 )
+                attached.append( embed )
+                length += embedLength
+            digest.append( (content, attached) )
+            index += 1
+        return digest
+
+    async def send( self, channel ) -> int:
+        """ Sends the announcements to the given channel through the message scheduler. Returns the number of messages sent. """
+        sends: List = [ ]
+        for content, embeds in self.createMessages( ):
+            if len(embeds) == 0:
+                sends.append( outbox.send( channel, content=content ) )
+            elif len(embeds) == 1:
+                sends.append( outbox.send( channel, content=content, embed=embeds[0] ) )
+            else:
+                sends.append( outbox.send( channel, content=content, embeds=embeds ) )
+        self.lines = [ ]
+        self.fieldGroups = [ ]
+        # Messages to the same channel are sent in order
+        await asyncio.gather( *sends )
+        return len(sends)
+
@@ -7,6 +7,8 @@ from .utils import *
 from .deck import *
 from .cardDB import *
 from .match import *
+from .blocking import saveFile, waitForSave
+from .messageScheduler import outbox, messagePriority
 
 
 """
@@ -30,20 +32,31 @@ from .match import *
         - status: A string that states if the player is active or has dropped
         - decks: A dict that index-s deck objects with their identifier (deck.ident)
         - matches: A list of matches that the player is associated with
+        - matchesByNumber: The player's matches indexed by match number
+        - openMatches: The player's matches that are not certified (or dead), indexed by match number
+        - tallies: Running counts of the player's certified matches, wins, draws, and byes
         - discordUser: A copy of the player's associated discord user object
 """
 
 class player:
+    __slots__ = ( "saveLocation", "discordUser", "discordID", "name", "triceName", "status",
+                  "decks", "matches", "matchesByNumber", "openMatches", "tallies",
+                  "matchTallies", "opponents" )
+
     # The class constructor
     def __init__( self, name: str = "", discordID: str = "" ):
         self.saveLocation = f'{name}.xml'
         self.discordUser = ""
-        self.discordID = discordID
+        self.discordID = internID( discordID )
         self.name = name
         self.triceName = ""
         self.status  = "active"
         self.decks   = { }
         self.matches = [ ]
+        self.matchesByNumber = { }
+        self.openMatches = { }
+        self.tallies = { "certified": 0, "byes": 0, "wins": 0, "draws": 0 }
+        self.matchTallies = { }
         self.opponents = set( )
 
     def __str__( self ):
@@ -88,45 +101,16 @@ class player:
         return "\u200b" # Widthless whitespace char to prevent Embed issues
 
     def countByes( self ) -> int:
-        return sum( 1 for mtch in self.matches if mtch.isBye() )
+        return self.tallies["byes"]
 
     async def getDeckEmbed( self, a_deckname: str ) -> discord.Embed:
-        digest = discord.Embed( title=f"**{self.name}'s Deck,** **{a_deckname}**: **{self.decks[a_deckname].deckHash}**" )
-
-        fieldVals: dict = { "Sideboard": [] }
-        for card_ in self.decks[a_deckname].cards:
-            if card_ == "":
-                continue
-            isSideboard = "SB:" in card_
-            if isSideboard:
-                card_ = card_.partition( "SB:" )[-1].strip()
-            
-            cardName = card_.partition( " " )[-1].strip()
-                
-            try:
-                tmpCard = cardsDB.getCard( cardName )
-            except CardNotFoundError as ex:
-                typesList = []
-                typesList.append("Unknown")
-                tmpCard = card( cardName, "normal", typesList )
-
-            if (not isSideboard) and (not getPrimaryType(tmpCard.types) in fieldVals ):
-                fieldVals[getPrimaryType(tmpCard.types)] = []
-            fieldVals["Sideboard" if isSideboard else getPrimaryType(tmpCard.types)].append( card_ )
-        # The embed looks bad if the fields that form a row are vastly different lengths
-        # So, they are sorted (except for the sideboard)
-        fieldKeys: list = [ key for key in fieldVals if key != "Sideboard" ]
-        fieldKeys.sort( key = lambda x: len(fieldVals[x]), reverse=True )
-
-        for field in fieldKeys:
-            count = sum( [ int(c.partition( " " )[0]) for c in fieldVals[field] ] )
-            digest.add_field( name=f'{field} ({count}):', value="\n".join(fieldVals[field]) )
-
-        # The Sideboard should always be displayed last
-        if len(fieldVals["Sideboard"]) > 0:
-            count = sum( [ int(c.partition( " " )[0]) for c in fieldVals["Sideboard"] ] )
-            digest.add_field( name=f'Sideboard ({count}):', value="\n".join(fieldVals["Sideboard"]) )
+        return self.buildDeckEmbed( a_deckname )
 
+    # The deck's layout is cached on the deck, so this is cheap after the first time a deck is shown
+    def buildDeckEmbed( self, a_deckname: str ) -> discord.Embed:
+        digest = discord.Embed( title=f"**{self.name}'s Deck,** **{a_deckname}**: **{self.decks[a_deckname].deckHash}**" )
+        for name, value in self.decks[a_deckname].getEmbedFields( ):
+            digest.add_field( name=name, value=value )
         return digest
 
     def pairingString( self ):
@@ -148,105 +132,121 @@ class player:
         self.status = a_status
 
     def hasOpenMatch( self ) -> bool:
-        digest = False
-        for mtch in self.matches:
-            digest |= not mtch.isCertified( )
-        return digest
+        return len( self.openMatches ) > 0
 
     def addOpponent( self, a_plyr: int ) -> None:
         if a_plyr != self.discordID:
-            self.opponents.add( a_plyr )
+            self.opponents.add( internID( a_plyr ) )
 
     def removeOpponent( self, a_plyr ) -> None:
         if a_plyr in self.opponents:
             self.opponents.remove( a_plyr )
 
     async def removeMatch( self, a_matchNum: int ) -> None:
-        index = -1
-        for i in range(len(self.matches)):
-            if self.matches[i].matchNumber == a_matchNum:
-                index = i
-                break
-        if index == -1:
+        if not a_matchNum in self.matchesByNumber:
             return
-        for plyr in self.matches[i].activePlayers:
+        mtch = self.matchesByNumber.pop( a_matchNum )
+        self.openMatches.pop( a_matchNum, None )
+        self._untallyMatch( a_matchNum )
+        mtch.observers.remove( self )
+        for plyr in mtch.activePlayers:
             self.removeOpponent( plyr )
-        for plyr in self.matches[i].droppedPlayers:
+        for plyr in mtch.droppedPlayers:
             self.removeOpponent( plyr )
-        del( self.matches[i] )
+        self.matches.remove( mtch )
         self.saveXML( )
 
     def addMatch( self, a_mtch: match ) -> None:
         self.matches.append( a_mtch )
+        self.matchesByNumber[a_mtch.matchNumber] = a_mtch
+        a_mtch.observers.append( self )
+        self.matchUpdated( a_mtch )
         for plyr in a_mtch.activePlayers:
             self.addOpponent( plyr )
         for plyr in a_mtch.droppedPlayers:
             self.addOpponent( plyr )
 
+    # Called by the player's matches whenever their status or winner changes
+    def matchUpdated( self, a_mtch: match ) -> None:
+        if a_mtch.isCertified() or a_mtch.isDead():
+            self.openMatches.pop( a_mtch.matchNumber, None )
+        else:
+            self.openMatches[a_mtch.matchNumber] = a_mtch
+        # The match's old contribution to the tallies is swapped for its new one
+        self._untallyMatch( a_mtch.matchNumber )
+        if a_mtch.isCertified():
+            tally = { "certified": 1, "byes": int(a_mtch.isBye()), "wins": int(a_mtch.winner == self.discordID), "draws": int(a_mtch.isDraw()) }
+            self.matchTallies[a_mtch.matchNumber] = tally
+            for key in tally:
+                self.tallies[key] += tally[key]
+
+    def _untallyMatch( self, a_matchNum: int ) -> None:
+        tally = self.matchTallies.pop( a_matchNum, None )
+        if tally is None:
+            return
+        for key in tally:
+            self.tallies[key] -= tally[key]
+
+    # Returns None if the player isn't in a match with that number
     def getMatch( self, a_matchNum: int ) -> match:
-        for mtch in self.matches:
-            if mtch.matchNumber == a_matchNum:
-                return mtch
-        return match( [] )
+        return self.matchesByNumber.get( a_matchNum )
 
     # Find the index of the not certified match closest to the end of the match array
     # Returns 1 if no open matches exist; otherwise, returns a negative index
     def findOpenMatchIndex( self ) -> int:
         if not self.hasOpenMatch( ):
             return 1
-        digest = -1
-        while self.matches[digest].isCertified() and abs(digest) <= len(self.matches):
-            digest -= 1
-        return digest
-
+        # The open match is almost always one of the last matches, so the search starts at the end
+        openMatch = self.findOpenMatch( )
+        for index in range( -1, -len(self.matches) - 1, -1 ):
+            if self.matches[index] is openMatch:
+                return index
+        return 1
+
+    # A player is almost never in more than one open match, so this is effectively O(1)
     def findOpenMatch( self ) -> match:
-        index = self.findOpenMatchIndex( )
-        if index == 1:
-            # print( f'The reported index was one. Returning an empty match.' )
+        if not self.hasOpenMatch( ):
             return match( [] )
-        # print( f'The reported index was not one. Returning an the correct match.' )
-        return self.matches[index]
+        return self.openMatches[max( self.openMatches )]
 
     def findOpenMatchNumber( self ) -> int:
-        index = self.findOpenMatchIndex( )
-        if index == 1:
+        if not self.hasOpenMatch( ):
             return -1
-        return self.matches[index].matchNumber
+        return max( self.openMatches )
 
     async def drop( self ) -> None:
         self.status = "dropped"
         digest = []
         for match in self.matches:
-            if match.status != "certified":
+            if not match.isCertified():
                 await match.dropPlayer( self.name )
 
     async def confirmResult( self ) -> str:
-        index = self.findOpenMatchIndex( )
-        if index == 1:
+        if not self.hasOpenMatch( ):
             return f'you are not in any open matches.'
-        return await self.matches[index].confirmResult( self.name )
+        return await self.findOpenMatch().confirmResult( self.name )
 
     async def recordWin( self ) -> str:
-        index = self.findOpenMatchIndex( )
-        if index == 1:
+        if not self.hasOpenMatch( ):
             return ""
-        return await self.matches[index].recordResult( self.name, "win" )
+        return await self.findOpenMatch().recordResult( self.name, "win" )
 
     async def recordDraw( self ) -> str:
-        index = self.findOpenMatchIndex( )
-        if index == 1:
+        if not self.hasOpenMatch( ):
             return ""
-        digest  = await self.matches[index].recordResult(  self.name, "draw" )
-        digest += await self.matches[index].confirmResult( self.name )
+        mtch = self.findOpenMatch( )
+        digest  = await mtch.recordResult(  self.name, "draw" )
+        digest += await mtch.confirmResult( self.name )
         return digest
 
     # Addes a deck to the list of decks
-    def addDeck( self, a_ident: str = "", a_decklist: str = "" ) -> None:
+    # A deck that has already been built from the decklist can be passed in
+    def addDeck( self, a_ident: str = "", a_decklist: str = "", a_deck: deck = None ) -> None:
         # Removes an deck instead of overwriting it to keep self.decks in chrono order
         print( a_ident, a_decklist )
         if a_ident in self.decks:
             del( self.decks[a_ident] )
-        self.decks[a_ident] = deck( a_ident, a_decklist )
+        self.decks[a_ident] = deck( a_ident, a_decklist ) if a_deck is None else a_deck
 
     # A coroutine that returns a string for use in the generallized verification commands
     # An author is needed only when admin run the command
@@ -256,7 +256,7 @@ class player:
         del( self.decks[a_ident] )
         self.saveXML( )
         if author != "":
-            await self.discordUser.send( content=f'Your deck {a_ident} has been removed by tournament admin.' )
+            outbox.send( self.discordUser, messagePriority.DIRECT_MESSAGE, content=f'Your deck {a_ident} has been removed by tournament admin.' )
             return f'{author}, the deck {a_ident} has been removed from {self.getMention()}.'
         return f'{self.getMention()}, your decklist whose name or deck hash was "{a_ident}" has been deleted.'
 
@@ -277,32 +277,31 @@ class player:
                 digest.append( mtch )
         return digest
 
+    def countCertMatches( self, withBye: bool=True ) -> int:
+        if withBye:
+            return self.tallies["certified"]
+        return self.tallies["certified"] - self.tallies["byes"]
+
     # Tallies the number of matches that the player is in, has won, and have been certified.
     def getMatchPoints( self, withBye: bool=True ) -> float:
-        digest = 0
-        certMatches = self.getCertMatches( withBye )
-        for mtch in certMatches:
-            if mtch.winner == self.discordID:
-                digest += 3 #4
-            elif withBye and mtch.isBye():
-                digest += 3
-            elif mtch.isDraw():
-                digest += 1 #0.5
-            else: # Lose gets no points
-                digest += 0 #-2.25
+        digest  = 3*self.tallies["wins"] #4
+        digest += 1*self.tallies["draws"] #0.5
+        if withBye:
+            digest += 3*self.tallies["byes"]
+        # Lose gets no points #-2.25
         return digest
 
     # Calculates the percentage of game the player has won
     def getMatchWinPercentage( self, withBye: bool=True ) -> float:
-        certMatches = self.getCertMatches( withBye )
-        if len( certMatches ) == 0:
+        certCount = self.countCertMatches( withBye )
+        if certCount == 0:
             return 0.0
-        digest = self.getNumberOfWins( )/( len(certMatches)*1.0 )
-        #digest = self.getMatchPoints( withBye )/( len(certMatches)*4. )
+        digest = self.getNumberOfWins( )/( certCount*1.0 )
+        #digest = self.getMatchPoints( withBye )/( certCount*4. )
         return digest #if digest >= 1./3 else 1./3
 
     def getNumberOfWins( self ) -> int:
-        return sum( [ 1 if mtch.winner == self.discordID else 0 for mtch in self.matches if mtch.isCertified( ) ] )
+        return self.tallies["wins"]
 
     # Saves the overview of the player and their deck(s)
     # Matches aren't saved with the player. They are save seperately.
@@ -319,11 +318,11 @@ class player:
         for ident in self.decks:
             digest += self.decks[ident].exportXMLString( '\t' )
         digest += '</player>'
-        with open( a_filename, 'w+' ) as xmlFile:
-            xmlFile.write( digest )
+        saveFile( a_filename, digest )
 
     # Loads an xml file saved with the class after construction
     def loadXML( self, a_filename: str ) -> None:
+        waitForSave( a_filename )
         xmlTree = ET.parse( a_filename )
         self.saveLocation = a_filename
         self.name = fromXML(xmlTree.getroot().find( 'name' ).text)
@@ -332,7 +331,7 @@ class player:
             self.triceName = ""
         self.discordID  = fromXML(xmlTree.getroot().find( 'discord' ).attrib['id'])
         if self.discordID != "":
-            self.discordID = int( self.discordID )
+            self.discordID = internID( int( self.discordID ) )
         self.status = fromXML(xmlTree.getroot().find( "status" ).text)
         for deckTag in xmlTree.getroot().findall('deck'):
             self.decks[deckTag.attrib['ident']] = deck()
@@ -0,0 +1,99 @@
+""" This module seats a whole room of players into pods, e.g. for a round of Commander """
+# Imports of standard libraries
+
+# Partial imports from standard libraries
+
+# Include typing help
+from typing import List, Tuple
+
+# External libraries
+
+# Local modules
+from .player import player
+
+
+# How many of the next unseated players are considered for each seat
+SEATING_WINDOW = 12
+# How many times the swaps between neighbouring pods are retried
+IMPROVEMENT_PASSES = 2
+
+
+def podSizes( count: int, podSize: int ) -> List[int]:
+    """
+    The sizes of the pods that seat everyone, with as few pods one player
+    short as possible, e.g. 10 players in pods of 4 sit as 4, 3, 3. The short
+    pods come last. If everyone can't be seated (e.g. 5 players in pods of 4),
+    or a pod one player short wouldn't be a game, there are only full pods and
+    the players that don't fit are left out of the sizes.
+    """
+    short = ( podSize - count % podSize ) % podSize
+    if podSize < 3 or ( podSize - 1 ) * short > count:
+        return [ podSize ] * ( count // podSize )
+    full = ( count - ( podSize - 1 ) * short ) // podSize
+    return [ podSize ] * full + [ podSize - 1 ] * short
+
+def countRepeats( pod: List[player] ) -> int:
+    """ The number of pairs of players in the pod that have played each other """
+    return sum( 1 for i, A in enumerate(pod) for B in pod[i+1:] if B.discordID in A.opponents )
+
+def _repeatsWith( plyr: player, pod: List[player] ) -> int:
+    return sum( 1 for other in pod if other.discordID in plyr.opponents )
+
+def seatPods( plyrs: List[player], podSize: int, window: int = SEATING_WINDOW ) -> Tuple[List[List[player]], List[player]]:
+    """
+    Seats the players into pods, trying to keep each pod free of players that
+    have already played each other. The players are given best first, and
+    players are only seated near their place in that order, so pods stay
+    within their score brackets as much as possible. Returns the pods and the
+    players that couldn't be seated.
+    """
+    sizes = podSizes( len(plyrs), podSize )
+    seated = sum( sizes )
+    remaining = list( plyrs[:seated] )
+    unseated = list( plyrs[seated:] )
+
+    pods: List = [ ]
+    for size in sizes:
+        pod = [ remaining.pop( 0 ) ]
+        while len(pod) < size:
+            # The first player that adds the fewest repeats, which is usually one without any
+            best = 0
+            bestRepeats = _repeatsWith( remaining[0], pod )
+            for i in range( 1, min( window, len(remaining) ) ):
+                if bestRepeats == 0:
+                    break
+                repeats = _repeatsWith( remaining[i], pod )
+                if repeats < bestRepeats:
+                    best, bestRepeats = i, repeats
+            pod.append( remaining.pop( best ) )
+        pods.append( pod )
+
+    _improvePods( pods )
+    return pods, unseated
+
+def _improvePods( pods: List[List[player]] ) -> None:
+    """ Swaps players between neighbouring pods when that removes repeats """
+    for _ in range( IMPROVEMENT_PASSES ):
+        improved = False
+        for i in range( len(pods) ):
+            if countRepeats( pods[i] ) == 0:
+                continue
+            for j in ( i - 1, i + 1 ):
+                if 0 <= j < len(pods) and _swapOnce( pods[i], pods[j] ):
+                    improved = True
+                    break
+        if not improved:
+            return
+
+def _swapOnce( A: List[player], B: List[player] ) -> bool:
+    """ Makes the first swap between the pods that lowers their repeats, and returns whether there was one """
+    before = countRepeats( A ) + countRepeats( B )
+    for a, plyrA in enumerate( A ):
+        if _repeatsWith( plyrA, A[:a] + A[a+1:] ) == 0:
+            continue
+        for b, plyrB in enumerate( B ):
+            A[a], B[b] = plyrB, plyrA
+            if countRepeats( A ) + countRepeats( B ) < before:
+                return True
+            A[a], B[b] = plyrA, plyrB
+    return False
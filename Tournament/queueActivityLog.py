@@ -0,0 +1,210 @@
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+import traceback
+
+from enum import IntEnum
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from .blocking import getBlockingPool
+
+
+"""
+    This class stores a tournament's queue activity in an append-only sqlite
+    database next to the rest of the tournament's files.
+    It currently has the following functionities:
+        - Players joining, leaving, and being paired from the queue are recorded with numeric timestamps
+        - Events recorded on the event loop are written in batches by the disk pool
+        - Hourly rollups of joins, pairings, and how long players waited to be paired
+        - Raw events older than the raw retention are folded into the hourly rollups and deleted
+        - Rollups older than the rollup retention are deleted
+
+    The class has the following member variables:
+        - location: The path of the database
+        - rawRetention: How long raw events are kept (in seconds)
+        - rollupRetention: How long hourly rollups are kept (in seconds)
+        - pending: Events that have been recorded but not written yet
+"""
+
+HOUR = 60*60
+DAY  = 24*HOUR
+
+class queueEvent(IntEnum):
+    JOINED = 0
+    LEFT   = 1
+    PAIRED = 2
+
+
+class queueActivityLog:
+    def __init__( self, location: str, rawRetention: float = 30*DAY, rollupRetention: float = 365*DAY ):
+        self.location = location
+        self.rawRetention = rawRetention
+        self.rollupRetention = rollupRetention
+        self.lastPrune = 0
+        # Queue commands and pairings don't always run on the same thread
+        self.lock = threading.Lock( )
+        self.pending: List[Tuple[float, int, int]] = [ ]
+        self.pendingLock = threading.Lock( )
+        self.flushQueued = False
+        # While a batch is open, events are held until it ends
+        self.batches = 0
+        dirName = os.path.dirname( location )
+        if dirName != "" and not os.path.isdir( dirName ):
+            os.makedirs( dirName )
+        self.db = sqlite3.connect( location, check_same_thread=False )
+        with self.lock, self.db:
+            self.db.execute( "PRAGMA journal_mode=WAL" )
+            self.db.execute( "PRAGMA synchronous=NORMAL" )
+            self.db.execute( "CREATE TABLE IF NOT EXISTS events ( time REAL NOT NULL, player INTEGER NOT NULL, kind INTEGER NOT NULL )" )
+            self.db.execute( "CREATE INDEX IF NOT EXISTS eventTimes ON events ( time )" )
+            self.db.execute( "CREATE TABLE IF NOT EXISTS hourly ( hour INTEGER PRIMARY KEY, joins INTEGER NOT NULL, leaves INTEGER NOT NULL, pairings INTEGER NOT NULL, waits INTEGER NOT NULL, waitTotal REAL NOT NULL )" )
+        self.prune( )
+
+    def __len__( self ) -> int:
+        self.flush( )
+        with self.lock:
+            return self.db.execute( "SELECT COUNT(*) FROM events" ).fetchone()[0]
+
+    # Old events are folded into the rollups, so there can be history without any events
+    def isEmpty( self ) -> bool:
+        self.flush( )
+        with self.lock:
+            return self.db.execute( "SELECT NOT EXISTS ( SELECT 1 FROM events ) AND NOT EXISTS ( SELECT 1 FROM hourly )" ).fetchone()[0] == 1
+
+    def close( self ) -> None:
+        self.flush( )
+        with self.lock:
+            self.db.close( )
+
+    # Events recorded on the event loop are written by the disk pool, and every
+    # event recorded while that write is waiting goes into the same INSERT.
+    # Elsewhere, the event is written right away.
+    def record( self, plyr: int, kind: queueEvent, when: float = None ) -> None:
+        if when is None:
+            when = time.time( )
+        with self.pendingLock:
+            self.pending.append( (when, int(plyr), int(kind)) )
+            if self.batches > 0:
+                return
+        self._queueFlush( )
+
+    # Holds the events recorded in it (e.g. during a pairing pass) and writes them together when it ends
+    @contextmanager
+    def batch( self ):
+        with self.pendingLock:
+            self.batches += 1
+        try:
+            yield self
+        finally:
+            with self.pendingLock:
+                self.batches -= 1
+            self._queueFlush( )
+
+    def _queueFlush( self ) -> None:
+        try:
+            asyncio.get_running_loop( )
+        except RuntimeError:
+            self.flush( )
+            return
+        with self.pendingLock:
+            if self.flushQueued or self.batches > 0:
+                return
+            self.flushQueued = True
+        getBlockingPool( "disk" ).submit( self._flushQueued )
+
+    # Writes the events that have been recorded but not written yet
+    def flush( self ) -> None:
+        while True:
+            with self.pendingLock:
+                events, self.pending = self.pending, [ ]
+                if len(events) == 0:
+                    self.flushQueued = False
+                    return
+            self.recordMany( events )
+            if events[-1][0] - self.lastPrune >= HOUR:
+                self.prune( events[-1][0] )
+
+    def _flushQueued( self ) -> None:
+        try:
+            self.flush( )
+        except Exception as ex:
+            with self.pendingLock:
+                self.flushQueued = False
+            print( f'Error while recording queue activity to {self.location}' )
+            traceback.print_exception( type(ex), ex, ex.__traceback__ )
+
+    def recordMany( self, events: List[Tuple[float, int, queueEvent]] ) -> None:
+        with self.lock, self.db:
+            self.db.executemany( "INSERT INTO events VALUES ( ?, ?, ? )", [ (when, int(plyr), int(kind)) for when, plyr, kind in events ] )
+
+    # Walks events in time order and sorts them into hourly buckets. A wait
+    # counts towards the hour that the player was paired in.
+    # Returns the buckets and the rowids of players that are still waiting.
+    def _rollUp( self, events ) -> Tuple[Dict[int, List], Dict[int, int]]:
+        buckets: Dict[int, List] = { }
+        waiting: Dict[int, Tuple[int, float]] = { }
+        for rowid, when, plyr, kind in events:
+            bucket = buckets.setdefault( int(when // HOUR) * HOUR, [ 0, 0, 0, 0, 0.0 ] )
+            if kind == queueEvent.JOINED:
+                bucket[0] += 1
+                waiting[plyr] = ( rowid, when )
+            elif kind == queueEvent.LEFT:
+                bucket[1] += 1
+                waiting.pop( plyr, None )
+            else:
+                bucket[2] += 1
+                joined = waiting.pop( plyr, None )
+                if not joined is None:
+                    bucket[3] += 1
+                    bucket[4] += when - joined[1]
+        return buckets, { plyr: joined[0] for plyr, joined in waiting.items() }
+
+    def prune( self, now: float = None ) -> None:
+        if now is None:
+            now = time.time( )
+        self.lastPrune = now
+        cutoff = now - self.rawRetention
+        with self.lock, self.db:
+            events = self.db.execute( "SELECT rowid, time, player, kind FROM events WHERE time < ? ORDER BY time, rowid", (cutoff,) ).fetchall()
+            if len(events) > 0:
+                buckets, waiting = self._rollUp( events )
+                # Players that joined before the cutoff but are still waiting keep their join
+                for rowid, when, plyr, kind in events:
+                    if kind == queueEvent.JOINED and waiting.get( plyr ) == rowid:
+                        buckets[int(when // HOUR) * HOUR][0] -= 1
+                self.db.executemany( "INSERT INTO hourly VALUES ( ?, ?, ?, ?, ?, ? ) ON CONFLICT ( hour ) DO UPDATE SET joins = joins + excluded.joins, leaves = leaves + excluded.leaves, pairings = pairings + excluded.pairings, waits = waits + excluded.waits, waitTotal = waitTotal + excluded.waitTotal",
+                                     [ (hour, *bucket) for hour, bucket in buckets.items() ] )
+                kept = set( waiting.values() )
+                self.db.executemany( "DELETE FROM events WHERE rowid = ?", [ (event[0],) for event in events if not event[0] in kept ] )
+            self.db.execute( "DELETE FROM hourly WHERE hour < ?", (now - self.rollupRetention,) )
+
+    # Returns a dict for each hour with queue activity (oldest first), which has
+    # the number of joins, leaves, and pairings, and the average wait in seconds
+    def hourlyRollups( self, since: float = 0 ) -> List[Dict]:
+        self.flush( )
+        with self.lock:
+            rows = self.db.execute( "SELECT hour, joins, leaves, pairings, waits, waitTotal FROM hourly WHERE hour >= ?", (int(since // HOUR) * HOUR,) ).fetchall()
+            events = self.db.execute( "SELECT rowid, time, player, kind FROM events ORDER BY time, rowid" ).fetchall()
+        totals: Dict[int, List] = { row[0]: list(row[1:]) for row in rows }
+        for hour, bucket in self._rollUp( events )[0].items():
+            if hour < since // HOUR * HOUR:
+                continue
+            total = totals.setdefault( hour, [ 0, 0, 0, 0, 0.0 ] )
+            for i, value in enumerate( bucket ):
+                total[i] += value
+        digest = [ ]
+        for hour in sorted( totals ):
+            joins, leaves, pairings, waits, waitTotal = totals[hour]
+            digest.append( { "hour": hour, "joins": joins, "leaves": leaves, "pairings": pairings, "waits": waits, "averageWait": waitTotal/waits if waits > 0 else None } )
+        return digest
+
+    # The average number of seconds between joining the queue and being paired, or None if no one has been paired
+    def averageTimeToPair( self, since: float = 0 ) -> float:
+        rollups = self.hourlyRollups( since )
+        waits = sum( rollup["waits"] for rollup in rollups )
+        if waits == 0:
+            return None
+        return sum( rollup["averageWait"]*rollup["waits"] for rollup in rollups if rollup["waits"] > 0 ) / waits
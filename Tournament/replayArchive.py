@@ -0,0 +1,193 @@
+import os
+import shutil
+import asyncio
+import hashlib
+import tempfile
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+
+from xml.sax.saxutils import quoteattr
+
+from functools import partial
+from typing import IO, Dict, List
+
+from .tricebot import TriceBot, TriceBotResult, TriceBotStatus
+from .utils import *
+from .blocking import runBlocking, saveFile, waitForSave
+
+
+"""
+    This class keeps a tournament's replays on disk so that they only need to
+    be downloaded from tricebot once.
+    It currently has the following functionities:
+        - Replays are appended to a zip archive as they are fetched
+        - A manifest records which match each replay belongs to and its checksum
+        - Only replays that are not in the archive are downloaded
+        - The archive and manifest are checked against each other when loaded
+        - Each replay's checksum is checked before the archive is first used, and replays that don't match are fetched again
+
+    The class has the following member variables:
+        - dirName: The directory the archive and manifest are stored in
+        - compressionLevel: The zlib level replays are compressed at (0-9)
+        - replays: A dict from replay names to their match number and sha256 checksum
+        - verified: Whether the replays have been checked against their checksums
+"""
+
+class replayArchive:
+    def __init__( self, dirName: str, compressionLevel: int = 6 ):
+        self.dirName = dirName
+        self.compressionLevel = compressionLevel
+        self.archiveLocation  = f'{dirName}/replays.zip'
+        self.manifestLocation = f'{dirName}/manifest.xml'
+        self.replays: Dict[str, Dict] = { }
+        # Appends to the zip happen off of the event loop, one at a time
+        self.zipLock = threading.Lock( )
+        self.verified = False
+        # A manifest that is still being written doesn't exist yet
+        waitForSave( self.manifestLocation )
+        if os.path.isfile( self.manifestLocation ) or os.path.isfile( self.archiveLocation ):
+            self.loadXML( )
+
+    def __len__( self ) -> int:
+        return len( self.replays )
+
+    def hasReplay( self, name: str ) -> bool:
+        return name in self.replays
+
+    def _appendReplay( self, name: str, matchNum: int, spool ) -> None:
+        with spool, self.zipLock:
+            # Something else fetched this replay while it was downloading
+            if name in self.replays:
+                return
+            if not os.path.isdir( self.dirName ):
+                os.makedirs( self.dirName )
+            checksum = hashlib.sha256( )
+            with zipfile.ZipFile( self.archiveLocation, "a", zipfile.ZIP_DEFLATED, compresslevel=self.compressionLevel ) as zipf:
+                with zipf.open( name, "w" ) as entry:
+                    for chunk in iter( partial( spool.read, 64 * 1024 ), b"" ):
+                        checksum.update( chunk )
+                        entry.write( chunk )
+            self.replays[name] = { "match": matchNum, "checksum": checksum.hexdigest() }
+
+    # Checks each archived replay against its checksum. Replays that don't match,
+    # or can't be read, are taken out of the archive so that they are fetched again.
+    def verify( self ) -> None:
+        with self.zipLock:
+            if self.verified:
+                return
+            self.verified = True
+            if len( self.replays ) == 0:
+                return
+            corrupt = set( )
+            with zipfile.ZipFile( self.archiveLocation ) as zipf:
+                for name, replay in self.replays.items():
+                    checksum = hashlib.sha256( )
+                    try:
+                        with zipf.open( name ) as entry:
+                            for chunk in iter( partial( entry.read, 64 * 1024 ), b"" ):
+                                checksum.update( chunk )
+                    except ( OSError, zipfile.BadZipFile ):
+                        corrupt.add( name )
+                        continue
+                    if checksum.hexdigest() != replay["checksum"]:
+                        corrupt.add( name )
+            if len( corrupt ) == 0:
+                return
+            # A zip's entries can't be removed, so the archive is copied without them
+            rebuilt = f'{self.archiveLocation}.tmp'
+            with zipfile.ZipFile( self.archiveLocation ) as zipf, zipfile.ZipFile( rebuilt, "w", zipfile.ZIP_DEFLATED, compresslevel=self.compressionLevel ) as newZip:
+                for name in self.replays:
+                    if not name in corrupt:
+                        with zipf.open( name ) as entry, newZip.open( name, "w" ) as newEntry:
+                            shutil.copyfileobj( entry, newEntry, 64 * 1024 )
+            os.replace( rebuilt, self.archiveLocation )
+            for name in corrupt:
+                del self.replays[name]
+            self.saveXML( )
+
+    # Copies the archive so that it can be sent while more replays are appended
+    def _snapshot( self ):
+        digest = tempfile.TemporaryFile( mode="wb+", prefix="replays", suffix=".zip" )
+        with self.zipLock, open( self.archiveLocation, "rb" ) as archive:
+            shutil.copyfileobj( archive, digest )
+        digest.seek( 0 )
+        return digest
+
+    # Adds a match's replay to the archive, unless it is already there. The
+    # manifest can be left for the caller to save once it has added a batch.
+    async def fetch( self, triceBot: TriceBot, matchNum: int, replayURL: str, saveManifest: bool = True ) -> TriceBotResult:
+        if not self.verified:
+            await runBlocking( "disk", self.verify )
+        name = triceBot.getReplayName( replayURL )
+        if self.hasReplay( name ):
+            return TriceBotResult( TriceBotStatus.SUCCESS, None, 0 )
+        digest = await triceBot.fetchReplay( replayURL )
+        if digest.success:
+            await runBlocking( "disk", self._appendReplay, name, matchNum, digest.response )
+            if saveManifest:
+                self.saveXML( )
+        return digest
+
+    # Brings the archive up to date with the given replays (by match number).
+    # The names of replays that couldn't be fetched are added to replaysNotFound, if it is given.
+    # Returns a copy of the archive (which the caller needs to close) or None if it is empty.
+    async def update( self, triceBot: TriceBot, replayURLs: Dict[int, str], replaysNotFound: List[str] = None, concurrency: int = 8, progress = None ) -> IO[bytes]:
+        if replaysNotFound is None:
+            replaysNotFound = [ ]
+        if not self.verified:
+            await runBlocking( "disk", self.verify )
+        limiter = asyncio.Semaphore( concurrency )
+        total = len( replayURLs )
+        finished = 0
+        archived = len( self.replays )
+
+        async def fetchOne( matchNum: int, replayURL: str ) -> None:
+            nonlocal finished
+            async with limiter:
+                result = await self.fetch( triceBot, matchNum, replayURL, saveManifest=False )
+            if not result.success:
+                replaysNotFound.append( triceBot.getReplayName( replayURL ) )
+            finished += 1
+            if not progress is None:
+                await progress( finished, total )
+
+        await asyncio.gather( *[ fetchOne( num, url ) for num, url in replayURLs.items() ] )
+        # The manifest is saved once for the whole batch
+        if len( self.replays ) != archived:
+            self.saveXML( )
+        if len( self.replays ) == 0:
+            return None
+        return await runBlocking( "disk", self._snapshot )
+
+    def saveXML( self ) -> None:
+        digest  = "<?xml version='1.0'?>\n"
+        digest += '<replays>\n'
+        for name, replay in list( self.replays.items() ):
+            digest += f'\t<replay name={quoteattr(name)} match="{replay["match"]}" checksum="{replay["checksum"]}"/>\n'
+        digest += '</replays>'
+        saveFile( self.manifestLocation, toSafeXML(digest) )
+
+    # Loads the manifest, keeping only the replays that are actually in the archive
+    def loadXML( self ) -> None:
+        try:
+            with zipfile.ZipFile( self.archiveLocation ) as zipf:
+                archived = set( zipf.namelist() )
+        except ( OSError, zipfile.BadZipFile ):
+            # The archive is missing or was cut off mid-write, so start over
+            archived = set( )
+            if os.path.isfile( self.archiveLocation ):
+                os.remove( self.archiveLocation )
+        waitForSave( self.manifestLocation )
+        manifest = ET.parse( self.manifestLocation ).getroot() if os.path.isfile( self.manifestLocation ) else [ ]
+        for replay in manifest:
+            name = fromXML( replay.attrib["name"] )
+            if name in archived:
+                self.replays[name] = { "match": int( fromXML( replay.attrib["match"] ) ), "checksum": fromXML( replay.attrib["checksum"] ) }
+        # Replays that were archived just before a crash, but never made it into the manifest
+        missing = archived - set( self.replays )
+        if len( missing ) > 0:
+            with zipfile.ZipFile( self.archiveLocation ) as zipf:
+                for name in missing:
+                    self.replays[name] = { "match": -1, "checksum": hashlib.sha256( zipf.read( name ) ).hexdigest() }
+            self.saveXML( )
@@ -0,0 +1,230 @@
+""" This module contains the router that lets SquireBot run as several processes (shards), each owning the guilds that Discord sends to it """
+# Imports of standard libraries
+import json
+import shlex
+import asyncio
+import itertools
+
+# Partial imports from standard libraries
+from time import perf_counter
+
+# Include typing help
+from typing import Callable, Dict, List, Tuple
+
+# External libraries
+
+# Local modules
+from .metrics import counter, histogram, registerMetric, LATENCY_BUCKETS
+from .exceptions import ShardCallError
+
+
+routedCalls = registerMetric( counter( "squirebot_routed_calls_total", "Calls made through the shard router, by whether they were run by this shard or another one", ( "where", ) ) )
+remoteCallTime = registerMetric( histogram( "squirebot_remote_call_seconds", "How long calls to other shards took, from sending the call to getting its result", LATENCY_BUCKETS ) )
+
+
+def shardOf( guildID: int, shardCount: int ) -> int:
+    """ The shard that Discord sends a guild's events to """
+    return ( guildID >> 22 ) % shardCount
+
+def parseAddresses( text: str ) -> List[Tuple[str, int]]:
+    """ Parses addresses like "127.0.0.1:7001,127.0.0.1:7002", one per shard """
+    digest = [ ]
+    for address in text.split( "," ):
+        if address.strip() == "":
+            continue
+        host, port = address.strip().rsplit( ":", 1 )
+        digest.append( ( host, int(port) ) )
+    return digest
+
+def splitArguments( content: str ) -> List[str]:
+    """ Splits a command into its arguments like the command parser does, falling back to spaces when the quotes don't match up """
+    try:
+        return shlex.split( content )
+    except ValueError:
+        return content.split( )
+
+
+class shardConnection:
+    """
+    A connection to another shard's router. Calls are sent as JSON lines,
+    each with an ID, so many calls can be waiting on the same connection
+    at once and their results can come back in any order.
+    """
+    def __init__( self, address: Tuple[str, int] ):
+        self.address = address
+        self.reader = None
+        self.writer = None
+        self.listener = None
+        self.lock = asyncio.Lock( )
+        self.callIDs = itertools.count( 1 )
+        self.pending: Dict[int, asyncio.Future] = { }
+
+    def isOpen( self ) -> bool:
+        return not self.writer is None and not self.writer.is_closing()
+
+    async def open( self ) -> None:
+        async with self.lock:
+            if self.isOpen( ):
+                return
+            self.reader, self.writer = await asyncio.open_connection( *self.address )
+            self.listener = asyncio.create_task( self._listen() )
+
+    async def close( self ) -> None:
+        if not self.writer is None:
+            self.writer.close( )
+            self.listener.cancel( )
+            self.writer = None
+        self._failPending( "The connection was closed" )
+
+    async def call( self, name: str, /, **kwargs ):
+        if not self.isOpen( ):
+            await self.open( )
+        callID = next( self.callIDs )
+        future = asyncio.get_running_loop().create_future( )
+        self.pending[callID] = future
+        self.writer.write( json.dumps( { "id": callID, "name": name, "kwargs": kwargs } ).encode() + b'\n' )
+        await self.writer.drain( )
+        return await future
+
+    async def _listen( self ) -> None:
+        try:
+            while True:
+                line = await self.reader.readline( )
+                if line == b'':
+                    break
+                reply = json.loads( line )
+                future = self.pending.pop( reply["id"], None )
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception( ShardCallError( reply["error"] ) )
+                else:
+                    future.set_result( reply["result"] )
+        finally:
+            self._failPending( f'The connection to {self.address[0]}:{self.address[1]} was lost' )
+
+    def _failPending( self, reason: str ) -> None:
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception( ShardCallError( reason ) )
+        self.pending.clear( )
+
+
+class shardRouter:
+    """
+    Runs handlers on the shard that owns the data they need. Each shard
+    registers the same handlers and listens on its own address; a call to
+    this shard runs the handler directly, and a call to another shard is
+    sent over its connection. With one shard, nothing is listened on and
+    every call is local.
+    """
+    def __init__( self, shardID: int = 0, addresses: List[Tuple[str, int]] = [ ] ):
+        self.shardID = shardID
+        self.addresses = list( addresses )
+        self.shardCount = max( 1, len(self.addresses) )
+        self.handlers: Dict[str, Callable] = { }
+        self.connections: Dict[int, shardConnection] = { }
+        self.server = None
+
+    # Registers a coroutine function as a handler, e.g. @router.handler( "locatePlayer" )
+    def handler( self, name: str ) -> Callable:
+        def register( coro: Callable ) -> Callable:
+            self.handlers[name] = coro
+            return coro
+        return register
+
+    def owns( self, guildID: int ) -> bool:
+        return shardOf( guildID, self.shardCount ) == self.shardID
+
+    def ownerOf( self, guildID: int ) -> int:
+        return shardOf( guildID, self.shardCount )
+
+    async def start( self ) -> None:
+        if self.shardCount == 1 or not self.server is None:
+            return
+        host, port = self.addresses[self.shardID]
+        self.server = await asyncio.start_server( self._serve, host, port )
+
+    async def stop( self ) -> None:
+        for conn in self.connections.values():
+            await conn.close( )
+        self.connections.clear( )
+        if not self.server is None:
+            self.server.close( )
+            await self.server.wait_closed( )
+            self.server = None
+
+    async def call( self, shard: int, name: str, /, **kwargs ):
+        """ Runs the handler on the given shard and returns its result. The arguments and result must be JSON. """
+        if shard == self.shardID:
+            routedCalls.inc( "local" )
+            return await self.handlers[name]( **kwargs )
+        routedCalls.inc( "remote" )
+        conn = self.connections.get( shard )
+        if conn is None:
+            conn = self.connections[shard] = shardConnection( self.addresses[shard] )
+        start = perf_counter( )
+        try:
+            return await conn.call( name, **kwargs )
+        finally:
+            remoteCallTime.observe( perf_counter() - start )
+
+    async def dispatch( self, guildID: int, name: str, /, **kwargs ):
+        """ Runs the handler on the shard that owns the guild """
+        return await self.call( self.ownerOf( guildID ), name, **kwargs )
+
+    async def broadcast( self, name: str, /, **kwargs ) -> List:
+        """ Runs the handler on every shard at once, and returns the results in shard order """
+        return await asyncio.gather( *[ self.call( shard, name, **kwargs ) for shard in range( self.shardCount ) ] )
+
+    async def findPlayerShard( self, userID: int, content: str ) -> int:
+        """
+        The shard that should handle a DM from a player. Discord sends every DM
+        to the first shard, but the player's tournaments can be on any of them.
+        Every shard needs a "playerTournaments" handler that returns the names
+        of the player's tournaments in its guilds. When the player is in
+        tournaments on several shards, the message has to name one of them, and
+        None is returned if it doesn't.
+        """
+        if self.shardCount == 1:
+            return self.shardID
+        names = await self.broadcast( "playerTournaments", userID=userID )
+        owning = [ shard for shard, tourns in enumerate( names ) if len(tourns) > 0 ]
+        if len(owning) == 0:
+            return self.shardID
+        if len(owning) == 1:
+            return owning[0]
+        args = set( splitArguments( content ) )
+        named = [ shard for shard in owning if any( name in args for name in names[shard] ) ]
+        return named[0] if len(named) == 1 else None
+
+    async def _serve( self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter ) -> None:
+        # Each call is run in its own task, so a slow handler doesn't hold up the others on this connection
+        tasks = set( )
+        try:
+            while True:
+                line = await reader.readline( )
+                if line == b'':
+                    break
+                task = asyncio.create_task( self._answer( json.loads( line ), writer ) )
+                tasks.add( task )
+                task.add_done_callback( tasks.discard )
+        except ( asyncio.CancelledError, ConnectionError ):
+            # The router was stopped, or the other shard went away
+            pass
+        finally:
+            for task in tasks:
+                task.cancel( )
+            writer.close( )
+
+    async def _answer( self, request: Dict, writer: asyncio.StreamWriter ) -> None:
+        try:
+            handler = self.handlers.get( request["name"] )
+            if handler is None:
+                raise ShardCallError( f'Shard {self.shardID} has no handler called "{request["name"]}"' )
+            reply = { "id": request["id"], "result": await handler( **request["kwargs"] ) }
+        except Exception as ex:
+            reply = { "id": request["id"], "error": f'{type(ex).__name__}: {ex}' }
+        if not writer.is_closing( ):
+            writer.write( json.dumps( reply ).encode() + b'\n' )
+            await writer.drain( )
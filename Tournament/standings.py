@@ -0,0 +1,78 @@
+""" This module contains the cached standings of a tournament and the paged message that shows them """
+from typing import Dict, List
+
+import discord
+
+from .utils import trunk
+from .pagedMessage import pagedMessage
+
+
+# Each line of a page is at most ~35 characters, which keeps each field well under Discord's 1024 character limit
+STANDINGS_PAGE_SIZE = 20
+STANDINGS_HEADERS = ( "Name:", "Points & Win Percent:", "Opp. WP" )
+
+
+class standingsSnapshot:
+    """
+    The standings of a tournament at one point in time. A tournament keeps its
+    snapshot until a match result changes, so everyone looking at the
+    standings shares one calculation. Pages are rendered the first time they
+    are viewed and then reused.
+    """
+    def __init__( self, standings: List[List], pageSize: int = STANDINGS_PAGE_SIZE ):
+        # Place, Player object, Points, MWP, OWP
+        self.standings = standings
+        self.pageSize = pageSize
+        self.pages: Dict[int, discord.Embed] = { }
+        self.positions: Dict[int, int] = None
+
+    def __len__( self ):
+        return len(self.standings[0])
+
+    # Copies of the columns, so that callers can't change the snapshot
+    def toLists( self ) -> List[List]:
+        return [ list(column) for column in self.standings ]
+
+    def pageCount( self ) -> int:
+        return max( 1, (len(self) + self.pageSize - 1) // self.pageSize )
+
+    # The page that a player is on, or the first page if they aren't in the standings
+    def pageOf( self, plyr: int ) -> int:
+        if self.positions is None:
+            self.positions = { p.discordID: i for i, p in enumerate(self.standings[1]) }
+        return self.positions.get( plyr, 0 ) // self.pageSize
+
+    def getPage( self, page: int ) -> discord.Embed:
+        if not page in self.pages:
+            self.pages[page] = self._renderPage( page )
+        return self.pages[page]
+
+    def _renderPage( self, page: int ) -> discord.Embed:
+        places, players, points, MWP, OWP = [ column[page*self.pageSize:(page+1)*self.pageSize] for column in self.standings ]
+        values = [ "\n".join( [ f'{places[i]}) <@{players[i].discordID}>' for i in range(len(places)) ] ),
+                   "\n".join( [ f'{points[i]},\t{trunk(MWP[i])}%' for i in range(len(places)) ] ),
+                   "\n".join( [ f'{trunk(OWP[i])}%' for i in range(len(places)) ] ) ]
+        digest = discord.Embed( )
+        for name, value in zip( STANDINGS_HEADERS, values ):
+            digest.add_field( name=name, value=value if value != "" else "\u200b" )
+        if self.pageCount() > 1:
+            digest.set_footer( text=f'Page {page+1} of {self.pageCount()}' )
+        return digest
+
+
+class standingsMessage( pagedMessage ):
+    """ A standings message. Pages come from the tournament's current snapshot, so turning the page picks up new results. """
+    def __init__( self, tourn, content: str = "", page: int = 0, pageable: bool = True ):
+        super().__init__( content, page )
+        self.tourn = tourn
+        self.pageable = pageable
+
+    def pageCount( self ) -> int:
+        return self.tourn.getStandingsSnapshot().pageCount( )
+
+    def isPageable( self ) -> bool:
+        return self.pageable and super().isPageable( )
+
+    def getPage( self, page: int ) -> discord.Embed:
+        snapshot = self.tourn.getStandingsSnapshot( )
+        return snapshot.getPage( min( page, snapshot.pageCount() - 1 ) )
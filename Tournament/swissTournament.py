@@ -0,0 +1,207 @@
+import os
+import random
+import discord
+
+from typing import Dict, List, Tuple
+
+from .utils import *
+from .tournament import tournament, QUEUE_ACTIVITY_FILE
+from .match import match
+from .player import player
+from .blocking import saveFile
+from .podSeating import podSizes, seatPods, countRepeats
+
+
+# When the greedy pass leaves players that can only be paired into rematches,
+# the pairings at the bottom are redone in random orders this many times
+REPAIR_ATTEMPTS = 20
+
+
+# ---------------- Pairing Engine ----------------
+
+def isValidGroup( plyrs: List[player] ) -> bool:
+    """ Determines if none of the players have played each other """
+    return all( not B.discordID in A.opponents for i, A in enumerate(plyrs) for B in plyrs[i+1:] )
+
+def pairGreedily( plyrs: List[player], matchSize: int ) -> Tuple[List[List[player]], List[player]]:
+    """ Groups players in order with the first players after them that they haven't played. Returns the groups and the players that were left. """
+    groups: List = [ ]
+    leftovers: List = [ ]
+    remaining = list( plyrs )
+    while len(remaining) >= matchSize:
+        group = [ remaining[0] ]
+        for plyr in remaining[1:]:
+            if isValidGroup( group + [ plyr ] ):
+                group.append( plyr )
+                if len(group) == matchSize:
+                    break
+        if len(group) == matchSize:
+            groups.append( group )
+            for plyr in group:
+                remaining.remove( plyr )
+        else:
+            leftovers.append( remaining.pop( 0 ) )
+    return groups, leftovers + remaining
+
+def pairBrackets( brackets: List[List[player]], matchSize: int ) -> Tuple[List[List[player]], List[player]]:
+    """ Pairs each score bracket, best first. Players that can't be paired in their bracket are paired down into the next one. """
+    groups: List = [ ]
+    floaters: List = [ ]
+    for bracket in brackets:
+        # Players that were paired down go first, so they meet the top of the bracket below them
+        bracketGroups, floaters = pairGreedily( floaters + bracket, matchSize )
+        groups += bracketGroups
+    return groups, floaters
+
+def repairPairings( groups: List[List[player]], leftovers: List[player], matchSize: int, attempts: int = REPAIR_ATTEMPTS ) -> Tuple[List[List[player]], int]:
+    """
+    Pairs the players that the brackets couldn't. The bottom pairings are
+    undone and redone together with them, reaching further up each time,
+    until everyone can be paired without a rematch. As a last resort, the
+    leftovers are paired with rematches. Returns the pairings and the number
+    of rematches.
+    """
+    undone = matchSize
+    while len(leftovers) > 0 and undone <= len(groups):
+        kept = groups[:-undone]
+        pool = [ plyr for group in groups[-undone:] for plyr in group ] + leftovers
+        for _ in range( attempts ):
+            newGroups, newLeftovers = pairGreedily( pool, matchSize )
+            if len(newLeftovers) == 0:
+                return kept + newGroups, 0
+            random.shuffle( pool )
+        undone *= 2
+    forced = [ leftovers[i:i+matchSize] for i in range( 0, len(leftovers) - len(leftovers) % matchSize, matchSize ) ]
+    return groups + forced, sum( 1 for group in forced if not isValidGroup( group ) )
+
+
+"""
+    A Swiss tournament is played in rounds. Each round, players are paired
+    against players with the same number of points that they haven't played yet.
+    The matches of a round are all made at once, and the next round can be
+    paired once every match of the current round has been certified.
+"""
+class swissTournament(tournament):
+    def __init__( self, name: str, hostGuildName: str, props: dict = { } ):
+        super().__init__( name, hostGuildName, props )
+        self.round = 0
+        # The match numbers of each round, by round number
+        self.roundMatches: Dict[int, List[int]] = { }
+        # Whether a round is being paired right now
+        self.pairingRound = False
+
+    # ---------------- Embed Generators ----------------
+    def _addStatusFields( self, digest: discord.Embed ) -> None:
+        roundText = "No rounds have been paired yet."
+        if self.round > 0:
+            unfinished = self._unfinishedRoundMatches( )
+            roundText = f'Round {self.round} is being played, and {len(unfinished)} of its {len(self.roundMatches[self.round])} matches have not been certified.'
+        digest.add_field( name="**Round Info.**", value=roundText )
+
+    # ---------------- Round Management ----------------
+
+    def _unfinishedRoundMatches( self ) -> List[int]:
+        return [ num for num in self.roundMatches.get( self.round, [ ] ) if num in self.openMatches or num in self.uncertifiedMatches ]
+
+    # The active players from best to worst, grouped by their points
+    def getScoreBrackets( self ) -> List[List[player]]:
+        snapshot = self.getStandingsSnapshot( )
+        ranked = [ plyr for plyr in snapshot.standings[1] if plyr.discordID in self.activePlayers ]
+        points = { plyr.discordID: pts for plyr, pts in zip( snapshot.standings[1], snapshot.standings[2] ) }
+        # Players without any matches aren't in the standings
+        rankedIDs = { plyr.discordID for plyr in ranked }
+        unranked = [ self.players[plyr] for plyr in self.activePlayers if not plyr in rankedIDs ]
+        random.shuffle( unranked )
+
+        digest: List = [ ]
+        lastPoints = None
+        for plyr in ranked + unranked:
+            pts = points.get( plyr.discordID, 0 )
+            if pts != lastPoints:
+                digest.append( [ ] )
+                lastPoints = pts
+            digest[-1].append( plyr )
+        return digest
+
+    # The pairings (as discord IDs) for the next round, the players that get a bye, and the number of rematches
+    def createRoundPairings( self ) -> Tuple[List[List[int]], List[int], int]:
+        brackets = self.getScoreBrackets( )
+        plyrs = [ plyr for bracket in brackets for plyr in bracket ]
+        # Multiplayer rounds seat everyone, using pods that are one player short,
+        # so there are only byes when that isn't possible. Byes go to the lowest
+        # ranked players that have had the fewest byes.
+        byeCount = len(plyrs) - sum( podSizes( len(plyrs), self.playersPerMatch ) )
+        byes = [ ]
+        if byeCount > 0:
+            ranks = { plyr.discordID: i for i, plyr in enumerate(plyrs) }
+            byes = sorted( plyrs, key=lambda p: ( p.countByes(), -ranks[p.discordID] ) )[:byeCount]
+            brackets = [ [ plyr for plyr in bracket if not plyr in byes ] for bracket in brackets ]
+
+        if self.playersPerMatch > 2:
+            groups, _ = seatPods( [ plyr for bracket in brackets for plyr in bracket ], self.playersPerMatch )
+            rematches = sum( 1 for group in groups if countRepeats( group ) > 0 )
+        else:
+            groups, leftovers = pairBrackets( brackets, self.playersPerMatch )
+            groups, rematches = repairPairings( groups, leftovers, self.playersPerMatch )
+        return [ [ plyr.discordID for plyr in group ] for group in groups ], [ plyr.discordID for plyr in byes ], rematches
+
+    async def pairRound( self ) -> str:
+        if not self.isActive( ):
+            return f'{self.name} is not active, so a round can not be paired.'
+        if not self.bracket is None:
+            return f'{self.name} has been cut to its top players, so its rounds are over. The top cut is paired as its matches finish.'
+        unfinished = self._unfinishedRoundMatches( )
+        if len(unfinished) > 0:
+            return f'round {self.round} of {self.name} still has {len(unfinished)} matches that have not been certified.'
+        if self.pairingRound:
+            return f'round {self.round} of {self.name} is already being paired.'
+        if len(self.activePlayers) < self.playersPerMatch:
+            return f'there are not enough active players in {self.name} to pair a round.'
+
+        pairings, byes, rematches = self.createRoundPairings( )
+        self.pairingRound = True
+        self.round += 1
+        matchCount = len(self.matches)
+        try:
+            for plyr in byes:
+                await self.addBye( plyr )
+            await self.addMatches( pairings )
+        finally:
+            # Whatever matches were made are kept as the round, even if pairing it failed part way
+            # through, so the round has to be finished (or its matches removed) before pairing again
+            self.pairingRound = False
+            self.roundMatches[self.round] = [ mtch.matchNumber for mtch in self.matches[matchCount:] ]
+            if len(self.roundMatches[self.round]) == 0:
+                del self.roundMatches[self.round]
+                self.round -= 1
+            self.saveOverview( )
+        await self.updateInfoMessage( )
+
+        digest = f'round {self.round} of {self.name} has been paired into {len(pairings)} matches'
+        if len(byes) > 0:
+            digest += f', and {", ".join( self.players[plyr].getMention() for plyr in byes )} {"was" if len(byes) == 1 else "were"} given a bye'
+        digest += "."
+        if rematches > 0:
+            digest += f' {rematches} of the matches have players that have already played each other, since there was no way to avoid it.'
+        return digest
+
+    # ---------------- XML Saving/Loading ----------------
+
+    def saveTournamentType( self, filename: str = "" ) -> None:
+        print( "Swiss tournament type being saved." )
+        saveFile( filename, "<?xml version='1.0'?>\n<type>swissTournament</type>" )
+
+    def _exportOverviewXML( self, indent: str = "" ) -> str:
+        digest  = f'{indent}<matchSize>{self.playersPerMatch}</matchSize>\n'
+        digest += f'{indent}<rounds current="{self.round}">\n'
+        for num, matchNums in self.roundMatches.items():
+            digest += f'{indent}\t<round number="{num}" matches="{" ".join( str(m) for m in matchNums )}"/>\n'
+        digest += f'{indent}</rounds>\n'
+        return digest
+
+    def _loadOverviewXML( self, tournRoot, filename: str ) -> None:
+        self.playersPerMatch = int( fromXML(tournRoot.find( 'matchSize' ).text ))
+        roundsRoot = tournRoot.find( 'rounds' )
+        self.round = int( fromXML( roundsRoot.attrib['current'] ) )
+        for rnd in roundsRoot.findall( 'round' ):
+            self.roundMatches[int( fromXML( rnd.attrib['number'] ) )] = [ int(m) for m in fromXML( rnd.attrib['matches'] ).split() ]
@@ -2,7 +2,7 @@ import os
 import shutil
 import threading
 import time
-from time import sleep
+from time import sleep, monotonic, perf_counter
 import asyncio
 import warnings
 import xml.etree.ElementTree as ET
@@ -11,25 +11,53 @@ from typing import List, Dict, Tuple
 import discord
 from dotenv import load_dotenv
 
-from .tricebot import TriceBot
+from .tricebot import TriceBot, TriceBotResult, TriceBotStatus, GameSpec, GameMade
 from .utils import *
 from .match import match
 from .player import player
 from .deck import *
-
-
-load_dotenv()
-# Trice bot auth token must be the same as in config.conf for the tricebot
-# is whitespace sensitive
-TRICE_BOT_AUTH_TOKEN = os.getenv('TRICE_BOT_AUTH_TOKEN')
-# This is the external URL of the tricebot for replay downloads, this is different
-# to the apiURL which is a loopback address or internal IP address allowing for
-# nginx or similar to be setup.
-EXTERN_URL = os.getenv('EXTERN_URL')
-API_URL = os.getenv('API_URL')
-
-#init trice bot object
-trice_bot = TriceBot(TRICE_BOT_AUTH_TOKEN, apiURL=API_URL, externURL=EXTERN_URL)
+from .pairingsAnnouncer import pairingsAnnouncer
+from .replayArchive import replayArchive
+from .queueActivityLog import queueActivityLog, queueEvent
+from .standings import standingsSnapshot
+from .eliminationBracket import eliminationBracket
+from .metrics import matchSetupTime
+from .blocking import getBlockingPool, runBlocking, saveFile, waitForSave, waitForSaves
+from .messageScheduler import outbox, messagePriority
+
+
+# The TriceBot client is made the first time it is needed (or when the bot starts), so that importing
+# this module doesn't read the .env file or start anything
+trice_bot: TriceBot = None
+
+def getTriceBot( ) -> TriceBot:
+    global trice_bot
+    if trice_bot is None:
+        load_dotenv()
+        # Trice bot auth token must be the same as in config.conf for the tricebot
+        # is whitespace sensitive
+        TRICE_BOT_AUTH_TOKEN = os.getenv('TRICE_BOT_AUTH_TOKEN')
+        # This is the external URL of the tricebot for replay downloads, this is different
+        # to the apiURL which is a loopback address or internal IP address allowing for
+        # nginx or similar to be setup.
+        EXTERN_URL = os.getenv('EXTERN_URL')
+        API_URL = os.getenv('API_URL')
+        trice_bot = TriceBot(TRICE_BOT_AUTH_TOKEN, apiURL=API_URL, externURL=EXTERN_URL, executor=getBlockingPool("http"))
+    return trice_bot
+
+# How long after a match is certified to wait before prefetching its replay,
+# which gives cockatrice time to close the game and write the replay
+REPLAY_PREFETCH_DELAY = 30
+
+# The zlib level that archived replays are compressed at (0-9). Replays barely
+# shrink past the default, and higher levels take much longer.
+REPLAY_COMPRESSION_LEVEL = 6
+
+# Queue activity is kept in its own database, which the overview points to
+QUEUE_ACTIVITY_FILE = "queueActivity.db"
+
+# The info message is edited at most once every this many seconds, with whatever the latest status is
+INFO_MESSAGE_INTERVAL = 5
 
 
 """
@@ -81,6 +109,7 @@ class tournament:
         self.players  = {}
 
         self.matches = []
+        self.matchesByNumber = { }
 
         #Create bot class and store the game creation settings
         self.triceBotEnabled = False
@@ -91,6 +120,35 @@ class tournament:
         self.only_registered = False
         self.player_deck_verification = False
 
+        self.replayArchive = None
+        self.replayPrefetches = set( )
+
+        self.queueActivity = None
+
+        # The single-elimination bracket of the top cut, once the tournament has been cut
+        self.bracket = None
+
+        # Rebuilt the next time the standings are needed after a match result changes
+        self.standingsSnapshot = None
+        # The numbers of the certified matches, which are the only ones that count towards the standings
+        self.certifiedMatches = set( )
+
+        # Kept up to date as players and matches change, so the status embed doesn't need to scan everything
+        self.activePlayers = set( )
+        self.playersWithDecks = set( )
+        self.openMatches = set( )
+        self.uncertifiedMatches = set( )
+        self.settingsText = None
+
+        # The pending update of the info message, when it was last edited, and the embed it was edited with
+        self.infoMessageInterval = INFO_MESSAGE_INTERVAL
+        self.infoMessageUpdate = None
+        self.infoMessagePushedAt = 0.0
+        self.infoMessagePushed = None
+
+        # Called with the tournament and a player's ID when they register or drop
+        self.playerObservers = [ ]
+
         if len(props) != 0:
             self.setProperties(props)
 
@@ -130,6 +188,7 @@ class tournament:
         self.guildID = guild.id
         self.hostGuildName = guild.name
         self.pairingsChannel = guild.get_channel( self.pairingsChannelID )
+        self.settingsText = None
         infoChannel = None
         if isinstance(self.infoMessageChannelID, int):
             infoChannel = self.guild.get_channel( self.infoMessageChannelID )
@@ -149,12 +208,34 @@ class tournament:
             if mtch.VC_ID != "":
                 mtch.addMatchVC( guild.get_channel( mtch.VC_ID ) )
 
+    # The embed is what the message was sent with, so that it isn't edited until something changes
+    def setInfoMessage( self, message: discord.Message, embed: discord.Embed ) -> None:
+        self.infoMessage = message
+        self.infoMessagePushed = ( message.id, embed.to_dict() )
+        self.infoMessagePushedAt = monotonic( )
+
+    # Called after anything that might change the status embed. Updates are
+    # debounced, so a burst of changes results in a single edit.
     async def updateInfoMessage( self ) -> None:
         if self.infoMessage is None:
             return
-        await self.infoMessage.edit( embed = self.getTournamentStatusEmbed() )
+        if self.infoMessageUpdate is None or self.infoMessageUpdate.done():
+            self.infoMessageUpdate = asyncio.ensure_future( self._pushInfoMessage() )
         return
 
+    async def _pushInfoMessage( self ) -> None:
+        # The embed is rendered after the wait, so it has every change made in the meantime
+        await asyncio.sleep( max( 0, self.infoMessagePushedAt + self.infoMessageInterval - monotonic() ) )
+        if self.infoMessage is None:
+            return
+        embed = self.getTournamentStatusEmbed( )
+        rendered = ( self.infoMessage.id, embed.to_dict() )
+        if rendered == self.infoMessagePushed:
+            return
+        self.infoMessagePushedAt = monotonic( )
+        self.infoMessagePushed = rendered
+        outbox.edit( self.infoMessage, embed=embed )
+
     # ---------------- Property Accessors ----------------
 
     # Each tournament type needs a static method that will filter out valid properties
@@ -277,6 +358,7 @@ class tournament:
 
         if len(props) == 0:
             return digest
+        self.settingsText = None
 
         filteredProps = tournament.filterProperties( self.guild, props )
         for prop in filteredProps["successes"]:
@@ -323,20 +405,64 @@ class tournament:
     def updatePairingsThreshold( self, count: int ) -> str:
         return f'There is no pairings threshold is not defined for {self.name}'
 
+    # Returns None if there is no match with that number
     def getMatch( self, matchNum: int ) -> match:
-        if matchNum > len(self.matches) + 1:
-            return match( [] )
-        if self.matches[matchNum - 1].matchNumber == matchNum:
-            return self.matches[matchNum - 1]
-        for mtch in self.matches:
-            if mtch.matchNumber == matchNum:
-                return mtch
+        return self.matchesByNumber.get( matchNum )
 
     # ---------------- Misc ----------------
 
+    # Returns copies of the cached standings, see getStandingsSnapshot
+    def getStandings( self ) -> List[List]:
+        return self.getStandingsSnapshot().toLists( )
+
+    def getStandingsSnapshot( self ) -> standingsSnapshot:
+        if self.standingsSnapshot is None:
+            self.standingsSnapshot = standingsSnapshot( self._calculateStandings() )
+        return self.standingsSnapshot
+
+    # Called by the tournament's matches whenever their status or winner changes
+    def matchUpdated( self, mtch: match ) -> None:
+        self._trackMatchStatus( mtch )
+        if mtch.isCertified():
+            self.certifiedMatches.add( mtch.matchNumber )
+        elif mtch.matchNumber in self.certifiedMatches:
+            self.certifiedMatches.remove( mtch.matchNumber )
+        else:
+            # Results that aren't certified yet don't change the standings
+            return
+        self.standingsSnapshot = None
+
+    def _trackMatchStatus( self, mtch: match ) -> None:
+        if mtch.isOpen():
+            self.openMatches.add( mtch.matchNumber )
+        else:
+            self.openMatches.discard( mtch.matchNumber )
+        if mtch.isUncertified():
+            self.uncertifiedMatches.add( mtch.matchNumber )
+        else:
+            self.uncertifiedMatches.discard( mtch.matchNumber )
+
+    # Called whenever a player registers, drops, or changes their decks
+    def _trackPlayer( self, plyr: int ) -> None:
+        if self.players[plyr].isActive():
+            self.activePlayers.add( plyr )
+        else:
+            self.activePlayers.discard( plyr )
+        if len(self.players[plyr].decks) > 0:
+            self.playersWithDecks.add( plyr )
+        else:
+            self.playersWithDecks.discard( plyr )
+
+    # The properties part of the status embed only changes when the properties do
+    def getSettingsText( self ) -> str:
+        if self.settingsText is None:
+            props = self.getProperties( )
+            self.settingsText = "\n".join( [ f'{p}: {props[p]}' for p in props if not props[p] is None ] )
+        return self.settingsText
+
     # TODO: There should be a calculator class for this when more flexible
     # scoring systems are added
-    def getStandings( self ) -> List[List]:
+    def _calculateStandings( self ) -> List[List]:
         rough = [ ]
         for plyr in self.players.values():
             if not plyr.isActive( ):
@@ -351,7 +477,7 @@ class tournament:
             OWP = 0.0
             if len(plyr.opponents) > 0:
                 wins  = sum( [ self.players[opp].getNumberOfWins( ) for opp in plyr.opponents ] )
-                games = sum( [len(self.players[opp].getCertMatches( withBye=False )) for opp in plyr.opponents] )
+                games = sum( [ self.players[opp].countCertMatches( withBye=False ) for opp in plyr.opponents ] )
                 if games != 0:
                     OWP = wins/games
                 #OWP = sum( [ self.players[opp].getMatchWinPercentage( withBye=False ) for opp in plyr.opponents ] )/len(plyr.opponents)
@@ -373,10 +499,40 @@ class tournament:
 
 
     # ---------------- Embed Generators ----------------
+    # The sections that every type of tournament has. Each type adds its own
+    # sections (e.g. its queue or rounds) with _addStatusFields.
     def getTournamentStatusEmbed( self ) -> discord.Embed:
         digest: discord.Embed = discord.Embed( title = f'{self.name} Status' )
+        NL = "\n"
+        NLT = "\n\t"
+
+        propsText = f'{self.name} has{"" if self.isActive() else " not"} started.\n' + self.getSettingsText()
+        digest.add_field( name="**Settings Info.**", value=propsText )
+
+        decksText = f'There are {len(self.activePlayers)} players registered.'
+        if len(self.playersWithDecks) > 0:
+            decksText = decksText[:-1] + f', and {len(self.playersWithDecks)} of them have submitted decks.'
+        digest.add_field( name="**Player Count**", value=decksText )
+
+        self._addStatusFields( digest )
+
+        openMatches = sorted( self.openMatches )
+        uncertMatches = sorted( self.uncertifiedMatches )
+        matchText  = f'There are {len(openMatches)} open matches and {len(uncertMatches)} uncertified matches.'
+        # There can be hundreds of matches, so they are only listed when there are a few
+        if 0 < len(openMatches) + len(uncertMatches) <= 40:
+            if len(openMatches) > 0:
+                matchText += f'{NL}**Open Matches**:{NLT}{NLT.join([ "#" + str(m) for m in openMatches ])}'
+            if len(uncertMatches) > 0:
+                matchText += f'{NL}**Uncertified Matches**:{NLT}{NLT.join([ "#" + str(m) for m in uncertMatches ])}'
+        digest.add_field( name="**Match Info.**", value=matchText )
+        if not self.bracket is None:
+            digest.add_field( name="**Top Cut**", value=self.getBracketText() )
         return digest
 
+    def _addStatusFields( self, digest: discord.Embed ) -> None:
+        return None
+
     def getPlayerProfileEmbed( self, plyr: int ) -> discord.Embed:
         Player = self.players[plyr]
         digest = discord.Embed()
@@ -401,7 +557,7 @@ class tournament:
 
     def getMatchEmbed( self, mtch: int ):
         digest = discord.Embed( )
-        Match = self.matches[mtch]
+        Match = self.getMatch( mtch )
         digest.add_field( name="Status", value=Match.status )
         digest.add_field( name="Active Players", value="\u200b" + ", ".join( [ self.players[plyr].getMention() for plyr in Match.activePlayers ] ) )
         if len(Match.droppedPlayers) != 0:
@@ -439,12 +595,16 @@ class tournament:
             return f'you are registered by are not an active player in {self.name}. If you believe this is an error, contact tournament staff.'
         if not ( admin or self.regOpen ):
             return f'registration for {self.name} is closed, so you cannot submit a deck. If you believe this is an error, contact tournament staff.'
-        self.players[plyr].addDeck( deckName, decklist )
+        # Scraping a deck site and hashing a deck both block, so the deck is built on a thread
+        category = "http" if isMoxFieldLink(decklist) or isTappedOutLink(decklist) or isMtgGoldfishLink(decklist) else "hashing"
+        newDeck = await runBlocking( category, deck, deckName, decklist )
+        self.players[plyr].addDeck( deckName, decklist, newDeck )
         self.players[plyr].saveXML( )
+        self._trackPlayer( plyr )
         deckHash = self.players[plyr].decks[deckName].deckHash
 
         if admin:
-            await self.players[plyr].discordUser.send( content = f'A decklist has been submitted for {self.name} on your behalf. The name of the deck is "{deckName}" and the deck hash is "{deckHash}". Use the command "!decklist {deckName}" to see the list. Please contact tournament staff if there is an error.' )
+            outbox.send( self.players[plyr].discordUser, messagePriority.DIRECT_MESSAGE, content = f'A decklist has been submitted for {self.name} on your behalf. The name of the deck is "{deckName}" and the deck hash is "{deckHash}". Use the command "!decklist {deckName}" to see the list. Please contact tournament staff if there is an error.' )
             return f'you have submitted a decklist for {self.players[plyr].getMention()}. The deck hash is {deckHash}.'
         message = f'your deck has been successfully registered in {self.name}. Your deck name is "{deckName}", and the deck hash is "{deckHash}". Make sure it matches your deck hash in Cockatrice. You can see your decklist by using !decklist "{deckName}" or !decklist {deckHash}.'
 
@@ -459,6 +619,7 @@ class tournament:
             return f'<@{plyr}>, you are registered by are not an active player in {self.name}. If you believe this is an error, contact tournament staff.'
 
         digest = await self.players[plyr].removeDeck( deckName, author )
+        self._trackPlayer( plyr )
         await self.updateInfoMessage()
         return digest
 
@@ -509,6 +670,8 @@ class tournament:
         await self.purgeTourn( )
         self.tournEnded = False
         self.saveTournament( f'closedTournaments/{self.name}' )
+        # The old files can't be removed while they are still being written
+        await runBlocking( "disk", waitForSaves, self.getSaveLocation(), f'currentTournaments/{self.name}', f'closedTournaments/{self.name}' )
         if os.path.isdir( f'currentTournaments/{self.name}' ):
             shutil.rmtree( f'currentTournaments/{self.name}' )
         await self.updateInfoMessage()
@@ -519,6 +682,20 @@ class tournament:
         oldLocation = self.getSaveLocation()
         self.tournCancel = True
         self.saveTournament( )
+        # The old files can't be removed while they are still being written
+        await runBlocking( "disk", waitForSaves, oldLocation, self.getSaveLocation() )
+        # The replay archive and queue activity move along with the rest of the tournament
+        if os.path.isdir( f'{oldLocation}replays' ):
+            # Moving into an existing directory would nest the replays inside of it, so an
+            # old archive from a closed tournament with the same name is replaced instead
+            if os.path.isdir( f'{self.getSaveLocation()}replays' ):
+                shutil.rmtree( f'{self.getSaveLocation()}replays' )
+            shutil.move( f'{oldLocation}replays', f'{self.getSaveLocation()}replays' )
+        if not self.queueActivity is None:
+            self.queueActivity.close( )
+            self.queueActivity = None
+        if os.path.isfile( f'{oldLocation}{QUEUE_ACTIVITY_FILE}' ):
+            shutil.move( f'{oldLocation}{QUEUE_ACTIVITY_FILE}', f'{self.getSaveLocation()}{QUEUE_ACTIVITY_FILE}' )
         if os.path.isdir( oldLocation ):
             shutil.rmtree( oldLocation )
         await self.updateInfoMessage()
@@ -528,14 +705,24 @@ class tournament:
 
     async def prunePlayers( self, ctx ) -> str:
         await ctx.send( f'Pruning players starting... now!' )
+        pruned = [ ]
         for plyr in self.players:
             if len(self.players[plyr].decks) == 0:
                 await self.dropPlayer( plyr )
-                await ctx.send( f'{self.players[plyr].getMention()} has been pruned.' )
-                await self.players[plyr].discordUser.send( content=f'You have been dropped from the tournament {self.name} on {ctx.guild.name} by tournament staff for not submitting a deck. If you believe this is an error, contact them immediately.' )
+                pruned.append( f'{self.players[plyr].getMention()} has been pruned.' )
+                outbox.send( self.players[plyr].discordUser, messagePriority.DIRECT_MESSAGE, content=f'You have been dropped from the tournament {self.name} on {ctx.guild.name} by tournament staff for not submitting a deck. If you believe this is an error, contact them immediately.' )
                 self.players[plyr].saveXML( )
+        for msg in splitMessage( "\n".join( pruned ) ):
+            if msg.strip() != "":
+                outbox.send( ctx.channel, content=msg )
         return f'All players that did not submit a deck have been pruned.'
 
+    def _notifyPlayerObservers( self, plyr: int ) -> None:
+        self.standingsSnapshot = None
+        self._trackPlayer( plyr )
+        for observer in self.playerObservers:
+            observer( self, plyr )
+
     async def addPlayer( self, discordUser, admin=False ) -> str:
         if not admin and self.tournCancel:
             return "this tournament has been cancelled. If you believe this to be incorrect, please contact the tournament staff."
@@ -554,9 +741,10 @@ class tournament:
         self.players[discordUser.id].addDiscordUser( discordUser )
         await self.players[discordUser.id].discordUser.add_roles( self.role )
         self.players[discordUser.id].saveXML( )
+        self._notifyPlayerObservers( discordUser.id )
         if admin:
-            await discordUser.send( content=f'You have been registered for {self.name}!' )
-            return f'you have {RE}registered {getMention()} for {self.name}'
+            outbox.send( discordUser, messagePriority.DIRECT_MESSAGE, content=f'You have been registered for {self.name}!' )
+            return f'you have {RE}registered {self.players[discordUser.id].getMention()} for {self.name}'
         return f'you have been {RE}registered in {self.name}!'
 
     async def dropPlayer( self, plyr: str, author: str = "" ) -> None:
@@ -566,57 +754,77 @@ class tournament:
             pass # This is thrown when the discord object is None
         await self.players[plyr].drop( )
         self.players[plyr].saveXML()
+        self._notifyPlayerObservers( plyr )
         message = await self.removePlayerFromQueue( plyr )
         
         # The player was dropped by an admin, so two messages need to be sent
         # TODO: The admin half of this command needs to be its own method
         if author != "":
-            await self.players[plyr].discordUser.send( content=f'You have been dropped from {self.name} on {self.guild.name} by tournament staff. If you believe this is an error, check with them.' )
+            outbox.send( self.players[plyr].discordUser, messagePriority.DIRECT_MESSAGE, content=f'You have been dropped from {self.name} on {self.guild.name} by tournament staff. If you believe this is an error, check with them.' )
             return f'{author}, {self.players[plyr].getMention()} has been dropped from the tournament.'
         return message
 
     async def playerConfirmResult( self, plyr: str, matchNum: int, admin: bool = False ) -> None:
         if not plyr in self.players:
             return f'you are not registered in {self.name}.'
-        message = await self.matches[matchNum - 1].confirmResult( plyr )
+        Match = self.getMatch( matchNum )
+        if Match is None:
+            return f'there is no match #{matchNum} in {self.name}.'
+        message = await Match.confirmResult( plyr )
+        if Match.isCertified( ):
+            self._queueReplayPrefetch( Match )
+            await self._advanceBracket( Match )
         if message != "":
-            await self.pairingsChannel.send( message )
+            outbox.send( self.pairingsChannel, content=message )
             return f'you have certified the result of match #{matchNum} on behalf of {plyr}.' if admin else f'your confirmation has been logged.'
         if admin:
-            await self.players.discordUser.send( f'The result for match #{matchNum} in {self.name} has been confirmed on your behalf by tournament staff.' )
+            outbox.send( self.players[plyr].discordUser, messagePriority.DIRECT_MESSAGE, content=f'The result for match #{matchNum} in {self.name} has been confirmed on your behalf by tournament staff.' )
         return message
 
     async def recordMatchResult( self, plyr: str, result: str, matchNum: int, admin: bool = False ) -> str:
+        Match = self.getMatch( matchNum )
+        if Match is None:
+            return f'there is no match #{matchNum} in {self.name}.'
         if admin:
-            message = await self.matches[matchNum - 1].recordResultAdmin( plyr, result )
+            message = await Match.recordResultAdmin( plyr, result )
         else:
-            message = await self.matches[matchNum - 1].recordResult( plyr, result )
+            message = await Match.recordResult( plyr, result )
+        if Match.isCertified( ):
+            self._queueReplayPrefetch( Match )
+            await self._advanceBracket( Match )
 
         if "announcement" in message:
-            await self.pairingsChannel.send( content=message["announcement"] )
+            outbox.send( self.pairingsChannel, content=message["announcement"] )
         return message["message"]
 
     async def pruneDecks( self, ctx ) -> str:
         await ctx.send( f'Pruning decks starting... now!' )
+        pruned = [ ]
         for plyr in self.players.values():
             deckIdents = [ ident for ident in plyr.decks ]
             while len( plyr.decks ) > self.deckCount:
                 del( plyr.decks[deckIdents[0]] )
-                await ctx.send( f'The deck {deckIdents[0]} belonging to {plyr.getMention()} has been pruned.' )
-                await plyr.discordUser.send( content=f'Your deck {deckIdents[0]} has been pruned from the tournament {self.name} on {ctx.guild.name} by tournament staff.' )
+                pruned.append( f'The deck {deckIdents[0]} belonging to {plyr.getMention()} has been pruned.' )
+                outbox.send( plyr.discordUser, messagePriority.DIRECT_MESSAGE, content=f'Your deck {deckIdents[0]} has been pruned from the tournament {self.name} on {ctx.guild.name} by tournament staff.' )
                 del( deckIdents[0] )
             plyr.saveXML( )
+            self._trackPlayer( plyr.discordID )
+        for msg in splitMessage( "\n".join( pruned ) ):
+            if msg.strip() != "":
+                outbox.send( ctx.channel, content=msg )
         await self.updateInfoMessage()
         return f'Decks have been pruned. All players have at most {self.deckCount} deck{"" if self.deckCount == 1 else "s"}.'
 
     # ---------------- Match Management ----------------
     async def _sendMatchWarning( self, msg: str ) -> None:
-        await self.pairingsChannel.send( content=msg )
+        await outbox.send( self.pairingsChannel, messagePriority.MATCH_WARNING, content=msg )
 
+    # Called from a match's timer thread. The warning is handed to the event loop
+    # without waiting for it to be sent, so the timer is never held up by
+    # Discord, and the outbox logs the warning if it can't be sent.
     def _launch_match_warning( self, msg: str ) -> None:
         if self.loop.is_running( ):
-            fut_send = asyncio.run_coroutine_threadsafe( self._sendMatchWarning(msg), self.loop )
-            fut_send.result( )
+            asyncio.run_coroutine_threadsafe( self._sendMatchWarning(msg), self.loop )
         else:
             self.loop.run_until_complete( self._sendMatchWarning(msg) )
 
@@ -627,32 +835,91 @@ class tournament:
         while mtch.getTimeLeft() > 0 and not mtch.stopTimer:
             sleep( 1 )
             if mtch.getTimeLeft() <= 60 and not mtch.sentOneMinWarning and not mtch.stopTimer:
-                    task = threading.Thread( target=self._launch_match_warning, args=(f'{mtch.getMention()}, you have one minute left in your match.',) )
-                    task.start( )
+                    self._launch_match_warning( f'{mtch.getMention()}, you have one minute left in your match.' )
                     mtch.sentOneMinWarning = True
                     mtch.saveXML( )
             elif mtch.getTimeLeft() <= 300 and not mtch.sentFiveMinWarning and not mtch.stopTimer:
-                    task = threading.Thread( target=self._launch_match_warning, args=(f'{mtch.getMention()}, you have five minutes left in your match.',) )
-                    task.start( )
+                    self._launch_match_warning( f'{mtch.getMention()}, you have five minutes left in your match.' )
                     mtch.sentFiveMinWarning = True
                     mtch.saveXML( )
 
         if not mtch.stopTimer and not mtch.sentFinalWarning:
-            task = threading.Thread( target=self._launch_match_warning, args=(f'{mtch.getMention()}, time in your match is up!!',) )
-            task.start( )
-            task.join( )
+            self._launch_match_warning( f'{mtch.getMention()}, time in your match is up!!' )
             mtch.sentFinalWarning = True
         mtch.saveXML( )
-
-    async def addMatch( self, plyrs: List ) -> None:
-        for plyr in plyrs:
-            self.queueActivity.append( (plyr, getTime() ) )
+        # Long leagues have many matches, so finished timer threads aren't kept around
+        mtch.timer = ""
+
+    def _createPairingsAnnouncer( self ) -> pairingsAnnouncer:
+        return pairingsAnnouncer( f'New pairings for {self.name}! A voice channel has been created for each match. Below is information about your opponents.' )
+
+    def _createGameSpec( self, matchNum: int, plyrs: List ) -> GameSpec:
+        #This causes the replay to get saved into a folder
+        game_name: str = f'{self.name}/Match {matchNum}'
+        game_password: str = "game-" + str(matchNum)
+
+        playerNames = []
+        deckHashes = []
+        if self.player_deck_verification:
+            for plyr in plyrs:
+                name = self.players[plyr].triceName
+                if name == "" or name is None:
+                    name = "*"
+                playerNames.append(name)
+                deckHashes.append( [dck.deckHash for dck in self.players[plyr].decks.values()] )
+
+        return GameSpec( game_name, game_password, len(plyrs), self.spectators_allowed, self.spectators_need_password, self.spectators_can_chat, self.spectators_can_see_hands, self.only_registered, self.player_deck_verification, playerNames, deckHashes )
+
+    # Creates the cockatrice games for a group of matches that have just been
+    # reserved with a single tricebot request. The games line up with the matches.
+    async def _createTriceGames( self, matches: List[match] ) -> List[GameMade]:
+        if not ( self.triceBotEnabled and isinstance( self.guild, discord.Guild ) ):
+            return [ None for _ in matches ]
+        specs = [ self._createGameSpec( mtch.matchNumber, mtch.activePlayers ) for mtch in matches ]
+        with matchSetupTime.time( self.name, "tricebot" ):
+            return await getTriceBot().createGames( specs )
+
+    # Adds the matches for a group of pairings together. Their cockatrice games
+    # are made with one request, and they are announced together once they
+    # have all been made. Returns the new matches.
+    async def addMatches( self, pairings: List[List] ) -> List[match]:
+        # The matches are numbered before anything is awaited, so a match that is
+        # added in the meantime can't take a number that a game was made for
+        newMatches = [ self._reserveMatch( pairing ) for pairing in pairings ]
+        announcer = self._createPairingsAnnouncer( )
+        games = await self._createTriceGames( newMatches )
+        for newMatch, game in zip( newMatches, games ):
+            await self._setUpMatch( newMatch, announcer, game )
+        if len(announcer) > 0:
+            await announcer.send( self.pairingsChannel )
+        return newMatches
+
+    # When an announcer is given, the pairing announcement is added to it and
+    # whoever passed it in is responsible for sending it. Otherwise, the
+    # announcement is sent right away.
+    # If the cockatrice game for this match has already been made, it can be
+    # passed in. Otherwise, the game is made here (if needed).
+    async def addMatch( self, plyrs: List, announcer: pairingsAnnouncer = None, game_made: GameMade = None ) -> None:
+        await self._setUpMatch( self._reserveMatch( plyrs ), announcer, game_made )
+
+    # Numbers and registers a new match, without awaiting anything
+    def _reserveMatch( self, plyrs: List ) -> match:
         newMatch = match( plyrs )
-        self.matches.append( newMatch )
-        newMatch.matchNumber = len(self.matches)
+        newMatch.matchNumber = len(self.matches) + 1
+        self._registerMatch( newMatch )
         newMatch.matchLength = self.matchLength
         newMatch.saveLocation = f'{self.getSaveLocation()}/matches/match_{newMatch.matchNumber}.xml'
+        return newMatch
+
+    async def _setUpMatch( self, newMatch: match, announcer: pairingsAnnouncer = None, game_made: GameMade = None ) -> None:
+        plyrs = list( newMatch.activePlayers )
+        sendAnnouncement = announcer is None
+        if sendAnnouncement:
+            announcer = self._createPairingsAnnouncer( )
+        # Time spent waiting on Discord, which is reported separately from tricebot
+        discordTime = 0
         if isinstance( self.guild, discord.Guild ):
+            start = perf_counter( )
             matchRole = await self.guild.create_role( name=f'Match {newMatch.matchNumber}' )
             overwrites = { self.guild.default_role: discord.PermissionOverwrite(read_messages=False),
                            getAdminRole(self.guild): discord.PermissionOverwrite(read_messages=True),
@@ -665,45 +932,27 @@ class tournament:
             game_name: str = f'{self.name} Match {newMatch.matchNumber}'
 
             newMatch.VC    = await matchCategory.create_voice_channel( name=game_name, overwrites=overwrites )
+            discordTime += perf_counter() - start
             newMatch.role  = matchRole
             newMatch.timer = threading.Thread( target=self._matchTimer, args=(newMatch,) )
 
-            message = f'\n{matchRole.mention} of {self.name}, you have been paired. A voice channel has been created for you. Below is information about your opponents.\n'
-            embed   = discord.Embed( )
+            line    = f'{matchRole.mention}, you have been paired in match #{newMatch.matchNumber}.'
+            message = ""
+            fields  = [ ]
 
             if self.triceBotEnabled:
-                #This causes the replay to get saved into a folder
-                game_name: str = f'{self.name}/Match {newMatch.matchNumber}'
-
-                #Try to create the game
-                creation_success: bool = False
-                replay_download_link: str = ""
-                game_id: int = -1
-                tries: int = 0
-                max_tries: int = 3
-
-                game_password: str = "game-" + str(newMatch.matchNumber)
-
-                playerNames = []
-                deckHashes = []
-                if self.player_deck_verification:
-                    for plyr in plyrs:
-                        name = self.players[plyr].triceName
-                        if name == "" or name is None:
-                            name = "*"
-                        playerNames.append(name)
-                        deckHashes.append( [dck.deckHash for dck in self.players[plyr].decks.values()] )
-
-                #Try up to three times
-                while not creation_success and tries < max_tries:                    
-                    game_made = trice_bot.createGame(game_name, game_password, len(plyrs), self.spectators_allowed, self.spectators_need_password, self.spectators_can_chat, self.spectators_can_see_hands, self.only_registered, self.player_deck_verification, playerNames, deckHashes)
-
-                    creation_success = game_made.success
-                    replay_download_link = trice_bot.getDownloadLink(game_made.replayName)
-                    game_id = game_made.gameID
-                    tries += 1
-
-                if creation_success:
+                spec = self._createGameSpec( newMatch.matchNumber, plyrs )
+                game_name: str = spec.gamename
+                game_password: str = spec.password
+
+                #Try to create the game (tricebot retries with backoff on its own)
+                if game_made is None:
+                    with matchSetupTime.time( self.name, "tricebot" ):
+                        game_made = await getTriceBot().createGameFromSpec( spec )
+                replay_download_link: str = getTriceBot().getDownloadLink(game_made.replayName)
+                game_id: int = game_made.gameID
+
+                if game_made.success:
                     #Game was made
                     newMatch.triceMatch = True
                     newMatch.gameID = game_id
@@ -719,65 +968,187 @@ class tournament:
                     message += f'Replay download link {replay_download_link} (available on game end).\n'
                 else:
                     #Game was not made
+                    print( f'[TRICEBOT ERROR]: Game creation for match #{newMatch.matchNumber} failed with {game_made.result}' )
                     message += "A cockatrice game was not automatically made for you.\n"
 
+            fields.append( (f'Match #{newMatch.matchNumber}', "\u200b" + message) )
+
         for plyr in plyrs:
             # TODO: This should be unready player
-            await self.removePlayerFromQueue( plyr )
-            self.players[plyr].matches.append( newMatch )
-            for p in plyrs:
-                self.players[plyr].addOpponent( p )
-            if type( self.guild ) == discord.Guild:
+            await self.removePlayerFromQueue( plyr, paired=True )
+            self.players[plyr].addMatch( newMatch )
+            if isinstance( self.guild, discord.Guild ):
                 self.players[plyr].saveXML()
+                start = perf_counter( )
                 await self.players[plyr].discordUser.add_roles( matchRole )
-                embed.add_field( name=self.players[plyr].getDisplayName(), value=self.players[plyr].pairingString() )
+                discordTime += perf_counter() - start
+                fields.append( (self.players[plyr].getDisplayName(), self.players[plyr].pairingString()) )
 
-        if type( self.guild ) is discord.Guild:
-            await self.pairingsChannel.send( content=message, embed=embed )
+        if isinstance( self.guild, discord.Guild ):
+            announcer.addMatch( line, fields )
+            if sendAnnouncement:
+                start = perf_counter( )
+                await announcer.send( self.pairingsChannel )
+                discordTime += perf_counter() - start
+            matchSetupTime.observe( discordTime, self.name, "discord" )
 
         newMatch.timer.start( )
         newMatch.saveXML()
         await self.updateInfoMessage()
 
-    # See tricebot.py for retun details
-    # copy pasta of them is here. accurate as of 25/04/21
-
-    #  1 if success
-    #  0 auth token is bad or error404 or network issue
-    # -1 if player not found
-    # -2 if an unknown error occurred
-    def kickTricePlayer(self, a_matchNum, playerName):
-        match = self.matches[a_matchNum - 1]
-        return trice_bot.kickPlayer(match.gameID, playerName)
+    # Match numbers are handed out in order, so they double as keys for lookups
+    def _registerMatch( self, newMatch: match ) -> None:
+        self.matches.append( newMatch )
+        self.matchesByNumber[newMatch.matchNumber] = newMatch
+        newMatch.observers.append( self )
+        self._trackMatchStatus( newMatch )
+        # Even an open match changes its players' opponents
+        self.standingsSnapshot = None
+        if newMatch.isCertified():
+            self.certifiedMatches.add( newMatch.matchNumber )
+
+    # See tricebot.py for the possible statuses of the result
+    async def kickTricePlayer(self, a_matchNum, playerName) -> TriceBotResult:
+        match = self.getMatch( a_matchNum )
+        if match is None:
+            return TriceBotResult( TriceBotStatus.GAME_NOT_FOUND )
+        return await getTriceBot().kickPlayer(match.gameID, playerName)
 
     async def addBye( self, plyr: str ) -> None:
         await self.removePlayerFromQueue( plyr )
         newMatch = match( [ plyr ] )
-        self.matches.append( newMatch )
-        newMatch.matchNumber = len(self.matches)
+        newMatch.matchNumber = len(self.matches) + 1
+        self._registerMatch( newMatch )
         newMatch.saveLocation = f'{self.getSaveLocation()}/matches/match_{newMatch.matchNumber}.xml'
         newMatch.recordBye( )
-        self.players[plyr].matches.append( newMatch )
+        self.players[plyr].addMatch( newMatch )
         newMatch.saveXML( )
 
     async def removeMatch( self, matchNum: int, author: str = "" ) -> str:
-        if self.matches[matchNum - 1] != matchNum:
-            self.matches.sort( key=lambda x: x.matchNumber )
+        Match = self.getMatch( matchNum )
+        if Match is None:
+            return f'{author}, there is no match #{matchNum} in {self.name}.'
 
-        for plyr in self.matches[matchNum - 1].activePlayers:
+        for plyr in Match.activePlayers:
             await self.players[plyr].removeMatch( matchNum )
-            await self.players[plyr].discordUser.send( content=f'You were a particpant in match #{matchNum} in the tournament {self.name} on the server {self.hostGuildName}. This match has been removed by tournament staff. If you think this is an error, contact them.' )
-        for plyr in self.matches[matchNum - 1].droppedPlayers:
+            outbox.send( self.players[plyr].discordUser, messagePriority.DIRECT_MESSAGE, content=f'You were a particpant in match #{matchNum} in the tournament {self.name} on the server {self.hostGuildName}. This match has been removed by tournament staff. If you think this is an error, contact them.' )
+        for plyr in Match.droppedPlayers:
             await self.players[plyr].removeMatch( matchNum )
-            await self.players[plyr].discordUser.send( content=f'You were a particpant in match #{matchNum} in the tournament {self.name} on the server {self.hostGuildName}. This match has been removed by tournament staff. If you think this is an error, contact them.' )
+            outbox.send( self.players[plyr].discordUser, messagePriority.DIRECT_MESSAGE, content=f'You were a particpant in match #{matchNum} in the tournament {self.name} on the server {self.hostGuildName}. This match has been removed by tournament staff. If you think this is an error, contact them.' )
 
-        await self.matches[matchNum - 1].killMatch( )
-        self.matches[matchNum - 1].saveXML( )
+        await Match.killMatch( )
+        Match.saveXML( )
 
         await self.updateInfoMessage()
         return f'{author}, match #{matchNum} has been removed.'
 
 
+    # ---------------- Round Management ----------------
+
+    # Pairs the next round for tournament types that have rounds
+    async def pairRound( self ) -> str:
+        return f'{self.name} does not have rounds.'
+
+
+    # ---------------- Top Cut ----------------
+
+    # Drops everyone outside of the top of the standings and starts a
+    # single-elimination bracket for the rest, seeded by the standings. The
+    # players that were cut are told with one announcement rather than a DM each.
+    async def cutToTop( self, count: int, author: str = "" ) -> str:
+        if not self.isActive( ):
+            return f'{author}, {self.name} is not active, so it can not be cut.'
+        if not self.bracket is None:
+            return f'{author}, {self.name} has already been cut to its top {self.bracket.playerCount()} players.'
+        if len(self.openMatches) + len(self.uncertifiedMatches) > 0:
+            return f'{author}, {self.name} has {len(self.openMatches) + len(self.uncertifiedMatches)} matches that have not been certified. They need to be finished before the tournament is cut.'
+        standings = self.getStandingsSnapshot().standings[1]
+        if count < 2 or count > len(standings):
+            return f'{author}, {self.name} can not be cut to the top {count} players, since {len(standings)} players have standings.'
+
+        kept = [ plyr.discordID for plyr in standings[:count] ]
+        keptIDs = set( kept )
+        cut = [ plyr for plyr in self.activePlayers if not plyr in keptIDs ]
+        # The role removals don't depend on each other, so they are made together
+        await asyncio.gather( *[ self.players[plyr].discordUser.remove_roles( self.role ) for plyr in cut if not self.players[plyr].discordUser is None ] )
+        for plyr in cut:
+            # Every match is certified, so there are no matches to drop them from
+            self.players[plyr].status = "dropped"
+            self.players[plyr].saveXML( )
+            self._notifyPlayerObservers( plyr )
+            await self.removePlayerFromQueue( plyr )
+        for plyr in kept:
+            await self.removePlayerFromQueue( plyr )
+
+        self.bracket = eliminationBracket( kept )
+        if len(cut) > 0:
+            message = f'{self.name} has been cut to the top {count} players. These players did not make the cut, and have been dropped:\n'
+            message += ", ".join( [ self.players[plyr].getMention() for plyr in cut ] )
+            for msg in splitMessage( message, delim=", " ):
+                if msg != "":
+                    outbox.send( self.pairingsChannel, content=msg )
+        await self._pairBracketRound( )
+        self.saveOverview( )
+        await self.updateInfoMessage( )
+        return f'{author}, {self.name} was cut to the top {count} players and {len(cut)} players were dropped. The matches for {self.bracket.roundName()} have been made.'
+
+    async def _pairBracketRound( self ) -> None:
+        self.bracket.recordMatches( await self.addMatches( self.bracket.unpairedPairs() ) )
+
+    # Called when a match is certified. Once every match of the bracket's
+    # current round has a winner, the next round is paired.
+    async def _advanceBracket( self, mtch: match ) -> None:
+        if self.bracket is None or not self.bracket.hasMatch( mtch.matchNumber ):
+            return
+        if mtch.isDraw( ):
+            outbox.send( self.pairingsChannel, content=f'Match #{mtch.matchNumber} is part of the top cut of {self.name}, so it can not end in a draw. Tournament staff will need to record a winner for it.' )
+            return
+        if not self.bracket.advance( self.getMatch ):
+            return
+        if self.bracket.isFinished( ):
+            outbox.send( self.pairingsChannel, content=f'{self.players[self.bracket.champion()].getMention()} has won {self.name}!' )
+        else:
+            await self._pairBracketRound( )
+        self.saveOverview( )
+        await self.updateInfoMessage( )
+
+    def getBracketText( self ) -> str:
+        if self.bracket.isFinished( ):
+            return f'The top cut is over, and {self.players[self.bracket.champion()].getMention()} won.'
+        unfinished = [ num for num in self.bracket.matches[-1] if num in self.openMatches or num in self.uncertifiedMatches ]
+        return f'The top cut of {self.bracket.playerCount()} players is in {self.bracket.roundName()}, and {len(unfinished)} of its matches have not been certified.'
+
+
+    # ---------------- Replay Management ----------------
+
+    def getReplayArchive( self ) -> replayArchive:
+        location = f'{self.getSaveLocation()}replays'
+        if self.replayArchive is None or self.replayArchive.dirName != location:
+            self.replayArchive = replayArchive( location, REPLAY_COMPRESSION_LEVEL )
+        return self.replayArchive
+
+    def getReplayURLs( self ) -> Dict[int, str]:
+        return { mtch.matchNumber: mtch.replayURL for mtch in self.matches if mtch.triceMatch and mtch.replayURL != "" }
+
+    # Only replays that aren't already archived are downloaded
+    # Returns a copy of the replay archive, or None if it is empty
+    async def downloadReplays( self, replaysNotFound: List[str] = None, progress = None ):
+        return await self.getReplayArchive().update( getTriceBot(), self.getReplayURLs(), replaysNotFound, progress=progress )
+
+    async def _prefetchReplay( self, mtch: match ) -> None:
+        await asyncio.sleep( REPLAY_PREFETCH_DELAY )
+        if mtch.isCertified( ):
+            await self.getReplayArchive().fetch( getTriceBot(), mtch.matchNumber, mtch.replayURL )
+
+    def _queueReplayPrefetch( self, mtch: match ) -> None:
+        if not mtch.triceMatch or mtch.replayURL == "":
+            return
+        task = asyncio.ensure_future( self._prefetchReplay( mtch ) )
+        # The event loop only keeps weak references to tasks
+        self.replayPrefetches.add( task )
+        task.add_done_callback( self.replayPrefetches.discard )
+
+
     # ---------------- Matchmaking Queue Methods ----------------
 
     # There will be a far more sofisticated pairing system in the future. Right now, the dummy version will have to do for testing
@@ -785,9 +1156,18 @@ class tournament:
     def addPlayerToQueue( self, plyr: str ) -> str:
         return f'{self.name} does not have a matchmaking queue.'
 
-    async def removePlayerFromQueue( self, plyr: str ) -> str:
+    # Players that are being removed because they were paired are recorded as such in the queue activity
+    async def removePlayerFromQueue( self, plyr: str, paired: bool = False ) -> str:
         return f'{self.name} does not have a matchmaking queue.'
 
+    def getQueueActivity( self ) -> queueActivityLog:
+        location = f'{self.getSaveLocation()}{QUEUE_ACTIVITY_FILE}'
+        if self.queueActivity is None or os.path.normpath( self.queueActivity.location ) != os.path.normpath( location ):
+            if not self.queueActivity is None:
+                self.queueActivity.close( )
+            self.queueActivity = queueActivityLog( location )
+        return self.queueActivity
+
 
     # ---------------- XML Saving/Loading ----------------
     # Most of these are also universally defined, but are for a particular purpose
@@ -808,9 +1188,41 @@ class tournament:
         print( "No tournament type being saved." )
         return None
 
-    def saveOverview( self, filename: str = "" ):
-        print( "No overview being saved." )
-        return None
+    # The settings that every type of tournament has. Each type adds its own
+    # parts with _exportOverviewXML and reads them back with _loadOverviewXML.
+    def saveOverview( self, filename: str = "" ) -> None:
+        print( "Overview being saved." )
+        if filename == "":
+            filename = f'{self.getSaveLocation()}/overview.xml'
+        digest  = "<?xml version='1.0'?>\n"
+        digest += '<tournament>\n'
+        digest += f'\t<name>{self.name}</name>\n'
+        digest += f'\t<guild id="{self.guild.id if isinstance(self.guild, discord.Guild) else str()}">{self.hostGuildName}</guild>\n'
+        digest += f'\t<role id="{self.role.id if isinstance(self.role, discord.Role) else str()}"/>\n'
+        digest += f'\t<pairingsChannel id="{self.pairingsChannel.id}"/>\n'
+        if not self.infoMessage is None:
+            digest += f'\t<infoMessage channel="{self.infoMessage.channel.id}" id="{self.infoMessage.id}"/>\n'
+        digest += f'\t<format>{self.format}</format>\n'
+        digest += f'\t<regOpen>{self.regOpen}</regOpen>\n'
+        digest += f'\t<status started="{self.tournStarted}" ended="{self.tournEnded}" canceled="{self.tournCancel}"/>\n'
+        digest += f'\t<deckCount>{self.deckCount}</deckCount>\n'
+        digest += f'\t<matchLength>{self.matchLength}</matchLength>\n'
+        digest += f'\t<triceBotEnabled>{self.triceBotEnabled}</triceBotEnabled>\n'
+        digest += f'\t<spectatorsAllowed>{self.spectators_allowed}</spectatorsAllowed>\n'
+        digest += f'\t<spectatorsNeedPassword>{self.spectators_need_password}</spectatorsNeedPassword>\n'
+        digest += f'\t<spectatorsCanChat>{self.spectators_can_chat}</spectatorsCanChat>\n'
+        digest += f'\t<spectatorsCanSeeHands>{self.spectators_can_see_hands}</spectatorsCanSeeHands>\n'
+        digest += f'\t<onlyRegistered>{self.only_registered}</onlyRegistered>\n'
+        digest += f'\t<playerDeckVerification>{self.player_deck_verification}</playerDeckVerification>\n'
+        digest += self._exportOverviewXML( "\t" )
+        if not self.bracket is None:
+            digest += self.bracket.exportToXML( "\t" )
+        digest += '</tournament>'
+
+        saveFile( filename, toSafeXML(digest) )
+
+    def _exportOverviewXML( self, indent: str = "" ) -> str:
+        return ""
 
     def savePlayers( self, dirName: str = "" ) -> None:
         if dirName == "":
@@ -836,6 +1248,41 @@ class tournament:
         self.loadMatches( f'{dirName}/matches/' )
 
     def loadOverview( self, filename: str ) -> None:
+        waitForSave( filename )
+        xmlTree = ET.parse( filename )
+        tournRoot = xmlTree.getroot()
+        self.name = fromXML(tournRoot.find( 'name' ).text)
+        self.guildID   = int( fromXML(tournRoot.find( 'guild' ).attrib["id"]) )
+        self.roleID    = int( fromXML(tournRoot.find( 'role' ).attrib["id"]) )
+        self.pairingsChannelID = int( fromXML(tournRoot.find( 'pairingsChannel' ).attrib["id"]) )
+        if not tournRoot.find( 'infoMessage' ) is None:
+            self.infoMessageChannelID = int( fromXML(tournRoot.find( 'infoMessage' ).attrib["channel"]) )
+            self.infoMessageID = int( fromXML(tournRoot.find( 'infoMessage' ).attrib["id"]) )
+
+        self.format    = fromXML(tournRoot.find( 'format' ).text)
+        self.deckCount = int( fromXML(tournRoot.find( 'deckCount' ).text) )
+
+        self.regOpen      = str_to_bool( fromXML(tournRoot.find( 'regOpen' ).text ))
+        self.tournStarted = str_to_bool( fromXML(tournRoot.find( 'status' ).attrib['started'] ))
+        self.tournEnded   = str_to_bool( fromXML(tournRoot.find( 'status' ).attrib['ended'] ))
+        self.tournCancel  = str_to_bool( fromXML(tournRoot.find( 'status' ).attrib['canceled'] ))
+
+        self.matchLength     = int( fromXML(tournRoot.find( 'matchLength' ).text ))
+
+        self.triceBotEnabled = str_to_bool( fromXML(tournRoot.find( "triceBotEnabled" ).text ) )
+        self.spectators_allowed = str_to_bool( fromXML(tournRoot.find( "spectatorsAllowed" ).text ) )
+        self.spectators_need_password = str_to_bool( fromXML(tournRoot.find( "spectatorsNeedPassword" ).text ) )
+        self.spectators_can_chat = str_to_bool( fromXML(tournRoot.find( "spectatorsCanChat" ).text ) )
+        self.spectators_can_see_hands = str_to_bool( fromXML(tournRoot.find( "spectatorsCanSeeHands" ).text ) )
+        self.only_registered = str_to_bool( fromXML(tournRoot.find( "onlyRegistered" ).text ) )
+        self.player_deck_verification = str_to_bool( fromXML(tournRoot.find( "playerDeckVerification" ).text ) )
+
+        if not tournRoot.find( 'bracket' ) is None:
+            self.bracket = eliminationBracket( )
+            self.bracket.loadFromXML( tournRoot.find( 'bracket' ) )
+        self._loadOverviewXML( tournRoot, filename )
+
+    def _loadOverviewXML( self, tournRoot, filename: str ) -> None:
         return None
 
     def loadPlayers( self, dirName: str ) -> None:
@@ -846,6 +1293,7 @@ class tournament:
             newPlayer.saveLocation = playerFile
             newPlayer.loadXML( playerFile )
             self.players[newPlayer.discordID] = newPlayer
+            self._trackPlayer( newPlayer.discordID )
         print( list(self.players.keys()) )
 
     def loadMatches( self, dirName: str ) -> None:
@@ -854,7 +1302,7 @@ class tournament:
             newMatch = match( [] )
             newMatch.saveLocation = matchFile
             newMatch.loadXML( matchFile )
-            self.matches.append( newMatch )
+            self._registerMatch( newMatch )
             for aPlayer in newMatch.activePlayers:
                 if aPlayer in self.players:
                     self.players[aPlayer].addMatch( newMatch )
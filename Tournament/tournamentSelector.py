@@ -4,15 +4,19 @@ import xml.etree.ElementTree as ET
 
 from .tournament import *
 from .fluidRoundTournament import *
+from .swissTournament import *
+from .blocking import waitForSave
 
 
-tournamentTypes = [ "fluidRoundTournament" ]
+tournamentTypes = [ "fluidRoundTournament", "swissTournament" ]
 
 def getTournamentType( tournType: str, tournName: str = "", guildName: str = "", tournProps: dict = { } ):
     tournType = tournType.strip().lower()
     digest = None
     if tournType == "fluidroundtournament":
         digest = fluidRoundTournament( tournName, guildName, tournProps )
+    elif tournType == "swisstournament" or tournType == "swiss":
+        digest = swissTournament( tournName, guildName, tournProps )
     else:
         raise NotImplementedError( f'The type of "{tournType}" is not an implemented tournament type.' )
     
@@ -20,6 +24,7 @@ def getTournamentType( tournType: str, tournName: str = "", guildName: str = "",
     
 
 def tournamentSelector( typeFile: str, tournName: str = "", guildName: str = "", tournProps: dict = { } ):
+    waitForSave( typeFile )
     tournType = ET.parse( typeFile ).getroot().text
     digest = getTournamentType( tournType, tournName, guildName, tournProps )
     return digest
@@ -32,6 +37,7 @@ def getTournamentProperties( ) -> List:
     # TODO: As more tournament types are added, this needs to be updated
     digest += tournament.properties
     digest += fluidRoundTournament.properties
+    digest += swissTournament.properties
     
     return list(set(digest))
 
@@ -45,6 +51,7 @@ def filterProperties( guild: discord.Guild, props: Dict ) -> Dict:
     
     # Passing the adjusted defaults through the base fluidRoundsTournament
     filteredDefaults.append( fluidRoundTournament.filterProperties( guild, props ) )
+    filteredDefaults.append( swissTournament.filterProperties( guild, props ) )
      
     # TODO: As more tournaments types are added, this process will need to grow
     
@@ -1,256 +1,468 @@
-import zipfile
 import urllib.parse
 import tempfile
 import requests
+import urllib3
+import asyncio
+import random
 import re
 
+from enum import Enum
+from typing import List
+from time import time
+from functools import partial
+from requests.adapters import HTTPAdapter
+
+class TriceBotStatus(Enum):
+    SUCCESS = "success"
+    # The operation worked, but the player slot was occupied (an admin may need to kick a player)
+    SUCCESS_SLOT_OCCUPIED = "success but occupied"
+    NETWORK_ERROR = "network error"
+    TIMEOUT_ERROR = "timeout error"
+    AUTH_ERROR = "invalid auth token"
+    NOT_FOUND_ERROR = "error 404"
+    GAME_NOT_FOUND = "game not found"
+    PLAYER_NOT_FOUND = "player not found"
+    # The circuit breaker is open, so the request was never sent
+    UNAVAILABLE = "unavailable"
+    UNKNOWN_ERROR = "unknown error"
+
+class TriceBotResult:
+    def __init__(self, status: TriceBotStatus, response = "", attempts: int = 0, sent: bool = True):
+        self.status = status
+        self.response = response
+        self.attempts = attempts
+        # Whether the request might have reached tricebot. A request that timed
+        # out or was dropped after it was sent may still have been carried out.
+        self.sent = sent
+
+    def __bool__(self):
+        return self.success
+
+    def __str__(self):
+        return f'{self.status.value} (after {self.attempts} attempt{"" if self.attempts == 1 else "s"})'
+
+    @property
+    def success(self) -> bool:
+        return self.status in (TriceBotStatus.SUCCESS, TriceBotStatus.SUCCESS_SLOT_OCCUPIED)
+
 class GameMade:
-    def __init__(self, success: bool, gameID: int, replayName: str):
+    def __init__(self, success: bool, gameID: int, replayName: str, result: TriceBotResult = None):
         self.success = success
         self.gameID = gameID
         self.replayName = replayName
+        self.result = result
+
+# The settings for a single game. This is what gets serialised into the body
+# of a game creation request.
+class GameSpec:
+    def __init__(self, gamename: str, password: str, playercount: int, spectatorsallowed: bool, spectatorsneedpassword: bool, spectatorscanchat: bool, spectatorscanseehands: bool, onlyregistered: bool, playerdeckverification: bool, playernames, deckHashes):
+        self.gamename = gamename
+        self.password = password
+        self.playercount = playercount
+        self.spectatorsallowed = spectatorsallowed
+        self.spectatorsneedpassword = spectatorsneedpassword
+        self.spectatorscanchat = spectatorscanchat
+        self.spectatorscanseehands = spectatorscanseehands
+        self.onlyregistered = onlyregistered
+        self.playerdeckverification = playerdeckverification
+        self.playernames = playernames
+        self.deckHashes = deckHashes
+
+    def isValid(self) -> bool:
+        return len(self.playernames) == len(self.deckHashes)
+
+    def toBody(self) -> str:
+        body  = f'gamename={self.gamename.replace(" ", "").replace("_", "")}\n'
+        body += f'password={self.password}\n'
+        body += f'playerCount={self.playercount}\n'
+        body += f'spectatorsAllowed={int(self.spectatorsallowed)}\n'
+        body += f'spectatorsNeedPassword={int(self.spectatorsneedpassword)}\n'
+        body += f'spectatorsCanChat={int(self.spectatorscanchat)}\n'
+        body += f'spectatorsCanSeeHands={int(self.spectatorscanseehands)}\n'
+        body += f'onlyRegistered={int(self.onlyregistered)}\n'
+        body += f'playerDeckVerification={int(self.playerdeckverification)}\n'
+
+        if self.playerdeckverification:
+            for i in range(0, len(self.playernames)):
+                if self.playernames[i] == "" or self.playernames[i] == None: # No name
+                    body += f'playerName=*\n'
+                else:
+                    body += f'playerName={self.playernames[i]}\n'
+                    if len(self.deckHashes[i]) == 0:
+                        body += f'deckHash=*\n'
+                    else:
+                        for deckHash in self.deckHashes[i]:
+                            body += f'deckHash={deckHash}\n'
+        return body
+
+# Stops the bot from hammering a tricebot that is down. After enough consecutive
+# failures the circuit opens and requests fail fast. Once the reset time has
+# passed, one request is let through to test the waters (half-open), and the
+# rest keep failing fast until it finishes.
+class CircuitBreaker:
+    def __init__(self, failureThreshold: int = 5, resetTime: float = 30.0):
+        self.failureThreshold = failureThreshold
+        self.resetTime = resetTime
+        self.failures = 0
+        self.openedAt = None
+        # When the half-open trial request was let through, None if there isn't one
+        self.trialStartedAt = None
+
+    # Calling this while half-open claims the trial request, so a caller that is
+    # told the circuit isn't open needs to record a success or failure
+    def isOpen(self) -> bool:
+        if self.openedAt is None:
+            return False
+        now = time()
+        if now - self.openedAt < self.resetTime:
+            return True
+        # A trial that never finished (e.g. it was cancelled) doesn't hold the circuit open forever
+        if self.trialStartedAt is not None and now - self.trialStartedAt < self.resetTime:
+            return True
+        self.trialStartedAt = now
+        return False
+
+    def recordSuccess(self) -> None:
+        self.failures = 0
+        self.openedAt = None
+        self.trialStartedAt = None
+
+    def recordFailure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failureThreshold:
+            self.openedAt = time()
+            self.trialStartedAt = None
 
 class TriceBot:
     # Set externURL to the domain address and apiURL to the loopback address in LAN configs
-    def __init__(self, authToken: str, apiURL: str="https://0.0.0.0:8000", externURL: str=""):
+    def __init__(self, authToken: str, apiURL: str="https://0.0.0.0:8000", externURL: str="", timeout: float = 7.0, maxTries: int = 3, backoffBase: float = 0.25, backoffCap: float = 4.0, poolSize: int = 16, executor = None):
         self.authToken = authToken
         self.apiURL = apiURL
-        
+
         if (externURL == ""):
             self.externURL = self.apiURL
         else:
             self.externURL = externURL
-        
-    # verify = false as self signed ssl certificates will cause errors here
-    def req(self, urlpostfix: str, data: str, abs: bool = False) -> str:
-        print(data)
-        url = urlpostfix
-        if not abs:
-            url = f'{self.apiURL}/{url}'
-        resp = requests.get(url, timeout=7.0, data=data,  verify=False).text
-        if not abs:
-            print(resp)
-        return resp
-    
-    def reqBin(self, urlpostfix: str, data: str, abs: bool = False) -> str:
-        print(data)
-        url = urlpostfix
-        if not abs:
-            url = f'{self.apiURL}/{url}'
-        resp = requests.get(url, timeout=7.0, data=data,  verify=False).content
-        if not abs:
-            print(resp)
-        return resp
-    
-    def reqBin(self, urlpostfix: str, data: str, abs: bool = False) -> str:
-        print(data)
+
+        self.timeout = timeout
+        self.maxTries = maxTries
+        self.backoffBase = backoffBase
+        self.backoffCap = backoffCap
+        self.breaker = CircuitBreaker()
+        # Where blocking requests are run (None is the event loop's default executor)
+        self.executor = executor
+        # Whether the tricebot can create games in bulk, None until it has been asked
+        self.batchSupport = None
+
+        # All requests share one session so connections are kept alive and reused
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # verify = false as self signed ssl certificates will cause errors here
+        self.session.verify = False
+
+    def _get(self, url: str, data: str, timeout: float) -> requests.Response:
+        return self.session.get(url, timeout=timeout, data=data)
+
+    def _backoff(self, attempt: int) -> float:
+        """ Exponential backoff with full jitter """
+        return random.uniform(0, min(self.backoffCap, self.backoffBase * 2**attempt))
+
+    # Whether a failed request never left, because a connection couldn't be made
+    @staticmethod
+    def _neverConnected(ex: Exception) -> bool:
+        if isinstance(ex, (requests.exceptions.ConnectTimeout, ConnectionRefusedError)):
+            return True
+        reason = getattr(ex.args[0], "reason", None) if len(ex.args) > 0 else None
+        # A failed connection (NewConnectionError) is a kind of ConnectTimeoutError
+        return isinstance(reason, urllib3.exceptions.ConnectTimeoutError)
+
+    # Sends a request to tricebot off of the event loop. Transient failures are
+    # retried with backoff, and nothing is sent while the circuit breaker is open.
+    # Requests that aren't safe to repeat (idempotent=False) are only retried
+    # if the failed attempt never reached tricebot.
+    # Returns the response and the number of attempts made
+    async def _request(self, urlpostfix: str, data: str, abs: bool = False, timeout: float = None, binary: bool = False, idempotent: bool = True):
         url = urlpostfix
         if not abs:
             url = f'{self.apiURL}/{url}'
-        resp = requests.get(url, timeout=7.0, data=data,  verify=False).content
-        if not abs:
-            print(resp)
-        return resp
-        
-    def checkauthkey(self):
-        return self.req("api/checkauthkey", self.authToken) == "1"
-    
+        if timeout is None:
+            timeout = self.timeout
+
+        loop = asyncio.get_running_loop()
+        status = TriceBotStatus.NETWORK_ERROR
+        sent = False
+        attempt = 0
+        while attempt < self.maxTries:
+            if sent and not idempotent:
+                break
+            if self.breaker.isOpen():
+                return TriceBotResult(TriceBotStatus.UNAVAILABLE, b"" if binary else "", attempt, sent)
+            if attempt > 0:
+                await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+            try:
+                resp = await loop.run_in_executor(self.executor, partial(self._get, url, data, timeout))
+            except requests.exceptions.Timeout as ex:
+                print("[TRICEBOT ERROR]: Request timed out")
+                status = TriceBotStatus.TIMEOUT_ERROR
+                sent = sent or not self._neverConnected(ex)
+                self.breaker.recordFailure()
+                continue
+            except OSError as ex:
+                # Network issues (the requests exceptions are OSErrors too)
+                print("[TRICEBOT ERROR]: Netty error")
+                status = TriceBotStatus.NETWORK_ERROR
+                sent = sent or not self._neverConnected(ex)
+                self.breaker.recordFailure()
+                continue
+
+            self.breaker.recordSuccess()
+            sent = True
+            content = resp.content if binary else resp.text
+            if not binary and content == TriceBotStatus.TIMEOUT_ERROR.value:
+                status = TriceBotStatus.TIMEOUT_ERROR
+                continue
+            return TriceBotResult(TriceBotStatus.SUCCESS, content, attempt)
+
+        return TriceBotResult(status, b"" if binary else "", attempt, sent)
+
+    async def req(self, urlpostfix: str, data: str, abs: bool = False, timeout: float = None, idempotent: bool = True) -> TriceBotResult:
+        return await self._request(urlpostfix, data, abs, timeout, idempotent=idempotent)
+
+    async def reqBin(self, urlpostfix: str, data: str, abs: bool = False, timeout: float = None) -> TriceBotResult:
+        return await self._request(urlpostfix, data, abs, timeout, binary=True)
+
+    # Converts a response to a status using the meaning of each message for an endpoint
+    def _parseResponse(self, result: TriceBotResult, messages: dict) -> TriceBotResult:
+        if not result.success:
+            return result
+        message = result.response.strip()
+        if message in messages:
+            result.status = messages[message]
+        elif message == "invalid auth token":
+            result.status = TriceBotStatus.AUTH_ERROR
+        elif message == "error 404":
+            result.status = TriceBotStatus.NOT_FOUND_ERROR
+        else:
+            result.status = TriceBotStatus.UNKNOWN_ERROR
+        if result.status in (TriceBotStatus.AUTH_ERROR, TriceBotStatus.NOT_FOUND_ERROR, TriceBotStatus.UNKNOWN_ERROR):
+            print(f'[TRICEBOT ERROR]: {message}')
+        return result
+
+    async def checkauthkey(self) -> bool:
+        result = await self.req("api/checkauthkey", self.authToken)
+        return result.success and result.response == "1"
+
     def getDownloadLink(self, replayName: str) -> str:
         return f'{self.externURL}/{replayName}'
-    
-    # Returns the zip file which contains all of the downloaded files
-    # Returns none if the zip file would be empty or if there was an IOError
-    def downloadReplays(self, replayURLs, replaysNotFound = []):                
-        # Download all the replays
-        replayStrs = []
-        replayNames = []
-        
-        # Iterate over each replay url
-        for replayURL in replayURLs:
+
+    def getReplayName(self, replayURL: str) -> str:
+        split = replayURL.split("/")
+        return urllib.parse.unquote(split[len(split) - 1])
+
+    # Each line of a features reply is the name of an endpoint
+    featureRegex = re.compile("^[a-z_]+$")
+
+    # Replays that don't exist come back as one of these instead of a binary file
+    replayErrorPrefixes = (b"error 404", b"Not found [", b"<!DOCTYPE html>", b"<html>")
+
+    def _fetchReplay(self, replayURL: str, spoolSize: int):
+        """ Streams a replay into a spooled temp file. Returns None if tricebot doesn't have the replay. """
+        with self.session.get(replayURL.replace(self.externURL, self.apiURL), timeout=self.timeout, stream=True) as resp:
+            chunks = resp.iter_content(chunk_size=64 * 1024)
+            # Only the start of the response is needed to tell if it is an error
+            head = b""
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= 32:
+                    break
+            if head.startswith(self.replayErrorPrefixes):
+                return None
+            spool = tempfile.SpooledTemporaryFile(max_size=spoolSize)
             try:
-                res = self.reqBin(replayURL.replace(self.externURL, self.apiURL), "", abs=True)
-                split = replayURL.split("/")
-                name = urllib.parse.unquote(split[len(split) - 1])
-                try:
-                    if res.decode() == "error 404" or re.match("Not found \[.*\]", res.decode()) or re.match("<!DOCTYPE html>.*", res.decode()) or re.match("<html>.*", res.decode()):
-                        # Error file not found
-                        replaysNotFound.append(name)
-                        #print(res == "error 404")
-                        #print(re.match("Not found \[.*\]", res))
-                        #print(re.match("<!DOCTYPE html>.*", res))
-                    else:
-                        # Create a temp file and write the data
-                        replayStrs.append(res)
-                        replayNames.append(name)
-                except UnicodeDecodeError as e:
-                    print(e) # This means we got binary :)
-                    # Create a temp file and write the data
-                    replayStrs.append(res)
-                    replayNames.append(name)
-            except OSError as exc:
+                spool.write(head)
+                for chunk in chunks:
+                    spool.write(chunk)
+                spool.seek(0)
+            except BaseException:
+                # A download that is cut off part way through doesn't leave its temp file behind
+                spool.close()
+                raise
+            return spool
+
+    # Downloads a single replay, retrying network failures with backoff. Like
+    # other requests, nothing is sent while the circuit breaker is open.
+    # On success, the response is a file object holding the replay (which the
+    # caller needs to close). A replay tricebot doesn't have is NOT_FOUND_ERROR.
+    async def fetchReplay(self, replayURL: str, spoolSize: int = 1024 * 1024) -> TriceBotResult:
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while attempt < self.maxTries:
+            if self.breaker.isOpen():
+                return TriceBotResult(TriceBotStatus.UNAVAILABLE, None, attempt)
+            if attempt > 0:
+                await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+            try:
+                spool = await loop.run_in_executor(self.executor, partial(self._fetchReplay, replayURL, spoolSize))
+            except OSError:
                 # Network issues
                 print("[TRICEBOT ERROR]: Netty error")
-                replaysNotFound.append(replayURL)
-        
-        # Create zip file then close the temp files
-        try:
-            if (len(replayStrs) == 0):
-                return None
-            tmpFile = tempfile.TemporaryFile(mode="wb+", suffix="tricebot.py", prefix="replaydownloads.zip")
-            #tmpFile = open("I hate python.zip", "wb+")
-            zipf = zipfile.ZipFile(tmpFile, "w", zipfile.ZIP_DEFLATED)
-            for i in range(0, len(replayStrs)):
-                replayStr = replayStrs[i]
-                name = replayNames[i]            
-                zipf.writestr(name, replayStr, compress_type=zipfile.ZIP_DEFLATED, compresslevel=9)
-            zipf.close()
-            tmpFile.seek(0)
-            return tmpFile
-        except IOError as exc:
-            print(exc)
-            return None
-    
-    # Returns:
-    # 1 if the operation was a success
-    # 2 if the slot was occupied (warns the admin that a player may need to be kicked)
-    
-    # 0 if a network error occurred
-    # -1 if the game was not found
-    # -2 if the player slot was not found
-    def changePlayerInfo(self, gameID: int, oldPlayerName: str, newPlayerName: str):
+                self.breaker.recordFailure()
+                continue
+            self.breaker.recordSuccess()
+            if spool is None:
+                return TriceBotResult(TriceBotStatus.NOT_FOUND_ERROR, None, attempt)
+            return TriceBotResult(TriceBotStatus.SUCCESS, spool, attempt)
+        return TriceBotResult(TriceBotStatus.NETWORK_ERROR, None, attempt)
+
+    # The status is SUCCESS_SLOT_OCCUPIED if the slot was occupied (warns the
+    # admin that a player may need to be kicked)
+    async def changePlayerInfo(self, gameID: int, oldPlayerName: str, newPlayerName: str) -> TriceBotResult:
         body  = f'authtoken={self.authToken}\n'
         body += f'oldplayername={oldPlayerName}\n'
         body += f'newplayername={newPlayerName}\n'
         body += f'gameid={gameID}'
-        
-        res = ""
-        try:
-            res = self.req("api/updateplayerinfo", body)
-        except OSError as exc:
-            #Network issues
-            print("[TRICEBOT ERROR]: Netty error")
-            res = "network error"
-            
-        if res == "success":
-            return 1
-        elif res == "success but occupied":
-            return 2
-        elif res == "error game not found":
-            return -1
-        elif res == "error player not found":
-            return -2
-        else:
-            return 0
-    
-    # 1 if success
-    # 0 auth token is bad, error 404 or network issue
-    # -1 game not found
-    def disablePlayerDeckVerificatoin(self, gameID: str) -> int:
+
+        result = await self.req("api/updateplayerinfo", body)
+        return self._parseResponse(result, { "success": TriceBotStatus.SUCCESS,
+                                             "success but occupied": TriceBotStatus.SUCCESS_SLOT_OCCUPIED,
+                                             "error game not found": TriceBotStatus.GAME_NOT_FOUND,
+                                             "error player not found": TriceBotStatus.PLAYER_NOT_FOUND })
+
+    async def disablePlayerDeckVerificatoin(self, gameID: str) -> TriceBotResult:
         body  = f'authtoken={self.authToken}\n'
         body += f'gameid={gameID}'
-        
-        res = ""
-        try:
-            res = self.req("api/disableplayerdeckverification", body)
-        except OSError as exc:
-            #Network issues
-            print("[TRICEBOT ERROR]: Netty error")
-            res = "network error"
-            return 0
-            
-        if res == "success":
-            return 1
-        elif res == "error 404" or "invalid auth token":
-            return 0
-        elif res == "game not found":
-            return -1
-        return 0
-    
-    #  1 if success
-    #  0 auth token is bad or error404 or network issue
-    # -1 if player not found
-    # -2 if an unknown error occurred
-    def kickPlayer(self, gameID: int, name: str) -> int:
+
+        result = await self.req("api/disableplayerdeckverification", body)
+        return self._parseResponse(result, { "success": TriceBotStatus.SUCCESS,
+                                             "game not found": TriceBotStatus.GAME_NOT_FOUND })
+
+    async def kickPlayer(self, gameID: int, name: str) -> TriceBotResult:
         body  = f'authtoken={self.authToken}\n'
         body += f'gameid={gameID}\n'
-        body += f'target={name}'        
-        
-        try:
-            message = self.req("api/kickplayer", body)
-        except OSError as exc:
-            # Network issues
-            print("[TRICEBOT ERROR]: Netty error")
-            return 0
-        
-        # Check for server error
-        if (message == "timeout error" or message == "error 404" or message == "invalid auth token"):        
-            return 0        
-        if (message == "success"):
-            return 1
-        elif (message == "error not found"):
-            return -1
-        
-        return -2
-    
-    def createGame(self, gamename: str, password: str, playercount: int, spectatorsallowed: bool, spectatorsneedpassword: bool, spectatorscanchat: bool, spectatorscanseehands: bool, onlyregistered: bool, playerdeckverification: bool, playernames, deckHashes):
-        if len(playernames) != len(deckHashes):
-            GameMade(False, -1, -1) # They must the same length dummy!
-            
+        body += f'target={name}'
+
+        result = await self.req("api/kickplayer", body)
+        return self._parseResponse(result, { "success": TriceBotStatus.SUCCESS,
+                                             "error not found": TriceBotStatus.PLAYER_NOT_FOUND })
+
+    async def createGame(self, gamename: str, password: str, playercount: int, spectatorsallowed: bool, spectatorsneedpassword: bool, spectatorscanchat: bool, spectatorscanseehands: bool, onlyregistered: bool, playerdeckverification: bool, playernames, deckHashes) -> GameMade:
+        return await self.createGameFromSpec(GameSpec(gamename, password, playercount, spectatorsallowed, spectatorsneedpassword, spectatorscanchat, spectatorscanseehands, onlyregistered, playerdeckverification, playernames, deckHashes))
+
+    async def createGameFromSpec(self, spec: 'GameSpec') -> GameMade:
+        if not spec.isValid():
+            return GameMade(False, -1, "") # They must the same length dummy!
+
         body  = f'authtoken={self.authToken}\n'
-        body += f'gamename={gamename.replace(" ", "").replace("_", "")}\n'
-        body += f'password={password}\n'
-        body += f'playerCount={playercount}\n'        
-        body += f'spectatorsAllowed={int(spectatorsallowed)}\n'            
-        body += f'spectatorsNeedPassword={int(spectatorsneedpassword)}\n'        
-        body += f'spectatorsCanChat={int(spectatorscanchat)}\n'        
-        body += f'spectatorsCanSeeHands={int(spectatorscanseehands)}\n'        
-        body += f'onlyRegistered={int(onlyregistered)}\n'   
-        body += f'playerDeckVerification={int(playerdeckverification)}\n'
-        
-        if playerdeckverification:
-            for i in range(0, len(playernames)):
-                if playernames[i] == "" or playernames[i] == None: # No name
-                    body += f'playerName=*\n'
-                else:
-                    body += f'playerName={playernames[i]}\n'
-                    if len(deckHashes[i]) == 0:
-                        body += f'deckHash=*\n'
-                    else:
-                        for deckHash in deckHashes[i]:
-                            body += f'deckHash={deckHash}\n'
-        
-        try:
-            message = self.req("api/creategame", body)   
-            print(message)
-        except OSError as exc:
-            #Network issues
-            print("[TRICEBOT ERROR]: Netty error")
-            return GameMade(False, -1, "")
-            
+        body += spec.toBody()
+
+        result = await self.req("api/creategame", body)
+        if not result.success:
+            return GameMade(False, -1, "", result)
+        return self._parseGameMade(result.response, result)
+
+    # Asks the tricebot what optional endpoints it has. The answer is only kept
+    # if it is a list of features, or a 404 from a tricebot without the endpoint.
+    # Anything else (e.g. a bad auth token or an error page) is asked again next time.
+    async def supportsBatchCreation(self) -> bool:
+        if self.batchSupport is None:
+            result = await self.req("api/features", f'authtoken={self.authToken}')
+            if not result.success:
+                return False
+            message = result.response.strip()
+            if message == "error 404":
+                self.batchSupport = False
+            elif all(self.featureRegex.match(line) for line in message.split("\n")):
+                self.batchSupport = "creategames" in message.split("\n")
+            else:
+                print(f'[TRICEBOT ERROR]: Unexpected features reply: {message[:100]}')
+                return False
+        return self.batchSupport
+
+    # Creates many games with one request. The returned list lines up with the
+    # given specs. If the tricebot can't create games in bulk, or the request
+    # never reached it, the games are created one at a time. If the request was
+    # sent but no reply came back, the games may have been made, so they are
+    # reported as failed rather than made a second time.
+    async def createGames(self, specs: List['GameSpec']) -> List[GameMade]:
+        if len(specs) == 0:
+            return []
+        if not await self.supportsBatchCreation():
+            return [await self.createGameFromSpec(spec) for spec in specs]
+
+        digest = [GameMade(False, -1, "") for spec in specs]
+        body = f'authtoken={self.authToken}\n'
+        for i, spec in enumerate(specs):
+            if spec.isValid():
+                body += f'game={i}\n'
+                body += spec.toBody()
+
+        result = await self.req("api/creategames", body, idempotent=False)
+        if not result.success and result.sent:
+            print(f'[TRICEBOT ERROR]: Creating {len(specs)} games at once failed with {result}, and they may have been made, so they are not being made again')
+            for i, spec in enumerate(specs):
+                if spec.isValid():
+                    digest[i].result = result
+            return digest
+        message = result.response.strip().lower() if result.success else ""
+        if message == "error 404":
+            # The tricebot no longer has the endpoint
+            self.batchSupport = False
+        if not result.success or message in ("error 404", "invalid auth token"):
+            # The tricebot refused the batch or never got it, so none of the games were made
+            print(f'[TRICEBOT ERROR]: Creating {len(specs)} games at once failed with {result}, so they are being created one at a time')
+            return [await self.createGameFromSpec(spec) for spec in specs]
+
+        # The response has a block of lines per game, each starting with "game=<index>"
+        blocks = {}
+        index = None
+        for line in result.response.split("\n"):
+            if line.startswith("game="):
+                try:
+                    index = int(line.partition("=")[2])
+                except ValueError:
+                    index = None
+                    continue
+                blocks[index] = ""
+            elif index is not None:
+                blocks[index] += line + "\n"
+
+        for i, spec in enumerate(specs):
+            if not spec.isValid():
+                continue
+            gameResult = TriceBotResult(TriceBotStatus.SUCCESS, blocks.get(i, ""), result.attempts)
+            digest[i] = self._parseGameMade(gameResult.response.strip(), gameResult)
+        return digest
+
+    def _parseGameMade(self, message: str, result: TriceBotResult) -> GameMade:
         # Check for server error
-        if (message.lower() == "timeout error") or (message.lower() == "error 404") or (message.lower() == "invalid auth token"):
-            #Server issues         
+        if (message.lower() == "error 404") or (message.lower() == "invalid auth token"):
+            #Server issues
             print("[TRICEBOT ERROR]: " + message)
-            return GameMade(False, -1, "")
-        
+            result.status = TriceBotStatus.NOT_FOUND_ERROR if message.lower() == "error 404" else TriceBotStatus.AUTH_ERROR
+            return GameMade(False, -1, "", result)
+
         # Try to parse the message
         lines = message.split("\n")
         gameID: int = -1
         replayName: str = ""
-        
+
         # Parse line for line
         for line in lines:
             parts = line.split("=")
-            
+
             # Check length
-            if len(parts) >= 2 :            
+            if len(parts) >= 2 :
                 tag = parts[0]
                 value = ""
                 for i in range(1, len(parts)):
                     value += parts[i]
                     if i != len(parts) - 1:
                         value += "="
-                    
+
                 if tag == "gameid":
                     # There has to be a better way to do this
                     try:
@@ -262,8 +474,9 @@ class TriceBot:
                     replayName = urllib.parse.quote(value)
                 # Ignore other tags
             # Ignores lines that have no equals in them
-        
+
         # Check if there was an error
         success = (gameID != -1) and (replayName != "")
-        print(success)
-        return GameMade(success, gameID, replayName)
+        if not success:
+            result.status = TriceBotStatus.UNKNOWN_ERROR
+        return GameMade(success, gameID, replayName, result)
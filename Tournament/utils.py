@@ -67,6 +67,32 @@ def timeDiff( tOne: str, tTwo: str ) -> float:
     digest = diff.days*24*60*60 + diff.seconds + diff.microseconds*10**-6
     return abs(digest)
 
+# Player IDs are stored in every match that a player is in, and each ID read
+# from a file or command is a new int object, so only one copy of each is kept.
+# The table holds one entry per Discord user that has played in a tournament
+# on this bot, which is bounded by the members of its guilds. Entries are never
+# dropped, as a dropped ID that is still in use would stop being shared.
+_internedIDs: Dict = { }
+
+def internID( ID ):
+    """ Returns the shared copy of an ID """
+    if ID is None:
+        return None
+    return _internedIDs.setdefault( ID, ID )
+
+def splitMessage( msg: str, limit: int = 2000, delim: str = "\n" ) -> List[str]:
+    """ Splits a message into chunks no longer than the given limit (Discord caps messages at 2000 chars) """
+    if len(msg) <= limit:
+        return [ msg ]
+    msg = msg.split( delim )
+    digest = [ "" ]
+    for submsg in msg:
+        if len(digest[-1]) + len(delim) + len(submsg) <= limit:
+            digest[-1] += delim + submsg
+        else:
+            digest.append( submsg )
+    return digest
+
 def getAdminRole( duild: discord.Guild ):
     """ TODO: Soon to be depricated method """
     ret = ""
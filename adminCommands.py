@@ -2,6 +2,7 @@ import os
 import shutil
 import random
 import tempfile
+import time
 
 from discord.ext import commands
 from dotenv import load_dotenv
@@ -425,6 +426,34 @@ async def createPairingsList( ctx, tourn = None ):
         await ctx.send( msg )
 
 
+commandSnippets["pair-round"] = "- pair-round : Pairs the next round of a Swiss tournament"
+commandCategories["day-of"].append("pair-round")
+@bot.command(name='pair-round')
+async def pairRound( ctx, tourn = None ):
+    mention = ctx.author.mention
+
+    if await isPrivateMessage( ctx ): return
+    gld = guildSettingsObjects[ctx.guild.id]
+
+    if not await isTournamentAdmin( ctx ): return
+    adminMention = gld.getTournAdminRole().mention
+
+    if tourn is None:
+        await ctx.send( f'{mention}, you did not provide enough information. You need to specify a tournament in order to pair a round.' )
+        return
+
+    tournObj = gld.getTournament( tourn )
+    if tournObj is None:
+        await ctx.send( f'{mention}, there is not a tournament called {tourn!r} on this server.' )
+        return
+
+    message = await tournObj.pairRound( )
+    for msg in splitMessage( f'{mention}, {message}' ):
+        if msg == "":
+            break
+        await ctx.send( msg )
+
+
 # TODO: This should be a property
 commandSnippets["set-pairing-threshold"] = "- set-pairing-threshold : Sets the number of players needed to pair the queue"
 commandCategories["properties"].append("set-pairing-threshold")
@@ -562,8 +591,8 @@ async def adminRemoveMatch( ctx, tourn = None, mtch = None ):
         await ctx.send( f'{mention}, you did not provide a match number. Please specify a match number using digits.' )
         return
 
-    if mtch > len(tournObj.matches):
-        await ctx.send( f'{mention}, the match number that you specified is greater than the number of matches. Double check the match number.' )
+    if tournObj.getMatch( mtch ) is None:
+        await ctx.send( f'{mention}, there is no match #{mtch} in {tourn}. Double check the match number.' )
         return
 
     if await hasCommandWaiting( ctx, ctx.author.id ):
@@ -597,7 +626,7 @@ async def viewQueue( ctx, tourn = None ):
     tournInfo: discord.Embed = tournObj.getTournamentStatusEmbed()
 
     message = await ctx.send( embed=tournInfo )
-    tournObj.infoMessage = message
+    tournObj.setInfoMessage( message, tournInfo )
     tournObj.saveOverview()
 
 
@@ -636,6 +665,85 @@ async def viewQueue( ctx, tourn = None ):
     await ctx.send( f'{mention}, here is the current matchmaking queue for {tourn}:', embed=embed )
 
 
+commandSnippets["pairing-metrics"] = "- pairing-metrics : Shows how long players wait in the queue and how long pairings take"
+commandCategories["day-of"].append("pairing-metrics")
+@bot.command(name='pairing-metrics')
+async def pairingMetrics( ctx, tourn = None ):
+    mention = ctx.author.mention
+    gld = guildSettingsObjects[ctx.guild.id]
+
+    if await isPrivateMessage( ctx ): return
+
+    if not await isTournamentAdmin( ctx ): return
+
+    if tourn is None:
+        await ctx.send( f'{mention}, you did not provide enough information. You need to specify a tournament to view its pairing metrics.' )
+        return
+
+    tournObj = gld.getTournament( tourn )
+    if tournObj is None:
+        await ctx.send( f'{mention}, there is not a tournament called {tourn!r} on this server.' )
+        return
+
+    def summarize( hist, *labels ) -> str:
+        if hist.count( *labels ) == 0:
+            return "No data yet."
+        return f'Count: {hist.count( *labels )}\nMean: {hist.mean( *labels ):.2f}s\np50: {hist.quantile( 0.5, *labels ):.2f}s\np95: {hist.quantile( 0.95, *labels ):.2f}s'
+
+    name = tournObj.name
+    considered = playersConsidered.get( name )
+    successText  = f'Pairing passes: {int(pairingPasses.get( name ))}\n'
+    successText += f'Players paired: {int(playersPaired.get( name ))} of {int(considered)}'
+    if considered > 0:
+        successText += f' ({playersPaired.get( name )/considered:.0%})'
+
+    embed = discord.Embed( title=f'Pairing Metrics for {name}' )
+    embed.add_field( name="**Queue Wait**", value=summarize( queueWaitTime, name ) )
+    embed.add_field( name="**Pairing Passes**", value=summarize( pairingPassTime, name ) )
+    embed.add_field( name="**Finding Pairings**", value=summarize( pairingComputeTime, name ) )
+    embed.add_field( name="**Pairing Success**", value=successText )
+    embed.add_field( name="**Discord Setup (per match)**", value=summarize( matchSetupTime, name, "discord" ) )
+    embed.add_field( name="**Tricebot Setup (per request)**", value=summarize( matchSetupTime, name, "tricebot" ) )
+
+    await ctx.send( f'{mention}, here are the pairing metrics for {name} since the bot was started:', embed=embed )
+
+
+commandSnippets["perf-report"] = "- perf-report : Summarizes how long each command has taken since the bot started"
+commandCategories["management"].append("perf-report")
+@bot.command(name='perf-report')
+async def perfReport( ctx ):
+    mention = ctx.author.mention
+
+    if await isPrivateMessage( ctx ): return
+
+    if not await isTournamentAdmin( ctx ): return
+
+    rows = profiler.report( )
+    if len(rows) == 0:
+        await ctx.send( f'{mention}, no commands have been run since the bot started.' )
+        return
+
+    uptime = (time.time() - profiler.startTime) / 3600
+    lagP99 = eventLoopLag.quantile( 0.99 )
+    header  = f'{mention}, here is how long commands have taken over the last {uptime:.1f} hours (slowest p95 first). '
+    header += f'The "loop" column is how long a command blocked the event loop. '
+    header += f'The longest event loop lag was {profiler.maxLag*1000:.0f}ms' + ( f' and the p99 lag was {lagP99*1000:.0f}ms.' if not lagP99 is None else "." )
+    await ctx.send( header )
+
+    table  = f'{"command":<24}{"count":>7}{"p50":>9}{"p95":>9}{"p99":>9}{"loop p95":>10}\n'
+    table += "\n".join( f'{name[:23]:<24}{count:>7}{p50*1000:>7.0f}ms{p95*1000:>7.0f}ms{p99*1000:>7.0f}ms{loopP95*1000:>8.0f}ms' for name, count, p50, p95, p99, loopP95 in rows )
+    for chunk in splitMessage( table, limit=1990 ):
+        await ctx.send( f'```{chunk}```' )
+
+    stalls = watchdog.stallsBySite( )
+    if len(stalls) > 0:
+        table  = f'{"call site":<60}{"stalls":>7}{"total":>9}{"longest":>9}\n'
+        table += "\n".join( f'{site[-59:]:<60}{count:>7}{total*1000:>7.0f}ms{longest*1000:>7.0f}ms' for site, total, count, longest in stalls[:15] )
+        await ctx.send( f'Recent event loop stalls, by the call site that caused them:' )
+        for chunk in splitMessage( table, limit=1990 ):
+            await ctx.send( f'```{chunk}```' )
+
+
 commandSnippets["tricebot-kick-player"] = "- tricebot-kick-player : Kicks a player from a cockatrice match when tricebot is enabled for that match"
 commandCategories["day-of"].append("tricebot-kick-player")
 @bot.command(name='tricebot-kick-player')
@@ -663,26 +771,20 @@ async def tricebotKickPlayer( ctx, tourn = None, mtch = None, playerName = None
         await ctx.send( f'{mention}, you did not provide a match number. Please specify a match number using digits.' )
         return
 
-    if mtch > len(tournObj.matches):
-        await ctx.send( f'{mention}, the match number that you specified is greater than the number of matches. Double check the match number.' )
+    Match = tournObj.getMatch( mtch )
+    if Match is None:
+        await ctx.send( f'{mention}, there is no match #{mtch} in {tourn}. Double check the match number.' )
         return
 
-    Match = tournObj.matches[mtch - 1]
-
     if not Match.triceMatch:
         await ctx.send( f'{mention}, that match is not a match with tricebot enabled.' )
         return
 
-    result = tournObj.kickTricePlayer(Match.gameID, playerName)
+    result = await tournObj.kickTricePlayer(mtch, playerName)
 
-    #  1 success
-    #  0 auth token is bad or error404 or network issue
-    # -1 player not found
-    # -2 an unknown error occurred
-
-    if result == 1:
+    if result.status == TriceBotStatus.SUCCESS:
         await ctx.send( f'{mention}, {playerName!r} was kicked from match {mtch}.' )
-    elif result == -1:
+    elif result.status == TriceBotStatus.PLAYER_NOT_FOUND:
         await ctx.send( f'{mention}, {playerName!r} was not found in match {mtch}.' )
     else:
         await ctx.send( f'{mention}, An error has occured whilst kicking {playerName!r} from match {mtch}.' )
@@ -704,9 +806,9 @@ async def triceBotUpdatePlayer( ctx, tourn = None, mtch = None ):
         await ctx.send( f'{mention}, you did not provide enough information. You need to specify a tournament and a player.' )
         return
 
-    tournObj = gld.getTournament( tournName )
+    tournObj = gld.getTournament( tourn )
     if tournObj is None:
-        await ctx.send( f'{mention}, there is not a tournament called {tournName!r} on this server.' )
+        await ctx.send( f'{mention}, there is not a tournament called {tourn!r} on this server.' )
         return
 
     # Get match
@@ -716,12 +818,11 @@ async def triceBotUpdatePlayer( ctx, tourn = None, mtch = None ):
         await ctx.send( f'{mention}, you did not provide a match number. Please specify a match number using digits.' )
         return
 
-    if mtch > len(tournObj.matches):
-        await ctx.send( f'{mention}, the match number that you specified is greater than the number of matches. Double check the match number.' )
+    Match = tournObj.getMatch( mtch )
+    if Match is None:
+        await ctx.send( f'{mention}, there is no match #{mtch} in {tourn}. Double check the match number.' )
         return
 
-    Match = tournObj.matches[mtch - 1]
-
     if not Match.triceMatch:
         await ctx.send( f'{mention}, that match is not a match with tricebot enabled.' )
         return
@@ -730,12 +831,15 @@ async def triceBotUpdatePlayer( ctx, tourn = None, mtch = None ):
         return
 
     # Send update command
-    result = trice_bot.disablePlayerDeckVerificatoin(match.gameID)
-    if result == 1:
-        match.playerDeckVerification = False
+    result = await getTriceBot().disablePlayerDeckVerificatoin(Match.gameID)
+    if result.success:
+        Match.playerDeckVerification = False
+        Match.saveXML( )
         await ctx.send( f'{mention}, player deck verification was disabled.' )
+    elif result.status == TriceBotStatus.GAME_NOT_FOUND:
+        await ctx.send( f'{mention}, the game was not found, so player deck verification was not changed.' )
     else:
-        await ctx.send( f'{mention}, an error occurred.' )
+        await ctx.send( f'{mention}, an error occurred: {result.status.value}.' )
 
 
 commandSnippets["tricebot-update-player"] = "- tricebot-update-player : Updates the cockatrice username for a player, for a game that is ongoing."
@@ -766,12 +870,11 @@ async def triceBotUpdatePlayer( ctx, tourn = None, mtch = None, plyr = None, new
         await ctx.send( f'{mention}, you did not provide a match number. Please specify a match number using digits.' )
         return
 
-    if mtch > len(tournObj.matches):
-        await ctx.send( f'{mention}, the match number that you specified is greater than the number of matches. Double check the match number.' )
+    Match = tournObj.getMatch( mtch )
+    if Match is None:
+        await ctx.send( f'{mention}, there is no match #{mtch} in {tourn}. Double check the match number.' )
         return
 
-    Match = tournObj.matches[mtch - 1]
-
     if not Match.triceMatch:
         await ctx.send( f'{mention}, that match is not a match with tricebot enabled.' )
         return
@@ -793,26 +896,26 @@ async def triceBotUpdatePlayer( ctx, tourn = None, mtch = None, plyr = None, new
             return
 
     # Send update command
-    result = trice_bot.changePlayerInfo(Match.gameID, oldTriceName, newTriceName)
+    result = await getTriceBot().changePlayerInfo(Match.gameID, oldTriceName, newTriceName)
 
     # Handle result
-    if result == 0:
-        await ctx.send( f'{mention}, there was an error updating the game room.' )
-    elif result == 1:
+    if result.status == TriceBotStatus.SUCCESS:
         await ctx.send( f'{mention}, the player information was successfully updated.' )
         if not member is None:
             tournObj.setPlayerTriceName( member.id, newTriceName ) # Update trice name
-    elif result == 2:
+    elif result.status == TriceBotStatus.SUCCESS_SLOT_OCCUPIED:
         await ctx.send( f'{mention}, the player information was successfully updated, however a player using that player\'s name is in the game.' )
         if not member is None:
             tournObj.setPlayerTriceName( member.id, newTriceName ) # Update trice name
-    elif result == -1:
+    elif result.status == TriceBotStatus.GAME_NOT_FOUND:
         await ctx.send( f'{mention}, the game was not found, so the player information was not updated, as there no action was taken.' )
-    elif result == -2:
+    elif result.status == TriceBotStatus.PLAYER_NOT_FOUND:
         await ctx.send( f'{mention}, the player was not found, so no action was taken. If there are multiple players with no cockatrice names then you can ignore this error as they are still able to join.' )
-    else:
+    elif result.status == TriceBotStatus.UNKNOWN_ERROR:
         await ctx.send( f'{mention}, an unknown error has occurred.' )
-        raise TriceBotAPIError( f'tricebot-update-player failed with code {result}' )
+        raise TriceBotAPIError( f'tricebot-update-player failed with {result}' )
+    else:
+        await ctx.send( f'{mention}, there was an error updating the game room: {result.status.value}.' )
 
 
 commandSnippets["download-replays"] = "- download-replays : Downloads all replays for a tournament"
@@ -835,20 +938,18 @@ async def downloadReplays( ctx, tourn = None ):
         await ctx.send( f'{mention}, there is not a tournament called {tourn!r} on this server.' )
         return
 
-    replayURLs = []
-
-    # Iterate over matches
-    for match in tournObj.matches:
-        if match.triceMatch and match.replayURL != "":
-            replayURLs.append(match.replayURL)
-
-    if len(replayURLs) == 0:
+    replayCount = len( tournObj.getReplayURLs() )
+    if replayCount == 0:
         await ctx.send( f'{mention}, there were no replays to download.' )
         return
 
-    # Download replays
+    # Only replays that haven't been archived yet are downloaded
     replaysNotFound = []
-    replayFile = trice_bot.downloadReplays(replayURLs, replaysNotFound)
+    progressMessage = await ctx.send( f'{mention}, gathering {replayCount} replays for {tourn}.' )
+    async def updateProgress( done: int, total: int ) -> None:
+        # The outbox paces the edits and folds them together, so only the latest count is sent
+        outbox.edit( progressMessage, content=f'{mention}, gathered {done} of {total} replays for {tourn}.' )
+    replayFile = await tournObj.downloadReplays( replaysNotFound, progress=updateProgress )
     if replayFile is None:
         await ctx.send( f'{mention}, an error occurred downloading the replays.' )
         return
@@ -908,17 +1009,10 @@ async def rawStandings( ctx, tourn = None ):
 
 
 async def cutTopXCoroFunc(ctx, mention, standings, tournObj, tourn, x):
-    # Cut the players
-    playersDropped = []
-    for i in range(x, len(standings[1])):
-        # Drop this player
-        await tournObj.dropPlayer(standings[1][i].discordID, ctx.author.mention)
-        playersDropped.append(standings[1][i].getMention())
-        
-    newLine = "\n\t- "
-    return f'{mention}, tournament {tourn} was cut to the top {x} players, the following players were dropped:{newLine}{f"{newLine}".join(playersDropped)}'
-
-commandSnippets["cut-to-top"] = "- cut-to-top: Cuts a tournament to the top X players." 
+    # Cut the players and pair the first round of the bracket
+    return await tournObj.cutToTop( x, mention )
+
+commandSnippets["cut-to-top"] = "- cut-to-top: Cuts a tournament to the top X players and starts a single-elimination bracket for them." 
 commandCategories["management"].append("cut-to-top")
 @bot.command(name='cut-to-top')
 async def cutToTopX( ctx, tourn = None, x = None):
@@ -960,7 +1054,7 @@ async def cutToTopX( ctx, tourn = None, x = None):
         del( commandsToConfirm[ctx.author.id] )
 
     commandsToConfirm[ctx.author.id] = ( getTime(), 30, cutTopXCoroFunc(ctx, mention, standings, tournObj, tourn, x) )
-    await ctx.send( f'{adminMention}, in order to cut players to the top {x}, confirmation is needed. {mention}, are you sure you want to remove this match (!yes/!no)?' )
+    await ctx.send( f'{adminMention}, in order to cut players to the top {x}, confirmation is needed. {mention}, are you sure you want to cut {tourn} (!yes/!no)?' )
 
 
 """
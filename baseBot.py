@@ -215,23 +215,15 @@ def getTournamentAdminMention( a_guild ) -> str:
             break
     return adminMention
 
-def splitMessage( msg: str, limit: int = 2000, delim: str = "\n" ) -> List[str]:
-    if len(msg) <= limit:
-        return [ msg ]
-    msg = msg.split( delim )
-    digest = [ "" ]
-    for submsg in msg:
-        if len(digest[-1]) + len(submsg) <= limit:
-            digest[-1] += delim + submsg
-        else:
-            digest.append( submsg )
-    return digest
-    
 
 # ---------------- The Bot Base ---------------- 
 
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
+
+# Importing Tournament doesn't load anything, so the card database and the TriceBot client are made here
+getCardDB( )
+getTriceBot( )
 MAX_COIN_FLIPS = int( os.getenv('MAX_COIN_FLIPS') )
 
 DEV_SERVER_ID: int = None
@@ -242,10 +234,49 @@ ERROR_LOG_CHANNEL_ID: int = None
 if not os.getenv('ERROR_LOG_CHANNEL_ID') is None:
     ERROR_LOG_CHANNEL_ID = int( os.getenv('ERROR_LOG_CHANNEL_ID') )
 
+# Pairing and queue metrics are served locally in the Prometheus text format
+METRICS_PORT: int = None
+if not os.getenv('METRICS_PORT') is None:
+    METRICS_PORT = int( os.getenv('METRICS_PORT') )
+    startMetricsServer( METRICS_PORT )
+
+# Commands that take longer than this many seconds are logged, along with where they spent their time
+SLOW_COMMAND_SECONDS: float = 1.0
+if not os.getenv('SLOW_COMMAND_SECONDS') is None:
+    SLOW_COMMAND_SECONDS = float( os.getenv('SLOW_COMMAND_SECONDS') )
+
+# Event loop stalls longer than this many milliseconds are attributed to the call site that caused them
+LOOP_STALL_MS: int = 100
+if not os.getenv('LOOP_STALL_MS') is None:
+    LOOP_STALL_MS = int( os.getenv('LOOP_STALL_MS') )
+
+# The bot can run as several processes (shards), each owning the guilds that Discord sends it.
+# Each shard is given its ID and the addresses of every shard's router, like "127.0.0.1:7001,127.0.0.1:7002".
+SHARD_ID: int = 0
+if not os.getenv('SHARD_ID') is None:
+    SHARD_ID = int( os.getenv('SHARD_ID') )
+router = shardRouter( SHARD_ID, parseAddresses( os.getenv('SHARD_ADDRESSES', "") ) )
+
 random.seed( )
 
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix='!', intents=intents)
+if router.shardCount > 1:
+    bot = commands.Bot(command_prefix='!', intents=intents, shard_id=SHARD_ID, shard_count=router.shardCount)
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents)
+
+# Every command is run through the profiler, which times it and watches the event loop
+profiler = commandProfiler( threshold=SLOW_COMMAND_SECONDS )
+invokeCommand = bot.invoke
+
+async def profiledInvoke( ctx ) -> None:
+    if ctx.command is None:
+        return await invokeCommand( ctx )
+    return await profiler.profile( ctx.command.qualified_name, invokeCommand( ctx ) )
+
+bot.invoke = profiledInvoke
+
+watchdog = loopWatchdog( threshold=LOOP_STALL_MS/1000 )
 
 guildSettingsObjects = { }
 
@@ -261,10 +292,9 @@ savedGuildSettings = [ f'guilds/{d}' for d in os.listdir( "guilds" ) if os.path.
 # When a player leaves a guild, the bot is to drop them from all tournaments within the guild.
 @bot.event
 async def on_member_remove( member ):
-    for tourn in guildSettingsObjects[member.guild.id].tournaments:
-        if member.id in tourn.players:
-            message = await tourn.dropPlayer( member.id )
-            await member.send( message )
+    for tourn in guildSettingsObjects[member.guild.id].getPlayerTournaments( member ):
+        message = await tourn.dropPlayer( member.id )
+        await member.send( message )
 
 
 # When ready, the bot needs to looks at each pre-loaded tournament and add a discord user to each player.
@@ -272,6 +302,9 @@ async def on_member_remove( member ):
 async def on_ready():
     await bot.wait_until_ready( )
     print(f'{bot.user.name} has connected to Discord!\n')
+    await router.start( )
+    profiler.start( bot.loop )
+    watchdog.start( bot.loop )
     for guild in bot.guilds:
         print( f'This bot is connected to {guild.name} which has {len(guild.members)}!' ) 
         try:
@@ -297,6 +330,48 @@ async def on_guild_join( guild ):
         guildSettingsObjects[guild.id].save( f'guilds/{guild.id}/' )
 
 
+# Discord sends every DM to the first shard, but the player's tournaments can be in guilds that
+# another shard owns. Those DMs are handed to that shard, which fetches the message and runs it.
+@bot.event
+async def on_message( message ):
+    if router.shardCount > 1 and message.guild is None and not message.author.bot and message.content.startswith( bot.command_prefix ):
+        shard = await router.findPlayerShard( message.author.id, message.content )
+        if shard is None:
+            await message.channel.send( f'{message.author.mention}, you are registered for tournaments in several servers. Please include the name of the tournament in your command.' )
+            return
+        if shard != router.shardID:
+            await router.call( shard, "processMessage", userID=message.author.id, messageID=message.id )
+            return
+    await bot.process_commands( message )
+
+@router.handler( "playerTournaments" )
+async def findPlayerTournaments( userID: int ) -> List[str]:
+    user = bot.get_user( userID )
+    if user is None:
+        return [ ]
+    return [ tourn.name for tourn in getTournamentsByPlayer( user ) ]
+
+@router.handler( "processMessage" )
+async def processRoutedMessage( userID: int, messageID: int ) -> None:
+    user = await bot.fetch_user( userID )
+    channel = user.dm_channel
+    if channel is None:
+        channel = await user.create_dm( )
+    await bot.process_commands( await channel.fetch_message( messageID ) )
+
+
+# Long lists, like the full standings, are sent as one message that is paged through with reactions
+@bot.event
+async def on_raw_reaction_add( payload ):
+    if payload.user_id != bot.user.id:
+        await handlePageReaction( payload.message_id, str(payload.emoji) )
+
+@bot.event
+async def on_raw_reaction_remove( payload ):
+    if payload.user_id != bot.user.id:
+        await handlePageReaction( payload.message_id, str(payload.emoji) )
+
+
 # When an uncaught error occurs, the tracebot of the error needs to be printed
 # to stderr, logged, and sent to the development server's error log channel
 @bot.event
@@ -325,14 +400,24 @@ async def on_command_error( ctx: discord.ext.commands.Context, error: Exception
     with open( "squireBotError.log", "a" ) as errorFile:
         errorFile.write( message + "".join(traceback.format_exception( type(error), error, error.__traceback__ )) )
     
+    if DEV_SERVER_ID is None:
+        return
+    # Only the shard that owns the development server can see its error log channel
+    try:
+        await router.dispatch( DEV_SERVER_ID, "logError", text=message + f'```{"".join(traceback.format_exception( type(error), error, error.__traceback__ ))}```' )
+    except ( ShardCallError, OSError ) as ex:
+        print( f'The error could not be sent to the error log channel: {ex}' )
+    
+    return
+
+@router.handler( "logError" )
+async def sendErrorLog( text: str ) -> None:
     devServer = bot.get_guild( DEV_SERVER_ID )
     if devServer is None:
         return
     errorChannel = devServer.get_channel( ERROR_LOG_CHANNEL_ID )
     if isinstance( errorChannel, discord.TextChannel ):
-        await errorChannel.send( message + f'```{"".join(traceback.format_exception( type(error), error, error.__traceback__ ))}```' )
-    
-    return
+        await errorChannel.send( text )
     
 
 bot.remove_command( "help" )
@@ -140,7 +140,7 @@ async def adminRemoveDeck( ctx, tourn = None, plyr = None, ident = None ):
     if await hasCommandWaiting( ctx, ctx.author.id ):
         del( commandsToConfirm[ctx.author.id] )
 
-    commandsToConfirm[ctx.author.id] = ( getTime(), 30, tournObj.players.removeDeck( member.id, deckName, mention ) )
+    commandsToConfirm[ctx.author.id] = ( getTime(), 30, tournObj.removeDeck( member.id, deckName, mention ) )
     await ctx.send( f'{mention}, in order to remove the deck {deckName} from {member.mention}, confirmation is needed. Are you sure you want to remove the deck (!yes/!no)?' )
 
 
@@ -254,12 +254,12 @@ async def adminMatchResult( ctx, tourn = None, plyr = None, mtch = None, result
         await ctx.send( f'{mention}, you did not provide a match number. Please specify a match number as a number.' )
         return
     
-    if mtch > len(tournObj.matches):
-        await ctx.send( f'{mention}, the match number that you specified is greater than the number of matches. Double check the match number.' )
+    if tournObj.getMatch( mtch ) is None:
+        await ctx.send( f'{mention}, there is no match #{mtch} in {tourn}. Double check the match number.' )
         return
         
     Match = tournObj.players[member.id].getMatch( mtch )
-    if Match.matchNumber == -1:
+    if Match is None:
         await ctx.send( f'{mention}, {member.mention} is not a player in Match #{mtch}. Double check the match number.' )
         return
         
@@ -308,12 +308,12 @@ async def adminConfirmResult( ctx, tourn = None, plyr = None, mtch = None ):
         await ctx.send( f'{mention}, you did not provide a match number. Please specify a match number using digits.' )
         return
     
-    if mtch > len(tournObj.matches):
-        await ctx.send( f'{mention}, the match number that you specified is greater than the number of matches. Double check the match number.' )
+    if tournObj.getMatch( mtch ) is None:
+        await ctx.send( f'{mention}, there is no match #{mtch} in {tourn}. Double check the match number.' )
         return
         
     Match = tournObj.players[member.id].getMatch( mtch )
-    if Match.matchNumber == -1:
+    if Match is None:
         await ctx.send( f'{mention}, {member.mention} is not a player in Match #{mtch}. Double check the match number.' )
         return
     
@@ -357,11 +357,11 @@ async def giveTimeExtension( ctx, tourn = None, mtch = None, t = None ):
         await ctx.send( f'{mention}, you did not provide a match number correctly. Please specify a match number using digits.' )
         return
     
-    if mtch > len(tournObj.matches):
-        await ctx.send( f'{mention}, the match number that you specified is greater than the number of matches. Double check the match number.' )
+    if tournObj.getMatch( mtch ) is None:
+        await ctx.send( f'{mention}, there is no match #{mtch} in {tourn}. Double check the match number.' )
         return
     
-    if tournObj.matches[mtch - 1].stopTimer:
+    if tournObj.getMatch( mtch ).stopTimer:
         await ctx.send( f'{mention}, match #{mtch} does not have a timer set. Make sure the match is not already over.' )
         return
     
@@ -375,9 +375,9 @@ async def giveTimeExtension( ctx, tourn = None, mtch = None, t = None ):
         await ctx.send( f'{mention}, you can not give time extension of less than one minute in length.' )
         return
         
-    tournObj.matches[mtch - 1].giveTimeExtension( t*60 )
-    tournObj.matches[mtch - 1].saveXML( )
-    for plyr in tournObj.matches[mtch - 1].activePlayers:
+    tournObj.getMatch( mtch ).giveTimeExtension( t*60 )
+    tournObj.getMatch( mtch ).saveXML( )
+    for plyr in tournObj.getMatch( mtch ).activePlayers:
         await tournObj.players[plyr].discordUser.send( content=f'Your match (#{mtch}) in {tourn} has been given a time extension of {t} minute{"" if t == 1 else "s"}.' )
     await ctx.send( f'{mention}, you have given match #{mtch} a time extension of {t} minute{"" if t == 1 else "s"}.' )
 
@@ -419,6 +419,37 @@ async def adminPrintDecklist( ctx, tourn = None, plyr = None, ident = None ):
     await ctx.send( embed = await tournObj.players[member.id].getDeckEmbed( deckName ) )
 
 
+commandSnippets["admin-decklists"] = "- admin-decklists : Pages through the decklists of every active player" 
+commandCategories["admin-misc"].append( "admin-decklists" )
+@bot.command(name='admin-decklists')
+async def adminPrintDecklists( ctx, tourn = None ):
+    mention = ctx.author.mention
+    gld = guildSettingsObjects[ctx.guild.id]
+
+    if await isPrivateMessage( ctx ): return
+
+    if not await isAdmin( ctx ): return
+    
+    if tourn is None:
+        await ctx.send( f'{mention}, you did not provide enough information. You need to specify a tournament in order to see its decklists.' )
+        return
+
+    tournObj = gld.getTournament( tourn )
+    if tournObj is None: 
+        await ctx.send( f'{mention}, there is not tournament called {tourn!r} on this server.' )
+        return
+
+    plyrs = sorted( [ tournObj.players[plyr] for plyr in tournObj.activePlayers ], key=lambda p: p.name.lower() )
+    decks = [ ( plyr, deckName ) for plyr in plyrs for deckName in plyr.decks ]
+    if len(decks) == 0:
+        await ctx.send( f'{mention}, no active player in {tourn} has registered a deck.' )
+        return
+
+    # Each deck's layout is cached, so turning the pages doesn't look the cards up again
+    message = decklistMessage( decks, f'{mention}, here are the {len(decks)} decklists registered for {tourn}:' )
+    await message.send( ctx.channel )
+
+
 commandSnippets["match-status"] = "- match-status : View the currect status of a match" 
 commandCategories["admin-misc"].append("match-status")
 @bot.command(name='match-status')
@@ -445,10 +476,10 @@ async def matchStatus( ctx, tourn = None, mtch = None ):
         await ctx.send( f'{mention}, you did not provide a match number correctly. Please specify a match number using digits.' )
         return
     
-    if mtch > len(tournObj.matches):
-        await ctx.send( f'{mention}, the match number that you specified is greater than the number of matches. Double check the match number.' )
+    if tournObj.getMatch( mtch ) is None:
+        await ctx.send( f'{mention}, there is no match #{mtch} in {tourn}. Double check the match number.' )
         return
     
-    await ctx.send( f'{mention}, here is the status of match #{mtch}:', embed=tournObj.getMatchEmbed( mtch-1 ) )
+    await ctx.send( f'{mention}, here is the status of match #{mtch}:', embed=tournObj.getMatchEmbed( mtch ) )
 
 
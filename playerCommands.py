@@ -12,36 +12,6 @@ from baseBot import *
 from Tournament import *
 
 
-def createStandingsEmbeds( places: List[str], names: List[str], points: List[str], GWP: List[str], OWP: List[str] ):
-    length = len(places)
-    limit  = 1024
-    if   len(names ) < length: length = len(names )
-    elif len(points) < length: length = len(points)
-    elif len(GWP   ) < length: length = len(GWP   )
-    elif len(OWP   ) < length: length = len(OWP   )
-
-    digest  = [ ]
-    headers = [ "Name:", "Points & Win Percent:", "Opp. WP" ]
-    values  = [ "\u200b", "\u200b", "\u200b" ]
-    
-    for i in range(length):
-        line = [ f'{places[i]}) <@{names[i].discordID}>\n', f'{points[i]},\t{trunk(GWP[i])}%\n', f'{trunk(OWP[i])}%\n' ]
-        line_lengths = [ len(s) for s in line ]
-        if (len(values[0]) + line_lengths[0] <= limit) and (len(values[1]) + line_lengths[1] <= limit) and (len(values[2]) + line_lengths[2] <= limit):
-            values  = [ values[i] + line[i] for i in range(len(values)) ]
-        else:
-            digest.append( discord.Embed() )
-            for i in range(len(headers)):
-                digest[-1].add_field( name=headers[i], value=values[i] )
-            values = line.copy()
-
-    digest.append( discord.Embed() )
-    for i in range(len(headers)):
-        digest[-1].add_field( name=headers[i], value=values[i] )
-    
-    return digest
-        
-
 commandEmbeds["tournaments"] = discord.Embed( title = "Tournaments Command Info." )
 commandEmbeds["tournaments"].add_field( name = "", value = "" )
 commandSnippets["tournaments"] = "- tournaments : Registers you for a tournament"
@@ -110,7 +80,7 @@ async def addTriceName( ctx, tourn = None, name = None ):
         tourn = None
 
     if tourn is None:
-        tourns = gld.currentTournaments()
+        tourns = gld.getPlayerTournaments( ctx.author )
         if len( tourns ) < 1:
             await ctx.send( f'{mention}, you are not registered for any tournaments on this server. Please register for a tournament first. Use the !tournaments command to see what tournaments there are.' )
             return
@@ -137,22 +107,22 @@ async def addTriceName( ctx, tourn = None, name = None ):
     for match in plyrObj.matches:
         if match.isOpen() and match.triceMatch and match.playerDeckVerification:                
             # Send update command
-            result = trice_bot.changePlayerInfo(match.gameID, oldname, name)
+            result = await getTriceBot().changePlayerInfo(match.gameID, oldname, name)
                 
             # Handle result
-            if result == 0:
-                message += f'{mention}, an error occurred whilst updating match {match.matchNumber}.'
-            elif result == 1:
+            if result.status == TriceBotStatus.SUCCESS:
                 pass
-            elif result == 2:
+            elif result.status == TriceBotStatus.SUCCESS_SLOT_OCCUPIED:
                 message += f'{mention}, the player information was successfully updated for match{match.matchNumber}, however a player using that player\'s name is in the game.'
-            elif result == -1:
+            elif result.status == TriceBotStatus.GAME_NOT_FOUND:
                 message += f'{mention}, an error occurred whilst updating match {match.matchNumber}: tricebot failed to find the game.'
-            elif result == -2:
+            elif result.status == TriceBotStatus.PLAYER_NOT_FOUND:
                 message += f'{mention}, an error occurred whilst updating match {match.matchNumber}: tricebot failed to find the player.'
-            else:
+            elif result.status == TriceBotStatus.UNKNOWN_ERROR:
                 message += f'{mention}, an unknown error has occurred whilst updating the information for match {match.matchNumber}.'
-                errors.append(TriceBotAPIError( f'tricebot-update-player failed with code {result}' ))
+                errors.append(TriceBotAPIError( f'tricebot-update-player failed with {result}' ))
+            else:
+                message += f'{mention}, an error occurred whilst updating match {match.matchNumber}.'
             message += "\n"
     
     await ctx.send( f'{mention}, {message}' )
@@ -521,7 +491,7 @@ async def confirmMatchResult( ctx, tourn = None ):
     if not await hasOpenMatch( tournObj, ctx.author.id, ctx ): return
     
     playerMatch = tournObj.players[ctx.author.id].findOpenMatch( )
-    if playerMatch.status == "open":
+    if playerMatch.isOpen( ):
         await ctx.send( f'{mention}, match #{playerMatch.matchNumber} is still open, no result has been recorded yet, so there is nothing to confirm.' )
         return
     if ctx.author.id in playerMatch.confirmedPlayers:
@@ -576,41 +546,16 @@ async def standings( ctx, tourn = None, printAll = None ):
         await ctx.send( f'{mention}, this is not the correct channel to see the full standings. Please go to <#{gld.d_standingsChannel.id}> to use this command.' )
         return
     
-    standings = tournObj.getStandings( )
     if len(tournObj.players) < 1:
         await ctx.send( "There are no players registered in this tournament." )
         return
 
-    name = ""
-    if ctx.author.id is tournObj.players:
-        name = tournObj.players[ctx.author.id].getDisplayName()
-    
-    if name in standings[1] and not printAll:
-        index = standings[1].index(name)
-        upper = index - 12
-        lower = index + 12
-        if upper < 0:
-            upper = 0
-        for i in range(len(standings)):
-            # player object to player names
-            for j in range(len(standings[1])):
-                standings[1][j] = standings[1][j].discordUser.display_name
-            standings[i] = standings[i][upper:lower]
-        
-    if ctx.author.id in tournObj.players:        
-        if tournObj.players[ctx.author.id] in standings[1] and not printAll:
-            index = standings[1].index(tournObj.players[ctx.author.id])
-            upper = index - 12
-            lower = index + 12
-            if upper < 0:
-                upper = 0
-            for i in range(len(standings)):
-                standings[i] = standings[i][upper:lower]
-    
-    embeds = createStandingsEmbeds( standings[0], standings[1], standings[2], standings[3], standings[4] )
-    await ctx.send( content=f'{mention}, the standings for {tourn} are:', embed=embeds[0] )
-    for bed in embeds[1:]:
-        await ctx.send( content=" ", embed=bed )
+    # Everyone shares the tournament's cached standings, so this is cheap even when many people ask at once
+    # Without "all", only the page with the player on it is shown
+    snapshot = tournObj.getStandingsSnapshot( )
+    page = 0 if printAll else snapshot.pageOf( ctx.author.id )
+    message = standingsMessage( tournObj, f'{mention}, the standings for {tourn} are:', page, pageable=printAll )
+    await message.send( ctx.channel )
 
 
 commandSnippets["misfortune"] = "- misfortune : Helps you resolve Wheel of Misfortune (can be DM-ed)" 
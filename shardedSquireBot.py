@@ -0,0 +1,39 @@
+# shardedSquireBot.py
+# Starts SquireBot as several shards, each in its own process. Each shard connects to Discord for the guilds Discord
+# gives it, and the shards pass work between themselves over local ports, starting at SHARD_BASE_PORT.
+import os
+import sys
+import signal
+import subprocess
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+SHARD_COUNT = int( os.getenv('SHARD_COUNT', 2) )
+SHARD_BASE_PORT = int( os.getenv('SHARD_BASE_PORT', 7001) )
+
+addresses = ",".join( f'127.0.0.1:{SHARD_BASE_PORT + i}' for i in range( SHARD_COUNT ) )
+botPath = os.path.join( os.path.dirname( os.path.realpath(__file__) ), "squireBot.py" )
+
+shards = [ ]
+for shardID in range( SHARD_COUNT ):
+    env = dict( os.environ, SHARD_ID=str(shardID), SHARD_ADDRESSES=addresses )
+    # Each shard serves its own metrics, if they are being served
+    if not os.getenv('METRICS_PORT') is None:
+        env["METRICS_PORT"] = str( int( os.getenv('METRICS_PORT') ) + shardID )
+    shards.append( subprocess.Popen( [ sys.executable, botPath ], env=env ) )
+
+def stopShards( *args ) -> None:
+    for shard in shards:
+        if shard.poll() is None:
+            shard.terminate( )
+
+signal.signal( signal.SIGTERM, stopShards )
+try:
+    # If one shard stops, its guilds go unanswered, so they are all stopped
+    os.wait( )
+finally:
+    stopShards( )
+    for shard in shards:
+        shard.wait( )
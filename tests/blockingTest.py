@@ -0,0 +1,109 @@
+#! /usr/bin/python3
+import os
+import sys
+import time
+import asyncio
+import hashlib
+import tempfile
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeTriceBot import fakeTriceBot
+
+
+PROBE_INTERVAL = 0.01
+
+# Measures how late the event loop is in waking up a task until it is cancelled
+async def probeLoop( lags: list ) -> None:
+    while True:
+        start = perf_counter( )
+        await asyncio.sleep( PROBE_INTERVAL )
+        lags.append( perf_counter() - start - PROBE_INTERVAL )
+
+def hashData( ) -> str:
+    digest = hashlib.sha256( )
+    for _ in range( 200 ):
+        digest.update( os.urandom( 64 * 1024 ) )
+    return digest.hexdigest( )
+
+def blockInline( ) -> None:
+    time.sleep( 0.3 )
+
+async def runTests( server: fakeTriceBot, dirName: str ) -> None:
+    watchdog = loopWatchdog( threshold=0.1, interval=0.02 )
+    watchdog.start( )
+    lags = [ ]
+    probe = asyncio.ensure_future( probeLoop( lags ) )
+    await asyncio.sleep( 0.05 )
+
+    # The loop stays responsive while blocking work of every kind runs on the pools
+    triceBot = TriceBot( server.authToken, apiURL=server.url, executor=getBlockingPool( "http" ) )
+    start = perf_counter( )
+    work  = [ runBlocking( "disk", time.sleep, 0.1 ) for _ in range( 8 ) ]
+    work += [ runBlocking( "hashing", hashData ) for _ in range( 4 ) ]
+    work += [ triceBot.kickPlayer( 1, "nobody" ) for _ in range( 16 ) ]
+    work  = [ asyncio.ensure_future( call ) for call in work ]
+    await asyncio.sleep( 0 )
+    # More work than threads is queued up
+    assert( blockingQueueDepth.get( "hashing" ) >= 2 )
+    results = await asyncio.gather( *work )
+    print( f'{len(work)} blocking calls took {(perf_counter() - start)*1000:.0f}ms, and the event loop lagged by at most {max(lags)*1000:.1f}ms' )
+    assert( max( lags ) < 0.08 )
+    assert( all( len(result) == 64 for result in results[8:12] ) )
+    assert( blockingQueueDepth.get( "disk" ) == 0 and blockingQueueDepth.get( "hashing" ) == 0 )
+    assert( blockingRunTime.count( "http" ) >= 16 )
+    assert( len(watchdog.stalls) == 0 )
+
+    # Blocking the loop directly is caught and pinned on the call site
+    blockInline( )
+    await asyncio.sleep( 0.1 )
+    assert( len(watchdog.stalls) == 1 )
+    site, total, count, longest = watchdog.stallsBySite( )[0]
+    assert( "blockingTest.py" in site and "blockInline" in site )
+    assert( 0.2 <= longest <= 0.4 )
+
+    # Saves from the event loop are written on the disk pool, and only the newest content is kept
+    filename = f'{dirName}/save.xml'
+    start = perf_counter( )
+    for i in range( 100 ):
+        saveFile( filename, f'<save version="{i}"/>' )
+    elapsed = perf_counter() - start
+    waitForSave( filename )
+    with open( filename ) as savefile:
+        assert( savefile.read() == '<save version="99"/>' )
+    print( f'Saving from the event loop takes {elapsed/100*10**6:.1f}us per save' )
+    # Files are only tracked while they are being written
+    assert( len(saveWrites) == 0 )
+
+    # Waiting on a directory only waits for that directory's saves, and a failed write is raised to whoever waits for it
+    os.makedirs( f'{dirName}/one' )
+    saveFile( f'{dirName}/one/save.xml', "<save/>" )
+    saveFile( f'{dirName}/missing/save.xml', "<save/>" )
+    await runBlocking( "disk", waitForSaves, f'{dirName}/one' )
+    assert( os.path.isfile( f'{dirName}/one/save.xml' ) )
+    try:
+        await runBlocking( "disk", waitForSaves, dirName )
+        assert( False )
+    except FileNotFoundError:
+        pass
+    assert( len(saveWrites) == 0 )
+
+    probe.cancel( )
+
+def test():
+    with tempfile.TemporaryDirectory( ) as dirName, fakeTriceBot( latency=0.05 ) as server:
+        asyncio.run( runTests( server, dirName ) )
+    # Saves made off of the event loop are written right away
+    with tempfile.TemporaryDirectory( ) as dirName:
+        saveFile( f'{dirName}/save.xml', "<save/>" )
+        with open( f'{dirName}/save.xml' ) as savefile:
+            assert( savefile.read() == "<save/>" )
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,76 @@
+#! /usr/bin/python3
+import os
+import sys
+import random
+import string
+import tempfile
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+CARD_COUNT = 30000
+TYPES = [ "Artifact", "Creature", "Enchantment", "Instant", "Land", "Planeswalker", "Sorcery" ]
+
+def randomCards( count: int ) -> Dict[str, card]:
+    digest = { }
+    while len(digest) < count:
+        name = " ".join( "".join( random.choices( string.ascii_lowercase, k=random.randint( 3, 9 ) ) ).title() for _ in range( random.randint( 1, 4 ) ) )
+        digest[normaliseCardName( name )] = card( name, "normal", random.sample( TYPES, random.randint( 1, 2 ) ) )
+    return digest
+
+def test():
+    random.seed( 0 )
+    cards = randomCards( CARD_COUNT )
+    cards[normaliseCardName( "Lim-Dûl's Vault" )] = card( "Lim-Dûl's Vault", "normal", [ "Instant" ] )
+    cards[normaliseCardName( "Delver of Secrets // Insectile Aberration" )] = card( "Delver of Secrets // Insectile Aberration", "transform", [ "Creature" ] )
+    with tempfile.TemporaryDirectory( ) as tmp:
+        path = f'{tmp}/cardTable.bin'
+        start = perf_counter( )
+        writeCardTable( cards, path )
+        writeTime = perf_counter() - start
+
+        start = perf_counter( )
+        db = sharedCardDB( path, checkInterval=0 )
+        attachTime = perf_counter() - start
+        assert( len(db) == len(cards) )
+
+        # Every card is found by its name, however it is written
+        start = perf_counter( )
+        for name, c in cards.items():
+            found = db.getCard( c.getName().upper() )
+            assert( found.getName() == c.getName() and found.getTypes() == c.getTypes() )
+        lookupTime = ( perf_counter() - start ) / len(cards)
+        assert( db.getCard( "lim-dul's vault" ).getName() == "Lim-Dûl's Vault" )
+        assert( db.getCard( "Delver of Secrets" ).getName() == "Delver of Secrets" )
+        try:
+            db.getCard( "Not A Real Card" )
+            assert( False )
+        except CardNotFoundError:
+            pass
+
+        # The updater swaps in a new table, and attached processes pick it up while lookups on the old one still work
+        oldCard = db.getCard( "Lim-Dûl's Vault" )
+        writeCardTable( { normaliseCardName( "Brainstorm" ): card( "Brainstorm", "normal", [ "Instant" ] ) }, path )
+        assert( db.getCard( "brainstorm" ).hasType( "Instant" ) and len(db) == 1 )
+        assert( oldCard.getName() == "Lim-Dûl's Vault" )
+
+        # Only one process is the updater, and another takes over when it stops
+        lock = claimUpdater( f'{path}.lock' )
+        assert( not lock is None )
+        assert( claimUpdater( f'{path}.lock' ) is None )
+        lock.close( )
+        lock = claimUpdater( f'{path}.lock' )
+        assert( not lock is None )
+        lock.close( )
+
+    print( f'A table of {len(cards)} cards was written in {writeTime*1000:.0f}ms, attached in {attachTime*1000:.2f}ms, and looked up in {lookupTime*10**6:.1f}µs per card' )
+
+if __name__ == '__main__':
+    test()
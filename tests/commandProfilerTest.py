@@ -0,0 +1,87 @@
+#! /usr/bin/python3
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+STEP_COUNT = 10000
+
+async def blockingCommand( ) -> str:
+    # Stands in for blocking disk I/O on the event loop
+    time.sleep( 0.2 )
+    return "blocked"
+
+async def waitingCommand( ) -> str:
+    await asyncio.sleep( 0.2 )
+    return "waited"
+
+async def failingCommand( ) -> None:
+    await asyncio.sleep( 0 )
+    raise ValueError( "Bad input" )
+
+async def busyCommand( ) -> None:
+    for _ in range( STEP_COUNT ):
+        await asyncio.sleep( 0 )
+
+async def runTests( profiler: commandProfiler ) -> None:
+    profiler.start( )
+    await asyncio.sleep( 0.05 )
+
+    # Results and errors pass through the profiler untouched
+    assert( await profiler.profile( "test-blocking", blockingCommand() ) == "blocked" )
+    assert( await profiler.profile( "test-waiting", waitingCommand() ) == "waited" )
+    try:
+        await profiler.profile( "test-failing", failingCommand() )
+        assert( False )
+    except ValueError:
+        pass
+
+    # Blocking time is counted against the event loop, waiting is not
+    assert( commandLoopTime.total( "test-blocking" ) >= 0.2 )
+    assert( commandLoopTime.total( "test-waiting" ) < 0.05 )
+    assert( commandWallTime.total( "test-waiting" ) >= 0.2 )
+    assert( commandWallTime.count( "test-failing" ) == 1 )
+
+    # The lag monitor notices that the loop was blocked
+    await asyncio.sleep( 0.05 )
+    assert( profiler.maxLag >= 0.1 )
+
+    names = [ row[0] for row in profiler.report() ]
+    assert( names[:2] == [ "test-blocking", "test-waiting" ] or names[:2] == [ "test-waiting", "test-blocking" ] )
+
+    # The overhead of stepping through a command's coroutine
+    start = perf_counter( )
+    await busyCommand( )
+    plain = perf_counter() - start
+    start = perf_counter( )
+    await profiler.profile( "test-busy", busyCommand() )
+    profiled = perf_counter() - start
+    print( f'Profiling adds {(profiled - plain)/STEP_COUNT*10**6:.2f}us per await' )
+
+def test():
+    with tempfile.TemporaryDirectory( ) as dirName:
+        profiler = commandProfiler( logFile=f'{dirName}/slow.log', threshold=0.1, lagInterval=0.01 )
+        asyncio.run( runTests( profiler ) )
+        with open( profiler.logFile ) as logFile:
+            log = logFile.read( )
+        # Slow commands are logged with where they spent their time
+        assert( "'test-blocking' took" in log )
+        assert( "in blockingCommand" in log )
+        assert( "'test-waiting' took" in log )
+        assert( "in waitingCommand" in log )
+        assert( "The event loop was blocked" in log )
+        assert( not "'test-failing'" in log )
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,129 @@
+#! /usr/bin/python3
+"""
+Builds the deck embeds for a deck check of a large event, and pages a judge
+through all of the decklists in one message. Each deck's layout is worked
+out once, so showing a deck again doesn't look any cards up.
+"""
+import os
+import sys
+import random
+import string
+import asyncio
+import tempfile
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeDiscord import fakeDiscord
+
+
+PLAYER_COUNT = 300
+POOL_SIZE = 500
+TYPES = [ [ "Creature" ], [ "Land" ], [ "Artifact" ], [ "Enchantment" ], [ "Instant" ], [ "Sorcery" ], [ "Artifact", "Creature" ] ]
+
+def cardPool( ) -> Dict[str, card]:
+    digest = { }
+    while len(digest) < POOL_SIZE:
+        name = " ".join( "".join( random.choices( string.ascii_lowercase, k=random.randint( 3, 8 ) ) ).title() for _ in range( random.randint( 1, 3 ) ) )
+        digest[normaliseCardName( name )] = card( name, "normal", random.choice( TYPES ) )
+    return digest
+
+def randomDecklist( pool: List[card] ) -> str:
+    main = [ f'{random.randint( 1, 4 )} {c.getName()}' for c in random.sample( pool, 20 ) ]
+    side = [ f'{random.randint( 1, 3 )} {c.getName()}' for c in random.sample( pool, 5 ) ]
+    return "\n".join( main ) + "\n\n" + "\n".join( side )
+
+def countLookups( db: sharedCardDB ) -> List[int]:
+    calls = [ 0 ]
+    getCard = db.getCard
+    def counted( name: str ) -> card:
+        calls[0] += 1
+        return getCard( name )
+    db.getCard = counted
+    return calls
+
+async def pageThroughDecks( plyrs: List[player] ) -> None:
+    outbox.routeLimits = { "channel": ( 10**6, 1.0 ), "user": ( 10**6, 1.0 ) }
+    outbox.globalLimit = ( 10**6, 1.0 )
+    client = fakeDiscord( routeLimit=( 10**6, 1.0 ) )
+    channel = client.channel( )
+    decks = [ ( plyr, name ) for plyr in plyrs for name in plyr.decks ]
+    pager = decklistMessage( decks, "Decklists" )
+    message = await pager.send( channel )
+    await outbox.join( )
+    assert( message.reactions == list(PAGE_REACTIONS) )
+    assert( message.embed.footer.text == f'Decklist 1 of {len(decks)}' )
+
+    start = perf_counter( )
+    for _ in range( len(decks) + 1 ):
+        await handlePageReaction( message.id, NEXT_PAGE )
+        await outbox.join( )
+    elapsed = perf_counter() - start
+    assert( pager.page == len(decks) - 1 )
+    assert( message.embed.title.startswith( f"**{plyrs[-1].name}'s Deck,**" ) )
+
+    # A removed deck is still a page, and says so
+    del plyrs[-1].decks["Main"]
+    await handlePageReaction( message.id, PREVIOUS_PAGE )
+    await handlePageReaction( message.id, NEXT_PAGE )
+    await outbox.join( )
+    assert( message.embed.description == "This deck has been removed." )
+    assert( decklistMessage( [ ] ).getPage( 0 ).description == "There are no decklists to show." )
+    print( f'A judge paged through {len(decks)} decklists in {elapsed*1000:.0f}ms' )
+
+def test():
+    random.seed( 0 )
+    with tempfile.TemporaryDirectory( ) as tmp:
+        pool = cardPool( )
+        pool[normaliseCardName( "Island" )] = card( "Island", "normal", [ "Land" ] )
+        pool[normaliseCardName( "Lightning Bolt" )] = card( "Lightning Bolt", "normal", [ "Instant" ] )
+        pool[normaliseCardName( "Grim Lavamancer" )] = card( "Grim Lavamancer", "normal", [ "Creature" ] )
+        writeCardTable( pool, f'{tmp}/cardTable.bin' )
+        db = sharedCardDB( f'{tmp}/cardTable.bin' )
+        sys.modules["Tournament.cardDB"].cardsDB = db
+        lookups = countLookups( db )
+
+        # The biggest groups come first, unknown cards get their own group, and the sideboard is last
+        dck = deck( "Burn", "4 Lightning Bolt\n2 Grim Lavamancer\n1 Fireblast Prime\n10 Island\n3 Island\n\n2 Grim Lavamancer" )
+        assert( dck.getEmbedFields() == [ ( "Land (13):", "10 Island\n3 Island" ), ( "Instant (4):", "4 Lightning Bolt" ),
+                                          ( "Creature (2):", "2 Grim Lavamancer" ), ( "Unknown (1):", "1 Fireblast Prime" ),
+                                          ( "Sideboard (2):", "2 Grim Lavamancer" ) ] )
+
+        # The layout is only worked out again when the deck changes
+        fields = dck.getEmbedFields( )
+        calls = lookups[0]
+        assert( dck.getEmbedFields() is fields and lookups[0] == calls )
+        dck.cards.append( "3 Island" )
+        dck.updateDeckHash( )
+        assert( dck.getEmbedFields()[0] == ( "Land (16):", "10 Island\n3 Island\n3 Island" ) )
+
+        plyrs = [ ]
+        for ID in range( 1, PLAYER_COUNT + 1 ):
+            plyr = player( f'Player{ID:03}', ID )
+            plyr.decks["Main"] = deck( "Main", randomDecklist( list( pool.values() ) ) )
+            plyrs.append( plyr )
+
+        start = perf_counter( )
+        embeds = [ plyr.buildDeckEmbed( "Main" ) for plyr in plyrs ]
+        firstTime = perf_counter() - start
+        calls = lookups[0]
+        start = perf_counter( )
+        cached = [ plyr.buildDeckEmbed( "Main" ) for plyr in plyrs ]
+        cachedTime = perf_counter() - start
+        assert( lookups[0] == calls )
+        assert( all( A.to_dict() == B.to_dict() for A, B in zip( embeds, cached ) ) )
+        assert( all( sum( int( field.name.rpartition( "(" )[-1][:-2] ) for field in embed.fields if not field.name.startswith( "Sideboard" ) ) ==
+                     sum( int( line.partition( " " )[0] ) for line in plyr.decks["Main"].cards if not "SB:" in line ) for plyr, embed in zip( plyrs, embeds ) ) )
+        print( f'{PLAYER_COUNT} deck embeds took {firstTime*1000:.1f}ms to build the first time and {cachedTime*1000:.1f}ms after that' )
+
+        asyncio.run( pageThroughDecks( plyrs ) )
+        assert( lookups[0] == calls )
+        sys.modules["Tournament.cardDB"].cardsDB = None
+
+if __name__ == '__main__':
+    test()
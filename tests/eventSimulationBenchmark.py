@@ -0,0 +1,293 @@
+#! /usr/bin/python3
+"""
+Simulates whole fluid round events offline and compares them with the stored baselines.
+
+Each scenario registers players in a fake guild, and then has them queue,
+get paired, report, and confirm over some simulated hours. The simulated
+clock only decides the order of things; everything runs as fast as it can.
+The tournament talks to the fake Discord objects from fakeDiscord.py and
+to a local fake TriceBot.
+
+    eventSimulationBenchmark.py [scenario ...]           Runs the scenarios and prints what they measured
+    eventSimulationBenchmark.py --check [scenario ...]   Also fails if they have regressed from the baselines
+    eventSimulationBenchmark.py --update [scenario ...]  Replaces their baselines with what was measured
+"""
+import os
+import sys
+import json
+import heapq
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import importlib
+import tracemalloc
+
+from time import perf_counter
+from contextlib import redirect_stdout
+from typing import Dict, List, Tuple
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from Tournament.blocking import savesWritten, savedBytes
+from fakeDiscord import fakeDiscord
+from fakeTriceBot import fakeTriceBot
+
+
+BASELINE_FILE = os.path.dirname(os.path.realpath(__file__)) + "/baselines/eventSimulation.json"
+
+SCENARIOS = {
+    "small-league":  { "players": 64,  "hours": 4, "matchSize": 2 },
+    "large-league":  { "players": 384, "hours": 6, "matchSize": 2 },
+    "four-player":   { "players": 128, "hours": 4, "matchSize": 4 },
+}
+
+# Simulated seconds between pairing passes, and the range of a match's length in simulated minutes
+PAIRING_INTERVAL = 60
+MATCH_MINUTES = ( 15, 50 )
+# Registration is spread over the start of the event
+REGISTRATION_MINUTES = 30
+# After a match, players take a break before queueing again, and some of them drop
+BREAK_MINUTES = ( 1, 10 )
+DROP_CHANCE = 0.03
+DRAW_CHANCE = 0.1
+STANDINGS_CHANCE = 0.2
+
+# How much worse than its baseline a metric can be before --check fails. Timings
+# are noisy, so they get more room than the counts, which barely move.
+REGRESSION_LIMITS = {
+    "eventsPerSecond":   0.6,
+    "pairingPassP50Ms":  1.6,
+    "pairingPassP99Ms":  2.0,
+    "queueWaitP50Min":   1.2,
+    "queueWaitP99Min":   1.2,
+    "memoryGrowthMiB":   1.25,
+    "bytesSaved":        1.2,
+    "savesWritten":      1.2,
+    "discordCalls":      1.2,
+    "triceBotRequests":  1.2,
+}
+# These are better when they are higher, and the limit is how far they can fall
+HIGHER_IS_BETTER = { "eventsPerSecond" }
+
+
+def percentile( values: List[float], p: float ) -> float:
+    if len(values) == 0:
+        return 0.0
+    values = sorted( values )
+    return values[ min( len(values) - 1, int( len(values) * p ) ) ]
+
+# Allocations made by the fakes and the harness aren't the bot's memory
+def botMemory( ) -> int:
+    if not tracemalloc.is_tracing( ):
+        return 0
+    snapshot = tracemalloc.take_snapshot( ).filter_traces( [ tracemalloc.Filter( False, os.path.dirname(os.path.realpath(__file__)) + "/*" ) ] )
+    return sum( stat.size for stat in snapshot.statistics( "filename" ) )
+
+def directorySize( dirName: str ) -> int:
+    return sum( os.path.getsize( os.path.join( root, name ) ) for root, _, names in os.walk( dirName ) for name in names )
+
+
+class eventSimulation:
+    """ One simulated event. Events are (simulated time, sequence, kind, argument) in a heap. """
+    # The recorder, if given, is called with the queue and match size before each pairing pass
+    def __init__( self, name: str, players: int, hours: float, matchSize: int = 2, seed: int = 0, recorder = None ):
+        self.name = name
+        self.playerCount = players
+        self.duration = hours * 3600
+        self.matchSize = matchSize
+        self.seed = seed
+        self.recorder = recorder
+        self.events: List[Tuple] = [ ]
+        self.sequence = 0
+        self.now = 0.0
+        # When each queued player joined, in simulated time
+        self.joinedAt: Dict[int, float] = { }
+        self.queueWaits: List[float] = [ ]
+        self.passTimes: List[float] = [ ]
+        self.processed = 0
+
+    def schedule( self, delay: float, kind: str, arg = None ) -> None:
+        self.sequence += 1
+        heapq.heappush( self.events, ( self.now + delay, self.sequence, kind, arg ) )
+
+    async def setUp( self, server: fakeTriceBot ) -> None:
+        self.client = fakeDiscord( routeLimit=( 10**6, 1.0 ) )
+        self.guild = self.client.guild( "Simulated Guild" )
+        # The tournaments share the module's TriceBot client
+        importlib.import_module( "Tournament.tournament" ).trice_bot = TriceBot( server.authToken, apiURL=server.url, externURL=server.url )
+
+        self.tourn = fluidRoundTournament( self.name, self.guild.name, { "match-size": self.matchSize } )
+        await self.tourn.addDiscordGuild( self.guild )
+        os.makedirs( f'{self.tourn.getSaveLocation()}/players' )
+        os.makedirs( f'{self.tourn.getSaveLocation()}/matches' )
+        self.tourn.loop = asyncio.get_running_loop( )
+        self.tourn.triceBotEnabled = True
+        # The harness runs the pairing passes on the simulated clock instead of the pairing thread
+        self.threshold = self.tourn.pairingsThreshold
+        self.tourn.pairingsThreshold = sys.maxsize
+        self.tourn.startTourn( )
+        infoChannel = discord.utils.get( self.guild.channels, name="tournament-info" )
+        embed = self.tourn.getTournamentStatusEmbed( )
+        self.tourn.setInfoMessage( await infoChannel.send( embed=embed ), embed )
+
+        for i in range( self.playerCount ):
+            self.schedule( random.uniform( 0, REGISTRATION_MINUTES*60 ), "register", f'Player{i}' )
+        self.schedule( PAIRING_INTERVAL, "pair" )
+
+    async def register( self, name: str ) -> None:
+        member = self.guild.addMember( name )
+        await self.tourn.addPlayer( member, admin=True )
+        self.schedule( random.uniform( 0, 60 ), "queue", member.id )
+
+    async def joinQueue( self, plyr: int ) -> None:
+        if not self.tourn.players[plyr].isActive() or self.tourn.players[plyr].hasOpenMatch():
+            return
+        self.tourn.addPlayerToQueue( plyr )
+        self.joinedAt[plyr] = self.now
+
+    async def pair( self ) -> None:
+        self.schedule( PAIRING_INTERVAL, "pair" )
+        if not self.tourn.queue.readyToPair( self.threshold ):
+            return
+        if not self.recorder is None:
+            self.recorder( self.tourn.queue, self.matchSize )
+        matchCount = len(self.tourn.matches)
+        start = perf_counter( )
+        await self.tourn._pairQueue( 0 )
+        self.passTimes.append( perf_counter() - start )
+        for mtch in self.tourn.matches[matchCount:]:
+            for plyr in mtch.activePlayers:
+                self.queueWaits.append( self.now - self.joinedAt.pop( plyr ) )
+            self.schedule( random.uniform( *MATCH_MINUTES ) * 60, "report", mtch.matchNumber )
+
+    async def report( self, matchNum: int ) -> None:
+        mtch = self.tourn.getMatch( matchNum )
+        reporter = random.choice( mtch.activePlayers )
+        await self.tourn.recordMatchResult( reporter, "draw" if random.random() < DRAW_CHANCE else "win", matchNum )
+        self.schedule( random.uniform( 30, 180 ), "confirm", matchNum )
+
+    async def confirm( self, matchNum: int ) -> None:
+        mtch = self.tourn.getMatch( matchNum )
+        for plyr in list( mtch.activePlayers ):
+            if not plyr in mtch.confirmedPlayers:
+                await self.tourn.playerConfirmResult( plyr, matchNum )
+        for plyr in mtch.activePlayers:
+            if random.random() < STANDINGS_CHANCE:
+                await standingsMessage( self.tourn, "Standings", page=self.tourn.getStandingsSnapshot().pageOf( plyr ) ).send( self.tourn.pairingsChannel )
+            if random.random() < DROP_CHANCE:
+                await self.tourn.dropPlayer( plyr )
+            else:
+                self.schedule( random.uniform( *BREAK_MINUTES ) * 60, "queue", plyr )
+
+    async def run( self ) -> Dict[str, float]:
+        random.seed( self.seed )
+        handlers = { "register": self.register, "queue": self.joinQueue, "pair": self.pair, "report": self.report, "confirm": self.confirm }
+        with fakeTriceBot( ) as server:
+            await self.setUp( server )
+            saves, saved = savesWritten.get( ), savedBytes.get( )
+            memory = botMemory( )
+            start = perf_counter( )
+            while len(self.events) > 0 and self.events[0][0] <= self.duration:
+                self.now, _, kind, arg = heapq.heappop( self.events )
+                await ( handlers[kind]() if arg is None else handlers[kind]( arg ) )
+                self.processed += 1
+                # Lets the message scheduler and the saves keep up, like they would between commands
+                await asyncio.sleep( 0 )
+            await outbox.join( )
+            waitForSaves( )
+            elapsed = perf_counter() - start
+            memoryGrowth = botMemory() - memory
+            # The match timers save their match when they stop, so they need to finish before the files go away
+            timers = [ mtch.timer for mtch in self.tourn.matches if isinstance( mtch.timer, threading.Thread ) ]
+            for mtch in self.tourn.matches:
+                mtch.stopTimer = True
+            for timer in timers:
+                timer.join( )
+
+        return { "events":            self.processed,
+                 "matches":           len(self.tourn.matches),
+                 "wallSeconds":       round( elapsed, 2 ),
+                 "eventsPerSecond":   round( self.processed / elapsed, 1 ),
+                 "pairingPasses":     len(self.passTimes),
+                 "pairingPassP50Ms":  round( percentile( self.passTimes, 0.5 ) * 1000, 2 ),
+                 "pairingPassP99Ms":  round( percentile( self.passTimes, 0.99 ) * 1000, 2 ),
+                 "queueWaitP50Min":   round( percentile( self.queueWaits, 0.5 ) / 60, 1 ),
+                 "queueWaitP99Min":   round( percentile( self.queueWaits, 0.99 ) / 60, 1 ),
+                 "memoryGrowthMiB":   round( memoryGrowth / 2**20, 2 ),
+                 "savesWritten":      int( savesWritten.get() - saves ),
+                 "bytesSaved":        int( savedBytes.get() - saved ),
+                 "diskUsage":         directorySize( "guilds" ),
+                 "discordCalls":      len(self.client.calls),
+                 "triceBotRequests":  server.requests }
+
+
+def runScenario( name: str, recorder = None ) -> Dict[str, float]:
+    cwd = os.getcwd( )
+    # Pacing to Discord's limits would make the simulated hours take real hours. The calls are counted instead.
+    outbox.routeLimits = { "channel": ( 10**6, 1.0 ), "user": ( 10**6, 1.0 ) }
+    outbox.globalLimit = ( 10**6, 1.0 )
+    with tempfile.TemporaryDirectory( ) as tmp, open( os.devnull, "w" ) as devnull:
+        os.chdir( tmp )
+        try:
+            # The tournament narrates everything it does
+            with redirect_stdout( devnull ):
+                return asyncio.run( eventSimulation( name, recorder=recorder, **SCENARIOS[name] ).run() )
+        finally:
+            os.chdir( cwd )
+
+def findRegressions( results: Dict, baseline: Dict ) -> List[str]:
+    digest = [ ]
+    for metric, limit in REGRESSION_LIMITS.items():
+        if not metric in baseline or baseline[metric] == 0:
+            continue
+        ratio = results[metric] / baseline[metric]
+        if ( ratio < limit ) if metric in HIGHER_IS_BETTER else ( ratio > limit ):
+            digest.append( f'{metric} is {results[metric]}, and its baseline is {baseline[metric]}' )
+    return digest
+
+def benchmark():
+    parser = argparse.ArgumentParser( description="Simulates whole events offline and compares them with the stored baselines" )
+    parser.add_argument( "scenarios", nargs="*", help=f'any of {", ".join( SCENARIOS )} (all of them by default)' )
+    parser.add_argument( "--check", action="store_true", help="exit with an error if any scenario has regressed" )
+    parser.add_argument( "--update", action="store_true", help="store the results as the new baselines" )
+    args = parser.parse_args( )
+    for name in args.scenarios:
+        if not name in SCENARIOS:
+            parser.error( f'there is no scenario called {name!r}' )
+    if len(args.scenarios) == 0:
+        args.scenarios = list( SCENARIOS )
+
+    baselines = { }
+    if os.path.exists( BASELINE_FILE ):
+        with open( BASELINE_FILE ) as baselineFile:
+            baselines = json.load( baselineFile )
+
+    tracemalloc.start( )
+    regressions = [ ]
+    for name in args.scenarios:
+        results = runScenario( name )
+        print( f'{name}: ' + ", ".join( f'{metric}={value}' for metric, value in results.items() ) )
+        if name in baselines:
+            regressions += [ f'{name}: {regression}' for regression in findRegressions( results, baselines[name] ) ]
+        if args.update:
+            baselines[name] = results
+    tracemalloc.stop( )
+
+    if args.update:
+        os.makedirs( os.path.dirname( BASELINE_FILE ), exist_ok=True )
+        with open( BASELINE_FILE, "w" ) as baselineFile:
+            json.dump( baselines, baselineFile, indent=4 )
+            baselineFile.write( "\n" )
+    for regression in regressions:
+        print( f'Regression in {regression}' )
+    if args.check and len(regressions) > 0:
+        sys.exit( 1 )
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,234 @@
+#! /usr/bin/python3
+""" Local stand-ins for the Discord objects that the bot sends messages through, used by the tests and benchmarks """
+import time
+import asyncio
+import discord
+
+from typing import Dict, List, Tuple
+
+
+class fakeRateLimited( Exception ):
+    """ Looks like the discord.HTTPException that discord.py raises for a 429 """
+    def __init__( self, retryAfter: float ):
+        super().__init__( f'429 Too Many Requests (retry after {retryAfter:.2f}s)' )
+        self.status = 429
+        self.retry_after = retryAfter
+
+
+class fakeDiscord:
+    """
+    Records every call made to its channels, users, and messages. Each route
+    (a channel or a user's DMs) allows a number of calls per period like
+    Discord does, and calls past that raise a 429.
+    """
+    def __init__( self, routeLimit: Tuple[int, float] = ( 5, 5.0 ), latency: float = 0.0 ):
+        self.routeLimit = routeLimit
+        self.latency = latency
+        self.nextID = 1
+        # Each call as (time, route, kind, kwargs)
+        self.calls: List[Tuple] = [ ]
+        self.rateLimited = 0
+        # The start of each route's current window and the calls made in it
+        self.windows: Dict[Tuple, List] = { }
+
+    def newID( self ) -> int:
+        self.nextID += 1
+        return self.nextID
+
+    def channel( self ):
+        return fakeChannel( self, self.newID() )
+
+    def user( self ):
+        return fakeUser( self, self.newID() )
+
+    def guild( self, name: str = "Test Guild" ):
+        return fakeGuild( self, self.newID(), name )
+
+    async def _call( self, route: Tuple, kind: str, kwargs: Dict ) -> None:
+        now = time.monotonic( )
+        count, period = self.routeLimit
+        # Like Discord, each window starts with the first call after the last one ended
+        window = self.windows.get( route )
+        if window is None or now - window[0] >= period:
+            window = self.windows[route] = [ now, 0 ]
+        if window[1] >= count:
+            self.rateLimited += 1
+            raise fakeRateLimited( window[0] + period - now )
+        window[1] += 1
+        self.calls.append( ( now, route, kind, kwargs ) )
+        if self.latency > 0:
+            await asyncio.sleep( self.latency )
+
+    def sent( self, route: Tuple = None ) -> List[Tuple]:
+        return [ call for call in self.calls if route is None or call[1] == route ]
+
+
+class fakeMessage:
+    def __init__( self, client: fakeDiscord, channel, ID: int, content: str = None, embed = None ):
+        self.client = client
+        self.channel = channel
+        self.id = ID
+        self.content = content
+        self.embed = embed
+        self.reactions = [ ]
+        self.edits = 0
+
+    async def add_reaction( self, emoji: str ) -> None:
+        self.reactions.append( emoji )
+
+    async def edit( self, **kwargs ) -> None:
+        await self.client._call( ( "channel", self.channel.id ), "edit", kwargs )
+        self.content = kwargs.get( "content", self.content )
+        self.embed = kwargs.get( "embed", self.embed )
+        self.edits += 1
+
+
+class fakeChannel:
+    def __init__( self, client: fakeDiscord, ID: int, name: str = "" ):
+        self.client = client
+        self.id = ID
+        self.name = name
+        self.mention = f'<#{ID}>'
+        self.messages: List[fakeMessage] = [ ]
+
+    async def send( self, content: str = None, embed = None, embeds = None ) -> fakeMessage:
+        await self.client._call( ( "channel", self.id ), "send", { "content": content, "embed": embed, "embeds": embeds } )
+        self.messages.append( fakeMessage( self.client, self, self.client.newID(), content, embed ) )
+        return self.messages[-1]
+
+
+class fakeUser:
+    def __init__( self, client: fakeDiscord, ID: int ):
+        self.client = client
+        self.id = ID
+        self.dm_channel = None
+        self.received: List[str] = [ ]
+
+    async def send( self, content: str = None, embed = None ) -> None:
+        await self.client._call( ( "user", self.id ), "send", { "content": content, "embed": embed } )
+        self.received.append( content )
+
+
+class fakeMember( fakeUser ):
+    def __init__( self, client: fakeDiscord, ID: int, name: str ):
+        super().__init__( client, ID )
+        self.name = name
+        self.display_name = name
+        self.mention = f'<@{ID}>'
+        self.roles = [ ]
+
+    async def add_roles( self, *roles ) -> None:
+        await self.client._call( ( "guild", "roles" ), "add_roles", { "roles": roles } )
+        self.roles += [ role for role in roles if not role in self.roles ]
+
+    async def remove_roles( self, *roles ) -> None:
+        await self.client._call( ( "guild", "roles" ), "remove_roles", { "roles": roles } )
+        self.roles = [ role for role in self.roles if not role in roles ]
+
+
+class fakeRole( discord.Role ):
+    """ A discord.Role for the same reason that fakeGuild is a discord.Guild. Its mention comes from discord.Role. """
+    def __init__( self, guild: "fakeGuild", ID: int, name: str ):
+        self.guild = guild
+        self.id = ID
+        self.name = name
+
+    def __repr__( self ):
+        return f'<fakeRole id={self.id} name={self.name!r}>'
+
+    def __str__( self ):
+        return self.name
+
+    async def delete( self ) -> None:
+        await self.guild.client._call( ( "guild", "roles" ), "delete_role", { } )
+        self.guild.fakeRoles.remove( self )
+
+
+class fakeVoiceChannel( fakeChannel ):
+    def __init__( self, client: fakeDiscord, ID: int, name: str, category: "fakeCategory" ):
+        super().__init__( client, ID, name )
+        self.category = category
+
+    async def delete( self ) -> None:
+        await self.client._call( ( "guild", "channels" ), "delete_channel", { } )
+        self.category.channels.remove( self )
+
+
+class fakeCategory:
+    def __init__( self, guild: "fakeGuild", ID: int, name: str ):
+        self.guild = guild
+        self.id = ID
+        self.name = name
+        self.channels: List[fakeVoiceChannel] = [ ]
+
+    async def create_voice_channel( self, name: str, overwrites: Dict = None ) -> fakeVoiceChannel:
+        await self.guild.client._call( ( "guild", "channels" ), "create_voice_channel", { "name": name } )
+        self.channels.append( fakeVoiceChannel( self.guild.client, self.guild.client.newID(), name, self ) )
+        return self.channels[-1]
+
+
+class fakeGuild( discord.Guild ):
+    """
+    The tournaments check that their guild is a discord.Guild before they
+    touch Discord, so this is one. Only the parts of a guild that the
+    tournaments use are here, and nothing from discord.Guild's constructor
+    is set up.
+    """
+    def __init__( self, client: fakeDiscord, ID: int, name: str ):
+        self.client = client
+        self.id = ID
+        self.name = name
+        self.fakeRoles = [ fakeRole( self, ID, "@everyone" ) ]
+        self.fakeRoles += [ fakeRole( self, client.newID(), name ) for name in ( "Tournament Admin", "Judge" ) ]
+        self.fakeCategories = [ fakeCategory( self, client.newID(), name ) for name in ( "Matches", "More Matches" ) ]
+        self.fakeChannels = { }
+        self.fakeMembers = { }
+        for name in ( "match-pairings", "tournament-info" ):
+            self.addChannel( name )
+
+    def __repr__( self ):
+        return f'<fakeGuild id={self.id} name={self.name!r}>'
+
+    def addChannel( self, name: str ) -> fakeChannel:
+        channel = fakeChannel( self.client, self.client.newID(), name )
+        self.fakeChannels[channel.id] = channel
+        return channel
+
+    def addMember( self, name: str ) -> fakeMember:
+        member = fakeMember( self.client, self.client.newID(), name )
+        self.fakeMembers[member.id] = member
+        return member
+
+    @property
+    def roles( self ) -> List[fakeRole]:
+        return self.fakeRoles
+
+    @property
+    def default_role( self ) -> fakeRole:
+        return self.fakeRoles[0]
+
+    @property
+    def categories( self ) -> List[fakeCategory]:
+        return self.fakeCategories
+
+    @property
+    def channels( self ) -> List:
+        return list( self.fakeChannels.values() ) + [ vc for category in self.fakeCategories for vc in category.channels ]
+
+    @property
+    def members( self ) -> List[fakeMember]:
+        return list( self.fakeMembers.values() )
+
+    def get_channel( self, ID: int ):
+        return self.fakeChannels.get( ID )
+
+    def get_role( self, ID: int ):
+        return discord.utils.get( self.fakeRoles, id=ID )
+
+    def get_member( self, ID: int ):
+        return self.fakeMembers.get( ID )
+
+    async def create_role( self, name: str, **kwargs ) -> fakeRole:
+        await self.client._call( ( "guild", "roles" ), "create_role", { "name": name } )
+        self.fakeRoles.append( fakeRole( self, self.client.newID(), name ) )
+        return self.fakeRoles[-1]
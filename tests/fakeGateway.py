@@ -0,0 +1,103 @@
+#! /usr/bin/python3
+""" A local stand-in for the Discord gateway that runs each shard in its own process, used to test the shard router """
+import os
+import sys
+import socket
+import asyncio
+import importlib
+import multiprocessing
+
+from typing import Dict, List, Tuple
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament.sharding import shardOf, shardRouter, shardConnection
+
+
+def freeAddresses( count: int ) -> List[Tuple[str, int]]:
+    digest = [ ]
+    sockets = [ ]
+    for _ in range( count ):
+        sock = socket.socket( )
+        sock.bind( ( "127.0.0.1", 0 ) )
+        sockets.append( sock )
+        digest.append( sock.getsockname() )
+    for sock in sockets:
+        sock.close( )
+    return digest
+
+def runShard( shardID: int, addresses: List[Tuple[str, int]], setup: str, ready ) -> None:
+    """
+    The body of a shard's process. The setup is the "module:function" that
+    registers the shard's handlers; it is given the router and returns the
+    state the handlers share. The shard runs until it is sent "stop".
+    """
+    moduleName, funcName = setup.split( ":" )
+    setupShard = getattr( importlib.import_module( moduleName ), funcName )
+
+    async def serve( ) -> None:
+        router = shardRouter( shardID, addresses )
+        stopped = asyncio.Event( )
+
+        @router.handler( "stop" )
+        async def stop( ) -> None:
+            stopped.set( )
+
+        setupShard( router )
+        await router.start( )
+        ready.put( shardID )
+        await stopped.wait( )
+        # Lets the reply to "stop" go out before the server closes
+        await asyncio.sleep( 0.05 )
+        await router.stop( )
+
+    asyncio.run( serve() )
+
+
+class fakeGateway:
+    """
+    Starts a process per shard, and delivers events to them like Discord
+    does: a guild's events go to the shard that owns the guild, and every DM
+    goes to the first shard.
+    """
+    def __init__( self, shardCount: int, setup: str ):
+        self.shardCount = shardCount
+        self.setup = setup
+        self.addresses = freeAddresses( shardCount )
+        self.processes: List = [ ]
+        self.connections: Dict[int, shardConnection] = { }
+
+    def start( self, timeout: float = 60 ) -> None:
+        context = multiprocessing.get_context( "spawn" )
+        ready = context.Queue( )
+        for shardID in range( self.shardCount ):
+            proc = context.Process( target=runShard, args=( shardID, self.addresses, self.setup, ready ) )
+            proc.start( )
+            self.processes.append( proc )
+        for _ in range( self.shardCount ):
+            ready.get( timeout=timeout )
+
+    async def deliver( self, guildID: int, name: str, /, **kwargs ):
+        """ Sends an event from a guild to the shard that owns it """
+        return await self.send( shardOf( guildID, self.shardCount ), name, **kwargs )
+
+    async def directMessage( self, name: str, /, **kwargs ):
+        return await self.send( 0, name, **kwargs )
+
+    async def send( self, shard: int, name: str, /, **kwargs ):
+        conn = self.connections.get( shard )
+        if conn is None:
+            conn = self.connections[shard] = shardConnection( self.addresses[shard] )
+        return await conn.call( name, **kwargs )
+
+    async def stop( self ) -> None:
+        for shard in range( self.shardCount ):
+            await self.send( shard, "stop" )
+        for conn in self.connections.values():
+            await conn.close( )
+        self.connections.clear( )
+        for proc in self.processes:
+            proc.join( timeout=30 )
@@ -0,0 +1,132 @@
+#! /usr/bin/python3
+""" A local stand-in for the TriceBot HTTP API that is used by the tests and benchmarks """
+import threading
+import time
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class fakeTriceBotHandler( BaseHTTPRequestHandler ):
+    # Keep-alive requires HTTP/1.1
+    protocol_version = "HTTP/1.1"
+    # Otherwise, delayed ACKs stall each keep-alive response by ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message( self, *args ):
+        return
+
+    def _parseBody( self ) -> list:
+        length = int( self.headers.get( "Content-Length", 0 ) )
+        self._body = self.rfile.read( length ).decode() if length > 0 else ""
+        return [ line.split( "=", 1 ) for line in self._body.split( "\n" ) if "=" in line ]
+
+    def _reply( self, content ) -> None:
+        if isinstance( content, str ):
+            content = content.encode()
+        self.send_response( 200 )
+        self.send_header( "Content-Length", str(len(content)) )
+        self.end_headers( )
+        self.wfile.write( content )
+
+    def do_GET( self ):
+        server = self.server.triceBot
+        body = self._parseBody( )
+        server.requests += 1
+        server.connections.add( self.client_address )
+        if server.latency > 0:
+            time.sleep( server.latency )
+        if server.failuresLeft > 0:
+            # Simulates a dropped connection
+            server.failuresLeft -= 1
+            self.close_connection = True
+            return
+
+        fields = { }
+        for key, value in body:
+            fields.setdefault( key, [ ] ).append( value )
+        if self.path.startswith( "/api/" ) and fields.get( "authtoken", [ server.authToken ] )[0] != server.authToken:
+            self._reply( "invalid auth token" )
+            return
+        route = getattr( self, "_" + self.path.strip( "/" ).replace( "/", "_" ), None )
+        if self.path in server.replays:
+            self._reply( server.replays[self.path] )
+        elif route is None:
+            self._reply( "error 404" )
+        else:
+            self._reply( route( fields ) )
+
+    def _api_checkauthkey( self, fields ) -> str:
+        return "1"
+
+    def _api_features( self, fields ) -> str:
+        if not self.server.triceBot.batchSupport:
+            return "error 404"
+        return "creategames"
+
+    def _api_creategame( self, fields ) -> str:
+        server = self.server.triceBot
+        server.gameCount += 1
+        gameID = server.gameCount
+        name = fields["gamename"][0]
+        server.games[gameID] = { "name": name, "players": fields.get( "playerName", [ ] ) }
+        return f'gameid={gameID}\nreplayName={name}.cor'
+
+    def _api_creategames( self, fields ) -> str:
+        if not self.server.triceBot.batchSupport:
+            return "error 404"
+        # The fields of each game follow its "game=<index>" line
+        digest = [ ]
+        for line in self._body.split( "\n" ):
+            key, _, value = line.partition( "=" )
+            if key == "game":
+                digest.append( (value, { }) )
+            elif len(digest) > 0 and key != "":
+                digest[-1][1].setdefault( key, [ ] ).append( value )
+        return "\n".join( f'game={index}\n{self._api_creategame( game )}' for index, game in digest )
+
+    def _api_updateplayerinfo( self, fields ) -> str:
+        game = self.server.triceBot.games.get( int(fields["gameid"][0]) )
+        if game is None:
+            return "error game not found"
+        if not fields["oldplayername"][0] in game["players"]:
+            return "error player not found"
+        game["players"][game["players"].index(fields["oldplayername"][0])] = fields["newplayername"][0]
+        return "success"
+
+    def _api_kickplayer( self, fields ) -> str:
+        game = self.server.triceBot.games.get( int(fields["gameid"][0]) )
+        if game is None or not fields["target"][0] in game["players"]:
+            return "error not found"
+        return "success"
+
+    def _api_disableplayerdeckverification( self, fields ) -> str:
+        if not int(fields["gameid"][0]) in self.server.triceBot.games:
+            return "game not found"
+        return "success"
+
+
+class fakeTriceBot:
+    """ Runs the fake TriceBot API on a background thread """
+    def __init__( self, authToken: str = "testing-token", latency: float = 0.0, batchSupport: bool = True ):
+        self.authToken = authToken
+        self.latency = latency
+        self.batchSupport = batchSupport
+        self.failuresLeft = 0
+        self.requests = 0
+        self.connections = set( )
+        self.gameCount = 0
+        self.games = { }
+        # Replay files by URL path, e.g. "/replays/match1.cor"
+        self.replays = { }
+        self.server = ThreadingHTTPServer( ("127.0.0.1", 0), fakeTriceBotHandler )
+        self.server.triceBot = self
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread( target=self.server.serve_forever, daemon=True )
+
+    def __enter__( self ):
+        self.thread.start( )
+        return self
+
+    def __exit__( self, *args ):
+        self.server.shutdown( )
+        self.server.server_close( )
@@ -0,0 +1,93 @@
+#! /usr/bin/python3
+""" Compares resolving commands to tournaments by scanning every tournament with using the guild's indexes """
+import os
+import sys
+import random
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+LEAGUE_COUNT  = 50
+PLAYER_COUNT  = 5000
+LEAGUES_PER_PLAYER = 3
+COMMAND_COUNT = 20000
+
+class fakeUser:
+    def __init__( self, ID: int ):
+        self.id = ID
+
+class fakeGuild:
+    def __init__( self ):
+        self.id = 0
+        self.name = "Benchmark Guild"
+        self.roles = [ ]
+        self.channels = [ ]
+        self.categories = [ ]
+
+
+# How command resolution worked before the indexes
+def scanTournament( gld: guildSettings, name: str ) -> tournament:
+    for tourn in gld.tournaments:
+        if tourn.name == name:
+            return tourn
+    return None
+
+def scanPlayerTournaments( gld: guildSettings, user ) -> List:
+    return [ tourn for tourn in gld.tournaments if user.id in tourn.players and tourn.players[user.id].isActive() ]
+
+def createGuild( ) -> guildSettings:
+    gld = guildSettings( fakeGuild() )
+    for i in range( LEAGUE_COUNT ):
+        gld._addTournament( fluidRoundTournament( f'League{i}', gld.guild.name ) )
+    # Registering and dropping goes through the same observer as tourn.addPlayer and tourn.dropPlayer
+    for ID in range( PLAYER_COUNT ):
+        for tourn in random.sample( gld.tournaments, LEAGUES_PER_PLAYER ):
+            tourn.players[ID] = player( f'Player{ID}', ID )
+            tourn._notifyPlayerObservers( ID )
+            if random.random() < 0.2:
+                tourn.players[ID].status = "dropped"
+                tourn._notifyPlayerObservers( ID )
+    return gld
+
+def resolve( gld: guildSettings, commands, getTourn, getPlayerTourns ) -> float:
+    start = perf_counter( )
+    for user, name in commands:
+        getPlayerTourns( user )
+        getTourn( name )
+    return perf_counter( ) - start
+
+def benchmark():
+    random.seed( 0 )
+    gld = createGuild( )
+    users = [ fakeUser( ID ) for ID in range( PLAYER_COUNT ) ]
+
+    # The indexes need to agree with a full scan
+    for user in users:
+        assert( set(gld.getPlayerTournaments( user )) == set(scanPlayerTournaments( gld, user )) )
+    for tourn in gld.tournaments:
+        assert( gld.getTournament( tourn.name ) is tourn )
+
+    # Ending a league removes it from both indexes
+    ended = gld.tournaments[0]
+    gld._removeTournament( ended )
+    assert( gld.getTournament( ended.name ) is None )
+    for user in users:
+        assert( not ended in gld.getPlayerTournaments( user ) )
+        assert( set(gld.getPlayerTournaments( user )) == set(scanPlayerTournaments( gld, user )) )
+
+    commands = [ (random.choice( users ), f'League{random.randrange( 1, LEAGUE_COUNT )}') for _ in range( COMMAND_COUNT ) ]
+    scanTime  = resolve( gld, commands, lambda name: scanTournament( gld, name ), lambda user: scanPlayerTournaments( gld, user ) )
+    indexTime = resolve( gld, commands, gld.getTournament, gld.getPlayerTournaments )
+    print( f'Resolving {COMMAND_COUNT} commands in a guild with {LEAGUE_COUNT} leagues:' )
+    print( f'\tScanning tournaments: {scanTime*1000:.1f}ms ({scanTime/COMMAND_COUNT*10**6:.2f}us per command)' )
+    print( f'\tUsing the indexes:    {indexTime*1000:.1f}ms ({indexTime/COMMAND_COUNT*10**6:.2f}us per command)' )
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,69 @@
+#! /usr/bin/python3
+"""
+Checks that importing Tournament is quick and has no side effects: nothing
+is loaded, written, or started until it is used. Each check runs in a new
+interpreter, in an empty directory, and that interpreter has to exit on its
+own, which it couldn't if a thread that isn't a daemon had been started.
+"""
+import os
+import sys
+import json
+import subprocess
+import tempfile
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+
+# How long importing Tournament may take, which is mostly importing discord.py
+IMPORT_BUDGET = 1.5
+
+IMPORT_SCRIPT = """
+import sys, os, json, threading
+from time import perf_counter
+sys.path.insert( 0, sys.argv[1] )
+start = perf_counter( )
+import Tournament
+elapsed = perf_counter() - start
+print( json.dumps( { "seconds": elapsed, "threads": threading.active_count(), "files": os.listdir( "." ),
+                     "cardsDB": sys.modules["Tournament.cardDB"].cardsDB is None,
+                     "triceBot": sys.modules["Tournament.tournament"].trice_bot is None } ) )
+"""
+
+CARD_DB_SCRIPT = """
+import sys, os, json
+sys.path.insert( 0, sys.argv[1] )
+from Tournament import *
+writeCardTable( { normaliseCardName( "Brainstorm" ): card( "Brainstorm", "normal", [ "Instant" ] ) }, "cardTable.bin" )
+cardDBModule = sys.modules["Tournament.cardDB"]
+assert( getCardDB().getCard( "brainstorm" ).hasType( "Instant" ) )
+assert( getCardDB() is cardDBModule.cardsDB )
+thread = cardDBModule.cardUpdateThread
+assert( thread.is_alive() and thread.daemon )
+stopCardDB( )
+assert( not thread.is_alive() )
+# The updater's lock is given up when it stops
+lock = claimUpdater( "cardTable.bin.lock" )
+assert( not lock is None )
+lock.close( )
+print( "stopped" )
+"""
+
+def runScript( script: str, cwd: str ) -> str:
+    result = subprocess.run( [ sys.executable, "-c", script, projectBaseDir ], cwd=cwd, capture_output=True, text=True, timeout=60 )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+def test():
+    with tempfile.TemporaryDirectory( ) as tmp:
+        # The first import also compiles the bytecode, so the second one is measured
+        runScript( IMPORT_SCRIPT, tmp )
+        report = json.loads( runScript( IMPORT_SCRIPT, tmp ) )
+        assert( report["seconds"] < IMPORT_BUDGET )
+        assert( report["threads"] == 1 and report["files"] == [ ] )
+        assert( report["cardsDB"] and report["triceBot"] )
+    with tempfile.TemporaryDirectory( ) as tmp:
+        assert( runScript( CARD_DB_SCRIPT, tmp ) == "stopped" )
+    print( f'Tournament was imported in {report["seconds"]*1000:.0f}ms, within the budget of {IMPORT_BUDGET*1000:.0f}ms, without loading or starting anything' )
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,109 @@
+#! /usr/bin/python3
+import os
+import sys
+import asyncio
+import tempfile
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+PLAYER_COUNT = 40
+ROUND_COUNT  = 25
+
+def createTournament( ) -> fluidRoundTournament:
+    tourn = fluidRoundTournament( "Lookup Test", "Test Guild" )
+    for ID in range( PLAYER_COUNT ):
+        tourn.players[ID] = player( f'Player{ID}', ID )
+        tourn.players[ID].saveLocation = os.devnull
+    return tourn
+
+def pair( tourn: fluidRoundTournament, plyrs: List[int] ) -> match:
+    # The same bookkeeping as tourn.addMatch, minus the Discord and Cockatrice parts
+    newMatch = match( list(plyrs) )
+    newMatch.matchNumber = len(tourn.matches) + 1
+    newMatch.stopTimer = True
+    tourn._registerMatch( newMatch )
+    for plyr in plyrs:
+        tourn.players[plyr].addMatch( newMatch )
+    return newMatch
+
+# Checks the indexes against a scan of every match
+def checkConsistency( tourn: fluidRoundTournament ) -> None:
+    for mtch in tourn.matches:
+        assert( tourn.getMatch( mtch.matchNumber ) is mtch )
+    for plyr in tourn.players.values():
+        for mtch in plyr.matches:
+            assert( plyr.getMatch( mtch.matchNumber ) is mtch )
+        openMatches = [ mtch for mtch in plyr.matches if not ( mtch.isCertified() or mtch.isDead() ) ]
+        assert( plyr.hasOpenMatch() == ( len(openMatches) > 0 ) )
+        if len(openMatches) > 0:
+            assert( plyr.findOpenMatch() is openMatches[-1] )
+            assert( plyr.findOpenMatchNumber() == openMatches[-1].matchNumber )
+            assert( plyr.matches[plyr.findOpenMatchIndex()] is openMatches[-1] )
+        else:
+            assert( plyr.findOpenMatchIndex() == 1 )
+            assert( plyr.findOpenMatchNumber() == -1 )
+
+async def runTests( tourn: fluidRoundTournament ) -> None:
+    # Play most rounds to completion, leaving the last one part way through
+    for rnd in range( ROUND_COUNT ):
+        for i in range( 0, PLAYER_COUNT, 2 ):
+            pair( tourn, [ i, i+1 ] )
+        checkConsistency( tourn )
+        if rnd == ROUND_COUNT - 1:
+            break
+        for i in range( 0, PLAYER_COUNT, 2 ):
+            await tourn.recordMatchResult( i, "win", tourn.players[i].findOpenMatchNumber() )
+            await tourn.players[i+1].findOpenMatch().confirmResult( i+1 )
+        checkConsistency( tourn )
+
+    lastRound = [ tourn.players[i].findOpenMatch() for i in range( 0, PLAYER_COUNT, 2 ) ]
+    # Uncertified matches are still open
+    await lastRound[0].recordResult( 0, "win" )
+    assert( lastRound[0].isUncertified() and tourn.players[0].hasOpenMatch() )
+    # Certified matches are not
+    await lastRound[1].recordResult( 2, "draw" )
+    await lastRound[1].confirmResult( 3 )
+    assert( not tourn.players[2].hasOpenMatch() and not tourn.players[3].hasOpenMatch() )
+    # Neither are removed ones (the same steps as tourn.removeMatch, minus the Discord messages)
+    for plyr in lastRound[2].activePlayers:
+        await tourn.players[plyr].removeMatch( lastRound[2].matchNumber )
+    await lastRound[2].killMatch( )
+    assert( not tourn.players[4].hasOpenMatch() )
+    checkConsistency( tourn )
+
+    # Unknown match numbers aren't found, and can't be removed or reported on
+    assert( tourn.getMatch( len(tourn.matches) + 1 ) is None )
+    assert( tourn.players[0].getMatch( -5 ) is None )
+    matchCount = len(tourn.matches)
+    assert( "there is no match #999" in await tourn.removeMatch( 999 ) )
+    assert( "there is no match #999" in await tourn.recordMatchResult( 0, "win", 999 ) )
+    assert( "there is no match #999" in await tourn.playerConfirmResult( 0, 999 ) )
+    assert( len(tourn.matches) == matchCount )
+
+def test():
+    tourn = createTournament( )
+    asyncio.run( runTests( tourn ) )
+
+    # Matches are loaded in whatever order the files are listed in, and the indexes still need to line up
+    with tempfile.TemporaryDirectory( ) as dirName:
+        tourn.saveMatches( dirName )
+        loaded = createTournament( )
+        loaded.loadMatches( f'{dirName}/matches/' )
+    assert( [ mtch.matchNumber for mtch in loaded.matches ] == list( range( 1, len(tourn.matches) + 1 ) ) )
+    checkConsistency( loaded )
+    for ID in loaded.players:
+        assert( loaded.players[ID].hasOpenMatch() == tourn.players[ID].hasOpenMatch() )
+        assert( loaded.players[ID].findOpenMatchNumber() == tourn.players[ID].findOpenMatchNumber() )
+        assert( [ m.matchNumber for m in loaded.players[ID].matches ] == [ m.matchNumber for m in tourn.players[ID].matches ] )
+
+    # A loaded ID is the same object as the ID read from a command
+    assert( all( internID( int( str( ID ) ) ) is ID for ID in loaded.players ) )
+
+if __name__ == '__main__':
+    test()
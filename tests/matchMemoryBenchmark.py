@@ -0,0 +1,56 @@
+#! /usr/bin/python3
+""" Measures the memory that a long-running league's matches and players take up """
+import os
+import sys
+import random
+import asyncio
+import tracemalloc
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+MATCH_COUNT  = 50000
+PLAYER_COUNT = 2000
+
+# Discord IDs are snowflakes, and each one that is read from a file or a command is a new object
+def playerID( i: int ) -> int:
+    return int( str( 800000000000000000 + i ) )
+
+async def createLeague( ):
+    players = { }
+    for i in range( PLAYER_COUNT ):
+        players[playerID(i)] = player( f'Player{i}', playerID(i) )
+    matches = [ ]
+    for num in range( 1, MATCH_COUNT + 1 ):
+        a, b = random.sample( range(PLAYER_COUNT), 2 )
+        mtch = match( [ playerID(a), playerID(b) ] )
+        mtch.matchNumber = num
+        mtch.stopTimer = True
+        for i in ( a, b ):
+            players[playerID(i)].addMatch( mtch )
+        outcome = random.random( )
+        if outcome < 0.8:
+            await mtch.recordResult( playerID(a), "win" )
+            await mtch.confirmResult( playerID(b) )
+        elif outcome < 0.95:
+            await mtch.recordResult( playerID(a), "draw" )
+            await mtch.confirmResult( playerID(b) )
+        matches.append( mtch )
+    return players, matches
+
+def benchmark():
+    random.seed( 0 )
+    tracemalloc.start( )
+    before = tracemalloc.get_traced_memory()[0]
+    league = asyncio.run( createLeague( ) )
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop( )
+    print( f'{MATCH_COUNT} matches between {PLAYER_COUNT} players use {used/2**20:.1f}MiB ({used/MATCH_COUNT:.0f} bytes per match)' )
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,79 @@
+#! /usr/bin/python3
+"""
+Adds a batch of matches while another match is added during the batch's
+TriceBot request, and checks that every match's players are told the name
+and password of the game that was actually made for that match.
+"""
+import os
+import sys
+import asyncio
+import tempfile
+import threading
+
+from contextlib import redirect_stdout
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeDiscord import fakeDiscord
+from fakeTriceBot import fakeTriceBot
+
+
+async def addMatchesConcurrently( server: fakeTriceBot ) -> None:
+    client = fakeDiscord( routeLimit=( 10**6, 1.0 ) )
+    guild = client.guild( )
+    sys.modules["Tournament.tournament"].trice_bot = TriceBot( server.authToken, apiURL=server.url, externURL=server.url )
+    tourn = fluidRoundTournament( "Setup Test", guild.name )
+    await tourn.addDiscordGuild( guild )
+    os.makedirs( f'{tourn.getSaveLocation()}/players' )
+    os.makedirs( f'{tourn.getSaveLocation()}/matches' )
+    tourn.loop = asyncio.get_running_loop( )
+    tourn.triceBotEnabled = True
+    plyrs = [ ]
+    for i in range( 6 ):
+        member = guild.addMember( f'Player{i}' )
+        await tourn.addPlayer( member, admin=True )
+        plyrs.append( member.id )
+    tourn.startTourn( )
+
+    # The single match is added while the batch is waiting on TriceBot
+    batch = asyncio.create_task( tourn.addMatches( [ plyrs[0:2], plyrs[2:4] ] ) )
+    await asyncio.sleep( server.latency / 2 )
+    await tourn.addMatch( plyrs[4:6] )
+    newMatches = await batch
+    await outbox.join( )
+
+    assert( [ mtch.matchNumber for mtch in newMatches ] == [ 1, 2 ] )
+    assert( newMatches[0].activePlayers == plyrs[0:2] and newMatches[1].activePlayers == plyrs[2:4] )
+    announcements = " ".join( call[3].get( "content" ) or "" for call in client.sent( ( "channel", tourn.pairingsChannel.id ) ) )
+    announcements += " ".join( str( field.value ) for call in client.sent( ( "channel", tourn.pairingsChannel.id ) ) for embed in ( call[3].get( "embeds" ) or [ call[3].get( "embed" ) ] ) if not embed is None for field in embed.fields )
+    for mtch in tourn.matches:
+        assert( mtch.triceMatch )
+        # The game made for the match carries the match's number, and so does the password its players are given
+        assert( server.games[mtch.gameID]["name"] == f'{tourn.name}/Match {mtch.matchNumber}'.replace( " ", "" ) )
+        assert( f'`"game-{mtch.matchNumber}"`' in announcements )
+
+    timers = [ mtch.timer for mtch in tourn.matches if isinstance( mtch.timer, threading.Thread ) ]
+    for mtch in tourn.matches:
+        mtch.stopTimer = True
+    for timer in timers:
+        timer.join( )
+
+def test():
+    outbox.routeLimits = { "channel": ( 10**6, 1.0 ), "user": ( 10**6, 1.0 ) }
+    outbox.globalLimit = ( 10**6, 1.0 )
+    cwd = os.getcwd( )
+    with tempfile.TemporaryDirectory( ) as tmp, open( os.devnull, "w" ) as devnull, fakeTriceBot( latency=0.2 ) as server:
+        os.chdir( tmp )
+        try:
+            with redirect_stdout( devnull ):
+                asyncio.run( addMatchesConcurrently( server ) )
+        finally:
+            os.chdir( cwd )
+    print( "Every match's players were given the name and password of their own game" )
+
+if __name__ == '__main__':
+    test()
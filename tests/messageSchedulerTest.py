@@ -0,0 +1,137 @@
+#! /usr/bin/python3
+import os
+import sys
+import asyncio
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeDiscord import fakeDiscord, fakeRateLimited
+
+
+# Much faster than Discord's limits, so the test doesn't take long
+ROUTE_LIMIT = ( 5, 0.5 )
+
+async def testPacing( ) -> None:
+    client = fakeDiscord( routeLimit=ROUTE_LIMIT )
+    scheduler = messageScheduler( routeLimits={ "channel": ROUTE_LIMIT, "user": ROUTE_LIMIT } )
+    channel = client.channel( )
+    users = [ client.user() for _ in range( 20 ) ]
+
+    # Sending straight to Discord runs into 429s
+    failures = 0
+    for i in range( 20 ):
+        try:
+            await channel.send( content=f'Unpaced {i}' )
+        except fakeRateLimited:
+            failures += 1
+    assert( failures == 15 )
+    await asyncio.sleep( ROUTE_LIMIT[1] )
+
+    # The scheduler paces each route, and different routes don't wait on each other
+    client.rateLimited = 0
+    start = perf_counter( )
+    sends = [ scheduler.send( channel, content=f'Message {i}' ) for i in range( 20 ) ]
+    sends += [ scheduler.send( user, messagePriority.DIRECT_MESSAGE, content="Hello" ) for user in users ]
+    await asyncio.gather( *sends )
+    elapsed = perf_counter() - start
+    assert( client.rateLimited == 0 )
+    assert( all( user.received == [ "Hello" ] for user in users ) )
+    # Messages to a channel arrive in the order they were sent
+    assert( [ msg.content for msg in channel.messages[-20:] ] == [ f'Message {i}' for i in range( 20 ) ] )
+    # 20 messages at 5 per 0.5s is three refills
+    assert( 1.4 <= elapsed < 2.0 )
+    print( f'40 messages over 21 routes took {elapsed:.2f}s without any 429s' )
+
+async def testPriorities( ) -> None:
+    client = fakeDiscord( routeLimit=ROUTE_LIMIT )
+    scheduler = messageScheduler( routeLimits={ "channel": ROUTE_LIMIT, "user": ROUTE_LIMIT } )
+    channel = client.channel( )
+    info = await channel.send( content="Info" )
+    await asyncio.sleep( ROUTE_LIMIT[1] )
+
+    # A backlog builds up on the channel, and then a match warning jumps ahead of it
+    announcements = [ scheduler.send( channel, messagePriority.ANNOUNCEMENT, content=f'Announcement {i}' ) for i in range( 10 ) ]
+    edits = [ scheduler.edit( info, content=f'Info {i}' ) for i in range( 50 ) ]
+    await asyncio.sleep( 0.01 )
+    warning = scheduler.send( channel, messagePriority.MATCH_WARNING, content="Time is up!" )
+    await scheduler.join( )
+    contents = [ call[3]["content"] for call in client.sent() ]
+    assert( contents.index( "Time is up!" ) < contents.index( "Announcement 9" ) )
+    # The edits are made after the announcements, and only the latest edit is made
+    assert( contents[-1] == "Info 49" and not "Info 0" in contents )
+    assert( info.edits == 1 and info.content == "Info 49" )
+    assert( all( edit is edits[0] for edit in edits ) )
+    assert( client.rateLimited == 0 )
+
+async def testRetries( ) -> None:
+    # Another process using the same route gets the scheduler 429s, which it waits out
+    client = fakeDiscord( routeLimit=ROUTE_LIMIT )
+    scheduler = messageScheduler( routeLimits={ "channel": ( 10, 0.5 ), "user": ( 10, 0.5 ) } )
+    channel = client.channel( )
+    sends = [ scheduler.send( channel, content=f'Message {i}' ) for i in range( 10 ) ]
+    results = await asyncio.gather( *sends )
+    assert( client.rateLimited > 0 )
+    assert( all( not msg is None for msg in results ) )
+    assert( [ msg.content for msg in channel.messages ] == [ f'Message {i}' for i in range( 10 ) ] )
+
+    # Other failures go to whoever is waiting on the call
+    class brokenChannel:
+        id = 1
+        async def send( self, **kwargs ):
+            raise ValueError( "Missing permissions" )
+    try:
+        await scheduler.send( brokenChannel(), content="Nope" )
+        assert( False )
+    except ValueError:
+        pass
+
+async def queueMessages( scheduler: messageScheduler, channel, count: int ) -> None:
+    for i in range( count ):
+        scheduler.send( channel, content=f'Message {i}' )
+    await asyncio.sleep( 0.05 )
+
+async def sendFromLoop( scheduler: messageScheduler, channel ) -> None:
+    scheduler.send( channel, content="From another loop" )
+
+def testLoops( ) -> None:
+    client = fakeDiscord( routeLimit=ROUTE_LIMIT )
+    channel = client.channel( )
+
+    # Calls from a loop that isn't the one the scheduler sends on are refused, and what that loop has queued is kept
+    scheduler = messageScheduler( routeLimits={ "channel": ROUTE_LIMIT, "user": ROUTE_LIMIT } )
+    loop = asyncio.new_event_loop( )
+    loop.run_until_complete( queueMessages( scheduler, channel, 10 ) )
+    try:
+        asyncio.run( sendFromLoop( scheduler, channel ) )
+        assert( False )
+    except RuntimeError:
+        pass
+    loop.run_until_complete( scheduler.join() )
+    # asyncio.run would cancel the scheduler's worker before closing its loop
+    scheduler.worker.cancel( )
+    loop.run_until_complete( asyncio.sleep( 0 ) )
+    loop.close( )
+    assert( [ msg.content for msg in channel.messages ] == [ f'Message {i}' for i in range( 10 ) ] )
+
+    # Once the loop is closed, the next loop sends whatever it had left queued
+    scheduler = messageScheduler( routeLimits={ "channel": ROUTE_LIMIT, "user": ROUTE_LIMIT } )
+    channel = client.channel( )
+    asyncio.run( queueMessages( scheduler, channel, 10 ) )
+    assert( len(channel.messages) == ROUTE_LIMIT[0] and len(scheduler) == 10 - ROUTE_LIMIT[0] )
+    asyncio.run( scheduler.join() )
+    assert( [ msg.content for msg in channel.messages ] == [ f'Message {i}' for i in range( 10 ) ] )
+
+def test():
+    asyncio.run( testPacing() )
+    asyncio.run( testPriorities() )
+    asyncio.run( testRetries() )
+    testLoops( )
+
+if __name__ == '__main__':
+    test()
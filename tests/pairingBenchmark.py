@@ -0,0 +1,237 @@
+#! /usr/bin/python3
+"""
+Scores a pairing implementation against a corpus of queue states and writes the scores as JSON.
+
+The corpus has synthetic states, which are stored as the settings and seed
+that generate them, and states that were recorded from the event simulation.
+Each state is paired several times, since pairing is randomized, and scored on:
+    - pairingRate: the share of the players that could have been paired that were
+    - priorityRespect: how rarely a player was left in the queue while someone from a newer tier was paired
+    - byeFairness: the same, but for players in the same tier with more byes than someone that was paired
+    - repeatAvoidance: the share of pairings without any players that have played each other
+    - p99Ms: the 99th percentile time that pairing took
+
+    pairingBenchmark.py [--implementation module:function] [--output results.json] [--compare old.json]
+    pairingBenchmark.py --regenerate   Rewrites the synthetic corpus settings
+    pairingBenchmark.py --record       Rewrites the recorded corpus by running the event simulation
+
+An implementation is called with a pairingQueue and the match size, and returns
+the pairings as lists of discord IDs, like pairingQueue.createPairings does.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import platform
+import importlib
+import subprocess
+
+from time import perf_counter
+from typing import Dict, List
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+CORPUS_DIR = os.path.dirname(os.path.realpath(__file__)) + "/pairingCorpus"
+SYNTHETIC_FILE = f'{CORPUS_DIR}/synthetic.json'
+RECORDED_FILE = f'{CORPUS_DIR}/recorded.json'
+
+# The synthetic corpus is every combination of these
+SYNTHETIC_GRID = {
+    "matchSize":       [ 2, 3, 4, 5, 6 ],
+    "players":         [ 12, 60, 240 ],
+    "tiers":           [ 1, 4 ],
+    "opponentDensity": [ 0.0, 0.25, 0.6 ],
+    "byeShare":        [ 0.0, 0.2 ],
+}
+# The event simulation scenarios that are recorded, and how many of each one's pairing passes are skipped between recordings
+RECORDED_SCENARIOS = [ "small-league", "four-player" ]
+RECORD_EVERY = 4
+
+REPEATS = 5
+SCORES = ( "pairingRate", "priorityRespect", "byeFairness", "repeatAvoidance" )
+
+
+# ---------------- Corpus ----------------
+
+def syntheticState( spec: Dict ) -> Dict:
+    rng = random.Random( spec["seed"] )
+    IDs = list( range( 1, spec["players"] + 1 ) )
+    tiers = [ [ ] for _ in range( spec["tiers"] ) ]
+    for ID in IDs:
+        tiers[rng.randrange( spec["tiers"] )].append( ID )
+    opponents = [ [ a, b ] for i, a in enumerate(IDs) for b in IDs[i+1:] if rng.random() < spec["opponentDensity"] ]
+    byes = { str(ID): rng.randint( 1, 2 ) for ID in IDs if rng.random() < spec["byeShare"] }
+    return { "name": spec["name"], "matchSize": spec["matchSize"], "tiers": tiers, "opponents": opponents, "byes": byes }
+
+def regenerateSynthetic( ) -> None:
+    specs = [ { } ]
+    for key, values in SYNTHETIC_GRID.items():
+        specs = [ dict( spec, **{ key: value } ) for spec in specs for value in values ]
+    for seed, spec in enumerate( specs ):
+        spec["name"] = f'synthetic-k{spec["matchSize"]}-n{spec["players"]}-t{spec["tiers"]}-d{spec["opponentDensity"]}-b{spec["byeShare"]}'
+        spec["seed"] = seed
+    writeJSON( SYNTHETIC_FILE, specs )
+
+# The state of a live queue. Only the opponents within the queue matter.
+def recordState( name: str, queue: pairingQueue, matchSize: int ) -> Dict:
+    queued = { plyr.discordID: plyr for lvl in queue.queue for plyr in lvl }
+    opponents = sorted( [ a, b ] for a in queued for b in queued[a].opponents if b in queued and a < b )
+    byes = { str(ID): plyr.countByes() for ID, plyr in queued.items() if plyr.countByes() > 0 }
+    return { "name": name, "matchSize": matchSize, "tiers": [ [ plyr.discordID for plyr in lvl ] for lvl in queue.queue ], "opponents": opponents, "byes": byes }
+
+def rerecord( ) -> None:
+    from eventSimulationBenchmark import runScenario
+    states = [ ]
+    for scenario in RECORDED_SCENARIOS:
+        passes = [ 0 ]
+        def recorder( queue: pairingQueue, matchSize: int ) -> None:
+            passes[0] += 1
+            if passes[0] % RECORD_EVERY == 0:
+                states.append( recordState( f'recorded-{scenario}-pass{passes[0]}', queue, matchSize ) )
+        runScenario( scenario, recorder )
+    writeJSON( RECORDED_FILE, states )
+
+def loadCorpus( ) -> List[Dict]:
+    digest = [ ]
+    if os.path.exists( SYNTHETIC_FILE ):
+        digest += [ syntheticState( spec ) for spec in readJSON( SYNTHETIC_FILE ) ]
+    if os.path.exists( RECORDED_FILE ):
+        digest += readJSON( RECORDED_FILE )
+    return digest
+
+def buildQueue( state: Dict ) -> pairingQueue:
+    players = { ID: player( f'Player{ID}', ID ) for lvl in state["tiers"] for ID in lvl }
+    for a, b in state["opponents"]:
+        players[a].opponents.add( b )
+        players[b].opponents.add( a )
+    for ID, count in state["byes"].items():
+        players[int(ID)].tallies["byes"] = count
+    queue = pairingQueue( )
+    for i, lvl in enumerate( state["tiers"] ):
+        for ID in lvl:
+            queue.addPlayer( players[ID], i )
+    return queue
+
+
+# ---------------- Scoring ----------------
+
+# The share of (left in the queue, paired) combinations where the player that was left should have gone first
+def respectRate( left: List, paired: List, outranks ) -> float:
+    combinations = len(left) * len(paired)
+    if combinations == 0:
+        return 1.0
+    return 1 - sum( 1 for u in left for p in paired if outranks( u, p ) ) / combinations
+
+def scorePairings( state: Dict, pairings: List[List[int]] ) -> Dict[str, float]:
+    tierOf = { ID: i for i, lvl in enumerate( state["tiers"] ) for ID in lvl }
+    byes = { int(ID): count for ID, count in state["byes"].items() }
+    opponents = { ( a, b ) for a, b in state["opponents"] } | { ( b, a ) for a, b in state["opponents"] }
+    matchSize = state["matchSize"]
+
+    paired = [ ID for pairing in pairings for ID in pairing ]
+    if len(set(paired)) != len(paired) or not all( ID in tierOf for ID in paired ) or not all( len(pairing) == matchSize for pairing in pairings ):
+        raise ValueError( f'{state["name"]} was paired into invalid pairings' )
+    pairedSet = set( paired )
+    left = [ ID for ID in tierOf if not ID in pairedSet ]
+    possible = len(tierOf) - len(tierOf) % matchSize
+
+    digest = { }
+    digest["pairingRate"] = 1.0 if possible == 0 else len(paired) / possible
+    digest["priorityRespect"] = respectRate( left, paired, lambda u, p: tierOf[u] > tierOf[p] )
+    digest["byeFairness"] = respectRate( left, paired, lambda u, p: tierOf[u] == tierOf[p] and byes.get( u, 0 ) > byes.get( p, 0 ) )
+    repeats = [ any( ( a, b ) in opponents for i, a in enumerate(pairing) for b in pairing[i+1:] ) for pairing in pairings ]
+    digest["repeatAvoidance"] = 1.0 if len(pairings) == 0 else 1 - sum( repeats ) / len(pairings)
+    return digest
+
+def percentile( values: List[float], p: float ) -> float:
+    values = sorted( values )
+    return values[ min( len(values) - 1, int( len(values) * p ) ) ]
+
+def runState( implementation, state: Dict, repeats: int ) -> Dict[str, float]:
+    scores = { score: 0.0 for score in SCORES }
+    times = [ ]
+    for repeat in range( repeats ):
+        queue = buildQueue( state )
+        random.seed( repeat )
+        start = perf_counter( )
+        pairings = implementation( queue, state["matchSize"] )
+        times.append( perf_counter() - start )
+        for score, value in scorePairings( state, pairings ).items():
+            scores[score] += value / repeats
+    digest = { score: round( value, 4 ) for score, value in scores.items() }
+    digest["players"] = sum( len(lvl) for lvl in state["tiers"] )
+    digest["p99Ms"] = round( percentile( times, 0.99 ) * 1000, 3 )
+    digest["times"] = times
+    return digest
+
+def summarize( results: Dict[str, Dict] ) -> Dict[str, float]:
+    digest = { score: round( sum( r[score] for r in results.values() ) / len(results), 4 ) for score in SCORES }
+    digest["p99Ms"] = round( percentile( [ t for r in results.values() for t in r.pop( "times" ) ], 0.99 ) * 1000, 3 )
+    digest["states"] = len(results)
+    return digest
+
+
+# ---------------- Running ----------------
+
+def readJSON( filename: str ):
+    with open( filename ) as jsonFile:
+        return json.load( jsonFile )
+
+def writeJSON( filename: str, content ) -> None:
+    os.makedirs( os.path.dirname( filename ) or ".", exist_ok=True )
+    with open( filename, "w" ) as jsonFile:
+        json.dump( content, jsonFile, indent=1 )
+        jsonFile.write( "\n" )
+
+def loadImplementation( name: str ):
+    if name == "pairingQueue":
+        return lambda queue, matchSize: queue.createPairings( matchSize )
+    moduleName, _, functionName = name.partition( ":" )
+    return getattr( importlib.import_module( moduleName ), functionName )
+
+def currentCommit( ) -> str:
+    try:
+        return subprocess.run( [ "git", "rev-parse", "--short", "HEAD" ], cwd=projectBaseDir, capture_output=True, text=True ).stdout.strip() or None
+    except OSError:
+        return None
+
+def benchmark():
+    parser = argparse.ArgumentParser( description="Scores a pairing implementation against the pairing corpus" )
+    parser.add_argument( "--implementation", default="pairingQueue", help='"pairingQueue" or module:function (default: pairingQueue)' )
+    parser.add_argument( "--repeats", type=int, default=REPEATS, help="how many times each state is paired" )
+    parser.add_argument( "--output", help="where to write the results as JSON" )
+    parser.add_argument( "--compare", help="results from an earlier run to compare with" )
+    parser.add_argument( "--regenerate", action="store_true", help="rewrite the synthetic corpus settings" )
+    parser.add_argument( "--record", action="store_true", help="rewrite the recorded corpus from the event simulation" )
+    args = parser.parse_args( )
+
+    if args.regenerate:
+        regenerateSynthetic( )
+    if args.record:
+        rerecord( )
+    implementation = loadImplementation( args.implementation )
+
+    results = { }
+    for state in loadCorpus( ):
+        results[state["name"]] = runState( implementation, state, args.repeats )
+    summary = summarize( results )
+    print( f'{args.implementation}: ' + ", ".join( f'{key}={value}' for key, value in summary.items() ) )
+
+    if not args.compare is None:
+        earlier = readJSON( args.compare )
+        print( f'Compared with {earlier["implementation"]} at {earlier["commit"]}:' )
+        for key in SCORES + ( "p99Ms", ):
+            print( f'    {key}: {earlier["summary"][key]} -> {summary[key]}' )
+    if not args.output is None:
+        writeJSON( args.output, { "implementation": args.implementation, "commit": currentCommit(), "python": platform.python_version(),
+                                  "repeats": args.repeats, "summary": summary, "states": results } )
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,81 @@
+#! /usr/bin/python3
+import os
+import sys
+import time
+import urllib.request
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+OBSERVATION_COUNT = 100000
+
+def testHistogram( ) -> None:
+    hist = histogram( "test_seconds", "A test histogram", ( 1, 2, 4 ), ("tournament",) )
+    for value in ( 0.5, 1.5, 1.5, 3, 10 ):
+        hist.observe( value, "League" )
+    assert( hist.count( "League" ) == 5 )
+    assert( hist.total( "League" ) == 16.5 )
+    assert( hist.count( "Other" ) == 0 and hist.quantile( 0.5, "Other" ) is None )
+    # The median falls in the (1, 2] bucket and overflow is clamped to the largest bound
+    assert( 1 < hist.quantile( 0.5, "League" ) <= 2 )
+    assert( hist.quantile( 1.0, "League" ) == 4 )
+    with hist.time( "League" ):
+        pass
+    assert( hist.count( "League" ) == 6 )
+
+    text = hist.exportToText( )
+    assert( '# TYPE test_seconds histogram' in text )
+    assert( 'test_seconds_bucket{tournament="League",le="1"} 2\n' in text )
+    assert( 'test_seconds_bucket{tournament="League",le="2"} 4\n' in text )
+    assert( 'test_seconds_bucket{tournament="League",le="+Inf"} 6\n' in text )
+    assert( 'test_seconds_count{tournament="League"} 6\n' in text )
+
+    count = counter( "test_total", "A test counter", ("tournament",) )
+    count.inc( 'Quote " League' )
+    count.inc( 'Quote " League', amount=2 )
+    assert( count.get( 'Quote " League' ) == 3 )
+    assert( 'test_total{tournament="Quote \\" League"} 3\n' in count.exportToText() )
+
+def testQueueWaits( ) -> None:
+    queue = pairingQueue( )
+    plyr = player( "Player", 1 )
+    assert( queue.waitTime( plyr ) is None )
+    queue.addPlayer( plyr )
+    time.sleep( 0.01 )
+    assert( queue.waitTime( plyr ) >= 0.01 )
+    queue.removePlayer( plyr )
+    assert( queue.waitTime( plyr ) is None )
+
+def testEndpoint( ) -> None:
+    pairingPasses.inc( "Endpoint Test" )
+    server = startMetricsServer( 0 )
+    try:
+        with urllib.request.urlopen( f'http://127.0.0.1:{server.server_address[1]}/metrics' ) as response:
+            text = response.read().decode()
+        assert( 'squirebot_pairing_passes_total{tournament="Endpoint Test"} 1\n' in text )
+        assert( '# TYPE squirebot_queue_wait_seconds histogram' in text )
+    finally:
+        server.shutdown( )
+        server.server_close( )
+
+def benchmark( ) -> None:
+    start = perf_counter( )
+    for i in range( OBSERVATION_COUNT ):
+        matchSetupTime.observe( 0.02, "Benchmark", "discord" )
+    print( f'Recording an observation takes {(perf_counter() - start)/OBSERVATION_COUNT*10**6:.2f}us' )
+
+def test():
+    testHistogram( )
+    testQueueWaits( )
+    testEndpoint( )
+    benchmark( )
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,135 @@
+#! /usr/bin/python3
+import os
+import sys
+import asyncio
+import tempfile
+import threading
+
+from contextlib import redirect_stdout
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeDiscord import fakeDiscord
+
+
+class fakeChannel:
+    """ Stands in for a Discord text channel and records what is sent to it """
+    def __init__( self ):
+        self.sent = [ ]
+
+    async def send( self, content: str = None, embed = None, embeds = None ):
+        if embeds is None:
+            embeds = [ ] if embed is None else [ embed ]
+        self.sent.append( (content, embeds) )
+
+
+def test():
+    # A 200-player wave paired into 100 two-player pods
+    playerCount = 200
+    matchSize   = 2
+    announcer = pairingsAnnouncer( "New pairings for Test Tournament!" )
+    mentions = [ ]
+    for i in range( playerCount // matchSize ):
+        mention = f'<@&{800000000000000000 + i}>'
+        mentions.append( mention )
+        fields = [ (f'Match #{i+1}', "\u200b") ]
+        for j in range( matchSize ):
+            fields.append( (f'Player {i*matchSize + j}', f'\u200b\u200bCockatrice Username: player{i*matchSize + j}\nDeck #1: abcd1234') )
+        announcer.addMatch( f'{mention}, you have been paired in match #{i+1}.', fields )
+
+    channel = fakeChannel( )
+    sentCount = asyncio.run( announcer.send( channel ) )
+    print( f'{sentCount} messages were sent for a wave of {playerCount} players.' )
+
+    assert( sentCount == len(channel.sent) )
+    assert( sentCount < playerCount // matchSize )
+
+    checkLimits( channel )
+
+    # Every match still gets pinged
+    allContent = "\n".join( content for content, _ in channel.sent if not content is None )
+    for mention in mentions:
+        assert( mention in allContent )
+
+    # A match with more fields, or more text, than fits in one embed is split across embeds
+    announcer = pairingsAnnouncer( )
+    announcer.addMatch( "<@&1>, you have been paired in match #1.", [ (f'Player {i}', "\u200b") for i in range( 2*EMBED_FIELD_LIMIT + 5 ) ] )
+    announcer.addMatch( "<@&2>, you have been paired in match #2.", [ (f'Player {i}', "x"*1000) for i in range( 8 ) ] )
+    channel = fakeChannel( )
+    asyncio.run( announcer.send( channel ) )
+    checkLimits( channel )
+    assert( sum( len(embed.fields) for _, embeds in channel.sent for embed in embeds ) == 2*EMBED_FIELD_LIMIT + 5 + 8 )
+
+    # Fields with names or values that are too long are cut short or split, and none of the value is lost
+    longValue = "\n".join( f'Deck #{i}: ' + "x"*90 for i in range( 30 ) ) + "\n" + "y"*2500
+    announcer = pairingsAnnouncer( )
+    announcer.addMatch( "<@&1>, you have been paired in match #1.", [ ("N"*300, longValue) ] )
+    channel = fakeChannel( )
+    asyncio.run( announcer.send( channel ) )
+    checkLimits( channel )
+    fields = [ field for _, embeds in channel.sent for embed in embeds for field in embed.fields ]
+    assert( len(fields) > 1 and fields[0].name.endswith( "..." ) )
+    assert( "".join( field.value for field in fields ).replace( "\n", "" ) == longValue.replace( "\n", "" ) )
+
+    # A pairing pass announces all of its matches together
+    outbox.routeLimits = { "channel": ( 10**6, 1.0 ), "user": ( 10**6, 1.0 ) }
+    outbox.globalLimit = ( 10**6, 1.0 )
+    cwd = os.getcwd( )
+    with tempfile.TemporaryDirectory( ) as tmp, open( os.devnull, "w" ) as devnull:
+        os.chdir( tmp )
+        try:
+            with redirect_stdout( devnull ):
+                asyncio.run( pairQueue() )
+        finally:
+            os.chdir( cwd )
+
+async def pairQueue( ) -> None:
+    client = fakeDiscord( routeLimit=( 10**6, 1.0 ) )
+    guild = client.guild( )
+    tourn = fluidRoundTournament( "Announcer Test", guild.name )
+    await tourn.addDiscordGuild( guild )
+    os.makedirs( f'{tourn.getSaveLocation()}/players' )
+    os.makedirs( f'{tourn.getSaveLocation()}/matches' )
+    tourn.loop = asyncio.get_running_loop( )
+    # The pass is run here rather than on the pairings thread
+    tourn.pairingsThreshold = 10**6
+    for i in range( 20 ):
+        member = guild.addMember( f'Player{i}' )
+        await tourn.addPlayer( member, admin=True )
+    tourn.startTourn( )
+    for plyr in tourn.players:
+        tourn.addPlayerToQueue( plyr )
+    await outbox.join( )
+    sentBefore = len( client.sent( ( "channel", tourn.pairingsChannel.id ) ) )
+
+    await tourn._pairQueue( 0 )
+    await outbox.join( )
+    assert( len(tourn.matches) == 10 )
+    announcements = client.sent( ( "channel", tourn.pairingsChannel.id ) )[sentBefore:]
+    contents = "\n".join( call[3].get( "content" ) or "" for call in announcements )
+    assert( len(announcements) < len(tourn.matches) )
+    assert( contents.count( "New pairings for Announcer Test" ) == 1 )
+    assert( all( f'match #{mtch.matchNumber}.' in contents for mtch in tourn.matches ) )
+
+    timers = [ mtch.timer for mtch in tourn.matches if isinstance( mtch.timer, threading.Thread ) ]
+    for mtch in tourn.matches:
+        mtch.stopTimer = True
+    for timer in timers:
+        timer.join( )
+
+# Everything needs to be within Discord's limits
+def checkLimits( channel: fakeChannel ) -> None:
+    for content, embeds in channel.sent:
+        assert( content is None or len(content) <= MESSAGE_CHAR_LIMIT )
+        assert( len(embeds) <= EMBEDS_PER_MESSAGE )
+        assert( sum( len(embed) for embed in embeds ) <= EMBED_CHAR_LIMIT )
+        for embed in embeds:
+            assert( len(embed.fields) <= EMBED_FIELD_LIMIT )
+            assert( all( len(field.name) <= FIELD_NAME_LIMIT and len(field.value) <= FIELD_VALUE_LIMIT for field in embed.fields ) )
+
+if __name__ == '__main__':
+    test()
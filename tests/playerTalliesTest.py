@@ -0,0 +1,102 @@
+#! /usr/bin/python3
+import os
+import sys
+import random
+import asyncio
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+PLAYER_COUNT = 200
+ROUND_COUNT  = 30
+
+# The aggregates as they were calculated before players kept tallies
+def scanPoints( plyr: player, withBye: bool = True ) -> int:
+    digest = 0
+    for mtch in plyr.matches:
+        if not mtch.isCertified() or ( not withBye and mtch.isBye() ):
+            continue
+        if mtch.winner == plyr.discordID:
+            digest += 3
+        elif withBye and mtch.isBye():
+            digest += 3
+        elif mtch.isDraw():
+            digest += 1
+    return digest
+
+def checkTallies( tourn: fluidRoundTournament ) -> None:
+    for plyr in tourn.players.values():
+        assert( plyr.countByes() == sum( 1 for mtch in plyr.matches if mtch.isBye() ) )
+        assert( plyr.getNumberOfWins() == sum( 1 for mtch in plyr.matches if mtch.isCertified() and mtch.winner == plyr.discordID ) )
+        for withBye in ( True, False ):
+            assert( plyr.countCertMatches( withBye ) == len( plyr.getCertMatches( withBye ) ) )
+            assert( plyr.getMatchPoints( withBye ) == scanPoints( plyr, withBye ) )
+
+def pair( tourn: fluidRoundTournament, plyrs: List[int] ) -> match:
+    # The same bookkeeping as tourn.addMatch, minus the Discord and Cockatrice parts
+    newMatch = match( list(plyrs) )
+    newMatch.matchNumber = len(tourn.matches) + 1
+    newMatch.stopTimer = True
+    tourn._registerMatch( newMatch )
+    for plyr in plyrs:
+        tourn.players[plyr].addMatch( newMatch )
+    return newMatch
+
+async def playRound( tourn: fluidRoundTournament ) -> None:
+    IDs = list( tourn.players )
+    random.shuffle( IDs )
+    if len(IDs) % 2 == 1:
+        pair( tourn, [ IDs.pop() ] ).recordBye( )
+    for i in range( 0, len(IDs), 2 ):
+        mtch = pair( tourn, IDs[i:i+2] )
+        outcome = random.random( )
+        if outcome < 0.6:
+            await mtch.recordResult( IDs[i], "win" )
+            await mtch.confirmResult( IDs[i+1] )
+        elif outcome < 0.75:
+            await mtch.recordResult( IDs[i], "draw" )
+            await mtch.confirmResult( IDs[i+1] )
+        elif outcome < 0.85:
+            await mtch.recordResult( IDs[i+1], "loss" )
+        elif outcome < 0.95:
+            # Left uncertified
+            await mtch.recordResult( IDs[i+1], "win" )
+        # Otherwise, the match is still open
+    # Tournament staff overturn some results after they are certified
+    for mtch in random.sample( tourn.matches, 5 ):
+        if mtch.isCertified() and not mtch.isBye() and len(mtch.activePlayers) > 0:
+            await mtch.recordResultAdmin( random.choice( mtch.activePlayers ), random.choice( [ "win", "draw" ] ) )
+
+async def runTests( tourn: fluidRoundTournament ) -> None:
+    for _ in range( ROUND_COUNT ):
+        await playRound( tourn )
+        checkTallies( tourn )
+
+    # Removing a match takes it out of the tallies
+    for mtch in random.sample( tourn.matches, 20 ):
+        for plyr in mtch.activePlayers + mtch.droppedPlayers:
+            await tourn.players[plyr].removeMatch( mtch.matchNumber )
+        await mtch.killMatch( )
+    checkTallies( tourn )
+
+def test():
+    random.seed( 0 )
+    tourn = fluidRoundTournament( "Tallies Test", "Test Guild" )
+    for ID in range( PLAYER_COUNT + 1 ):
+        tourn.players[ID] = player( f'Player{ID}', ID )
+        tourn.players[ID].saveLocation = os.devnull
+    asyncio.run( runTests( tourn ) )
+
+    start = perf_counter( )
+    tourn.getStandings( )
+    print( f'Standings for {len(tourn.players)} players with {len(tourn.matches)} matches took {(perf_counter() - start)*1000:.1f}ms' )
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,67 @@
+#! /usr/bin/python3
+"""
+Seats rounds of a large Commander event into pods, and compares the pod
+seating engine with seating the standings in order. Each round, the players
+are sorted by points, seated, and each pod is given a random winner.
+"""
+import os
+import sys
+import random
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+PLAYER_COUNT = 500
+ROUNDS = 8
+POD_SIZE = 4
+
+# Seating the standings in order, which is what pods look like without the engine
+def seatInOrder( plyrs: List[player], podSize: int ) -> Tuple[List[List[player]], List[player]]:
+    pods = [ ]
+    seated = 0
+    for size in podSizes( len(plyrs), podSize ):
+        pods.append( plyrs[seated:seated+size] )
+        seated += size
+    return pods, plyrs[seated:]
+
+def percentile( values: List[float], p: float ) -> float:
+    values = sorted( values )
+    return values[ min( len(values) - 1, int( len(values) * p ) ) ]
+
+def playEvent( seat ) -> Tuple[List[float], List[int]]:
+    random.seed( 0 )
+    plyrs = [ player( f'Player{ID}', ID ) for ID in range( 1, PLAYER_COUNT + 1 ) ]
+    points = { plyr.discordID: 0 for plyr in plyrs }
+    random.shuffle( plyrs )
+    times = [ ]
+    repeats = [ ]
+    for _ in range( ROUNDS ):
+        # sort() is stable, so players with the same points stay in a random order
+        plyrs.sort( key=lambda p: points[p.discordID], reverse=True )
+        start = perf_counter( )
+        pods, unseated = seat( plyrs, POD_SIZE )
+        times.append( perf_counter() - start )
+        assert( len(unseated) == 0 and sum( len(pod) for pod in pods ) == PLAYER_COUNT )
+        repeats.append( sum( countRepeats( pod ) for pod in pods ) )
+        for pod in pods:
+            for plyr in pod:
+                plyr.opponents.update( other.discordID for other in pod if not other is plyr )
+            points[random.choice( pod ).discordID] += 3
+        random.shuffle( plyrs )
+    return times, repeats
+
+def benchmark():
+    for name, seat in ( ( "in order", seatInOrder ), ( "seatPods", seatPods ) ):
+        times, repeats = playEvent( seat )
+        print( f'{name}: {PLAYER_COUNT} players over {ROUNDS} rounds, {sum(repeats)} repeat pairings ({", ".join( str(r) for r in repeats )}), '
+               f'p50 {percentile( times, 0.5 )*1000:.2f}ms, p99 {percentile( times, 0.99 )*1000:.2f}ms per round' )
+
+if __name__ == '__main__':
+    benchmark()
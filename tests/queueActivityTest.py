@@ -0,0 +1,143 @@
+#! /usr/bin/python3
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+
+from datetime import datetime, timezone
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+START = int( time.time() ) // HOUR * HOUR - 10*DAY
+LEAGUE_EVENTS = 20000
+
+def testRollups( dirName: str ) -> None:
+    log = queueActivityLog( f'{dirName}/rollups.db' )
+    log.record( 1, queueEvent.JOINED, START )
+    log.record( 2, queueEvent.JOINED, START + 60 )
+    log.record( 2, queueEvent.LEFT,   START + 120 )
+    log.record( 1, queueEvent.PAIRED, START + 300 )
+    # This wait counts towards the hour the player was paired in
+    log.record( 3, queueEvent.JOINED, START + HOUR - 100 )
+    log.record( 3, queueEvent.PAIRED, START + HOUR + 100 )
+    rollups = log.hourlyRollups( )
+    assert( [ r["hour"] for r in rollups ] == [ START, START + HOUR ] )
+    assert( (rollups[0]["joins"], rollups[0]["leaves"], rollups[0]["pairings"]) == (3, 1, 1) )
+    assert( rollups[0]["averageWait"] == 300 )
+    assert( (rollups[1]["joins"], rollups[1]["pairings"], rollups[1]["averageWait"]) == (0, 1, 200) )
+    assert( log.averageTimeToPair( ) == 250 )
+    assert( log.averageTimeToPair( START + HOUR ) == 200 )
+    log.close( )
+
+    # Everything is still there after a restart
+    log = queueActivityLog( f'{dirName}/rollups.db' )
+    assert( len(log) == 6 )
+    assert( log.hourlyRollups( ) == rollups )
+    log.close( )
+
+def testRetention( dirName: str ) -> None:
+    log = queueActivityLog( f'{dirName}/retention.db', rawRetention=DAY, rollupRetention=7*DAY )
+    for day in range( 3 ):
+        for plyr in range( 10 ):
+            log.record( plyr, queueEvent.JOINED, START + day*DAY + plyr )
+            log.record( plyr, queueEvent.PAIRED, START + day*DAY + plyr + 60*(plyr+1) )
+    # This player is still waiting when their join is old enough to be pruned
+    log.record( 99, queueEvent.JOINED, START + 2*DAY + 10 )
+    rollups = log.hourlyRollups( )
+    average = log.averageTimeToPair( )
+
+    # Pruning folds old events into the rollups without changing them
+    log.prune( START + 3*DAY + HOUR )
+    assert( len(log) == 1 )
+    assert( log.hourlyRollups( ) == rollups )
+    assert( log.averageTimeToPair( ) == average )
+    log.record( 99, queueEvent.PAIRED, START + 3*DAY + 2*HOUR )
+    assert( log.hourlyRollups( )[-1]["averageWait"] == DAY + 2*HOUR - 10 )
+
+    # Rollups are dropped once they are past their own retention
+    log.prune( START + 30*DAY )
+    assert( len(log) == 0 )
+    assert( log.hourlyRollups( ) == [ ] )
+    log.close( )
+
+def testLegacyOverview( dirName: str ) -> None:
+    # How older overviews stored the queue activity
+    def event( plyr: int, offset: int ) -> str:
+        return f'<event player="{plyr}" time="{datetime.fromtimestamp( START + offset, timezone.utc ).strftime(TFORM)}"/>'
+    actsRoot = ET.fromstring( f'<queueActivity>{event(1, 0)}{event(2, 60)}{event(1, 300)}{event(2, 300)}{event(1, 600)}</queueActivity>' )
+    tourn = fluidRoundTournament( "Legacy Test", "Test Guild" )
+    tourn.loadQueueActivity( actsRoot, dirName )
+    assert( len(tourn.queueActivity) == 5 )
+    assert( tourn.queueActivity.averageTimeToPair( ) == 4.5*60 )
+    tourn.queueActivity.close( )
+    # The events are only imported once
+    tourn.loadQueueActivity( actsRoot, dirName )
+    assert( len(tourn.queueActivity) == 5 )
+    assert( tourn.queueActivity.averageTimeToPair( ) == 4.5*60 )
+    tourn.queueActivity.close( )
+
+    # Newer overviews only point to the database
+    tourn = fluidRoundTournament( "Legacy Test", "Test Guild" )
+    tourn.loadQueueActivity( ET.fromstring( f'<queueActivity file="{QUEUE_ACTIVITY_FILE}"/>' ), dirName )
+    assert( tourn.queueActivity.hourlyRollups( )[0]["pairings"] == 2 )
+    tourn.queueActivity.close( )
+
+async def recordFromLoop( log: queueActivityLog ) -> None:
+    writes = [ ]
+    recordMany = log.recordMany
+    def tracked( events ) -> None:
+        writes.append( ( len(events), threading.get_ident() ) )
+        recordMany( events )
+    log.recordMany = tracked
+
+    # A pairing pass's events are written together, and not by the event loop
+    with log.batch( ):
+        for plyr in range( 20 ):
+            log.record( plyr, queueEvent.PAIRED, START + plyr )
+            await asyncio.sleep( 0 )
+    assert( len(writes) == 0 or writes == [ ( 20, writes[0][1] ) ] )
+    for _ in range( 100 ):
+        if len(writes) > 0:
+            break
+        await asyncio.sleep( 0.01 )
+    assert( writes == [ ( 20, writes[0][1] ) ] and writes[0][1] != threading.get_ident() )
+
+    # Events that haven't been written yet are written before the log is read
+    log.record( 99, queueEvent.JOINED, START + 100 )
+    assert( len(log) == 21 )
+
+def testEventLoop( dirName: str ) -> None:
+    log = queueActivityLog( f'{dirName}/loop.db' )
+    asyncio.run( recordFromLoop( log ) )
+    log.close( )
+
+def benchmark( dirName: str ) -> None:
+    # The overview used to grow by a line per event and was rewritten on every queue command
+    inline = "".join( f'\t\t<event player="{START + i%500}" time="2023-11-14 22:00:00.000000"/>\n' for i in range( LEAGUE_EVENTS ) )
+    log = queueActivityLog( f'{dirName}/league.db' )
+    start = perf_counter( )
+    for i in range( 1000 ):
+        log.record( i % 500, queueEvent.JOINED if i % 2 == 0 else queueEvent.PAIRED )
+    print( f'Recording a queue event takes {(perf_counter() - start):.2f}ms, instead of rewriting {len(inline)//1024}KiB of overview for a league with {LEAGUE_EVENTS} events' )
+    log.close( )
+
+def test():
+    with tempfile.TemporaryDirectory( ) as dirName:
+        testRollups( dirName )
+        testRetention( dirName )
+        testLegacyOverview( dirName )
+        testEventLoop( dirName )
+        benchmark( dirName )
+
+if __name__ == '__main__':
+    test()
@@ -9,24 +9,31 @@ sys.path.insert( 0, projectBaseDir )
 
 from Tournament import *
 
-queue = pairingQueue( )
-
-players = [ player(i, f'[{i}]') for i in range(50) ]
-
-for p in players:
-    queue.addPlayer( p )
-
-print( queue )
-
-pairings = queue.createPairings( 4 )
-
-for pairing in pairings:
-    for plyr in pairing:
-        queue.removePlayer( plyr )
-
-print( queue )
-
-queue.bump()
-
-print( queue )
 
+def test():
+    queue = pairingQueue( )
+    players = { i: player( f'Player{i}', i ) for i in range( 50 ) }
+    for plyr in players.values():
+        queue.addPlayer( plyr )
+    assert( queue.size() == 50 )
+    assert( "already in the queue" in queue.addPlayer( players[0] ) )
+
+    # Everyone who can be is paired into pods of four, and nobody is in two pods
+    pairings = queue.createPairings( 4 )
+    assert( len(pairings) == 12 )
+    assert( all( len(pairing) == 4 for pairing in pairings ) )
+    paired = [ ID for pairing in pairings for ID in pairing ]
+    assert( len(set(paired)) == len(paired) )
+
+    for ID in paired:
+        queue.removePlayer( players[ID] )
+    assert( queue.size() == 2 )
+    assert( "were not in the queue" in queue.removePlayer( players[paired[0]] ) )
+
+    # The players that are left move down a tier, ahead of anyone that joins after them
+    queue.bump( )
+    assert( queue.height() == 2 and len(queue.queue[1]) == 2 )
+    print( queue )
+
+if __name__ == '__main__':
+    test()
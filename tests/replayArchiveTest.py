@@ -0,0 +1,118 @@
+#! /usr/bin/python3
+import os
+import sys
+import asyncio
+import zipfile
+import tempfile
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeTriceBot import fakeTriceBot
+
+
+REPLAY_COUNT = 40
+
+async def runTests( server: fakeTriceBot, dirName: str ):
+    triceBot = TriceBot( server.authToken, apiURL=server.url, externURL=server.url, backoffBase=0.01 )
+    replayURLs = { i+1: triceBot.getDownloadLink( f'replays/match{i+1}.cor' ) for i in range( REPLAY_COUNT ) }
+
+    # The last replay hasn't been written by tricebot yet
+    del( server.replays[f'/replays/match{REPLAY_COUNT}.cor'] )
+    archive = replayArchive( dirName )
+    replaysNotFound = [ ]
+    start = perf_counter( )
+    replayFile = await archive.update( triceBot, replayURLs, replaysNotFound )
+    print( f'First download of {REPLAY_COUNT} replays: {(perf_counter() - start)*1000:.1f}ms' )
+    assert( replaysNotFound == [ f'match{REPLAY_COUNT}.cor' ] )
+    with zipfile.ZipFile( replayFile ) as zipf:
+        assert( len(zipf.namelist()) == REPLAY_COUNT - 1 )
+    replayFile.close( )
+
+    # Only the missing replay is fetched the second time, and the archive survives a restart
+    server.replays[f'/replays/match{REPLAY_COUNT}.cor'] = b"late replay"
+    archive = replayArchive( dirName )
+    assert( len(archive) == REPLAY_COUNT - 1 )
+    requestCount = server.requests
+    replaysNotFound = [ ]
+    start = perf_counter( )
+    replayFile = await archive.update( triceBot, replayURLs, replaysNotFound )
+    print( f'Repeat download of {REPLAY_COUNT} replays: {(perf_counter() - start)*1000:.1f}ms' )
+    assert( server.requests - requestCount == 1 )
+    assert( replaysNotFound == [ ] )
+    with zipfile.ZipFile( replayFile ) as zipf:
+        assert( len(zipf.namelist()) == REPLAY_COUNT )
+        assert( len(zipf.namelist()) == len(set(zipf.namelist())) )
+        assert( zipf.read( f'match{REPLAY_COUNT}.cor' ) == b"late replay" )
+    replayFile.close( )
+
+    # Nothing is downloaded once everything is archived
+    requestCount = server.requests
+    await archive.update( triceBot, replayURLs )
+    assert( server.requests == requestCount )
+
+    # A replay that was archived before the manifest was saved is not lost
+    waitForSave( archive.manifestLocation )
+    os.remove( archive.manifestLocation )
+    archive = replayArchive( dirName )
+    assert( len(archive) == REPLAY_COUNT )
+
+    # A replay that doesn't match its checksum is fetched again, and the manifest is saved once for the batch
+    with zipfile.ZipFile( archive.archiveLocation ) as zipf:
+        contents = { name: zipf.read( name ) for name in zipf.namelist() }
+    contents["match1.cor"] = b"tampered"
+    with zipfile.ZipFile( archive.archiveLocation, "w" ) as zipf:
+        for name, content in contents.items():
+            zipf.writestr( name, content )
+    archive = replayArchive( dirName )
+    saves = [ 0 ]
+    saveXML = archive.saveXML
+    def countedSave( ) -> None:
+        saves[0] += 1
+        saveXML( )
+    archive.saveXML = countedSave
+    requestCount = server.requests
+    replayFile = await archive.update( triceBot, replayURLs )
+    assert( server.requests - requestCount == 1 )
+    # Once when the replay is taken out, and once when it is added back
+    assert( saves[0] == 2 )
+    with zipfile.ZipFile( replayFile ) as zipf:
+        assert( sorted( zipf.namelist() ) == sorted( contents ) )
+        assert( zipf.read( "match1.cor" ) == server.replays["/replays/match1.cor"] )
+    replayFile.close( )
+    assert( len(replayArchive( dirName )) == REPLAY_COUNT )
+
+    # A corrupt archive is thrown out and rebuilt
+    with open( archive.archiveLocation, "wb" ) as archiveFile:
+        archiveFile.write( b"not a zip" )
+    archive = replayArchive( dirName )
+    assert( len(archive) == 0 )
+    replayFile = await archive.update( triceBot, replayURLs )
+    with zipfile.ZipFile( replayFile ) as zipf:
+        assert( len(zipf.namelist()) == REPLAY_COUNT )
+    replayFile.close( )
+
+    # Replays are compressed at the archive's level
+    server.replays["/replays/zeros.cor"] = bytes( 64 * 1024 )
+    sizes = [ ]
+    for level in ( 0, 9 ):
+        archive = replayArchive( f'{dirName}/level{level}', compressionLevel=level )
+        replayFile = await archive.update( triceBot, { 1: triceBot.getDownloadLink( "replays/zeros.cor" ) } )
+        replayFile.close( )
+        with zipfile.ZipFile( archive.archiveLocation ) as zipf:
+            sizes.append( zipf.getinfo( "zeros.cor" ).compress_size )
+    assert( sizes[0] >= 64 * 1024 > 100 * sizes[1] )
+
+def test():
+    with fakeTriceBot( latency=0.01 ) as server, tempfile.TemporaryDirectory( ) as dirName:
+        for i in range( REPLAY_COUNT ):
+            server.replays[f'/replays/match{i+1}.cor'] = os.urandom( 64 * 1024 )
+        asyncio.run( runTests( server, dirName + "/replays" ) )
+
+if __name__ == '__main__':
+    test()
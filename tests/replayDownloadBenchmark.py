@@ -0,0 +1,51 @@
+#! /usr/bin/python3
+""" Compares downloading a tournament's replays one at a time with downloading them concurrently """
+import os
+import sys
+import asyncio
+import zipfile
+import tempfile
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeTriceBot import fakeTriceBot
+
+
+REPLAY_COUNT = 64
+REPLAY_SIZE  = 256 * 1024
+LATENCY      = 0.02
+
+async def download( server: fakeTriceBot, concurrency: int ):
+    triceBot = TriceBot( server.authToken, apiURL=server.url, externURL=server.url )
+    replayURLs = { i: triceBot.getDownloadLink( f'replays/match{i}.cor' ) for i in range( REPLAY_COUNT ) }
+    replayURLs[REPLAY_COUNT] = triceBot.getDownloadLink( "replays/missing.cor" )
+    replaysNotFound = [ ]
+    with tempfile.TemporaryDirectory( ) as dirName:
+        archive = replayArchive( dirName )
+        start = perf_counter( )
+        replayFile = await archive.update( triceBot, replayURLs, replaysNotFound, concurrency=concurrency )
+        elapsed = perf_counter( ) - start
+
+    with zipfile.ZipFile( replayFile ) as zipf:
+        assert( len(zipf.namelist()) == REPLAY_COUNT )
+        assert( zipf.read( "match0.cor" ) == server.replays["/replays/match0.cor"] )
+    assert( replaysNotFound == [ "missing.cor" ] )
+    replayFile.close( )
+    return elapsed
+
+def benchmark():
+    with fakeTriceBot( latency=LATENCY ) as server:
+        for i in range( REPLAY_COUNT ):
+            server.replays[f'/replays/match{i}.cor'] = os.urandom( REPLAY_SIZE // 2 ) * 2
+        for concurrency in ( 1, 8 ):
+            elapsed = asyncio.run( download( server, concurrency ) )
+            print( f'{REPLAY_COUNT} replays with concurrency {concurrency}: {elapsed*1000:.1f}ms' )
+
+if __name__ == '__main__':
+    benchmark()
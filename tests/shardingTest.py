@@ -0,0 +1,164 @@
+#! /usr/bin/python3
+"""
+Runs three shards in their own processes behind a fake gateway. Each guild's
+tournaments are created on the shard that owns the guild, and DMs, which all
+arrive at the first shard, are routed to the shard that has the player's
+tournament, like the bot's on_message does.
+"""
+import os
+import sys
+import random
+import asyncio
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament.sharding import *
+from Tournament.exceptions import ShardCallError
+from fakeGateway import fakeGateway
+
+
+SHARD_COUNT = 3
+GUILD_COUNT = 60
+PLAYER_COUNT = 300
+DM_COUNT = 1000
+
+# Registers the handlers of a shard's process, with a dictionary of guild IDs to tournament names to player IDs standing in for its guild settings
+def setupShard( router: shardRouter ) -> None:
+    guilds = { }
+
+    def checkOwner( guildID: int ) -> None:
+        if not router.owns( guildID ):
+            raise ValueError( f'Shard {router.shardID} does not own guild {guildID}' )
+
+    @router.handler( "createTournament" )
+    async def createTournament( guildID: int, name: str ) -> int:
+        checkOwner( guildID )
+        guilds.setdefault( guildID, { } )[name] = set( )
+        return router.shardID
+
+    @router.handler( "addPlayer" )
+    async def addPlayer( guildID: int, name: str, userID: int ) -> None:
+        checkOwner( guildID )
+        guilds[guildID][name].add( userID )
+
+    @router.handler( "playerTournaments" )
+    async def playerTournaments( userID: int ) -> List[str]:
+        return [ name for tourns in guilds.values() for name, plyrs in tourns.items() if userID in plyrs ]
+
+    @router.handler( "processMessage" )
+    async def processMessage( userID: int, content: str ) -> Dict:
+        return { "shard": router.shardID, "tournaments": await playerTournaments( userID ) }
+
+    @router.handler( "directMessage" )
+    async def directMessage( userID: int, content: str ) -> Dict:
+        shard = await router.findPlayerShard( userID, content )
+        if shard is None:
+            return None
+        return await router.call( shard, "processMessage", userID=userID, content=content )
+
+    # Errors are logged by the shard that owns the development server, like the bot's error log channel
+    errorLog = [ ]
+
+    @router.handler( "logError" )
+    async def logError( guildID: int, text: str ) -> None:
+        checkOwner( guildID )
+        errorLog.append( text )
+
+    @router.handler( "reportError" )
+    async def reportError( guildID: int, text: str ) -> None:
+        await router.dispatch( guildID, "logError", guildID=guildID, text=text )
+
+    @router.handler( "errorLog" )
+    async def getErrorLog( ) -> List[str]:
+        return errorLog
+
+async def routeEvents( gateway: fakeGateway ) -> None:
+    guildIDs = [ ( random.getrandbits( 40 ) << 22 ) | random.getrandbits( 22 ) for _ in range( GUILD_COUNT ) ]
+    assert( len({ shardOf( ID, SHARD_COUNT ) for ID in guildIDs }) == SHARD_COUNT )
+    names = { ID: f'Tournament {i}' for i, ID in enumerate( guildIDs ) }
+
+    # Each guild's events are handled by the shard that owns it, and another shard refuses them
+    for ID in guildIDs:
+        assert( await gateway.deliver( ID, "createTournament", guildID=ID, name=names[ID] ) == shardOf( ID, SHARD_COUNT ) )
+    wrongShard = ( shardOf( guildIDs[0], SHARD_COUNT ) + 1 ) % SHARD_COUNT
+    try:
+        await gateway.send( wrongShard, "createTournament", guildID=guildIDs[0], name="Elsewhere" )
+        assert( False )
+    except ShardCallError as ex:
+        assert( "does not own" in str(ex) )
+
+    # An error on any shard reaches the development server's error log
+    devServerID = guildIDs[0]
+    for shard in range( SHARD_COUNT ):
+        await gateway.send( shard, "reportError", guildID=devServerID, text=f'Error on shard {shard}' )
+    logs = [ await gateway.send( shard, "errorLog" ) for shard in range( SHARD_COUNT ) ]
+    assert( logs[shardOf( devServerID, SHARD_COUNT )] == [ f'Error on shard {shard}' for shard in range( SHARD_COUNT ) ] )
+    assert( sum( len(log) for log in logs ) == SHARD_COUNT )
+
+    # Most players are in one tournament, and some are in tournaments on two shards
+    homes = { }
+    for userID in range( 1, PLAYER_COUNT + 1 ):
+        homes[userID] = [ random.choice( guildIDs ) ]
+        if userID % 10 == 0:
+            homes[userID].append( next( ID for ID in guildIDs if shardOf( ID, SHARD_COUNT ) != shardOf( homes[userID][0], SHARD_COUNT ) ) )
+        for ID in homes[userID]:
+            await gateway.deliver( ID, "addPlayer", guildID=ID, name=names[ID], userID=userID )
+
+    for userID, guilds in homes.items():
+        if len(guilds) == 1:
+            result = await gateway.directMessage( "directMessage", userID=userID, content="!match-result win" )
+            assert( result["shard"] == shardOf( guilds[0], SHARD_COUNT ) )
+            assert( result["tournaments"] == [ names[guilds[0]] ] )
+        else:
+            # Naming the tournament picks the shard, and otherwise the player is asked to name it
+            assert( await gateway.directMessage( "directMessage", userID=userID, content="!drop" ) is None )
+            for ID in guilds:
+                result = await gateway.directMessage( "directMessage", userID=userID, content=f'!drop "{names[ID]}"' )
+                assert( result["shard"] == shardOf( ID, SHARD_COUNT ) )
+    # Players without a tournament are answered by the first shard
+    assert( ( await gateway.directMessage( "directMessage", userID=PLAYER_COUNT + 1, content="!squirebot-help" ) )["shard"] == 0 )
+
+    # Many DMs at once
+    users = [ random.choice( [ ID for ID in homes if len(homes[ID]) == 1 ] ) for _ in range( DM_COUNT ) ]
+    start = perf_counter( )
+    results = await asyncio.gather( *[ gateway.directMessage( "directMessage", userID=ID, content="!match-result win" ) for ID in users ] )
+    elapsed = perf_counter() - start
+    assert( all( result["shard"] == shardOf( homes[ID][0], SHARD_COUNT ) for ID, result in zip( users, results ) ) )
+    print( f'{DM_COUNT} DMs were routed across {SHARD_COUNT} shards in {elapsed:.2f}s ({DM_COUNT/elapsed:.0f} per second)' )
+
+async def routeLocally( ) -> None:
+    # With one shard, every call is run directly
+    router = shardRouter( )
+    @router.handler( "echo" )
+    async def echo( value: int ) -> int:
+        return value
+    await router.start( )
+    assert( router.server is None and router.owns( random.getrandbits( 63 ) ) )
+    assert( await router.findPlayerShard( 1, "!drop" ) == 0 )
+    assert( await router.dispatch( 1234, "echo", value=5 ) == 5 )
+    assert( await router.broadcast( "echo", value=6 ) == [ 6 ] )
+
+def test():
+    random.seed( 0 )
+    assert( parseAddresses( "127.0.0.1:7001, localhost:7002" ) == [ ( "127.0.0.1", 7001 ), ( "localhost", 7002 ) ] )
+    assert( splitArguments( '!drop "Tournament 1"' ) == [ "!drop", "Tournament 1" ] )
+    assert( splitArguments( '!add-deck Bob "Rakdos' ) == [ "!add-deck", "Bob", '"Rakdos' ] )
+    asyncio.run( routeLocally() )
+
+    gateway = fakeGateway( SHARD_COUNT, "shardingTest:setupShard" )
+    gateway.start( )
+    async def run( ) -> None:
+        try:
+            await routeEvents( gateway )
+        finally:
+            await gateway.stop( )
+    asyncio.run( run() )
+    assert( all( not proc.is_alive() for proc in gateway.processes ) )
+
+if __name__ == '__main__':
+    test()
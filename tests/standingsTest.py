@@ -0,0 +1,146 @@
+#! /usr/bin/python3
+import os
+import sys
+import random
+import asyncio
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+
+
+PLAYER_COUNT = 300
+VIEWER_COUNT = 200
+
+# Stand-ins for the Discord objects that a standings message touches
+class fakeMessage:
+    def __init__( self, ID: int, embed ):
+        self.id = ID
+        self.embed = embed
+        self.reactions = [ ]
+        self.edits = 0
+
+    async def add_reaction( self, emoji: str ) -> None:
+        self.reactions.append( emoji )
+
+    async def edit( self, content: str = "", embed = None ) -> None:
+        self.embed = embed
+        self.edits += 1
+
+class fakeChannel:
+    def __init__( self ):
+        self.messages = [ ]
+
+    async def send( self, content: str = "", embed = None ) -> fakeMessage:
+        self.messages.append( fakeMessage( len(self.messages) + 1, embed ) )
+        return self.messages[-1]
+
+def pair( tourn: fluidRoundTournament, plyrs: List[int] ) -> match:
+    # The same bookkeeping as tourn.addMatch, minus the Discord and Cockatrice parts
+    newMatch = match( list(plyrs) )
+    newMatch.matchNumber = len(tourn.matches) + 1
+    newMatch.stopTimer = True
+    tourn._registerMatch( newMatch )
+    for plyr in plyrs:
+        tourn.players[plyr].addMatch( newMatch )
+    return newMatch
+
+def countCalculations( tourn: fluidRoundTournament ) -> List[int]:
+    calls = [ 0 ]
+    calculate = tourn._calculateStandings
+    def counted( ):
+        calls[0] += 1
+        return calculate( )
+    tourn._calculateStandings = counted
+    return calls
+
+async def runTests( tourn: fluidRoundTournament ) -> None:
+    IDs = list( tourn.players )
+    for i in range( 0, len(IDs), 2 ):
+        mtch = pair( tourn, IDs[i:i+2] )
+        await mtch.recordResult( IDs[i], "win" )
+        await mtch.confirmResult( IDs[i+1] )
+    calls = countCalculations( tourn )
+
+    # Many people asking for the standings share one calculation, and each gets one message
+    channel = fakeChannel( )
+    start = perf_counter( )
+    viewers = [ standingsMessage( tourn, "Standings", pageable=(i % 2 == 0) ) for i in range( VIEWER_COUNT ) ]
+    for viewer in viewers:
+        await viewer.send( channel )
+    print( f'Sending the standings to {VIEWER_COUNT} viewers took {(perf_counter() - start)*1000:.1f}ms' )
+    assert( calls[0] == 1 )
+    assert( len(channel.messages) == VIEWER_COUNT )
+    snapshot = tourn.getStandingsSnapshot( )
+    assert( snapshot.pageCount() == (len(snapshot) + STANDINGS_PAGE_SIZE - 1) // STANDINGS_PAGE_SIZE )
+    # Only the pages that were looked at have been rendered
+    assert( list(snapshot.pages) == [ 0 ] )
+    for field in snapshot.getPage( 0 ).fields:
+        assert( len(field.value) <= 1024 )
+    assert( channel.messages[0].reactions == list(PAGE_REACTIONS) )
+    assert( channel.messages[1].reactions == [ ] )
+
+    # Reactions turn the page by editing the message, and stop at either end
+    message = channel.messages[0]
+    assert( not await handlePageReaction( message.id, PREVIOUS_PAGE ) )
+    assert( await handlePageReaction( message.id, NEXT_PAGE ) )
+    assert( message.edits == 1 and message.embed is snapshot.getPage( 1 ) )
+    assert( not await handlePageReaction( message.id, "👍" ) )
+    assert( not await handlePageReaction( channel.messages[1].id, NEXT_PAGE ) )
+    # A paged message has to say what its pages are
+    try:
+        pagedMessage( "No pages" )
+        assert( False )
+    except TypeError:
+        pass
+    for _ in range( snapshot.pageCount() + 2 ):
+        await handlePageReaction( message.id, NEXT_PAGE )
+    assert( viewers[0].page == snapshot.pageCount() - 1 )
+    assert( calls[0] == 1 )
+
+    # The player's own page
+    last = tourn.players[snapshot.standings[1][-1].discordID]
+    assert( snapshot.pageOf( last.discordID ) == snapshot.pageCount() - 1 )
+    assert( snapshot.pageOf( -1 ) == 0 )
+
+    # Callers of getStandings can't change the cached standings
+    standings = tourn.getStandings( )
+    standings[1].clear( )
+    assert( len(tourn.getStandings()[1]) == len(snapshot) )
+
+    # New matches and results invalidate the snapshot, and turning the page picks them up
+    mtch = pair( tourn, IDs[1:3] )
+    snapshot = tourn.getStandingsSnapshot( )
+    assert( calls[0] == 2 )
+    await mtch.recordResult( IDs[1], "win" )
+    assert( tourn.getStandingsSnapshot() is snapshot )
+    await mtch.confirmResult( IDs[2] )
+    assert( not tourn.getStandingsSnapshot() is snapshot )
+    assert( calls[0] == 3 )
+    await handlePageReaction( message.id, PREVIOUS_PAGE )
+    assert( calls[0] == 3 )
+    assert( message.embed is tourn.getStandingsSnapshot().getPage( viewers[0].page ) )
+
+    # Dropping a player takes them out of the standings
+    await tourn.players[IDs[0]].drop( )
+    tourn._notifyPlayerObservers( IDs[0] )
+    assert( not tourn.players[IDs[0]] in tourn.getStandings()[1] )
+
+def test():
+    random.seed( 0 )
+    # Pacing the messages isn't what's being tested here
+    outbox.routeLimits = { "channel": ( 10000, 1.0 ), "user": ( 10000, 1.0 ) }
+    outbox.globalLimit = ( 10000, 1.0 )
+    tourn = fluidRoundTournament( "Standings Test", "Test Guild" )
+    for ID in range( 1, PLAYER_COUNT + 1 ):
+        tourn.players[ID] = player( f'Player{ID}', ID )
+        tourn.players[ID].saveLocation = os.devnull
+    asyncio.run( runTests( tourn ) )
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,130 @@
+#! /usr/bin/python3
+import os
+import sys
+import random
+import asyncio
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeDiscord import fakeDiscord
+
+
+PLAYER_COUNT = 2000
+MATCH_COUNT  = 3000
+EMBED_COUNT  = 200
+
+def pair( tourn: fluidRoundTournament, plyrs: List[int] ) -> match:
+    # The same bookkeeping as tourn.addMatch, minus the Discord and Cockatrice parts
+    newMatch = match( list(plyrs) )
+    newMatch.matchNumber = len(tourn.matches) + 1
+    newMatch.stopTimer = True
+    tourn._registerMatch( newMatch )
+    for plyr in plyrs:
+        tourn.players[plyr].addMatch( newMatch )
+    return newMatch
+
+# The status as it was found before the tournament kept track of it
+def scanStatus( tourn: fluidRoundTournament ) -> Tuple:
+    return ( len( [ p for p in tourn.players if tourn.players[p].isActive() ] ),
+             len( [ p for p in tourn.players if len(tourn.players[p].decks) > 0 ] ),
+             [ m.matchNumber for m in tourn.matches if m.isOpen() ],
+             [ m.matchNumber for m in tourn.matches if m.isUncertified() ],
+             sum( len(lvl) for lvl in tourn.queue.queue ) )
+
+def trackedStatus( tourn: fluidRoundTournament ) -> Tuple:
+    return ( len(tourn.activePlayers), len(tourn.playersWithDecks), sorted(tourn.openMatches), sorted(tourn.uncertifiedMatches), tourn.queue.size() )
+
+async def mutate( tourn: fluidRoundTournament ) -> None:
+    IDs = list( tourn.players )
+    for _ in range( MATCH_COUNT ):
+        mtch = pair( tourn, random.sample( IDs, 2 ) )
+        outcome = random.random( )
+        if outcome < 0.5:
+            await mtch.recordResult( mtch.activePlayers[0], "win" )
+            await mtch.confirmResult( mtch.activePlayers[1] )
+        elif outcome < 0.7:
+            await mtch.recordResult( mtch.activePlayers[0], "draw" )
+        elif outcome < 0.75:
+            await mtch.killMatch( )
+    for ID in random.sample( IDs, 100 ):
+        tourn.players[ID].status = "dropped"
+        tourn._notifyPlayerObservers( ID )
+    for ID in random.sample( IDs, 300 ):
+        tourn.players[ID].decks.clear( )
+        tourn._trackPlayer( ID )
+    for ID in random.sample( IDs, 50 ):
+        tourn.queue.addPlayer( tourn.players[ID] )
+
+async def testDebounce( tourn: fluidRoundTournament ) -> None:
+    client = fakeDiscord( routeLimit=( 1000, 1.0 ) )
+    channel = client.channel( )
+    tourn.infoMessageInterval = 0.2
+    embed = tourn.getTournamentStatusEmbed( )
+    tourn.setInfoMessage( await channel.send( embed=embed ), embed )
+
+    # Nothing has changed, so nothing is edited
+    await tourn.updateInfoMessage( )
+    await asyncio.sleep( 0.25 )
+    assert( tourn.infoMessage.edits == 0 )
+
+    # A burst of changes results in a couple of edits, the last of which has the latest status
+    IDs = [ ID for ID in tourn.players if tourn.players[ID].isActive() ]
+    start = perf_counter( )
+    for ID in IDs[:100]:
+        tourn.queue.addPlayer( tourn.players[ID] )
+        await tourn.updateInfoMessage( )
+        await asyncio.sleep( 0.003 )
+    elapsed = perf_counter() - start
+    await asyncio.sleep( 0.25 )
+    await outbox.join( )
+    assert( 1 <= tourn.infoMessage.edits <= elapsed / 0.2 + 2 )
+    assert( tourn.infoMessage.embed.to_dict() == tourn.getTournamentStatusEmbed().to_dict() )
+    print( f'100 updates over {elapsed:.2f}s resulted in {tourn.infoMessage.edits} edits' )
+
+def test():
+    random.seed( 0 )
+    tourn = fluidRoundTournament( "Status Test", "Test Guild" )
+    # Every attribute of the base tournament is set up for fluid round tournaments too
+    assert( set( vars( tournament( "Base Test", "Test Guild" ) ) ) <= set( vars( tourn ) ) )
+    tourn.pairingsThreshold = PLAYER_COUNT * 2
+    for ID in range( 1, PLAYER_COUNT + 1 ):
+        tourn.players[ID] = player( f'Player{ID}', ID )
+        tourn.players[ID].saveLocation = os.devnull
+        tourn.players[ID].decks["Main"] = deck( )
+        tourn._trackPlayer( ID )
+    asyncio.run( mutate( tourn ) )
+    assert( trackedStatus( tourn ) == scanStatus( tourn ) )
+
+    # The embed no longer scans the players and matches
+    start = perf_counter( )
+    for _ in range( EMBED_COUNT ):
+        embed = tourn.getTournamentStatusEmbed( )
+    tracked = (perf_counter() - start) / EMBED_COUNT
+    start = perf_counter( )
+    for _ in range( EMBED_COUNT ):
+        scanStatus( tourn )
+        str( tourn.queue )
+    scanned = (perf_counter() - start) / EMBED_COUNT
+    print( f'The status embed takes {tracked*1000:.2f}ms to make, and scanning for the same status took {scanned*1000:.2f}ms' )
+    assert( f'There are {PLAYER_COUNT - 100} players registered, and 1700 of them have submitted decks.' in embed.fields[1].value )
+    assert( "There are 50 players in the queue. The queue looks like:\nTier 1: " in embed.fields[2].value )
+
+    # A queue that is too long to list isn't written out
+    longQueue = pairingQueue( )
+    for ID in range( 1, 200 ):
+        longQueue.addPlayer( tourn.players[ID] )
+    assert( longQueue.toString( 1000 ) is None )
+    assert( len(str(longQueue)) > 1000 )
+    assert( longQueue.toString( len(str(longQueue)) ) == str(longQueue) )
+
+    outbox.routeLimits = { "channel": ( 1000, 1.0 ), "user": ( 1000, 1.0 ) }
+    asyncio.run( testDebounce( tourn ) )
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,177 @@
+#! /usr/bin/python3
+import os
+import sys
+import random
+import asyncio
+import tempfile
+import threading
+
+from time import perf_counter
+from contextlib import redirect_stdout
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeDiscord import fakeDiscord
+
+
+PLAYER_COUNT = 1001
+ROUNDS = 6
+
+def pair( tourn: swissTournament, plyrs: List[int] ) -> match:
+    # The same bookkeeping as tourn.addMatch, minus the Discord and Cockatrice parts
+    newMatch = match( list(plyrs) )
+    newMatch.matchNumber = len(tourn.matches) + 1
+    newMatch.stopTimer = True
+    tourn._registerMatch( newMatch )
+    for plyr in plyrs:
+        tourn.players[plyr].addMatch( newMatch )
+    return newMatch
+
+def giveBye( tourn: swissTournament, plyr: int ) -> None:
+    newMatch = match( [ plyr ] )
+    newMatch.matchNumber = len(tourn.matches) + 1
+    tourn._registerMatch( newMatch )
+    newMatch.recordBye( )
+    tourn.players[plyr].addMatch( newMatch )
+
+async def playRound( tourn: swissTournament, matchSize: int ) -> None:
+    brackets = tourn.getScoreBrackets( )
+    bracketOf = { plyr.discordID: i for i, bracket in enumerate(brackets) for plyr in bracket }
+    hadBye = { plyr for plyr in tourn.activePlayers if tourn.players[plyr].countByes() > 0 }
+
+    start = perf_counter( )
+    pairings, byes, rematches = tourn.createRoundPairings( )
+    elapsed = perf_counter() - start
+    assert( elapsed < 1.0 )
+
+    # Everyone plays exactly once, and nobody plays someone they have already played
+    paired = [ plyr for pairing in pairings for plyr in pairing ] + byes
+    assert( sorted(paired) == sorted(tourn.activePlayers) )
+    assert( rematches == 0 )
+    assert( all( isValidGroup( [ tourn.players[plyr] for plyr in pairing ] ) for pairing in pairings ) )
+    if matchSize > 2:
+        # Everyone is seated, in pods that are at most one player short
+        assert( len(byes) == 0 )
+        assert( all( matchSize - 1 <= len(pairing) <= matchSize for pairing in pairings ) )
+        assert( sorted( len(pairing) for pairing in pairings ) == sorted( podSizes( len(paired), matchSize ) ) )
+    else:
+        assert( all( len(pairing) == matchSize for pairing in pairings ) )
+        assert( len(byes) == len(tourn.activePlayers) % matchSize )
+        # Players are only paired down into the next bracket, and byes go to players that haven't had one
+        assert( all( max( bracketOf[p] for p in pairing ) - min( bracketOf[p] for p in pairing ) <= 1 for pairing in pairings ) )
+        assert( not any( plyr in hadBye for plyr in byes ) )
+
+    for plyr in byes:
+        giveBye( tourn, plyr )
+    for pairing in pairings:
+        mtch = pair( tourn, pairing )
+        if random.random() < 0.1:
+            await mtch.recordResult( mtch.activePlayers[0], "draw" )
+        else:
+            await mtch.recordResult( random.choice( mtch.activePlayers ), "win" )
+        for plyr in mtch.activePlayers:
+            if not plyr in mtch.confirmedPlayers:
+                await mtch.confirmResult( plyr )
+        assert( mtch.isCertified() )
+    spread = max( max( bracketOf[p] for p in pairing ) - min( bracketOf[p] for p in pairing ) for pairing in pairings )
+    print( f'{len(tourn.activePlayers)} players were paired into {len(pairings)} matches in {elapsed*1000:.1f}ms, with {len(brackets)} score brackets and matches spanning at most {spread + 1} of them' )
+
+def testPairings( matchSize: int, playerCount: int ) -> None:
+    tourn = swissTournament( "Swiss Test", "Test Guild", { "match-size": matchSize } )
+    for ID in range( 1, playerCount + 1 ):
+        tourn.players[ID] = player( f'Player{ID}', ID )
+        tourn.players[ID].saveLocation = os.devnull
+        tourn._trackPlayer( ID )
+    for _ in range( ROUNDS ):
+        asyncio.run( playRound( tourn, matchSize ) )
+
+async def playEvent( ) -> None:
+    client = fakeDiscord( routeLimit=( 10**6, 1.0 ) )
+    guild = client.guild( )
+    tourn = getTournamentType( "swiss", "Swiss Event", guild.name, { } )
+    assert( isinstance( tourn, swissTournament ) )
+    await tourn.addDiscordGuild( guild )
+    os.makedirs( f'{tourn.getSaveLocation()}/players' )
+    os.makedirs( f'{tourn.getSaveLocation()}/matches' )
+    tourn.loop = asyncio.get_running_loop( )
+    for i in range( 21 ):
+        await tourn.addPlayer( guild.addMember( f'Player{i}' ), admin=True )
+
+    assert( "is not active" in await tourn.pairRound() )
+    tourn.startTourn( )
+    for rnd in range( 1, 4 ):
+        message = await tourn.pairRound( )
+        assert( f'round {rnd} of Swiss Event has been paired into 10 matches' in message )
+        assert( "was given a bye" in message )
+        assert( "still has 10 matches" in await tourn.pairRound() )
+        await outbox.join( )
+        for num in tourn.roundMatches[rnd]:
+            mtch = tourn.getMatch( num )
+            if mtch.isBye():
+                continue
+            await tourn.recordMatchResult( mtch.activePlayers[0], "win", num )
+            await tourn.playerConfirmResult( mtch.activePlayers[1], num )
+    assert( tourn.round == 3 and len(tourn.matches) == 33 )
+    # Each round's pairings are announced together
+    announcements = [ call for call in client.sent( ( "channel", tourn.pairingsChannel.id ) ) if "New pairings" in ( call[3]["content"] or "" ) ]
+    assert( len(announcements) == 3 )
+
+    # The rounds survive a restart
+    waitForSaves( )
+    loaded = swissTournament( "", "" )
+    loaded.loadOverview( f'{tourn.getSaveLocation()}/overview.xml' )
+    assert( loaded.round == 3 and loaded.roundMatches == tourn.roundMatches )
+
+    # A round that fails part way through keeps the matches it made, so it isn't paired again until they are finished
+    setUpMatch = tourn._setUpMatch
+    calls = [ 0 ]
+    async def failingSetUp( newMatch, announcer = None, game_made = None ) -> None:
+        calls[0] += 1
+        await asyncio.sleep( 0.01 )
+        if calls[0] == 3:
+            raise RuntimeError( "Discord is down" )
+        await setUpMatch( newMatch, announcer, game_made )
+    tourn._setUpMatch = failingSetUp
+    pairing = asyncio.create_task( tourn.pairRound() )
+    await asyncio.sleep( 0 )
+    assert( "round 4 of Swiss Event is already being paired" in await tourn.pairRound() )
+    try:
+        await pairing
+        assert( False )
+    except RuntimeError:
+        pass
+    tourn._setUpMatch = setUpMatch
+    assert( tourn.round == 4 and len(tourn.roundMatches[4]) == 11 )
+    assert( "round 4 of Swiss Event still has" in await tourn.pairRound() )
+    assert( len(tourn.matches) == 44 )
+
+    await outbox.join( )
+    timers = [ mtch.timer for mtch in tourn.matches if isinstance( mtch.timer, threading.Thread ) ]
+    for mtch in tourn.matches:
+        mtch.stopTimer = True
+    for timer in timers:
+        timer.join( )
+
+def test():
+    random.seed( 0 )
+    testPairings( 2, PLAYER_COUNT )
+    testPairings( 4, PLAYER_COUNT )
+
+    outbox.routeLimits = { "channel": ( 10**6, 1.0 ), "user": ( 10**6, 1.0 ) }
+    outbox.globalLimit = ( 10**6, 1.0 )
+    cwd = os.getcwd( )
+    with tempfile.TemporaryDirectory( ) as tmp, open( os.devnull, "w" ) as devnull:
+        os.chdir( tmp )
+        try:
+            with redirect_stdout( devnull ):
+                asyncio.run( playEvent() )
+        finally:
+            os.chdir( cwd )
+    print( "A three round event was paired and played" )
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,123 @@
+#! /usr/bin/python3
+import os
+import sys
+import random
+import asyncio
+import tempfile
+import threading
+
+from contextlib import redirect_stdout
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from Tournament import *
+from fakeDiscord import fakeDiscord
+
+
+PLAYER_COUNT = 200
+CUT = 64
+
+async def certify( tourn: swissTournament, matchNums: List[int], result: str = "win" ) -> None:
+    for num in matchNums:
+        mtch = tourn.getMatch( num )
+        if mtch.isBye( ) or mtch.isCertified( ):
+            continue
+        await tourn.recordMatchResult( random.choice( mtch.activePlayers ), result, num, admin=True )
+        for plyr in mtch.activePlayers:
+            if not plyr in mtch.confirmedPlayers:
+                await tourn.playerConfirmResult( plyr, num )
+
+async def playEvent( ) -> None:
+    client = fakeDiscord( routeLimit=( 10**6, 1.0 ) )
+    guild = client.guild( )
+    tourn = swissTournament( "Top Cut Event", guild.name )
+    await tourn.addDiscordGuild( guild )
+    os.makedirs( f'{tourn.getSaveLocation()}/players' )
+    os.makedirs( f'{tourn.getSaveLocation()}/matches' )
+    tourn.loop = asyncio.get_running_loop( )
+    for i in range( PLAYER_COUNT ):
+        await tourn.addPlayer( guild.addMember( f'Player{i}' ), admin=True )
+    tourn.startTourn( )
+    for _ in range( 3 ):
+        await tourn.pairRound( )
+        await certify( tourn, tourn.roundMatches[tourn.round] )
+    await outbox.join( )
+
+    seeds = [ plyr.discordID for plyr in tourn.getStandingsSnapshot().standings[1][:CUT] ]
+    callCount = len(client.calls)
+    message = await tourn.cutToTop( CUT, "Admin" )
+    await outbox.join( )
+    assert( f'was cut to the top {CUT} players and {PLAYER_COUNT - CUT} players were dropped' in message )
+    assert( len(tourn.activePlayers) == CUT )
+    assert( "has already been cut" in await tourn.cutToTop( CUT, "Admin" ) )
+    assert( "rounds are over" in await tourn.pairRound() )
+
+    # The cut players are told in a couple of messages, not a DM each
+    cutCalls = client.calls[callCount:]
+    DMs = [ call for call in cutCalls if call[1][0] == "user" ]
+    assert( len(DMs) == 0 )
+    announcements = [ call for call in cutCalls if call[1] == ( "channel", tourn.pairingsChannel.id ) ]
+    assert( len(announcements) <= 3 )
+
+    # The best seed plays the worst, and the first two seeds can only meet in the finals
+    firstRound = [ tourn.getMatch( num ) for num in tourn.bracket.matches[-1] ]
+    assert( len(firstRound) == CUT // 2 )
+    assert( firstRound[0].activePlayers == [ seeds[0], seeds[-1] ] )
+    assert( firstRound[CUT // 4].activePlayers == [ seeds[1], seeds[-2] ] )
+
+    # A draw holds the bracket up until a judge records a winner
+    await certify( tourn, tourn.bracket.matches[-1][:1], "draw" )
+    await certify( tourn, tourn.bracket.matches[-1][1:] )
+    assert( tourn.bracket.roundNumber() == 1 )
+    drawn = tourn.getMatch( tourn.bracket.matches[-1][0] )
+    await tourn.recordMatchResult( drawn.activePlayers[0], "win", drawn.matchNumber, admin=True )
+    await tourn.playerConfirmResult( drawn.activePlayers[1], drawn.matchNumber )
+    assert( tourn.bracket.roundNumber() == 2 )
+
+    # Each round is paired as soon as the last one is over
+    while not tourn.bracket.isFinished( ):
+        winners = tourn.bracket.roundNumber( )
+        await certify( tourn, tourn.bracket.matches[-1] )
+        assert( tourn.bracket.roundNumber() == winners + 1 )
+    await outbox.join( )
+    champion = tourn.players[tourn.bracket.champion()]
+    assert( any( f'{champion.getMention()} has won' in ( call[3].get( "content" ) or "" ) for call in client.calls ) )
+    assert( "The top cut is over" in tourn.getTournamentStatusEmbed().fields[-1].value )
+
+    # The bracket survives a restart
+    waitForSaves( )
+    loaded = swissTournament( "", "" )
+    loaded.loadOverview( f'{tourn.getSaveLocation()}/overview.xml' )
+    assert( loaded.bracket.rounds == tourn.bracket.rounds and loaded.bracket.matches == tourn.bracket.matches )
+
+    timers = [ mtch.timer for mtch in tourn.matches if isinstance( mtch.timer, threading.Thread ) ]
+    for mtch in tourn.matches:
+        mtch.stopTimer = True
+    for timer in timers:
+        timer.join( )
+
+def test():
+    random.seed( 0 )
+    assert( bracketOrder( 8 ) == [ 1, 8, 4, 5, 2, 7, 3, 6 ] )
+    # The best seeds get the byes
+    bracket = eliminationBracket( [ 11, 12, 13, 14, 15, 16 ] )
+    assert( bracket.pairs() == [ ( 11, 0 ), ( 14, 15 ), ( 12, 0 ), ( 13, 16 ) ] )
+    assert( bracket.unpairedPairs() == [ [ 14, 15 ], [ 13, 16 ] ] )
+
+    outbox.routeLimits = { "channel": ( 10**6, 1.0 ), "user": ( 10**6, 1.0 ) }
+    outbox.globalLimit = ( 10**6, 1.0 )
+    cwd = os.getcwd( )
+    with tempfile.TemporaryDirectory( ) as tmp, open( os.devnull, "w" ) as devnull:
+        os.chdir( tmp )
+        try:
+            with redirect_stdout( devnull ):
+                asyncio.run( playEvent() )
+        finally:
+            os.chdir( cwd )
+    print( f'{PLAYER_COUNT} players were cut to a top {CUT}, which was played to the end' )
+
+if __name__ == '__main__':
+    test()
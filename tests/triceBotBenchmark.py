@@ -0,0 +1,54 @@
+#! /usr/bin/python3
+""" Compares TriceBot request latency with and without the shared keep-alive session """
+import os
+import sys
+import asyncio
+import requests
+
+from time import perf_counter
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from tricebot import *
+from fakeTriceBot import fakeTriceBot
+
+
+REQUEST_COUNT = 200
+
+def percentile( times, p: float ) -> float:
+    times = sorted( times )
+    return times[ min( len(times) - 1, int( len(times) * p ) ) ]
+
+def report( name: str, times ) -> None:
+    print( f'{name}: total {sum(times)*1000:.1f}ms, p50 {percentile(times, 0.5)*1000:.2f}ms, p99 {percentile(times, 0.99)*1000:.2f}ms' )
+
+async def pooled( server: fakeTriceBot ):
+    triceBot = TriceBot( server.authToken, apiURL=server.url )
+    times = [ ]
+    for i in range( REQUEST_COUNT ):
+        start = perf_counter( )
+        await triceBot.kickPlayer( 1, "nobody" )
+        times.append( perf_counter() - start )
+    return times
+
+def fresh( server: fakeTriceBot ):
+    # How requests were made before the shared session
+    times = [ ]
+    for i in range( REQUEST_COUNT ):
+        start = perf_counter( )
+        requests.get( f'{server.url}/api/kickplayer', timeout=7.0, data=f'authtoken={server.authToken}\ngameid=1\ntarget=nobody', verify=False ).text
+        times.append( perf_counter() - start )
+    return times
+
+def benchmark():
+    with fakeTriceBot( ) as server:
+        report( "Fresh connection per request", fresh( server ) )
+        connections = len( server.connections )
+        report( "Shared keep-alive session", asyncio.run( pooled( server ) ) )
+        print( f'Connections opened by the shared session: {len(server.connections) - connections}' )
+
+if __name__ == '__main__':
+    benchmark()
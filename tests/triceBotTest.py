@@ -0,0 +1,146 @@
+#! /usr/bin/python3
+import os
+import sys
+import asyncio
+
+projectBaseDir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+
+sys.path.insert( 0, projectBaseDir + 'Tournament')
+sys.path.insert( 0, projectBaseDir )
+
+from tricebot import *
+from fakeTriceBot import fakeTriceBot
+
+
+def createGame( triceBot: TriceBot, name: str, players = [ ] ):
+    return triceBot.createGame( name, "password", 2, False, False, False, False, False, len(players) > 0, players, [ [ ] for _ in players ] )
+
+async def runTests( server: fakeTriceBot ):
+    triceBot = TriceBot( server.authToken, apiURL=server.url, backoffBase=0.01 )
+    assert( await triceBot.checkauthkey() )
+
+    game = await createGame( triceBot, "Test Match 1", [ "alice", "bob" ] )
+    assert( game.success )
+    assert( game.result.status == TriceBotStatus.SUCCESS )
+
+    # Statuses are structured rather than magic numbers
+    result = await triceBot.changePlayerInfo( game.gameID, "alice", "carol" )
+    assert( result.status == TriceBotStatus.SUCCESS )
+    result = await triceBot.changePlayerInfo( game.gameID, "alice", "carol" )
+    assert( result.status == TriceBotStatus.PLAYER_NOT_FOUND )
+    result = await triceBot.kickPlayer( game.gameID + 1, "bob" )
+    assert( result.status == TriceBotStatus.PLAYER_NOT_FOUND )
+    result = await triceBot.disablePlayerDeckVerificatoin( game.gameID + 1 )
+    assert( result.status == TriceBotStatus.GAME_NOT_FOUND )
+
+    # Dropped connections are retried
+    server.failuresLeft = 2
+    game = await createGame( triceBot, "Test Match 2" )
+    assert( game.success )
+    assert( game.result.attempts == 3 )
+
+    # Failures past the retry limit are reported, not raised
+    server.failuresLeft = 3
+    game = await createGame( triceBot, "Test Match 3" )
+    assert( not game.success )
+    assert( game.result.status == TriceBotStatus.NETWORK_ERROR )
+
+    # Enough consecutive failures open the circuit breaker and requests fail fast
+    server.failuresLeft = triceBot.breaker.failureThreshold
+    await createGame( triceBot, "Test Match 4" )
+    requestCount = server.requests
+    game = await createGame( triceBot, "Test Match 5" )
+    assert( game.result.status == TriceBotStatus.UNAVAILABLE )
+    assert( server.requests == requestCount )
+    # Replay downloads go through the same breaker
+    result = await triceBot.fetchReplay( triceBot.getDownloadLink( "replays/match1.cor" ) )
+    assert( result.status == TriceBotStatus.UNAVAILABLE )
+    assert( server.requests == requestCount )
+
+    # Once the reset time has passed, only one request is let through to see if tricebot is back
+    server.failuresLeft = 0
+    triceBot.breaker.resetTime = 0.05
+    await asyncio.sleep( 0.1 )
+    games = await asyncio.gather( *[ createGame( triceBot, f'Trial Match {i}' ) for i in range( 5 ) ] )
+    assert( server.requests - requestCount == 1 )
+    assert( sum( game.success for game in games ) == 1 )
+    assert( sum( game.result.status == TriceBotStatus.UNAVAILABLE for game in games ) == 4 )
+    # It worked, so the circuit is closed again
+    assert( not triceBot.breaker.isOpen() )
+    assert( all( game.success for game in await asyncio.gather( *[ createGame( triceBot, f'Closed Match {i}' ) for i in range( 3 ) ] ) ) )
+
+    # A bad token is reported as such
+    server.failuresLeft = 0
+    triceBot = TriceBot( "wrong-token", apiURL=server.url )
+    result = await triceBot.kickPlayer( 1, "bob" )
+    assert( result.status == TriceBotStatus.AUTH_ERROR )
+
+async def runBatchTests( server: fakeTriceBot ):
+    triceBot = TriceBot( server.authToken, apiURL=server.url )
+    specs = [ GameSpec( f'Batch Match {i}', "password", 2, False, False, False, False, False, True, [ f'player{i}a', f'player{i}b' ], [ [ ], [ ] ] ) for i in range( 20 ) ]
+    # A spec with mismatched names and deck hashes fails on its own
+    specs.append( GameSpec( "Bad Match", "password", 2, False, False, False, False, False, True, [ "player" ], [ ] ) )
+
+    requestCount = server.requests
+    games = await triceBot.createGames( specs )
+    assert( len(games) == len(specs) )
+    assert( all( game.success for game in games[:-1] ) )
+    assert( not games[-1].success )
+    # Each result maps back to its own game
+    for spec, game in zip( specs, games[:-1] ):
+        assert( server.games[game.gameID]["name"] == spec.gamename.replace( " ", "" ) )
+    if server.batchSupport:
+        # One request to learn about batch support and one to make the games
+        assert( server.requests - requestCount == 2 )
+    else:
+        # One request to learn about batch support and one per valid game
+        assert( server.requests - requestCount == 1 + len(specs) - 1 )
+
+async def runFallbackTests( server: fakeTriceBot ):
+    # A reply that isn't a list of features isn't remembered, so the tricebot is asked again
+    wrongToken = TriceBot( "not the token", apiURL=server.url )
+    assert( not await wrongToken.supportsBatchCreation() )
+    assert( wrongToken.batchSupport is None )
+
+    triceBot = TriceBot( server.authToken, apiURL=server.url, backoffBase=0.01 )
+    assert( await triceBot.supportsBatchCreation() )
+    specs = [ GameSpec( f'Fallback Match {i}', "password", 2, False, False, False, False, False, True, [ f'player{i}a', f'player{i}b' ], [ [ ], [ ] ] ) for i in range( 5 ) ]
+    # The batch request never reaches the tricebot, so the games are made one at a time
+    get = triceBot._get
+    def refuseBatch( url: str, data: str, timeout: float ):
+        if url.endswith( "creategames" ):
+            raise ConnectionRefusedError( )
+        return get( url, data, timeout )
+    triceBot._get = refuseBatch
+    requestCount = server.requests
+    games = await triceBot.createGames( specs )
+    triceBot._get = get
+    assert( all( game.success for game in games ) )
+    for spec, game in zip( specs, games ):
+        assert( server.games[game.gameID]["name"] == spec.gamename.replace( " ", "" ) )
+    assert( server.requests - requestCount == len(specs) )
+    assert( triceBot.batchSupport )
+
+    # The batch request is dropped after it was sent, so the games might have been made.
+    # They are failed instead of being made again, and the request isn't retried.
+    server.failuresLeft = 1
+    requestCount = server.requests
+    gameCount = len(server.games)
+    games = await triceBot.createGames( specs )
+    assert( not any( game.success for game in games ) )
+    assert( all( game.result.sent and game.result.status == TriceBotStatus.NETWORK_ERROR for game in games ) )
+    assert( server.requests - requestCount == 1 )
+    assert( len(server.games) == gameCount )
+
+def test():
+    with fakeTriceBot( ) as server:
+        asyncio.run( runTests( server ) )
+    with fakeTriceBot( ) as server:
+        asyncio.run( runBatchTests( server ) )
+    with fakeTriceBot( batchSupport=False ) as server:
+        asyncio.run( runBatchTests( server ) )
+    with fakeTriceBot( ) as server:
+        asyncio.run( runFallbackTests( server ) )
+
+if __name__ == '__main__':
+    test()